@@ -3,8 +3,13 @@
  * (CRAG), which is stored in an HDF5 file for further processing.
  */
 
+#include <atomic>
+#include <exception>
+#include <functional>
 #include <iostream>
 #include <memory>
+#include <mutex>
+#include <thread>
 #include <boost/filesystem.hpp>
 #include <util/Logger.h>
 #include <util/ProgramOptions.h>
@@ -127,6 +132,19 @@ util::ProgramOption optionMinCandidateSize(
 		util::_long_name        = "minCandidateSize",
 		util::_description_text = "The minimal size for a candidate to keep it during downsampling (see downSampleCrag).");
 
+util::ProgramOption optionImportBlockBudget(
+		util::_long_name        = "importBlockBudget",
+		util::_description_text = "Read supervoxel and candidate segmentation stacks and find leaf adjacencies block-wise, "
+		                          "using at most this many megabytes for the blocks processed at the same time. If not "
+		                          "given, the stacks are read as a whole.");
+
+util::ProgramOption optionNumImportThreads(
+		util::_long_name        = "numImportThreads",
+		util::_description_text = "The number of threads to use for the import: for blocks if importBlockBudget is given, "
+		                          "and for sections if the CRAG is built from a stack of 2D merge trees or merge histories. "
+		                          "0 (the default) uses as many threads as there are cores.",
+		util::_default_value    = 0);
+
 std::set<Crag::Node>
 collectLeafNodes(const Crag& crag, Crag::Node n) {
 
@@ -151,6 +169,55 @@ collectLeafNodes(const Crag& crag, Crag::Node n) {
 	return leafNodes;
 }
 
+/**
+ * Call process(i) for each section i, using up to numThreads threads (0 for 
+ * as many threads as there are cores).
+ */
+void
+processSections(
+		std::size_t                             numSections,
+		int                                     numThreads,
+		const std::function<void(std::size_t)>& process) {
+
+	if (numThreads <= 0)
+		numThreads = std::max(1u, std::thread::hardware_concurrency());
+	numThreads = std::max<int>(1, std::min<std::size_t>(numThreads, numSections));
+
+	std::atomic<std::size_t> nextSection(0);
+	std::exception_ptr       error;
+	std::mutex               errorMutex;
+
+	auto worker = [&]() {
+
+		for (std::size_t i = nextSection++; i < numSections; i = nextSection++) {
+
+			try {
+
+				process(i);
+
+			} catch (...) {
+
+				std::lock_guard<std::mutex> lock(errorMutex);
+				if (!error)
+					error = std::current_exception();
+
+				// skip the remaining sections
+				nextSection = numSections;
+			}
+		}
+	};
+
+	std::vector<std::thread> threads;
+	for (int i = 1; i < numThreads; i++)
+		threads.emplace_back(worker);
+	worker();
+	for (std::thread& thread : threads)
+		thread.join();
+
+	if (error)
+		std::rethrow_exception(error);
+}
+
 int main(int argc, char** argv) {
 
 	UTIL_TIME_SCOPE("main");
@@ -173,7 +240,18 @@ int main(int argc, char** argv) {
 		CragVolumes* volumes = new CragVolumes(*crag);
 		Costs* mergeCosts = 0;
 
+		std::size_t importBlockBudget = 0;
+		if (optionImportBlockBudget)
+			importBlockBudget = optionImportBlockBudget.as<std::size_t>()*1024*1024;
+
 		CragImport import;
+		import.setBlockBudget(importBlockBudget);
+		import.setNumThreads(optionNumImportThreads.as<int>());
+
+		// for sections that are read in parallel already, each one with a 
+		// single thread, to not oversubscribe the cores
+		CragImport sectionImport(import);
+		sectionImport.setNumThreads(1);
 
 		bool alreadyDownsampled = false;
 
@@ -196,31 +274,31 @@ int main(int argc, char** argv) {
 					cragsVolumes.push_back(std::unique_ptr<CragVolumes>(new CragVolumes(*c)));
 				}
 
-				int i = 0;
-				for (std::string file : files) {
-					
-					LOG_USER(logger::out) << "reading crag from " << file << std::endl;
+				// sections are independent until they get combined, read them 
+				// in parallel
+				processSections(files.size(), optionNumImportThreads.as<int>(), [&](std::size_t i) {
 
-					import.readCrag(file, *crags[i], *cragsVolumes[i], resolution, offset + util::point<float, 3>(0, 0, resolution.z()*i));
-					i++;
-				}
+					LOG_USER(logger::out) << "reading crag from " << files[i] << std::endl;
+
+					sectionImport.readCrag(files[i], *crags[i], *cragsVolumes[i], resolution, offset + util::point<float, 3>(0, 0, resolution.z()*i));
+				});
 
 				if (optionDownsampleCrag) {
 
 					UTIL_TIME_SCOPE("downsample CRAG");
 
-					DownSampler downSampler(optionMinCandidateSize.as<int>());
-
 					std::vector<std::unique_ptr<Crag>> downSampledCrags(crags.size());
 					std::vector<std::unique_ptr<CragVolumes>> downSampledVolumes(crags.size());
 
-					for (int i = 0; i < crags.size(); i++) {
+					processSections(crags.size(), optionNumImportThreads.as<int>(), [&](std::size_t i) {
+
+						DownSampler downSampler(optionMinCandidateSize.as<int>());
 
 						downSampledCrags[i]   = std::unique_ptr<Crag>(new Crag());
 						downSampledVolumes[i] = std::unique_ptr<CragVolumes>(new CragVolumes(*downSampledCrags[i]));
 
 						downSampler.process(*crags[i], *cragsVolumes[i], *downSampledCrags[i], *downSampledVolumes[i]);
-					}
+					});
 
 					std::swap(cragsVolumes, downSampledVolumes);
 					std::swap(crags, downSampledCrags);
@@ -232,6 +310,7 @@ int main(int argc, char** argv) {
 
 				// combine crags
 				CragStackCombiner combiner;
+				combiner.setNumThreads(optionNumImportThreads.as<int>());
 				combiner.combine(crags, cragsVolumes, *crag, *volumes);
 
 			} else {
@@ -254,7 +333,8 @@ int main(int argc, char** argv) {
 					for (boost::filesystem::directory_iterator i(mergeHistoryPath); i != boost::filesystem::directory_iterator(); i++)
 						if (!boost::filesystem::is_directory(*i) && (
 							i->path().extension() == ".txt" ||
-							i->path().extension() == ".dat"
+							i->path().extension() == ".dat" ||
+							i->path().extension() == ".bin"
 						))
 							mhFiles.push_back(i->path().native());
 					std::sort(mhFiles.begin(), mhFiles.end());
@@ -270,30 +350,32 @@ int main(int argc, char** argv) {
 						cragsVolumes.push_back(std::unique_ptr<CragVolumes>(new CragVolumes(*c)));
 					}
 
-					for (int i = 0; i < mhFiles.size(); i++) {
-						
+					// sections are independent until they get combined, read 
+					// them in parallel
+					processSections(mhFiles.size(), optionNumImportThreads.as<int>(), [&](std::size_t i) {
+
 						LOG_USER(logger::out) << "reading crag from supervoxel file " << svFiles[i] << " and merge history " << mhFiles[i] << std::endl;
 
 						Costs mergeCosts(*crags[i]);
-						import.readCragFromMergeHistory(svFiles[i], mhFiles[i], *crags[i], *cragsVolumes[i], resolution, offset + util::point<float, 3>(0, 0, resolution.z()*i), mergeCosts);
-					}
+						sectionImport.readCragFromMergeHistory(svFiles[i], mhFiles[i], *crags[i], *cragsVolumes[i], resolution, offset + util::point<float, 3>(0, 0, resolution.z()*i), mergeCosts);
+					});
 
 					if (optionDownsampleCrag) {
 
 						UTIL_TIME_SCOPE("downsample CRAG");
 
-						DownSampler downSampler(optionMinCandidateSize.as<int>());
-
 						std::vector<std::unique_ptr<Crag>> downSampledCrags(crags.size());
 						std::vector<std::unique_ptr<CragVolumes>> downSampledVolumes(crags.size());
 
-						for (int i = 0; i < crags.size(); i++) {
+						processSections(crags.size(), optionNumImportThreads.as<int>(), [&](std::size_t i) {
+
+							DownSampler downSampler(optionMinCandidateSize.as<int>());
 
 							downSampledCrags[i]   = std::unique_ptr<Crag>(new Crag());
 							downSampledVolumes[i] = std::unique_ptr<CragVolumes>(new CragVolumes(*downSampledCrags[i]));
 
 							downSampler.process(*crags[i], *cragsVolumes[i], *downSampledCrags[i], *downSampledVolumes[i]);
-						}
+						});
 
 						std::swap(cragsVolumes, downSampledVolumes);
 						std::swap(crags, downSampledCrags);
@@ -305,6 +387,7 @@ int main(int argc, char** argv) {
 
 					// combine crags
 					CragStackCombiner combiner;
+					combiner.setNumThreads(optionNumImportThreads.as<int>());
 					combiner.combine(crags, cragsVolumes, *crag, *volumes);
 
 				} else {
@@ -357,6 +440,8 @@ int main(int argc, char** argv) {
 			UTIL_TIME_SCOPE("find CRAG adjacencies");
 
 			PlanarAdjacencyAnnotator annotator(PlanarAdjacencyAnnotator::Direct);
+			annotator.setBlockBudget(importBlockBudget);
+			annotator.setNumThreads(optionNumImportThreads.as<int>());
 			annotator.annotate(*crag, *volumes);
 		}
 
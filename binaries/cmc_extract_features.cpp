@@ -3,6 +3,8 @@
  * stores them in the project file.
  */
 
+#include <algorithm>
+#include <cmath>
 #include <iostream>
 #include <boost/filesystem.hpp>
 
@@ -28,6 +30,7 @@
 #include <features/VolumeRayFeatureProvider.h>
 #include <features/ContactFeatureProvider.h>
 #include <features/AssignmentFeatureProvider.h>
+#include <inference/RandomForest.h>
 #include <learning/RandLoss.h>
 #include <learning/BestEffort.h>
 
@@ -44,6 +47,26 @@ util::ProgramOption optionAppendBestEffortFeature(
 		                          "to each node and edge indicating if this node or edge is part of the "
 		                          "best-effort solution. Used for testing the learning method.");
 
+util::ProgramOption optionRandomForestFeature(
+		util::_module           = "features",
+		util::_long_name        = "rfFeature",
+		util::_description_text = "Append the energy of the random forests in the given file (groups classifiers/slice_node_rf and "
+		                          "classifiers/assignment_node_rf) as a feature to each slice and assignment node, and a zero "
+		                          "feature to each no-assignment edge. Energies of higher nodes and edges are multiplied with the "
+		                          "number of leaf decisions they imply. The feature weights are set to zero, except for this feature.");
+
+util::ProgramOption optionRandomForestHigherNodeBias(
+		util::_module           = "features",
+		util::_long_name        = "rfHigherNodeBias",
+		util::_description_text = "A bias to add to the random forest energy of non-leaf nodes.",
+		util::_default_value    = 0);
+
+util::ProgramOption optionRandomForestHigherEdgeBias(
+		util::_module           = "features",
+		util::_long_name        = "rfHigherEdgeBias",
+		util::_description_text = "A bias to add to the random forest energy of non-leaf edges.",
+		util::_default_value    = 0);
+
 util::ProgramOption optionNoFeatures(
 		util::_module           = "features",
 		util::_long_name        = "noFeatures",
@@ -219,6 +242,82 @@ util::ProgramOption optionVolumeRaysSampleDensity(
 		util::_description_text = "Distance between sample points in the normal estimation sphere.",
 		util::_default_value    = 2);
 
+/**
+ * Convert the probability of a candidate to be selected into the energy of 
+ * selecting it, assuming the energy of not selecting it is zero:
+ *
+ *   E(1) = log(p(y==0)) - log(p(y==1))
+ */
+double probabilityToEnergy(double p) {
+
+	// ensure numerical stability
+	p = std::max(0.001, std::min(0.999, p));
+
+	return std::log(1.0 - p) - std::log(p);
+}
+
+/**
+ * Append the random forest energy feature to slice nodes, assignment nodes, and 
+ * no-assignment edges, and set the feature weights to select only this 
+ * feature.
+ */
+void appendRandomForestFeature(
+		const Crag&     crag,
+		NodeFeatures&   nodeFeatures,
+		EdgeFeatures&   edgeFeatures,
+		FeatureWeights& weights) {
+
+	UTIL_TIME_SCOPE("appending random forest feature");
+
+	std::string rfFile = optionRandomForestFeature.as<std::string>();
+	double higherNodeBias = optionRandomForestHigherNodeBias;
+	double higherEdgeBias = optionRandomForestHigherEdgeBias;
+
+	RandomForest sliceNodeRandomForest;
+	RandomForest assignmentNodeRandomForest;
+	sliceNodeRandomForest.read(rfFile, "classifiers/slice_node_rf");
+	assignmentNodeRandomForest.read(rfFile, "classifiers/assignment_node_rf");
+
+	Crag::NodeMap<double> probs(crag);
+	sliceNodeRandomForest.getProbabilitiesBatch(crag, nodeFeatures, Crag::SliceNode, probs);
+	assignmentNodeRandomForest.getProbabilitiesBatch(crag, nodeFeatures, Crag::AssignmentNode, probs);
+
+	for (Crag::CragNode n : crag.nodes()) {
+
+		Crag::NodeType type = crag.type(n);
+		if (type != Crag::SliceNode && type != Crag::AssignmentNode)
+			continue;
+
+		double energy = probabilityToEnergy(probs[n]);
+
+		// weigh higher candidates by the number of leaf decisions they imply
+		if (!crag.isLeafNode(n)) {
+
+			energy *= crag.leafNodes(n).size() + crag.leafEdges(n).size();
+			energy += higherNodeBias;
+		}
+
+		nodeFeatures.append(n, energy);
+	}
+
+	// all training samples for no-assignment edges belonged to the same class, 
+	// their energy is zero (higher edges get only the bias)
+	for (Crag::CragEdge e : crag.edges())
+		if (crag.type(e) == Crag::NoAssignmentEdge)
+			edgeFeatures.append(e, crag.isLeafEdge(e) ? 0 : higherEdgeBias);
+
+	nodeFeatures.compact();
+	edgeFeatures.compact();
+
+	weights = FeatureWeights(nodeFeatures, edgeFeatures, 0);
+
+	for (Crag::NodeType type : { Crag::SliceNode, Crag::AssignmentNode })
+		if (!weights[type].empty())
+			weights[type].back() = 1;
+	if (!weights[Crag::NoAssignmentEdge].empty())
+		weights[Crag::NoAssignmentEdge].back() = 1;
+}
+
 int main(int argc, char** argv) {
 
 	UTIL_TIME_SCOPE("main");
@@ -228,6 +327,11 @@ int main(int argc, char** argv) {
 		util::ProgramOptions::init(argc, argv);
 		logger::LogManager::init();
 
+		if (optionRandomForestFeature && optionAppendBestEffortFeature)
+			UTIL_THROW_EXCEPTION(
+					UsageError,
+					"rfFeature and appendBestEffortFeature can not be used together");
+
 		Hdf5CragStore cragStore(optionProjectFile.as<std::string>());
 
 		LOG_USER(logger::out) << "reading CRAG and candidate volumes" << std::endl;
@@ -235,9 +339,10 @@ int main(int argc, char** argv) {
 		Crag        crag;
 		CragVolumes volumes(crag);
 		cragStore.retrieveCrag(crag);
+		crag.buildHierarchyIndex();
 		cragStore.retrieveVolumes(volumes);
 
-		LOG_USER(logger::out) << "reading raw and intensity volumes" << std::endl;
+		LOG_USER(logger::out) << "reading raw and boundary volumes" << std::endl;
 
 		Hdf5VolumeStore volumeStore(optionProjectFile.as<std::string>());
 		ExplicitVolume<float> raw;
@@ -247,8 +352,31 @@ int main(int argc, char** argv) {
 		ExplicitVolume<float> zAffinities;
 		bool hasAffinities = true;
 
-		volumeStore.retrieveIntensities(raw);
-		volumeStore.retrieveBoundaries(boundaries);
+		// accumulated, contact, and assignment features index the raw and 
+		// boundary volumes with grid graph or global voxel positions, all 
+		// others only need the region covered by the candidates
+		bool needsWholeVolumes =
+				optionEdgeAccumulatedFeatures ||
+				optionEdgeContactFeatures ||
+				optionAssignmentFeatures;
+
+		if (needsWholeVolumes) {
+
+			volumeStore.retrieveBoundaries(boundaries);
+
+		} else {
+
+			util::box<float, 3> candidatesBoundingBox = volumes.getBoundingBox();
+
+			LOG_USER(logger::out)
+					<< "reading boundaries only in " << candidatesBoundingBox << std::endl;
+
+			volumeStore.retrieveBoundaries(boundaries, candidatesBoundingBox);
+		}
+
+		// the raw volume is only used for accumulated features
+		if (optionEdgeAccumulatedFeatures)
+			volumeStore.retrieveIntensities(raw);
 
 		try {
 			volumeStore.retrieveAffinities(xAffinities, yAffinities, zAffinities);
@@ -395,6 +523,14 @@ int main(int argc, char** argv) {
 			}
 		}
 
+		FeatureWeights rfWeights;
+		if (optionRandomForestFeature) {
+
+			LOG_USER(logger::out) << "appending random forest feature" << std::endl;
+
+			appendRandomForestFeature(crag, nodeFeatures, edgeFeatures, rfWeights);
+		}
+
 		if (optionAppendBestEffortFeature) {
 
 			ExplicitVolume<int> groundTruth;
@@ -424,6 +560,13 @@ int main(int argc, char** argv) {
 			cragStore.saveEdgeFeatures(crag, edgeFeatures);
 		}
 
+		if (optionRandomForestFeature) {
+
+			LOG_USER(logger::out) << "saving feature weights" << std::endl;
+
+			cragStore.saveFeatureWeights(rfWeights);
+		}
+
 		if (optionSkeletons) {
 
 			LOG_USER(logger::out) << "extracting skeletons" << std::endl;
@@ -5,6 +5,7 @@
 
 #include <iostream>
 #include <fstream>
+#include <chrono>
 #include <boost/filesystem.hpp>
 
 #include <util/Logger.h>
@@ -17,6 +18,7 @@
 #include <io/Hdf5VolumeStore.h>
 #include <io/SolutionImageWriter.h>
 #include <features/FeatureExtractor.h>
+#include <features/LinearCosts.h>
 #include <inference/CragSolverFactory.h>
 
 util::ProgramOption optionForegroundBias(
@@ -57,6 +59,28 @@ util::ProgramOption optionExportSolutionWithBoundary(
 		util::_long_name        = "exportSolutionWithBoundary",
 		util::_description_text = "Create a volume export for the solution, showing the boundaries as well..");
 
+util::ProgramOption optionExportSolutionLabels(
+		util::_long_name        = "exportSolutionLabels",
+		util::_description_text = "Create an integer label export for the solution. If the name ends in .h5, .hdf, or .hdf5, the "
+		                          "labels are written as a chunked and compressed dataset 'solution' into this HDF5 file, "
+		                          "otherwise as 32-bit TIFF images.");
+
+util::ProgramOption optionExport64BitLabels(
+		util::_long_name        = "export64BitLabels",
+		util::_description_text = "Write 64-bit labels with exportSolutionLabels. Only supported for HDF5 files.");
+
+util::ProgramOption optionExportSlabSize(
+		util::_long_name        = "exportSlabSize",
+		util::_description_text = "The number of sections to paint and write at once when exporting the solution. Set to 0 to "
+		                          "export the whole volume at once.",
+		util::_default_value    = 16);
+
+util::ProgramOption optionNumExportThreads(
+		util::_long_name        = "numExportThreads",
+		util::_description_text = "The number of threads to export the solution with. Set to 0 (the default) to use one thread "
+		                          "per core.",
+		util::_default_value    = 0);
+
 util::ProgramOption optionReadOnly(
 		util::_long_name        = "readOnly",
 		util::_description_text = "Don't write the solution or costs to the project file (only export the solution).");
@@ -65,24 +89,10 @@ util::ProgramOption optionDryRun(
 		util::_long_name        = "dryRun",
 		util::_description_text = "Compute the costs and store them, but do not run the solver.");
 
-inline double dot(const std::vector<double>& a, const std::vector<double>& b) {
-
-	UTIL_ASSERT_REL(a.size(), ==, b.size());
-
-	double sum = 0;
-	auto ba = a.begin();
-	auto ea = a.end();
-	auto bb = b.begin();
-
-	while (ba != ea) {
-
-		sum += (*ba)*(*bb);
-		ba++;
-		bb++;
-	}
-
-	return sum;
-}
+util::ProgramOption optionCompareHeuristic(
+		util::_long_name        = "compareHeuristic",
+		util::_description_text = "Also solve with the heuristic multi-cut solver, and report its value and runtime "
+		                          "next to the ones of the selected solver.");
 
 int main(int argc, char** argv) {
 
@@ -103,6 +113,7 @@ int main(int argc, char** argv) {
 
 		Hdf5CragStore cragStore(optionProjectFile.as<std::string>());
 		cragStore.retrieveCrag(crag);
+		crag.buildHierarchyIndex();
 		cragStore.retrieveVolumes(volumes);
 
 		LOG_USER(logger::out) << "reading features" << std::endl;
@@ -120,17 +131,13 @@ int main(int argc, char** argv) {
 		float edgeBias = optionMergeBias;
 		float nodeBias = optionForegroundBias;
 
-		for (Crag::CragNode n : crag.nodes()) {
-
-			costs.node[n] = nodeBias;
-			costs.node[n] += dot(weights[crag.type(n)], nodeFeatures[n]);
-		}
-
-		for (Crag::CragEdge e : crag.edges()) {
+		LinearCosts linearCosts(crag, nodeFeatures, edgeFeatures);
+		linearCosts.computeCosts(weights, costs.node, costs.edge);
 
-			costs.edge[e] = edgeBias;
-			costs.edge[e] += dot(weights[crag.type(e)], edgeFeatures[e]);
-		}
+		for (Crag::CragNode n : crag.nodes())
+			costs.node[n] += nodeBias;
+		for (Crag::CragEdge e : crag.edges())
+			costs.edge[e] += edgeBias;
 
 		if (optionLevelAmplification) {
 
@@ -167,31 +174,64 @@ int main(int argc, char** argv) {
 		CragSolver::Parameters parameters;
 		if (optionNumIterations)
 			parameters.numIterations = optionNumIterations;
-		std::unique_ptr<CragSolver> solver(CragSolverFactory::createSolver(crag, volumes, parameters));
+
+		CycleConstraintPool cyclePool(optionCyclePoolMaxInactiveRounds.as<int>());
+		if (optionCycleConstraintPool)
+			cragStore.retrieveCycleConstraints(crag, cyclePool);
+
+		std::unique_ptr<CragSolver> solver(CragSolverFactory::createSolver(crag, volumes, parameters, &cyclePool));
+		cyclePool.nextRound();
 
 		solver->setCosts(costs);
+		auto start = std::chrono::steady_clock::now();
 		{
 			UTIL_TIME_SCOPE("solve candidate multi-cut");
 			solver->solve(solution);
 		}
+		double solverSeconds = std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
 
 		LOG_USER(logger::out) << "problem solved" << std::endl;
 
+		if (optionCompareHeuristic) {
+
+			LOG_USER(logger::out) << "solving with heuristic solver for comparison" << std::endl;
+
+			CragSolution heuristicSolution(crag);
+			HeuristicMultiCutSolver heuristicSolver(crag, parameters);
+			heuristicSolver.setCosts(costs);
+
+			start = std::chrono::steady_clock::now();
+			heuristicSolver.solve(heuristicSolution);
+			double heuristicSeconds = std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+
+			LOG_USER(logger::out)
+					<< "solver value: " << solver->getValue()
+					<< " (" << solverSeconds << "s), heuristic value: "
+					<< heuristicSolver.getValue()
+					<< " (" << heuristicSeconds << "s)" << std::endl;
+		}
+
 		LOG_USER(logger::out) << "storing solution" << std::endl;
 
 		if (!optionReadOnly)
 			cragStore.saveSolution(crag, solution, "solution");
 
+		if (optionCycleConstraintPool && !optionReadOnly) {
+
+			LOG_USER(logger::out) << "storing " << cyclePool.size() << " cycle constraints" << std::endl;
+			cragStore.saveCycleConstraints(crag, cyclePool);
+		}
+
 		if (optionExportSolution) {
 
 			LOG_USER(logger::out) << "exporting solution to " << optionExportSolution.as<std::string>() << std::endl;
 
 			Hdf5VolumeStore volumeStore(optionProjectFile.as<std::string>());
-			ExplicitVolume<float> intensities;
-			volumeStore.retrieveIntensities(intensities);
 
 			SolutionImageWriter imageWriter;
-			imageWriter.setExportArea(intensities.getBoundingBox());
+			imageWriter.setExportArea(volumeStore.retrieveVolumeInfo("intensities").getBoundingBox());
+			imageWriter.setSlabSize(optionExportSlabSize.as<unsigned int>());
+			imageWriter.setNumThreads(optionNumExportThreads.as<int>());
 			imageWriter.write(crag, volumes, solution, optionExportSolution.as<std::string>());
 		}
 
@@ -200,14 +240,39 @@ int main(int argc, char** argv) {
 			LOG_USER(logger::out) << "exporting solution with boundaries to " << optionExportSolutionWithBoundary.as<std::string>() << std::endl;
 
 			Hdf5VolumeStore volumeStore(optionProjectFile.as<std::string>());
-			ExplicitVolume<float> intensities;
-			volumeStore.retrieveIntensities(intensities);
 
 			SolutionImageWriter imageWriter;
-			imageWriter.setExportArea(intensities.getBoundingBox());
+			imageWriter.setExportArea(volumeStore.retrieveVolumeInfo("intensities").getBoundingBox());
+			imageWriter.setSlabSize(optionExportSlabSize.as<unsigned int>());
+			imageWriter.setNumThreads(optionNumExportThreads.as<int>());
 			imageWriter.write(crag, volumes, solution, optionExportSolution.as<std::string>() + "_boundary", true);
 		}
 
+		if (optionExportSolutionLabels) {
+
+			std::string filename = optionExportSolutionLabels.as<std::string>();
+
+			LOG_USER(logger::out) << "exporting solution labels to " << filename << std::endl;
+
+			Hdf5VolumeStore volumeStore(optionProjectFile.as<std::string>());
+
+			SolutionImageWriter imageWriter;
+			imageWriter.setExportArea(volumeStore.retrieveVolumeInfo("intensities").getBoundingBox());
+			imageWriter.setSlabSize(optionExportSlabSize.as<unsigned int>());
+			imageWriter.setNumThreads(optionNumExportThreads.as<int>());
+
+			SolutionImageWriter::LabelType labelType =
+					(optionExport64BitLabels ?
+					 SolutionImageWriter::UInt64Labels :
+					 SolutionImageWriter::UInt32Labels);
+
+			std::string extension = boost::filesystem::path(filename).extension().string();
+			if (extension == ".h5" || extension == ".hdf" || extension == ".hdf5")
+				imageWriter.writeHdf5Labels(crag, volumes, solution, filename, "solution", labelType);
+			else
+				imageWriter.writeLabels(crag, volumes, solution, filename, labelType);
+		}
+
 	} catch (Exception& e) {
 
 		handleException(e, std::cerr);
@@ -1,6 +1,6 @@
 /**
- * Reads a treemc project file containing features and a ground-truth labelling 
- * and trains node and edge feature weights.
+ * Reads one or several treemc project files containing features and a 
+ * ground-truth labelling and trains node and edge feature weights.
  */
 
 #include <iostream>
@@ -10,7 +10,9 @@
 #include <util/Logger.h>
 #include <util/ProgramOptions.h>
 #include <util/exceptions.h>
+#include <util/string.h>
 #include <util/timing.h>
+#include <crag/GroundTruthOverlaps.h>
 #include <io/CragImport.h>
 #include <io/Hdf5CragStore.h>
 #include <io/Hdf5VolumeStore.h>
@@ -19,6 +21,7 @@
 #include <learning/BestEffort.h>
 #include <learning/BundleOptimizer.h>
 #include <learning/AssignmentLoss.h>
+#include <learning/CompositeOracle.h>
 #include <learning/ContourDistanceLoss.h>
 #include <learning/GradientOptimizer.h>
 #include <learning/HammingLoss.h>
@@ -31,7 +34,9 @@
 util::ProgramOption optionProjectFile(
 		util::_long_name        = "projectFile",
 		util::_short_name       = "p",
-		util::_description_text = "The treemc project file.",
+		util::_description_text = "The treemc project file. Give a comma-separated list of project files to train on "
+		                          "several samples at once. The samples' objectives are summed, and the learnt weights "
+		                          "are stored in each of the project files.",
 		util::_default_value    = "project.hdf");
 
 util::ProgramOption optionBestEffortLoss(
@@ -46,6 +51,11 @@ util::ProgramOption optionBestEffortFromProjectFile(
 		util::_long_name        = "bestEffortFromProjectFile",
 		util::_description_text = "Read the best effort solution from the project file.");
 
+util::ProgramOption optionRecomputeGroundTruthOverlaps(
+		util::_long_name        = "recomputeGroundTruthOverlaps",
+		util::_description_text = "Compute the overlaps of the candidates with the ground truth (used by the best-effort "
+		                          "heuristic and the rand and overlap losses) even if they are stored in the project file.");
+
 util::ProgramOption optionLoss(
 		util::_long_name        = "loss",
 		util::_description_text = "The loss to use for training: hamming (Hamming distance "
@@ -117,220 +127,358 @@ util::ProgramOption optionReadOnly(
 		util::_long_name        = "readOnly",
 		util::_description_text = "Don't write the best-effort or learnt weights to the project file (only export the best-effort).");
 
+util::ProgramOption optionNumOracleThreads(
+		util::_long_name        = "numOracleThreads",
+		util::_description_text = "When training on several project files, the maximal number of samples to solve the "
+		                          "loss-augmented inference for at the same time. Defaults to 0, which means one per core.",
+		util::_default_value    = 0);
+
 util::ProgramOption optionExportBestEffort(
 		util::_long_name        = "exportBestEffort",
-		util::_description_text = "Create a volume export for the best-effort solution.");
+		util::_description_text = "Create a volume export for the best-effort solution. With several project files, the "
+		                          "number of the sample is appended to the name.");
 
 util::ProgramOption optionExportBestEffortWithBoundary(
 		util::_long_name        = "exportBestEffortWithBoundary",
 		util::_description_text = "Create a volume export for the best-effort solution, showing the boundaries as well.");
 
-int main(int argc, char** argv) {
+/**
+ * Everything needed to train on one project file.
+ */
+struct Sample {
 
-	UTIL_TIME_SCOPE("main");
+	Sample(const std::string& projectFile_) :
+		projectFile(projectFile_),
+		cragStore(std::make_shared<Hdf5CragStore>(projectFile_)),
+		volumes(crag),
+		nodeFeatures(crag),
+		edgeFeatures(crag),
+		cyclePool(optionCyclePoolMaxInactiveRounds.as<int>()) {}
 
-	try {
+	std::string                projectFile;
+	std::shared_ptr<CragStore> cragStore;
 
-		util::ProgramOptions::init(argc, argv);
-		logger::LogManager::init();
+	ExplicitVolume<int> groundTruth;
 
-		std::shared_ptr<CragStore> cragStore = std::make_shared<Hdf5CragStore>(optionProjectFile.as<std::string>());
-		Hdf5VolumeStore volumeStore(optionProjectFile.as<std::string>());
+	Crag         crag;
+	CragVolumes  volumes;
+	NodeFeatures nodeFeatures;
+	EdgeFeatures edgeFeatures;
 
-		LOG_USER(logger::out) << "reading ground-truth" << std::endl;
+	// overlaps of the candidates with the ground truth, shared by the 
+	// best-effort heuristic and the losses that need them
+	std::unique_ptr<GroundTruthOverlaps> gtOverlaps;
 
-		ExplicitVolume<int> groundTruth;
-		volumeStore.retrieveGroundTruth(groundTruth);
+	std::unique_ptr<BestEffort> bestEffort;
+	std::unique_ptr<Loss>       bestEffortLoss;
+	std::unique_ptr<Loss>       trainingLoss;
 
-		LOG_USER(logger::out) << "reading CRAG and volumes" << std::endl;
+	// cycle constraints found in one oracle call stay valid for the 
+	// following ones
+	CycleConstraintPool               cyclePool;
+	std::unique_ptr<CragSolverOracle> oracle;
+};
 
-		Crag crag;
-		CragVolumes volumes(crag);
-		cragStore->retrieveCrag(crag);
-		cragStore->retrieveVolumes(volumes);
+void readSample(Sample& sample) {
 
-		NodeFeatures nodeFeatures(crag);
-		EdgeFeatures edgeFeatures(crag);
+	Hdf5VolumeStore volumeStore(sample.projectFile);
 
-		if (!optionDryRun) {
+	LOG_USER(logger::out) << "reading ground-truth" << std::endl;
 
-			LOG_USER(logger::out) << "reading features" << std::endl;
-			cragStore->retrieveNodeFeatures(crag, nodeFeatures);
-			cragStore->retrieveEdgeFeatures(crag, edgeFeatures);
-		}
+	volumeStore.retrieveGroundTruth(sample.groundTruth);
 
-		std::unique_ptr<BestEffort> bestEffort;
-		std::unique_ptr<Loss>       bestEffortLoss;
-		std::unique_ptr<Loss>       trainingLoss;
+	LOG_USER(logger::out) << "reading CRAG and volumes" << std::endl;
 
-		CragSolver::Parameters solverParameters;
-		if (optionNumIterations)
-			solverParameters.numIterations = optionNumIterations;
-		if (optionPretrain)
-			solverParameters.noConstraints = true;
+	sample.cragStore->retrieveCrag(sample.crag);
+	sample.crag.buildHierarchyIndex();
+	sample.cragStore->retrieveVolumes(sample.volumes);
 
-		if (optionBestEffortFromProjectFile) {
+	if (!optionDryRun) {
 
-			LOG_USER(logger::out) << "reading best-effort" << std::endl;
+		LOG_USER(logger::out) << "reading features" << std::endl;
+		sample.cragStore->retrieveNodeFeatures(sample.crag, sample.nodeFeatures);
+		sample.cragStore->retrieveEdgeFeatures(sample.crag, sample.edgeFeatures);
+	}
+}
 
-			bestEffort = std::unique_ptr<BestEffort>(new BestEffort(crag));
+const GroundTruthOverlaps& getGroundTruthOverlaps(Sample& sample) {
 
-			cragStore->retrieveSolution(crag, *bestEffort, "best-effort");
+	if (sample.gtOverlaps)
+		return *sample.gtOverlaps;
 
-		} else {
+	if (!optionRecomputeGroundTruthOverlaps) {
 
-			if (!optionBestEffortLoss) {
+		sample.gtOverlaps = std::unique_ptr<GroundTruthOverlaps>(new GroundTruthOverlaps(sample.crag));
 
-				LOG_USER(logger::out) << "using assignment heuristic for best-effort" << std::endl;
+		// stored overlaps are only valid for the same ground truth
+		if (sample.cragStore->retrieveGroundTruthOverlaps(sample.crag, *sample.gtOverlaps) &&
+		    sample.gtOverlaps->getGroundTruthSizes() == GroundTruthOverlaps::countLabels(sample.groundTruth))
+			return *sample.gtOverlaps;
+	}
 
-				bestEffort = std::unique_ptr<BestEffort>(new BestEffort(crag, volumes, groundTruth));
+	LOG_USER(logger::out) << "computing ground-truth overlaps" << std::endl;
 
-			} else {
+	sample.gtOverlaps = std::unique_ptr<GroundTruthOverlaps>(
+			new GroundTruthOverlaps(sample.crag, sample.volumes, sample.groundTruth));
 
-				if (optionBestEffortLoss.as<std::string>() == "rand") {
+	if (!optionReadOnly) {
 
-					LOG_USER(logger::out) << "using RAND loss for best-effort" << std::endl;
+		LOG_USER(logger::out) << "storing ground-truth overlaps" << std::endl;
+		sample.cragStore->saveGroundTruthOverlaps(sample.crag, *sample.gtOverlaps);
+	}
 
-					bestEffortLoss = std::unique_ptr<RandLoss>(new RandLoss(crag, volumes, groundTruth));
+	return *sample.gtOverlaps;
+}
 
-				} else if (optionBestEffortLoss.as<std::string>() == "overlap") {
+void findBestEffort(Sample& sample, const CragSolver::Parameters& solverParameters) {
 
-					LOG_USER(logger::out) << "using overlap loss for best-effort" << std::endl;
+	const Crag&                crag        = sample.crag;
+	const CragVolumes&         volumes     = sample.volumes;
+	const ExplicitVolume<int>& groundTruth = sample.groundTruth;
 
-					bestEffortLoss = std::unique_ptr<OverlapLoss>(new OverlapLoss(crag, volumes, groundTruth));
+	if (optionBestEffortFromProjectFile) {
 
-				} else if (optionBestEffortLoss.as<std::string>() == "hausdorff") {
+		LOG_USER(logger::out) << "reading best-effort" << std::endl;
 
-					LOG_USER(logger::out) << "using hausdorff loss for best-effort" << std::endl;
+		sample.bestEffort = std::unique_ptr<BestEffort>(new BestEffort(crag));
 
-					// get ground truth volumes
-					Crag        gtCrag;
-					CragVolumes gtVolumes(gtCrag);
-					CragImport  import;
-					import.readSupervoxels(groundTruth, gtCrag, gtVolumes, groundTruth.getResolution(), groundTruth.getOffset());
+		sample.cragStore->retrieveSolution(crag, *sample.bestEffort, "best-effort");
 
-					bestEffortLoss = std::unique_ptr<HausdorffLoss>(new HausdorffLoss(crag, volumes, gtCrag, gtVolumes, optionMaxHausdorffDistance));
+		return;
+	}
 
-				} else if (optionBestEffortLoss.as<std::string>() == "contour") {
+	if (!optionBestEffortLoss) {
 
-					LOG_USER(logger::out) << "using contour loss for best-effort" << std::endl;
+		LOG_USER(logger::out) << "using assignment heuristic for best-effort" << std::endl;
 
-					// get ground truth volumes
-					Crag        gtCrag;
-					CragVolumes gtVolumes(gtCrag);
-					CragImport  import;
-					import.readSupervoxels(groundTruth, gtCrag, gtVolumes, groundTruth.getResolution(), groundTruth.getOffset());
+		sample.bestEffort = std::unique_ptr<BestEffort>(new BestEffort(crag, volumes, getGroundTruthOverlaps(sample)));
 
-					bestEffortLoss = std::unique_ptr<ContourDistanceLoss>(new ContourDistanceLoss(crag, volumes, gtCrag, gtVolumes, optionMaxHausdorffDistance));
+	} else {
 
-				} else if (optionBestEffortLoss.as<std::string>() == "assignment") {
+		if (optionBestEffortLoss.as<std::string>() == "rand") {
 
-					LOG_USER(logger::out) << "using assignment loss for best-effort" << std::endl;
+			LOG_USER(logger::out) << "using RAND loss for best-effort" << std::endl;
 
-					bestEffortLoss = std::unique_ptr<AssignmentLoss>(new AssignmentLoss(crag, volumes, groundTruth));
+			sample.bestEffortLoss = std::unique_ptr<RandLoss>(new RandLoss(crag, getGroundTruthOverlaps(sample)));
 
-				} else {
+		} else if (optionBestEffortLoss.as<std::string>() == "overlap") {
 
-					UTIL_THROW_EXCEPTION(
-							UsageError,
-							"unknown best-effort loss " + optionBestEffortLoss.as<std::string>());
-				}
+			LOG_USER(logger::out) << "using overlap loss for best-effort" << std::endl;
 
-				LOG_USER(logger::out) << "storing best-effort loss" << std::endl;
+			sample.bestEffortLoss = std::unique_ptr<OverlapLoss>(new OverlapLoss(crag, getGroundTruthOverlaps(sample)));
 
-				cragStore->saveCosts(crag, *bestEffortLoss, "best-effort_loss");
+		} else if (optionBestEffortLoss.as<std::string>() == "hausdorff") {
 
-				LOG_USER(logger::out) << "finding best-effort solution" << std::endl;
+			LOG_USER(logger::out) << "using hausdorff loss for best-effort" << std::endl;
 
-				bestEffort = std::unique_ptr<BestEffort>(new BestEffort(crag, volumes, *bestEffortLoss, solverParameters));
-			}
+			// get ground truth volumes
+			Crag        gtCrag;
+			CragVolumes gtVolumes(gtCrag);
+			CragImport  import;
+			import.readSupervoxels(groundTruth, gtCrag, gtVolumes, groundTruth.getResolution(), groundTruth.getOffset());
 
-			LOG_USER(logger::out) << "storing best-effort solution" << std::endl;
+			sample.bestEffortLoss = std::unique_ptr<HausdorffLoss>(new HausdorffLoss(crag, volumes, gtCrag, gtVolumes, optionMaxHausdorffDistance));
 
-			cragStore->saveSolution(crag, *bestEffort, "best-effort");
-		}
+		} else if (optionBestEffortLoss.as<std::string>() == "contour") {
 
-		if (optionExportBestEffort) {
+			LOG_USER(logger::out) << "using contour loss for best-effort" << std::endl;
 
-			SolutionImageWriter imageWriter;
-			imageWriter.setExportArea(groundTruth.getBoundingBox());
-			imageWriter.write(crag, volumes, *bestEffort, optionExportBestEffort);
-		}
+			// get ground truth volumes
+			Crag        gtCrag;
+			CragVolumes gtVolumes(gtCrag);
+			CragImport  import;
+			import.readSupervoxels(groundTruth, gtCrag, gtVolumes, groundTruth.getResolution(), groundTruth.getOffset());
 
-		if (optionExportBestEffortWithBoundary) {
+			sample.bestEffortLoss = std::unique_ptr<ContourDistanceLoss>(new ContourDistanceLoss(crag, volumes, gtCrag, gtVolumes, optionMaxHausdorffDistance));
 
-			SolutionImageWriter imageWriter;
-			imageWriter.setExportArea(groundTruth.getBoundingBox());
-			imageWriter.write(crag, volumes, *bestEffort, optionExportBestEffortWithBoundary, true);
+		} else if (optionBestEffortLoss.as<std::string>() == "assignment") {
+
+			LOG_USER(logger::out) << "using assignment loss for best-effort" << std::endl;
+
+			sample.bestEffortLoss = std::unique_ptr<AssignmentLoss>(new AssignmentLoss(crag, volumes, groundTruth));
+
+		} else {
+
+			UTIL_THROW_EXCEPTION(
+					UsageError,
+					"unknown best-effort loss " + optionBestEffortLoss.as<std::string>());
 		}
 
-		if (optionLoss.as<std::string>() == "hamming") {
+		LOG_USER(logger::out) << "storing best-effort loss" << std::endl;
+
+		sample.cragStore->saveCosts(crag, *sample.bestEffortLoss, "best-effort_loss");
+
+		LOG_USER(logger::out) << "finding best-effort solution" << std::endl;
 
-			LOG_USER(logger::out) << "using Hamming loss" << std::endl;
+		sample.bestEffort = std::unique_ptr<BestEffort>(new BestEffort(crag, volumes, *sample.bestEffortLoss, solverParameters));
+	}
 
-			trainingLoss = std::unique_ptr<HammingLoss>(new HammingLoss(crag, *bestEffort));
+	LOG_USER(logger::out) << "storing best-effort solution" << std::endl;
 
-		} else if (optionLoss.as<std::string>() == "rand") {
+	sample.cragStore->saveSolution(crag, *sample.bestEffort, "best-effort");
+}
 
-			LOG_USER(logger::out) << "using RAND loss" << std::endl;
+void createTrainingLoss(Sample& sample, const CragSolver::Parameters& solverParameters) {
 
-			LOG_USER(logger::out) << "reading ground-truth" << std::endl;
+	const Crag&                crag        = sample.crag;
+	const CragVolumes&         volumes     = sample.volumes;
+	const ExplicitVolume<int>& groundTruth = sample.groundTruth;
 
-			trainingLoss = std::unique_ptr<RandLoss>(new RandLoss(crag, volumes, groundTruth));
+	if (optionLoss.as<std::string>() == "hamming") {
 
-		} else if (optionLoss.as<std::string>() == "overlap") {
+		LOG_USER(logger::out) << "using Hamming loss" << std::endl;
 
-			LOG_USER(logger::out) << "using overlap loss" << std::endl;
+		sample.trainingLoss = std::unique_ptr<HammingLoss>(new HammingLoss(crag, *sample.bestEffort));
 
-			LOG_USER(logger::out) << "reading ground-truth" << std::endl;
-			ExplicitVolume<int> groundTruth;
-			volumeStore.retrieveGroundTruth(groundTruth);
+	} else if (optionLoss.as<std::string>() == "rand") {
 
-			trainingLoss = std::unique_ptr<OverlapLoss>(new OverlapLoss(crag, volumes, groundTruth));
+		LOG_USER(logger::out) << "using RAND loss" << std::endl;
 
-		} else if (optionLoss.as<std::string>() == "hausdorff") {
+		sample.trainingLoss = std::unique_ptr<RandLoss>(new RandLoss(crag, getGroundTruthOverlaps(sample)));
 
-			LOG_USER(logger::out) << "using hausdorff loss" << std::endl;
+	} else if (optionLoss.as<std::string>() == "overlap") {
 
-			// get ground truth volumes
-			Crag        gtCrag;
-			CragVolumes gtVolumes(gtCrag);
-			CragImport  import;
-			import.readSupervoxels(groundTruth, gtCrag, gtVolumes, groundTruth.getResolution(), groundTruth.getOffset());
+		LOG_USER(logger::out) << "using overlap loss" << std::endl;
 
-			trainingLoss = std::unique_ptr<HausdorffLoss>(new HausdorffLoss(crag, volumes, gtCrag, gtVolumes, optionMaxHausdorffDistance));
+		sample.trainingLoss = std::unique_ptr<OverlapLoss>(new OverlapLoss(crag, getGroundTruthOverlaps(sample)));
 
-		} else if (optionLoss.as<std::string>() == "topological") {
+	} else if (optionLoss.as<std::string>() == "hausdorff") {
 
-			LOG_USER(logger::out) << "using topological loss" << std::endl;
+		LOG_USER(logger::out) << "using hausdorff loss" << std::endl;
 
-			trainingLoss = std::unique_ptr<TopologicalLoss>(new TopologicalLoss(crag, *bestEffort));
+		// get ground truth volumes
+		Crag        gtCrag;
+		CragVolumes gtVolumes(gtCrag);
+		CragImport  import;
+		import.readSupervoxels(groundTruth, gtCrag, gtVolumes, groundTruth.getResolution(), groundTruth.getOffset());
 
-		} else {
+		sample.trainingLoss = std::unique_ptr<HausdorffLoss>(new HausdorffLoss(crag, volumes, gtCrag, gtVolumes, optionMaxHausdorffDistance));
 
-			LOG_USER(logger::out) << "using custom loss " << optionLoss.as<std::string>() << std::endl;
+	} else if (optionLoss.as<std::string>() == "topological") {
 
-			trainingLoss = std::unique_ptr<Loss>(new Loss(crag));
-			cragStore->retrieveCosts(crag, *trainingLoss, optionLoss);
-		}
+		LOG_USER(logger::out) << "using topological loss" << std::endl;
 
-		if (optionNormalizeLoss) {
+		sample.trainingLoss = std::unique_ptr<TopologicalLoss>(new TopologicalLoss(crag, *sample.bestEffort));
 
-			LOG_USER(logger::out) << "normalizing loss..." << std::endl;
-			trainingLoss->normalize(crag, solverParameters);
-		}
+	} else {
 
-		LOG_USER(logger::out) << "storing training loss" << std::endl;
+		LOG_USER(logger::out) << "using custom loss " << optionLoss.as<std::string>() << std::endl;
+
+		sample.trainingLoss = std::unique_ptr<Loss>(new Loss(crag));
+		sample.cragStore->retrieveCosts(crag, *sample.trainingLoss, optionLoss);
+	}
+
+	if (optionNormalizeLoss) {
+
+		LOG_USER(logger::out) << "normalizing loss..." << std::endl;
+		sample.trainingLoss->normalize(crag, solverParameters);
+	}
 
-		cragStore->saveCosts(crag, *trainingLoss, "training_loss");
+	LOG_USER(logger::out) << "storing training loss" << std::endl;
+
+	sample.cragStore->saveCosts(crag, *sample.trainingLoss, "training_loss");
+}
+
+/**
+ * Get the name of an export for a sample. With several samples, the number of 
+ * the sample is appended to the name, before the extension.
+ */
+std::string getExportName(const std::string& name, std::size_t sample, std::size_t numSamples) {
+
+	if (numSamples == 1)
+		return name;
+
+	boost::filesystem::path path(name);
+
+	return (path.parent_path() / (path.stem().string() + "_" + std::to_string(sample) + path.extension().string())).string();
+}
+
+int main(int argc, char** argv) {
+
+	UTIL_TIME_SCOPE("main");
+
+	try {
+
+		util::ProgramOptions::init(argc, argv);
+		logger::LogManager::init();
+
+		std::vector<std::string> projectFiles = split(optionProjectFile.as<std::string>(), ',');
+
+		if (projectFiles.size() == 0)
+			UTIL_THROW_EXCEPTION(
+					UsageError,
+					"no project file given");
+
+		CragSolver::Parameters solverParameters;
+		if (optionNumIterations)
+			solverParameters.numIterations = optionNumIterations;
+		if (optionPretrain)
+			solverParameters.noConstraints = true;
+
+		std::vector<std::unique_ptr<Sample>> samples;
+
+		for (std::size_t i = 0; i < projectFiles.size(); i++) {
+
+			LOG_USER(logger::out) << "preparing sample " << projectFiles[i] << std::endl;
+
+			samples.push_back(std::unique_ptr<Sample>(new Sample(projectFiles[i])));
+			Sample& sample = *samples.back();
+
+			readSample(sample);
+			findBestEffort(sample, solverParameters);
+
+			if (optionExportBestEffort) {
+
+				SolutionImageWriter imageWriter;
+				imageWriter.setExportArea(sample.groundTruth.getBoundingBox());
+				imageWriter.write(
+						sample.crag,
+						sample.volumes,
+						*sample.bestEffort,
+						getExportName(optionExportBestEffort, i, projectFiles.size()));
+			}
+
+			if (optionExportBestEffortWithBoundary) {
+
+				SolutionImageWriter imageWriter;
+				imageWriter.setExportArea(sample.groundTruth.getBoundingBox());
+				imageWriter.write(
+						sample.crag,
+						sample.volumes,
+						*sample.bestEffort,
+						getExportName(optionExportBestEffortWithBoundary, i, projectFiles.size()),
+						true);
+			}
+
+			createTrainingLoss(sample, solverParameters);
+		}
 
 		// create initial set of weights for the given features
-		FeatureWeights weights(nodeFeatures, edgeFeatures, optionInitialWeightValues.as<double>());
+		FeatureWeights weights(samples[0]->nodeFeatures, samples[0]->edgeFeatures, optionInitialWeightValues.as<double>());
+
+		// all samples have to share the same weights
+		for (const std::unique_ptr<Sample>& sample : samples) {
+
+			FeatureWeights sampleWeights(sample->nodeFeatures, sample->edgeFeatures, 0);
+
+			for (Crag::NodeType type : Crag::NodeTypes)
+				if (sampleWeights[type].size() != weights[type].size())
+					UTIL_THROW_EXCEPTION(
+							UsageError,
+							"number of node features of type " << type << " in " << sample->projectFile
+							<< " differs from " << samples[0]->projectFile);
+			for (Crag::EdgeType type : Crag::EdgeTypes)
+				if (sampleWeights[type].size() != weights[type].size())
+					UTIL_THROW_EXCEPTION(
+							UsageError,
+							"number of edge features of type " << type << " in " << sample->projectFile
+							<< " differs from " << samples[0]->projectFile);
+		}
 
 		if (optionRestartTraining) {
 
 			FeatureWeights prevWeights;
-			cragStore->retrieveFeatureWeights(prevWeights);
+			samples[0]->cragStore->retrieveFeatureWeights(prevWeights);
 
 			// previous weights might be incomplete
 			for (Crag::NodeType type : Crag::NodeTypes)
@@ -347,18 +495,33 @@ int main(int argc, char** argv) {
 
 			LOG_USER(logger::out) << "dry run -- skip learning" << std::endl;
 			if (!optionReadOnly)
-				cragStore->saveFeatureWeights(weights);
+				for (const std::unique_ptr<Sample>& sample : samples)
+					sample->cragStore->saveFeatureWeights(weights);
 			return 0;
 		}
 
-		CragSolverOracle oracle(
-				crag,
-				volumes,
-				nodeFeatures,
-				edgeFeatures,
-				*trainingLoss,
-				*bestEffort,
-				solverParameters);
+		// the objective is the sum of the objectives of all samples, whose 
+		// oracles are called concurrently
+		CompositeOracle oracle(optionNumOracleThreads.as<int>());
+
+		for (const std::unique_ptr<Sample>& sample : samples) {
+
+			if (optionCycleConstraintPool)
+				sample->cragStore->retrieveCycleConstraints(sample->crag, sample->cyclePool);
+
+			sample->oracle = std::unique_ptr<CragSolverOracle>(
+					new CragSolverOracle(
+							sample->crag,
+							sample->volumes,
+							sample->nodeFeatures,
+							sample->edgeFeatures,
+							*sample->trainingLoss,
+							*sample->bestEffort,
+							solverParameters,
+							&sample->cyclePool));
+
+			oracle.addOracle(*sample->oracle, sample->projectFile);
+		}
 
 		UTIL_TIME_SCOPE("training");
 
@@ -394,11 +557,20 @@ int main(int argc, char** argv) {
 			}
 		}
 
-		cragStore->saveFeatureWeights(weights);
+		for (const std::unique_ptr<Sample>& sample : samples)
+			sample->cragStore->saveFeatureWeights(weights);
+
+		if (optionCycleConstraintPool && !optionReadOnly) {
+
+			for (const std::unique_ptr<Sample>& sample : samples) {
+
+				LOG_USER(logger::out) << "storing " << sample->cyclePool.size() << " cycle constraints in " << sample->projectFile << std::endl;
+				sample->cragStore->saveCycleConstraints(sample->crag, sample->cyclePool);
+			}
+		}
 
 	} catch (boost::exception& e) {
 
 		handleException(e, std::cerr);
 	}
 }
-
@@ -0,0 +1,47 @@
+/**
+ * Rewrites the volumes, features, and affiliated edges of a candidate mc 
+ * project file in the most recent layout (chunked and compressed datasets, and 
+ * an index for partial reads of volumes).
+ */
+
+#include <iostream>
+
+#include <util/Logger.h>
+#include <util/ProgramOptions.h>
+#include <util/exceptions.h>
+#include <util/timing.h>
+#include <io/Hdf5CragStore.h>
+
+util::ProgramOption optionProjectFile(
+		util::_long_name        = "projectFile",
+		util::_short_name       = "p",
+		util::_description_text = "The candidate mc project file to upgrade.",
+		util::_default_value    = "project.hdf");
+
+int main(int argc, char** argv) {
+
+	UTIL_TIME_SCOPE("main");
+
+	try {
+
+		util::ProgramOptions::init(argc, argv);
+		logger::LogManager::init();
+
+		Hdf5CragStore cragStore(optionProjectFile.as<std::string>());
+
+		LOG_USER(logger::out)
+				<< "upgrading project file from volumes layout version "
+				<< cragStore.getStoredVolumesLayoutVersion() << " to "
+				<< Hdf5CragStore::CurrentLayoutVersion << std::endl;
+
+		cragStore.upgradeLayout();
+
+		LOG_USER(logger::out)
+				<< "done, run h5repack to reclaim the space of the replaced datasets"
+				<< std::endl;
+
+	} catch (Exception& e) {
+
+		handleException(e, std::cerr);
+	}
+}
@@ -106,7 +106,8 @@ getOverlay(
 			if (!crag.isRootNode(n) && overlaySolution->selected((*crag.outArcs(n).begin()).target()))
 				continue;
 
-			const CragVolume& volume = *volumes[n];
+			std::shared_ptr<CragVolume> volumePtr = volumes[n];
+			const CragVolume& volume = *volumePtr;
 			util::point<int, 3> offset = volume.getOffset()/volume.getResolution();
 
 			for (unsigned int z = 0; z < volume.getDiscreteBoundingBox().depth();  z++)
@@ -155,7 +156,8 @@ getOverlay(
 				if (!overlaySolution->selected(n))
 					continue;
 
-				const CragVolume& volume = *volumes[n];
+				std::shared_ptr<CragVolume> volumePtr = volumes[n];
+				const CragVolume& volume = *volumePtr;
 				util::point<int, 3> offset = volume.getOffset()/volume.getResolution();
 
 				for (unsigned int z = 0; z < volume.getDiscreteBoundingBox().depth();  z++)
@@ -245,7 +247,8 @@ int main(int argc, char** argv) {
 			if (!crag.isLeafNode(n))
 				continue;
 
-			const CragVolume& volume = *volumes[n];
+			std::shared_ptr<CragVolume> volumePtr = volumes[n];
+			const CragVolume& volume = *volumePtr;
 			util::point<int, 3> offset = volume.getOffset()/volume.getResolution();
 
 			for (unsigned int z = 0; z < volume.getDiscreteBoundingBox().depth();  z++)
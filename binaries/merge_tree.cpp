@@ -2,11 +2,18 @@
  * merge_tree
  *
  * Given a source image or volume, creates initial supervoxels and iteratively 
- * merges them.
+ * merges them. With --stack, each image of a stack is processed as an 
+ * independent section, using several threads.
  */
 
+#include <algorithm>
+#include <atomic>
+#include <exception>
 #include <iostream>
 #include <fstream>
+#include <mutex>
+#include <thread>
+#include <boost/filesystem.hpp>
 #include <util/ProgramOptions.h>
 #include <util/Logger.h>
 #include <util/exceptions.h>
@@ -22,6 +29,8 @@
 #include <mergetree/MultiplyMinRegionSize.h>
 #include <mergetree/MultiplySizeDifference.h>
 #include <mergetree/RandomPerturbation.h>
+#include <mergetree/UnionFindRegionMerging.h>
+#include <io/MergeHistory.h>
 #include <io/volumes.h>
 
 util::ProgramOption optionSource(
@@ -33,9 +42,22 @@ util::ProgramOption optionInitialSuperpixels(
 		util::_long_name        = "initialSuperpixels",
 		util::_description_text = "Use the given image/volume as inital superpixels. If not given, superpixels will be extracted automatically.");
 
+util::ProgramOption optionStack(
+		util::_long_name        = "stack",
+		util::_description_text = "Treat source (and initialSuperpixels, if given) as a stack of independent 2D sections. One merge history "
+		                          "is computed per section and written to the directory given by mergeHistory, named after the "
+		                          "source image.");
+
+util::ProgramOption optionNumThreads(
+		util::_long_name        = "numThreads",
+		util::_description_text = "The number of threads to process sections with in stack mode. Set to 0 (the default) to use one "
+		                          "thread per core.",
+		util::_default_value    = 0);
+
 util::ProgramOption optionSuperpixelImage(
 		util::_long_name        = "superpixelImage",
-		util::_description_text = "Create an image with the initial superpixels.");
+		util::_description_text = "Create an image with the initial superpixels. In stack mode, this is a directory to store one image "
+		                          "per section in.");
 
 util::ProgramOption optionReportNextSuperpixelId(
 		util::_long_name        = "reportNextSuperpixelId",
@@ -55,6 +77,23 @@ util::ProgramOption optionMergeHistory(
 		util::_description_text = "A file to write the region adjacency graph and merge history after merging.",
 		util::_default_value    = "merge_history.txt");
 
+util::ProgramOption optionBinaryMergeHistory(
+		util::_long_name        = "binaryMergeHistory",
+		util::_description_text = "Write the merge history in a binary format instead of text. Binary merge histories are "
+		                          "recognized by cmc_create_project and are faster to read.");
+
+util::ProgramOption optionFastMerging(
+		util::_long_name        = "fastMerging",
+		util::_description_text = "Use the union-find merging engine, which keeps histograms of the boundary intensities instead of "
+		                          "the boundary edges. Only supports the default scoring function (optionally with "
+		                          "dontConsiderRegionSize).");
+
+util::ProgramOption optionMergeHistogramBins(
+		util::_long_name        = "mergeHistogramBins",
+		util::_description_text = "The number of bins of the boundary intensity histograms used by fastMerging. The median boundary "
+		                          "intensity is exact if each bin covers at most one distinct intensity. Default is 1024.",
+		util::_default_value    = 1024);
+
 util::ProgramOption optionSmooth(
 		util::_long_name        = "smooth",
 		util::_description_text = "Smooth the input image with a Gaussian kernel of the given stddev.");
@@ -90,208 +129,403 @@ util::ProgramOption optionDontConsiderRegionSize(
 		util::_long_name        = "dontConsiderRegionSize",
 		util::_description_text = "By default, the scores are multiplied with the region size to encourage merging of small regions first. This option disables that.");
 
-using namespace logger;
 
-int main(int optionc, char** optionv) {
+using namespace logger;
 
-	using namespace vigra::functor;
+void smooth(ExplicitVolume<float>& source) {
+
+	if (source.depth() > 1) {
+		vigra::gaussianSmoothMultiArray(
+				source.data(),
+				source.data(),
+				optionSmooth.as<double>());
+	} else {
+		vigra::gaussianSmoothMultiArray(
+				source.data().bind<2>(0),
+				source.data().bind<2>(0),
+				optionSmooth.as<double>());
+	}
+}
 
-	try {
+/**
+ * Find watershed or SLIC superpixels in the source volume. Returns the largest 
+ * label.
+ */
+unsigned int extractSuperpixels(ExplicitVolume<float>& source, ExplicitVolume<int>& initialRegions) {
 
-		/********
-		 * INIT *
-		 ********/
+	// generate seeds
 
-		// init command line parser
-		util::ProgramOptions::init(optionc, optionv);
+	if (source.depth() > 1)
+		vigra::generateWatershedSeeds(
+				source.data(),
+				initialRegions.data(),
+				vigra::IndirectNeighborhood,
+				vigra::SeedOptions().extendedMinima());
+	else
+		vigra::generateWatershedSeeds(
+				source.data().bind<2>(0),
+				initialRegions.data().bind<2>(0),
+				vigra::IndirectNeighborhood,
+				vigra::SeedOptions().extendedMinima());
 
-		// init logger
-		logger::LogManager::init();
+	// perform watersheds or find SLIC superpixels
 
-		// read image
-		ExplicitVolume<float> source = readVolume<float>(getImageFiles(optionSource.as<std::string>()));
+	unsigned int maxLabel;
 
-		// smooth
-		if (optionSmooth) {
+	if (optionSlicSuperpixels) {
 
-			if (source.depth() > 1) {
-				vigra::gaussianSmoothMultiArray(
+		if (source.depth() > 1)
+				maxLabel = vigra::slicSuperpixels(
 						source.data(),
-						source.data(),
-						optionSmooth.as<double>());
-			} else {
-				vigra::gaussianSmoothMultiArray(
-						source.data().bind<2>(0),
+						initialRegions.data(),
+						optionSlicIntensityScaling.as<double>(),
+						optionSliceSize.as<double>());
+		else
+				maxLabel = vigra::slicSuperpixels(
 						source.data().bind<2>(0),
-						optionSmooth.as<double>());
-			}
-		}
+						initialRegions.data().bind<2>(0),
+						optionSlicIntensityScaling.as<double>(),
+						optionSliceSize.as<double>());
 
-		// generate seeds
-		ExplicitVolume<int> initialRegions(source.data().shape()[0], source.data().shape()[1], source.data().shape()[2]);
-		if (optionInitialSuperpixels) {
+		LOG_USER(logger::out) << "found " << maxLabel << " SLIC superpixels" << std::endl;
 
-			initialRegions = readVolume<int>(getImageFiles(optionInitialSuperpixels.as<std::string>()));
+	} else {
 
-		} else {
+		if (source.depth() > 1)
+			maxLabel = vigra::watershedsMultiArray(
+					source.data(), /* non-median filtered, possibly smoothed */
+					initialRegions.data(),
+					vigra::IndirectNeighborhood);
+		else
+			maxLabel = vigra::watershedsMultiArray(
+					source.data().bind<2>(0), /* non-median filtered, possibly smoothed */
+					initialRegions.data().bind<2>(0),
+					vigra::IndirectNeighborhood);
+
+		LOG_USER(logger::out) << "found " << maxLabel << " watershed regions" << std::endl;
+	}
 
-			if (source.depth() > 1)
-				vigra::generateWatershedSeeds(
-						source.data(),
-						initialRegions.data(),
-						vigra::IndirectNeighborhood,
-						vigra::SeedOptions().extendedMinima());
-			else
-				vigra::generateWatershedSeeds(
-						source.data().bind<2>(0),
-						initialRegions.data().bind<2>(0),
-						vigra::IndirectNeighborhood,
-						vigra::SeedOptions().extendedMinima());
+	return maxLabel;
+}
 
-			// perform watersheds or find SLIC superpixels
+/**
+ * Get a copy of the initial regions with superpixelFirstId added to each id.
+ */
+ExplicitVolume<int> getSuperpixelsForExport(const ExplicitVolume<int>& initialRegions) {
 
-			if (optionSlicSuperpixels) {
+	using namespace vigra::functor;
 
-				unsigned int maxLabel;
-				if (source.depth() > 1)
-						maxLabel = vigra::slicSuperpixels(
-								source.data(),
-								initialRegions.data(),
-								optionSlicIntensityScaling.as<double>(),
-								optionSliceSize.as<double>());
-				else
-						maxLabel = vigra::slicSuperpixels(
-								source.data().bind<2>(0),
-								initialRegions.data().bind<2>(0),
-								optionSlicIntensityScaling.as<double>(),
-								optionSliceSize.as<double>());
+	ExplicitVolume<int> initialRegionsExport(initialRegions.data().shape()[0], initialRegions.data().shape()[1], initialRegions.data().shape()[2]);
+	vigra::transformMultiArray(
+			initialRegions.data(),
+			initialRegionsExport.data(),
+			// vigra starts counting sp with 1
+			Arg1() + Param(optionSuperpixelsFirstId.as<int>()));
 
-				LOG_USER(logger::out) << "found " << maxLabel << " SLIC superpixels" << std::endl;
+	return initialRegionsExport;
+}
 
-			} else {
+template <typename Merging>
+std::vector<MergeHistory::Merge> getMerges(const Merging& merging) {
 
-				unsigned int maxLabel;
-				if (source.depth() > 1)
-					maxLabel = vigra::watershedsMultiArray(
-							source.data(), /* non-median filtered, possibly smoothed */
-							initialRegions.data(),
-							vigra::IndirectNeighborhood);
-				else
-					maxLabel = vigra::watershedsMultiArray(
-							source.data().bind<2>(0), /* non-median filtered, possibly smoothed */
-							initialRegions.data().bind<2>(0),
-							vigra::IndirectNeighborhood);
-
-				LOG_USER(logger::out) << "found " << maxLabel << " watershed regions" << std::endl;
-
-				if (optionReportNextSuperpixelId) {
-
-					// report highest used superpixel id
-					LOG_USER(logger::out) << "next superpixel id: ";
-					std::cout << (maxLabel + optionSuperpixelsFirstId.as<int>()) << std::endl;
-				}
-			}
+	std::vector<MergeHistory::Merge> merges(merging.getNumMerges());
+	for (std::size_t i = 0; i < merges.size(); i++)
+		merging.getMerge(i, merges[i].a, merges[i].b, merges[i].c, merges[i].score);
 
-			if (optionSuperpixelImage) {
+	return merges;
+}
 
-				ExplicitVolume<int> initialRegionsExport(source.data().shape()[0], source.data().shape()[1], source.data().shape()[2]);
-				vigra::transformMultiArray(
-						initialRegions.data(),
-						initialRegionsExport.data(),
-						// vigra starts counting sp with 1
-						Arg1() + Param(optionSuperpixelsFirstId.as<int>()));
-
-				if (optionSuperpixelImage)
-					saveVolume(
-							initialRegionsExport,
-							optionSuperpixelImage.as<std::string>());
-			}
+/**
+ * Iteratively merge the initial regions, using the scoring function selected 
+ * on the command line.
+ */
+std::vector<MergeHistory::Merge> createMergeHistory(ExplicitVolume<float>& source, ExplicitVolume<int>& initialRegions) {
+
+	if (optionFastMerging) {
+
+		UnionFindRegionMerging merging(
+				initialRegions.data(),
+				source.data(),
+				optionMergeHistogramBins.as<unsigned int>());
+
+		merging.createMergeTree(optionDontConsiderRegionSize ? 0.0 : optionMultiplyMinRegionSizeExponent.as<float>());
+
+		return getMerges(merging);
+	}
+
+	// extract merge tree
+	IterativeRegionMerging<3> merging(initialRegions.data());
+
+	MedianEdgeIntensity<3> mei(source.data());
+
+	// create the RAG description for the median edge intensities
+	if (optionRagFile)
+		merging.storeRag(optionRagFile.as<std::string>(), mei);
+
+	if (optionMergeSmallRegionsFirst) {
+
+		SmallFirst<MedianEdgeIntensity<3>> scoringFunction(
+				merging.getRag(),
+				source.data(),
+				initialRegions.data(),
+				mei);
+
+		if (optionRandomPerturbation) {
+
+			RandomPerturbation<SmallFirst<MedianEdgeIntensity<3>> > rp(scoringFunction);
+			merging.createMergeTree(rp);
+
+		} else {
+
+			merging.createMergeTree(scoringFunction);
 		}
 
-		// extract merge tree
-		IterativeRegionMerging<3> merging(initialRegions.data());
+	} else if (optionMultiplySizeDifference) {
 
-		MedianEdgeIntensity<3> mei(source.data());
+		MultiplySizeDifference<MedianEdgeIntensity<3>> scoringFunction(
+				merging.getRag(),
+				initialRegions.data(),
+				mei);
 
-		// create the RAG description for the median edge intensities
-		if (optionRagFile)
-			merging.storeRag(optionRagFile.as<std::string>(), mei);
+		if (optionRandomPerturbation) {
 
-		if (optionMergeSmallRegionsFirst) {
+			RandomPerturbation<MultiplySizeDifference<MedianEdgeIntensity<3>> > rp(scoringFunction);
+			merging.createMergeTree(rp);
 
-			SmallFirst<MedianEdgeIntensity<3>> scoringFunction(
-					merging.getRag(),
-					source.data(),
-					initialRegions.data(),
-					mei);
+		} else {
+
+			merging.createMergeTree(scoringFunction);
+		}
+
+	} else {
+
+		if (optionDontConsiderRegionSize) {
 
 			if (optionRandomPerturbation) {
 
-				RandomPerturbation<SmallFirst<MedianEdgeIntensity<3>> > rp(scoringFunction);
+				RandomPerturbation<MedianEdgeIntensity<3>> rp(mei);
 				merging.createMergeTree(rp);
 
 			} else {
 
-				merging.createMergeTree(scoringFunction);
+				merging.createMergeTree(mei);
 			}
 
-		} else if (optionMultiplySizeDifference) {
+		} else {
 
-			MultiplySizeDifference<MedianEdgeIntensity<3>> scoringFunction(
+			MultiplyMinRegionSize<MedianEdgeIntensity<3>> scoringFunction(
 					merging.getRag(),
 					initialRegions.data(),
 					mei);
 
 			if (optionRandomPerturbation) {
 
-				RandomPerturbation<MultiplySizeDifference<MedianEdgeIntensity<3>> > rp(scoringFunction);
+				RandomPerturbation<MultiplyMinRegionSize<MedianEdgeIntensity<3>>> rp(scoringFunction);
 				merging.createMergeTree(rp);
 
 			} else {
 
 				merging.createMergeTree(scoringFunction);
 			}
+		}
+	}
+
+	return getMerges(merging);
+}
+
+void writeMergeHistory(const std::vector<MergeHistory::Merge>& merges, const std::string& filename) {
+
+	if (optionBinaryMergeHistory)
+		MergeHistory::writeBinary(merges, filename);
+	else
+		MergeHistory::writeText(merges, filename);
+}
+
+/**
+ * Compute the merge history of the whole source volume.
+ */
+void processVolume() {
+
+	// read image
+	ExplicitVolume<float> source = readVolume<float>(getImageFiles(optionSource.as<std::string>()));
+
+	// smooth
+	if (optionSmooth)
+		smooth(source);
+
+	// generate seeds
+	ExplicitVolume<int> initialRegions(source.data().shape()[0], source.data().shape()[1], source.data().shape()[2]);
+	if (optionInitialSuperpixels) {
+
+		initialRegions = readVolume<int>(getImageFiles(optionInitialSuperpixels.as<std::string>()));
+
+	} else {
+
+		unsigned int maxLabel = extractSuperpixels(source, initialRegions);
+
+		if (optionReportNextSuperpixelId && !optionSlicSuperpixels) {
+
+			// report highest used superpixel id
+			LOG_USER(logger::out) << "next superpixel id: ";
+			std::cout << (maxLabel + optionSuperpixelsFirstId.as<int>()) << std::endl;
+		}
+
+		if (optionSuperpixelImage)
+			saveVolume(
+					getSuperpixelsForExport(initialRegions),
+					optionSuperpixelImage.as<std::string>());
+	}
+
+	std::vector<MergeHistory::Merge> merges = createMergeHistory(source, initialRegions);
+
+	LOG_USER(logger::out) << "writing merge history..." << std::endl;
+
+	writeMergeHistory(merges, optionMergeHistory.as<std::string>());
+}
+
+/**
+ * Compute one merge history per section of the source stack, processing 
+ * sections in parallel.
+ */
+void processStack() {
+
+	if (optionRagFile)
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"ragFile is not supported in stack mode");
+
+	std::vector<std::string> sourceFiles = getImageFiles(optionSource.as<std::string>());
+	std::vector<std::string> superpixelFiles;
+
+	if (optionInitialSuperpixels) {
+
+		superpixelFiles = getImageFiles(optionInitialSuperpixels.as<std::string>());
+
+		if (superpixelFiles.size() != sourceFiles.size())
+			UTIL_THROW_EXCEPTION(
+					UsageError,
+					"number of initial superpixel images (" << superpixelFiles.size() << ") does not match "
+					"number of source images (" << sourceFiles.size() << ")");
+	}
+
+	std::string mergeHistoryDirectory = optionMergeHistory.as<std::string>();
+	boost::filesystem::create_directories(mergeHistoryDirectory);
+
+	std::string superpixelDirectory;
+	if (optionSuperpixelImage && !optionInitialSuperpixels) {
+
+		superpixelDirectory = optionSuperpixelImage.as<std::string>();
+		boost::filesystem::create_directories(superpixelDirectory);
+	}
+
+	auto processSection = [&](std::size_t i) {
+
+		std::string name = boost::filesystem::path(sourceFiles[i]).stem().native();
+
+		ExplicitVolume<float> source = readVolume<float>(std::vector<std::string>(1, sourceFiles[i]));
+
+		if (optionSmooth)
+			smooth(source);
+
+		ExplicitVolume<int> initialRegions(source.data().shape()[0], source.data().shape()[1], source.data().shape()[2]);
+		if (optionInitialSuperpixels) {
+
+			initialRegions = readVolume<int>(std::vector<std::string>(1, superpixelFiles[i]));
 
 		} else {
 
-			if (optionDontConsiderRegionSize) {
+			extractSuperpixels(source, initialRegions);
 
-				if (optionRandomPerturbation) {
+			if (optionSuperpixelImage) {
 
-					RandomPerturbation<MedianEdgeIntensity<3>> rp(mei);
-					merging.createMergeTree(rp);
+				std::string filename = superpixelDirectory + "/" + name + ".tif";
+				vigra::exportImage(
+						getSuperpixelsForExport(initialRegions).data().bind<2>(0),
+						vigra::ImageExportInfo(filename.c_str()));
+			}
+		}
 
-				} else {
+		std::vector<MergeHistory::Merge> merges = createMergeHistory(source, initialRegions);
 
-					merging.createMergeTree(mei);
-				}
+		writeMergeHistory(
+				merges,
+				mergeHistoryDirectory + "/" + name + (optionBinaryMergeHistory ? ".bin" : ".txt"));
 
-			} else {
+		LOG_USER(logger::out) << "wrote merge history for " << sourceFiles[i] << std::endl;
+	};
 
-				MultiplyMinRegionSize<MedianEdgeIntensity<3>> scoringFunction(
-						merging.getRag(),
-						initialRegions.data(),
-						mei);
+	int numThreads = optionNumThreads.as<int>();
+	if (numThreads <= 0)
+		numThreads = std::max(1u, std::thread::hardware_concurrency());
+	numThreads = std::min(numThreads, static_cast<int>(sourceFiles.size()));
+
+	LOG_USER(logger::out)
+			<< "processing " << sourceFiles.size() << " sections with "
+			<< numThreads << " threads" << std::endl;
+
+	std::atomic<std::size_t> next(0);
+	std::exception_ptr       error;
+	std::mutex               errorMutex;
+
+	auto worker = [&]() {
+
+		while (true) {
+
+			std::size_t i = next++;
+			if (i >= sourceFiles.size())
+				return;
 
-				if (optionRandomPerturbation) {
+			try {
 
-					RandomPerturbation<MultiplyMinRegionSize<MedianEdgeIntensity<3>>> rp(scoringFunction);
-					merging.createMergeTree(rp);
+				processSection(i);
 
-				} else {
+			} catch (...) {
 
-					merging.createMergeTree(scoringFunction);
-				}
+				std::lock_guard<std::mutex> lock(errorMutex);
+				if (!error)
+					error = std::current_exception();
+				next = sourceFiles.size();
 			}
 		}
+	};
 
-		LOG_USER(logger::out) << "writing merge history..." << std::endl;
+	std::vector<std::thread> threads;
+	for (int t = 0; t < numThreads; t++)
+		threads.push_back(std::thread(worker));
+	for (std::thread& thread : threads)
+		thread.join();
 
-		merging.storeMergeHistory(optionMergeHistory.as<std::string>());
+	if (error)
+		std::rethrow_exception(error);
+}
+
+int main(int optionc, char** optionv) {
+
+	try {
+
+		/********
+		 * INIT *
+		 ********/
+
+		// init command line parser
+		util::ProgramOptions::init(optionc, optionv);
+
+		// init logger
+		logger::LogManager::init();
+
+		if (optionFastMerging && (optionMergeSmallRegionsFirst || optionMultiplySizeDifference || optionRandomPerturbation || optionRagFile))
+			UTIL_THROW_EXCEPTION(
+					UsageError,
+					"fastMerging does not support mergeSmallRegionsFirst, multiplySizeDifference, "
+					"randomPerturbation, or ragFile");
+
+		if (optionStack)
+			processStack();
+		else
+			processVolume();
 
 	} catch (Exception& e) {
 
 		handleException(e, std::cerr);
 	}
 }
-
@@ -0,0 +1,137 @@
+#include <tests.h>
+#include <limits>
+#include <map>
+#include <set>
+#include <crag/Crag.h>
+#include <crag/CragVolumes.h>
+#include <crag/PlanarAdjacencyAnnotator.h>
+
+namespace {
+
+// create one leaf node per label of a Voronoi partition of random seeds, with 
+// a few background voxels
+void
+createLeaves(Crag& crag, CragVolumes& volumes, unsigned int seed) {
+
+	const int width  = 23;
+	const int height = 17;
+	const int depth  = 13;
+	const int numSeeds = 15;
+
+	srand(seed);
+
+	std::vector<util::point<int, 3>> seeds;
+	for (int i = 0; i < numSeeds; i++)
+		seeds.push_back(util::point<int, 3>(rand()%width, rand()%height, rand()%depth));
+
+	vigra::MultiArray<3, int> labels(vigra::Shape3(width, height, depth));
+	for (int z = 0; z < depth;  z++)
+	for (int y = 0; y < height; y++)
+	for (int x = 0; x < width;  x++) {
+
+		if (rand()%20 == 0) {
+
+			labels(x, y, z) = -1;
+			continue;
+		}
+
+		int closest = 0;
+		int minDistance = std::numeric_limits<int>::max();
+		for (int i = 0; i < numSeeds; i++) {
+
+			util::point<int, 3> diff = seeds[i] - util::point<int, 3>(x, y, z);
+			int distance = diff.x()*diff.x() + diff.y()*diff.y() + diff.z()*diff.z();
+			if (distance < minDistance) {
+
+				minDistance = distance;
+				closest = i;
+			}
+		}
+
+		labels(x, y, z) = closest;
+	}
+
+	for (int i = 0; i < numSeeds; i++) {
+
+		util::box<int, 3> bb;
+		for (int z = 0; z < depth;  z++)
+		for (int y = 0; y < height; y++)
+		for (int x = 0; x < width;  x++)
+			if (labels(x, y, z) == i)
+				bb.fit(util::box<int, 3>(x, y, z, x + 1, y + 1, z + 1));
+
+		// seeds might coincide
+		if (bb.width() == 0)
+			continue;
+
+		std::shared_ptr<CragVolume> volume = std::make_shared<CragVolume>(bb.width(), bb.height(), bb.depth(), 0);
+		volume->setResolution(util::point<float, 3>(1, 1, 1));
+		volume->setOffset(util::point<float, 3>(bb.min().x(), bb.min().y(), bb.min().z()));
+
+		for (int z = 0; z < bb.depth();  z++)
+		for (int y = 0; y < bb.height(); y++)
+		for (int x = 0; x < bb.width();  x++)
+			if (labels(bb.min().x() + x, bb.min().y() + y, bb.min().z() + z) == i)
+				(*volume)(x, y, z) = 1;
+
+		Crag::CragNode n = crag.addNode();
+		volumes.setVolume(n, volume);
+	}
+}
+
+// the ids of the affiliated edges of each leaf adjacency
+std::map<std::pair<int, int>, std::set<int>>
+getAdjacencies(const Crag& crag) {
+
+	std::map<std::pair<int, int>, std::set<int>> adjacencies;
+
+	for (Crag::CragEdge e : crag.edges()) {
+
+		int u = crag.id(e.u());
+		int v = crag.id(e.v());
+
+		std::set<int>& ids = adjacencies[std::make_pair(std::min(u, v), std::max(u, v))];
+		for (vigra::GridGraph<3>::Edge ae : crag.getAffiliatedEdges(e))
+			ids.insert(crag.getGridGraph().id(ae));
+	}
+
+	return adjacencies;
+}
+
+} // anonymous namespace
+
+void blockwise_adjacency() {
+
+	for (PlanarAdjacencyAnnotator::Neighborhood neighborhood : { PlanarAdjacencyAnnotator::Direct, PlanarAdjacencyAnnotator::Indirect }) {
+
+		Crag        wholeCrag;
+		CragVolumes wholeVolumes(wholeCrag);
+		createLeaves(wholeCrag, wholeVolumes, 42);
+
+		PlanarAdjacencyAnnotator wholeAnnotator(neighborhood);
+		wholeAnnotator.annotate(wholeCrag, wholeVolumes);
+
+		std::map<std::pair<int, int>, std::set<int>> expected = getAdjacencies(wholeCrag);
+		BOOST_CHECK(expected.size() > 0);
+
+		// budgets for slabs of one to more than all sections, each section 
+		// needs 23*17*4 bytes
+		for (std::size_t budget : { 1, 2*23*17*4, 5*23*17*4, 100*23*17*4 }) {
+
+			for (int numThreads : { 1, 3 }) {
+
+				Crag        crag;
+				CragVolumes volumes(crag);
+				createLeaves(crag, volumes, 42);
+
+				PlanarAdjacencyAnnotator annotator(neighborhood);
+				annotator.setBlockBudget(budget);
+				annotator.setNumThreads(numThreads);
+				annotator.annotate(crag, volumes);
+
+				BOOST_CHECK(crag.getGridGraph().shape() == wholeCrag.getGridGraph().shape());
+				BOOST_CHECK(getAdjacencies(crag) == expected);
+			}
+		}
+	}
+}
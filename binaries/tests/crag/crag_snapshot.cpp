@@ -0,0 +1,121 @@
+#include <tests.h>
+#include <crag/Crag.h>
+#include <io/CragSnapshot.h>
+#include <io/Hdf5CragStore.h>
+
+namespace {
+
+void
+checkSameCrag(const Crag& a, const Crag& b) {
+
+	BOOST_CHECK_EQUAL(a.numNodes(), b.numNodes());
+	BOOST_CHECK_EQUAL(a.numEdges(), b.numEdges());
+	BOOST_CHECK_EQUAL(a.numArcs(),  b.numArcs());
+
+	for (Crag::CragNode n : a.nodes()) {
+
+		Crag::CragNode m = b.nodeFromId(a.id(n));
+
+		BOOST_CHECK_EQUAL(a.type(n), b.type(m));
+		BOOST_CHECK_EQUAL(a.isLeafNode(n), b.isLeafNode(m));
+		BOOST_CHECK_EQUAL(a.isRootNode(n), b.isRootNode(m));
+	}
+
+	for (Crag::CragEdge e : a.edges()) {
+
+		// find the same edge in b
+		Crag::CragNode u = b.nodeFromId(a.id(e.u()));
+		Crag::CragNode v = b.nodeFromId(a.id(e.v()));
+
+		bool found = false;
+		for (Crag::CragEdge f : b.adjEdges(u)) {
+
+			if (b.oppositeNode(u, f) != v)
+				continue;
+
+			found = true;
+
+			BOOST_CHECK_EQUAL(a.type(e), b.type(f));
+
+			if (a.isLeafEdge(e)) {
+
+				BOOST_CHECK_EQUAL(a.getAffiliatedEdges(e).size(), b.getAffiliatedEdges(f).size());
+				for (std::size_t i = 0; i < a.getAffiliatedEdges(e).size(); i++)
+					BOOST_CHECK_EQUAL(
+							a.getGridGraph().id(a.getAffiliatedEdges(e)[i]),
+							b.getGridGraph().id(b.getAffiliatedEdges(f)[i]));
+			}
+		}
+
+		BOOST_CHECK(found);
+	}
+}
+
+} // anonymous namespace
+
+void crag_snapshot() {
+
+	Crag crag;
+	crag.setGridGraph(vigra::GridGraph<3>(vigra::Shape3(10, 10, 10), vigra::DirectNeighborhood));
+
+	for (int i = 0; i < 50; i++)
+		crag.addNode(i%3 == 0 ? Crag::SliceNode : Crag::VolumeNode);
+
+	// every 5th node merges the 4 nodes before it
+	for (int i = 4; i < 50; i += 5)
+		for (int j = i - 4; j < i; j++)
+			crag.addSubsetArc(crag.nodeFromId(j), crag.nodeFromId(i));
+
+	for (int i = 0; i < 50; i++)
+		for (int j = i + 1; j < 50; j++)
+			if (rand() > RAND_MAX/2) {
+
+				Crag::CragEdge e = crag.addAdjacencyEdge(
+						crag.nodeFromId(i),
+						crag.nodeFromId(j),
+						(j%2 ? Crag::AdjacencyEdge : Crag::SeparationEdge));
+
+				if (!crag.isLeafEdge(e))
+					continue;
+
+				std::vector<vigra::GridGraph<3>::Edge> affiliatedEdges;
+				for (int k = 0; k < rand()%5; k++)
+					affiliatedEdges.push_back(crag.getGridGraph().edgeFromId(rand()%1000));
+				crag.setAffiliatedEdges(e, affiliatedEdges);
+			}
+
+	// direct round trip
+	{
+		CragSnapshot::write(crag, "test_snapshot.crag", 42);
+
+		Crag crag_;
+		BOOST_CHECK(!CragSnapshot::read(crag_, "test_snapshot.crag", 43));
+		BOOST_CHECK_EQUAL(crag_.numNodes(), 0);
+		BOOST_CHECK(CragSnapshot::read(crag_, "test_snapshot.crag", 42));
+
+		checkSameCrag(crag, crag_);
+	}
+
+	// snapshot and project file give the same CRAG
+	{
+		Hdf5CragStore store("test_snapshot.hdf");
+		store.saveCrag(crag);
+
+		Crag fromSnapshot;
+		store.retrieveCrag(fromSnapshot);
+		checkSameCrag(crag, fromSnapshot);
+
+		// ids are the same as when reading from the project file
+		CragSnapshot::write(crag, store.getCragSnapshotFile(), 0);
+
+		Crag fromProject;
+		store.retrieveCrag(fromProject);
+
+		for (Crag::CragEdge e : fromProject.edges()) {
+
+			Crag::CragEdge f = fromSnapshot.edgeFromId(fromProject.id(e));
+			BOOST_CHECK_EQUAL(fromProject.id(e.u()), fromSnapshot.id(f.u()));
+			BOOST_CHECK_EQUAL(fromProject.id(e.v()), fromSnapshot.id(f.v()));
+		}
+	}
+}
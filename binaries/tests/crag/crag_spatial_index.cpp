@@ -0,0 +1,91 @@
+#include <tests.h>
+#include <crag/Crag.h>
+#include <crag/CragSpatialIndex.h>
+#include <crag/CragVolumes.h>
+
+namespace {
+
+bool
+withinDistance(const util::box<float, 2>& a, const util::box<float, 2>& b, float distance) {
+
+	return
+			a.max().x() >= b.min().x() - distance && a.min().x() <= b.max().x() + distance &&
+			a.max().y() >= b.min().y() - distance && a.min().y() <= b.max().y() + distance;
+}
+
+} // anonymous namespace
+
+void crag_spatial_index() {
+
+	Crag        crag;
+	CragVolumes volumes(crag);
+
+	srand(23);
+
+	// 2D candidates of random size and position in 6 sections, with z 
+	// resolution 2
+	for (int i = 0; i < 300; i++) {
+
+		int section = rand()%6;
+
+		std::shared_ptr<CragVolume> volume = std::make_shared<CragVolume>(1 + rand()%15, 1 + rand()%15, 1);
+		volume->data() = 1;
+		volume->setResolution(util::point<float, 3>(1, 1, 2));
+		volume->setOffset(util::point<float, 3>(rand()%100, rand()%100, 2*section));
+
+		Crag::CragNode n = crag.addNode(Crag::SliceNode);
+		volumes.setVolume(n, volume);
+	}
+
+	// a parent for some pairs of candidates
+	for (int i = 0; i < 20; i++) {
+
+		Crag::CragNode parent = crag.addNode(Crag::SliceNode);
+		crag.addSubsetArc(crag.nodeFromId(2*i),     parent);
+		crag.addSubsetArc(crag.nodeFromId(2*i + 1), parent);
+	}
+
+	for (float cellSize : { 0.0f, 1.0f, 7.5f, 1000.0f }) {
+
+		CragSpatialIndex index(crag, volumes, cellSize);
+
+		for (Crag::CragNode n : crag.nodes()) {
+
+			util::box<float, 3> bb = volumes.getBoundingBox(n);
+			int section = bb.min().z()/2;
+
+			BOOST_CHECK_EQUAL(index.getFirstSection(n), section);
+
+			for (float distance : { 0.0f, 3.0f, 20.0f }) {
+
+				std::vector<Crag::CragNode> expected;
+				std::vector<Crag::CragNode> expectedInSection;
+				std::vector<Crag::CragNode> expectedNeighbors;
+
+				for (Crag::CragNode m : crag.nodes()) {
+
+					util::box<float, 3> bb_m = volumes.getBoundingBox(m);
+					int section_m = bb_m.min().z()/2;
+					int end_m     = std::max(section_m + 1, static_cast<int>(bb_m.max().z()/2));
+
+					if (!withinDistance(bb.project<2>(), bb_m.project<2>(), distance))
+						continue;
+
+					expected.push_back(m);
+					if (section >= section_m && section < end_m)
+						expectedInSection.push_back(m);
+					if (m != n && ((section - 1 >= section_m && section - 1 < end_m) || (index.getEndSection(n) >= section_m && index.getEndSection(n) < end_m)))
+						expectedNeighbors.push_back(m);
+				}
+
+				std::vector<Crag::CragNode> found          = index.find(bb.project<2>(), distance);
+				std::vector<Crag::CragNode> foundInSection = index.find(bb.project<2>(), distance, section);
+				std::vector<Crag::CragNode> neighbors      = index.findNeighbors(n, distance);
+
+				BOOST_CHECK(found == expected);
+				BOOST_CHECK(foundInSection == expectedInSection);
+				BOOST_CHECK(neighbors == expectedNeighbors);
+			}
+		}
+	}
+}
@@ -0,0 +1,118 @@
+#include <tests.h>
+#include <util/exceptions.h>
+#include <crag/Crag.h>
+#include <crag/CragVolumes.h>
+#include <crag/GroundTruthOverlaps.h>
+#include <io/Hdf5CragStore.h>
+
+void ground_truth_overlaps() {
+
+	Crag crag;
+	CragVolumes volumes(crag);
+
+	// two leaf nodes next to each other, merged by node 2
+	for (int i = 0; i < 3; i++)
+		crag.addNode();
+	crag.addSubsetArc(crag.nodeFromId(0), crag.nodeFromId(2));
+	crag.addSubsetArc(crag.nodeFromId(1), crag.nodeFromId(2));
+
+	std::shared_ptr<CragVolume> v0 = std::make_shared<CragVolume>(2, 2, 1);
+	std::shared_ptr<CragVolume> v1 = std::make_shared<CragVolume>(2, 2, 1);
+	v0->setOffset(0, 0, 0);
+	v1->setOffset(2, 0, 0);
+	v0->data() = 1;
+	v1->data() = 1;
+
+	volumes.setVolume(crag.nodeFromId(0), v0);
+	volumes.setVolume(crag.nodeFromId(1), v1);
+
+	// background at (0, 0), region 1 up to x = 2, region 2 at x = 3
+	ExplicitVolume<int> groundTruth(4, 2, 1);
+	for (int y = 0; y < 2; y++)
+		for (int x = 0; x < 4; x++)
+			groundTruth.data()(x, y, 0) = (x < 3 ? 1 : 2);
+	groundTruth.data()(0, 0, 0) = 0;
+
+	for (int numThreads : { 1, 2 }) {
+
+		GroundTruthOverlaps overlaps(crag, volumes, groundTruth, numThreads);
+
+		GroundTruthOverlaps::Overlaps expected0 = { { 0, 1 }, { 1, 3 } };
+		GroundTruthOverlaps::Overlaps expected1 = { { 1, 2 }, { 2, 2 } };
+		GroundTruthOverlaps::Overlaps expected2 = { { 0, 1 }, { 1, 5 }, { 2, 2 } };
+
+		BOOST_CHECK(overlaps[crag.nodeFromId(0)] == expected0);
+		BOOST_CHECK(overlaps[crag.nodeFromId(1)] == expected1);
+		BOOST_CHECK(overlaps[crag.nodeFromId(2)] == expected2);
+		BOOST_CHECK(overlaps.getGroundTruthSizes() == expected2);
+
+		BOOST_CHECK_EQUAL(overlaps.getSize(crag.nodeFromId(0)), 4);
+		BOOST_CHECK_EQUAL(overlaps.getSize(crag.nodeFromId(2)), 8);
+		BOOST_CHECK_EQUAL(overlaps.getOverlap(crag.nodeFromId(0), 2), 0);
+		BOOST_CHECK_EQUAL(overlaps.getGroundTruthSize(1), 5);
+
+		// tables restored from the leaf tables are the same
+		GroundTruthOverlaps restored(crag);
+		restored.setLeafOverlaps(crag.nodeFromId(0), overlaps[crag.nodeFromId(0)]);
+		restored.setLeafOverlaps(crag.nodeFromId(1), overlaps[crag.nodeFromId(1)]);
+		restored.setGroundTruthSizes(overlaps.getGroundTruthSizes());
+		restored.propagate();
+
+		BOOST_CHECK(restored[crag.nodeFromId(2)] == expected2);
+		BOOST_CHECK_EQUAL(restored.getSize(crag.nodeFromId(2)), 8);
+	}
+
+	GroundTruthOverlaps overlaps(crag);
+	BOOST_CHECK_THROW(overlaps.setLeafOverlaps(crag.nodeFromId(2), GroundTruthOverlaps::Overlaps()), UsageError);
+
+	// stored tables are only restored for the same CRAG
+	{
+		GroundTruthOverlaps computed(crag, volumes, groundTruth);
+
+		{
+			Hdf5CragStore store("test_gt_overlaps.hdf");
+			store.saveCrag(crag);
+			store.saveGroundTruthOverlaps(crag, computed);
+		}
+
+		Hdf5CragStore store("test_gt_overlaps.hdf");
+
+		GroundTruthOverlaps restored(crag);
+		BOOST_REQUIRE(store.retrieveGroundTruthOverlaps(crag, restored));
+		BOOST_CHECK(restored[crag.nodeFromId(2)] == computed[crag.nodeFromId(2)]);
+
+		Crag other;
+		for (int i = 0; i < 3; i++)
+			other.addNode();
+		other.addSubsetArc(other.nodeFromId(0), other.nodeFromId(1));
+		other.addSubsetArc(other.nodeFromId(1), other.nodeFromId(2));
+
+		GroundTruthOverlaps unrelated(other);
+		BOOST_CHECK(!store.retrieveGroundTruthOverlaps(other, unrelated));
+
+		// saving empty tables removes the previous ones
+		store.saveGroundTruthOverlaps(crag, GroundTruthOverlaps(crag));
+		BOOST_CHECK(!store.retrieveGroundTruthOverlaps(crag, restored));
+	}
+
+	// a deep chain of nodes does not exhaust the call stack
+	{
+		const int depth = 100000;
+
+		Crag chain;
+		Crag::CragNode prev = chain.addNode();
+		for (int i = 1; i < depth; i++) {
+
+			Crag::CragNode n = chain.addNode();
+			chain.addSubsetArc(prev, n);
+			prev = n;
+		}
+
+		GroundTruthOverlaps deep(chain);
+		deep.setLeafOverlaps(chain.nodeFromId(0), GroundTruthOverlaps::Overlaps{ { 1, 7 } });
+		deep.propagate();
+
+		BOOST_CHECK_EQUAL(deep.getOverlap(prev, 1), 7);
+		BOOST_CHECK_EQUAL(deep.getSize(prev), 7);
+	}
+}
@@ -0,0 +1,78 @@
+#include <tests.h>
+#include <crag/Crag.h>
+#include <io/Hdf5CragStore.h>
+
+namespace {
+
+void
+roundTrip(const Crag& crag, const CragVolumes& volumes, int layoutVersion) {
+
+	{
+		Hdf5CragStore store("test_empty_volume.hdf");
+		store.setLayoutVersion(layoutVersion);
+		store.setRunLengthVolumes(true);
+		store.saveCrag(crag);
+		store.saveVolumes(volumes);
+	}
+
+	Hdf5CragStore store("test_empty_volume.hdf");
+	store.setRunLengthVolumes(true);
+
+	Crag crag_;
+	CragVolumes volumes_(crag_);
+	store.retrieveCrag(crag_);
+	store.retrieveVolumes(volumes_);
+
+	for (Crag::CragNode n : crag.nodes()) {
+
+		if (!crag.isLeafNode(n))
+			continue;
+
+		const RunLengthVolume& a = *volumes.getRunLengthVolume(n);
+		const RunLengthVolume& b = *volumes_.getRunLengthVolume(crag_.nodeFromId(crag.id(n)));
+
+		BOOST_CHECK_EQUAL(a.numVoxels(), b.numVoxels());
+		BOOST_CHECK_EQUAL(a.runs().size(), b.runs().size());
+		BOOST_CHECK_EQUAL(a.getResolution(), b.getResolution());
+		BOOST_CHECK_EQUAL(a.getOffset(), b.getOffset());
+	}
+}
+
+} // anonymous namespace
+
+void hdf5_store_empty_volume() {
+
+	Crag crag;
+	CragVolumes volumes(crag);
+
+	// two leaf nodes, the first one without any foreground voxel
+	for (int i = 0; i < 2; i++) {
+
+		Crag::CragNode n = crag.addNode();
+
+		std::shared_ptr<CragVolume> volume = std::make_shared<CragVolume>(5, 5, 5);
+		volume->setOffset(10*i, 0, 0);
+		volume->setResolution(1.0, 1.0, 1.0);
+
+		volumes.setVolume(n, volume);
+	}
+
+	// only empty volumes
+	roundTrip(crag, volumes, 1);
+	roundTrip(crag, volumes, 2);
+
+	std::shared_ptr<CragVolume> volume = std::make_shared<CragVolume>(5, 5, 5);
+	volume->setOffset(10, 0, 0);
+	volume->setResolution(1.0, 1.0, 1.0);
+	for (unsigned char& v : volume->data())
+		v = rand()%2;
+	volumes.setVolume(crag.nodeFromId(1), volume);
+
+	Crag::CragNode parent = crag.addNode();
+	crag.addSubsetArc(crag.nodeFromId(0), parent);
+	crag.addSubsetArc(crag.nodeFromId(1), parent);
+
+	// an empty volume next to a non-empty one
+	roundTrip(crag, volumes, 1);
+	roundTrip(crag, volumes, 2);
+}
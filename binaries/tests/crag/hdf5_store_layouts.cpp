@@ -0,0 +1,145 @@
+#include <tests.h>
+#include <crag/Crag.h>
+#include <io/Hdf5CragStore.h>
+
+namespace {
+
+void
+checkVolume(const CragVolume& a, const CragVolume& b) {
+
+	BOOST_CHECK_EQUAL(a.getResolution(), b.getResolution());
+	BOOST_CHECK_EQUAL(a.getOffset(), b.getOffset());
+	BOOST_CHECK(a.data() == b.data());
+}
+
+} // anonymous namespace
+
+void hdf5_store_layouts() {
+
+	Crag crag;
+	CragVolumes volumes(crag);
+
+	// 20 leaf nodes in a row along x, every pair merged by a higher node
+	for (int i = 0; i < 20; i++) {
+
+		Crag::CragNode n = crag.addNode();
+
+		std::shared_ptr<CragVolume> volume = std::make_shared<CragVolume>(5, 5, 5);
+		volume->setOffset(10*i, 0, 0);
+		volume->setResolution(1.0, 1.0, 1.0);
+
+		for (unsigned char& v : volume->data())
+			v = rand()%2;
+
+		volumes.setVolume(n, volume);
+	}
+
+	for (int i = 0; i < 20; i += 2) {
+
+		Crag::CragNode n = crag.addNode();
+		crag.addSubsetArc(crag.nodeFromId(i),     n);
+		crag.addSubsetArc(crag.nodeFromId(i + 1), n);
+	}
+
+	{
+		Hdf5CragStore store("test_layouts.hdf");
+		store.setLayoutVersion(2);
+		store.saveCrag(crag);
+		store.saveVolumes(volumes);
+
+		BOOST_CHECK_EQUAL(store.getStoredVolumesLayoutVersion(), 2);
+	}
+
+	Hdf5CragStore store("test_layouts.hdf");
+
+	// all volumes
+	{
+		Crag crag_;
+		CragVolumes volumes_(crag_);
+		store.retrieveCrag(crag_);
+		store.retrieveVolumes(volumes_);
+
+		for (int i = 0; i < 20; i++)
+			checkVolume(*volumes[crag.nodeFromId(i)], *volumes_[crag_.nodeFromId(i)]);
+	}
+
+	// the leaf volumes of a higher node
+	{
+		Crag crag_;
+		CragVolumes volumes_(crag_);
+		store.retrieveCrag(crag_);
+		store.retrieveVolumes(volumes_, std::vector<Crag::CragNode>{crag_.nodeFromId(22)});
+
+		for (int i = 0; i < 20; i++) {
+
+			if (i == 4 || i == 5)
+				checkVolume(*volumes[crag.nodeFromId(i)], *volumes_[crag_.nodeFromId(i)]);
+			else
+				BOOST_CHECK_THROW(volumes_[crag_.nodeFromId(i)], UsageError);
+		}
+	}
+
+	// the volumes intersecting a region of interest
+	{
+		Crag crag_;
+		CragVolumes volumes_(crag_);
+		store.retrieveCrag(crag_);
+		store.retrieveVolumes(
+				volumes_,
+				util::box<float, 3>(
+						util::point<float, 3>(32, 0, 0),
+						util::point<float, 3>(63, 5, 5)));
+
+		for (int i = 0; i < 20; i++) {
+
+			if (i >= 4 && i <= 6)
+				checkVolume(*volumes[crag.nodeFromId(i)], *volumes_[crag_.nodeFromId(i)]);
+			else
+				BOOST_CHECK_THROW(volumes_[crag_.nodeFromId(i)], UsageError);
+		}
+	}
+
+	// upgrade from layout 1
+	{
+		Hdf5CragStore v1("test_layouts_v1.hdf");
+		v1.setLayoutVersion(1);
+		v1.saveCrag(crag);
+		v1.saveVolumes(volumes);
+
+		BOOST_CHECK_EQUAL(v1.getStoredVolumesLayoutVersion(), 1);
+
+		v1.upgradeLayout();
+
+		BOOST_CHECK_EQUAL(v1.getStoredVolumesLayoutVersion(), 2);
+		BOOST_CHECK_EQUAL(v1.getLayoutVersion(), 1);
+
+		Crag crag_;
+		CragVolumes volumes_(crag_);
+		v1.retrieveCrag(crag_);
+		v1.retrieveVolumes(volumes_);
+
+		for (int i = 0; i < 20; i++)
+			checkVolume(*volumes[crag.nodeFromId(i)], *volumes_[crag_.nodeFromId(i)]);
+	}
+
+	// writing no volumes in layout 2 replaces volumes of layout 1
+	{
+		Hdf5CragStore store("test_layouts_replace.hdf");
+		store.setLayoutVersion(1);
+		store.saveCrag(crag);
+		store.saveVolumes(volumes);
+
+		Crag empty;
+		CragVolumes emptyVolumes(empty);
+		store.setLayoutVersion(2);
+		store.saveCrag(empty);
+		store.saveVolumes(emptyVolumes);
+
+		BOOST_CHECK_EQUAL(store.getStoredVolumesLayoutVersion(), 2);
+
+		Crag crag_;
+		CragVolumes volumes_(crag_);
+		store.retrieveCrag(crag_);
+		BOOST_CHECK_NO_THROW(store.retrieveVolumes(volumes_));
+	}
+}
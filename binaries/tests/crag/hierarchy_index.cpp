@@ -0,0 +1,105 @@
+#include <random>
+#include <tests.h>
+#include <crag/Crag.h>
+
+namespace hierarchy_index_case {
+
+std::set<int> ids(const Crag& crag, const std::set<Crag::CragEdge>& edges) {
+
+	std::set<int> ids;
+	for (Crag::CragEdge e : edges)
+		ids.insert(crag.id(e));
+	return ids;
+}
+
+} using namespace hierarchy_index_case;
+
+void hierarchy_index() {
+
+	// create a forest of random merge trees over 40 leaves, with random 
+	// adjacency edges between all nodes
+
+	Crag crag;
+	std::mt19937 random(42);
+
+	std::vector<Crag::CragNode> roots;
+	for (int i = 0; i < 40; i++)
+		roots.push_back(crag.addNode());
+
+	for (int i = 0; i < 30; i++) {
+
+		std::shuffle(roots.begin(), roots.end(), random);
+
+		Crag::CragNode a = roots.back();
+		roots.pop_back();
+		Crag::CragNode b = roots.back();
+		roots.pop_back();
+
+		Crag::CragNode parent = crag.addNode();
+		crag.addSubsetArc(a, parent);
+		crag.addSubsetArc(b, parent);
+		roots.push_back(parent);
+	}
+
+	std::vector<Crag::CragNode> nodes;
+	for (Crag::CragNode n : crag.nodes())
+		nodes.push_back(n);
+
+	std::uniform_int_distribution<int> anyNode(0, nodes.size() - 1);
+	for (int i = 0; i < 150; i++) {
+
+		Crag::CragNode u = nodes[anyNode(random)];
+		Crag::CragNode v = nodes[anyNode(random)];
+
+		if (u != v)
+			crag.addAdjacencyEdge(u, v);
+	}
+
+	// get results without index
+
+	std::vector<int>                      levels;
+	std::vector<std::set<Crag::CragNode>> leafNodes;
+	std::vector<std::set<int>>            nodeLeafEdges;
+	std::vector<std::set<int>>            edgeLeafEdges;
+	std::vector<std::set<int>>            descendantEdges;
+
+	for (Crag::CragNode n : crag.nodes()) {
+
+		levels.push_back(crag.getLevel(n));
+		leafNodes.push_back(crag.leafNodes(n));
+		nodeLeafEdges.push_back(ids(crag, crag.leafEdges(n)));
+	}
+	for (Crag::CragEdge e : crag.edges()) {
+
+		edgeLeafEdges.push_back(ids(crag, crag.leafEdges(e)));
+		descendantEdges.push_back(ids(crag, crag.descendantEdges(e)));
+	}
+
+	// compare to results with index
+
+	BOOST_REQUIRE(crag.buildHierarchyIndex());
+	BOOST_REQUIRE(crag.getHierarchyIndex() != 0);
+
+	int i = 0;
+	for (Crag::CragNode n : crag.nodes()) {
+
+		BOOST_CHECK_EQUAL(crag.getLevel(n), levels[i]);
+		BOOST_CHECK(crag.leafNodes(n) == leafNodes[i]);
+		BOOST_CHECK(ids(crag, crag.leafEdges(n)) == nodeLeafEdges[i]);
+		BOOST_CHECK_EQUAL(crag.getHierarchyIndex()->getNumLeafNodes(crag.id(n)), leafNodes[i].size());
+		BOOST_CHECK_EQUAL(crag.getHierarchyIndex()->getNumLeafEdges(crag.id(n)), nodeLeafEdges[i].size());
+		i++;
+	}
+
+	i = 0;
+	for (Crag::CragEdge e : crag.edges()) {
+
+		BOOST_CHECK(ids(crag, crag.leafEdges(e)) == edgeLeafEdges[i]);
+		BOOST_CHECK(ids(crag, crag.descendantEdges(e)) == descendantEdges[i]);
+		i++;
+	}
+
+	// modifications discard the index
+	crag.addNode();
+	BOOST_CHECK(crag.getHierarchyIndex() == 0);
+}
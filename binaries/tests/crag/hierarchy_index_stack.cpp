@@ -0,0 +1,130 @@
+#include <tests.h>
+#include <set>
+#include <util/exceptions.h>
+#include <crag/Crag.h>
+#include <crag/CragHierarchyIndex.h>
+#include <crag/CragStackCombiner.h>
+#include <crag/CragVolumes.h>
+
+namespace hierarchy_index_stack_case {
+
+std::set<int> ids(const Crag& crag, const std::set<Crag::CragEdge>& edges) {
+
+	std::set<int> ids;
+	for (Crag::CragEdge e : edges)
+		ids.insert(crag.id(e));
+	return ids;
+}
+
+// a stack of three sections with four strips each, merged pairwise, combined 
+// into one CRAG
+void createStack(Crag& crag, CragVolumes& volumes) {
+
+	std::vector<std::unique_ptr<Crag>>        crags;
+	std::vector<std::unique_ptr<CragVolumes>> cragsVolumes;
+
+	for (int z = 0; z < 3; z++) {
+
+		crags.push_back(std::unique_ptr<Crag>(new Crag()));
+		cragsVolumes.push_back(std::unique_ptr<CragVolumes>(new CragVolumes(*crags.back())));
+
+		Crag&        section = *crags.back();
+		CragVolumes& sectionVolumes = *cragsVolumes.back();
+
+		std::vector<Crag::CragNode> strips;
+		for (int i = 0; i < 4; i++) {
+
+			std::shared_ptr<CragVolume> volume = std::make_shared<CragVolume>(3, 10, 1);
+			volume->data() = 1;
+			volume->setResolution(util::point<float, 3>(1, 1, 1));
+			volume->setOffset(util::point<float, 3>(3*i + z%2, 0, z));
+
+			Crag::CragNode n = section.addNode(Crag::SliceNode);
+			sectionVolumes.setVolume(n, volume);
+			strips.push_back(n);
+
+			if (i > 0)
+				section.addAdjacencyEdge(strips[i-1], n);
+		}
+
+		for (int i = 0; i < 4; i += 2) {
+
+			Crag::CragNode parent = section.addNode(Crag::SliceNode);
+			section.addSubsetArc(strips[i], parent);
+			section.addSubsetArc(strips[i+1], parent);
+		}
+	}
+
+	CragStackCombiner combiner;
+	combiner.setNumThreads(1);
+	combiner.combine(crags, cragsVolumes, crag, volumes);
+}
+
+} using namespace hierarchy_index_stack_case;
+
+void hierarchy_index_stack() {
+
+	Crag        crag;
+	CragVolumes volumes(crag);
+	createStack(crag, volumes);
+
+	// slice nodes are children of their parent slice nodes and of their 
+	// AssignmentNodes
+	BOOST_REQUIRE(!CragHierarchyIndex::isApplicable(crag));
+
+	std::vector<int>                      levels;
+	std::vector<std::set<Crag::CragNode>> leafNodes;
+	std::vector<std::set<int>>            nodeLeafEdges;
+	std::vector<std::set<int>>            edgeLeafEdges;
+	std::vector<std::set<int>>            descendantEdges;
+
+	for (Crag::CragNode n : crag.nodes()) {
+
+		levels.push_back(crag.getLevel(n));
+		leafNodes.push_back(crag.leafNodes(n));
+		nodeLeafEdges.push_back(ids(crag, crag.leafEdges(n)));
+	}
+	for (Crag::CragEdge e : crag.edges()) {
+
+		edgeLeafEdges.push_back(ids(crag, crag.leafEdges(e)));
+		descendantEdges.push_back(ids(crag, crag.descendantEdges(e)));
+	}
+
+	// no index is built, queries fall back to the traversals
+	BOOST_CHECK(!crag.buildHierarchyIndex());
+	BOOST_CHECK(crag.getHierarchyIndex() == 0);
+	BOOST_CHECK_THROW(CragHierarchyIndex index(crag), UsageError);
+
+	int i = 0;
+	for (Crag::CragNode n : crag.nodes()) {
+
+		BOOST_CHECK_EQUAL(crag.getLevel(n), levels[i]);
+		BOOST_CHECK(crag.leafNodes(n) == leafNodes[i]);
+		BOOST_CHECK(ids(crag, crag.leafEdges(n)) == nodeLeafEdges[i]);
+		i++;
+	}
+
+	i = 0;
+	for (Crag::CragEdge e : crag.edges()) {
+
+		BOOST_CHECK(ids(crag, crag.leafEdges(e)) == edgeLeafEdges[i]);
+		BOOST_CHECK(ids(crag, crag.descendantEdges(e)) == descendantEdges[i]);
+		i++;
+	}
+
+	// an AssignmentNode covers the leaves of both its slice nodes
+	for (Crag::CragNode n : crag.nodes()) {
+
+		if (crag.type(n) != Crag::AssignmentNode)
+			continue;
+
+		std::set<Crag::CragNode> expected;
+		for (Crag::CragArc a : crag.inArcs(n)) {
+
+			std::set<Crag::CragNode> childLeaves = crag.leafNodes(a.source());
+			expected.insert(childLeaves.begin(), childLeaves.end());
+		}
+
+		BOOST_CHECK(crag.leafNodes(n) == expected);
+	}
+}
@@ -0,0 +1,124 @@
+#include <tests.h>
+#include <crag/Crag.h>
+#include <crag/CragVolumes.h>
+#include <crag/RunLengthVolume.h>
+#include <features/Overlap.h>
+
+void run_length_volume() {
+
+	// a few leaf volumes with some empty space
+
+	std::vector<std::shared_ptr<CragVolume>> dense;
+	for (int i = 0; i < 3; i++) {
+
+		auto v = std::make_shared<CragVolume>(10, 10, 10);
+		v->setOffset(2*i, i, 3*i);
+
+		for (int z = 0; z < 10; z++)
+		for (int y = 0; y < 10; y++)
+		for (int x = 0; x < 10; x++)
+			if ((x + y + z + i)%3 == 0 || (x > 2 && x < 6))
+				(*v)(x, y, z) = 1;
+
+		dense.push_back(v);
+	}
+
+	// encoding and materializing preserves the volume
+
+	std::vector<std::shared_ptr<RunLengthVolume>> runs;
+	for (auto v : dense) {
+
+		auto r = std::make_shared<RunLengthVolume>(*v);
+		auto m = r->materialize();
+
+		BOOST_CHECK_EQUAL(r->getBoundingBox(), v->getBoundingBox());
+		BOOST_CHECK_EQUAL(m->getBoundingBox(), v->getBoundingBox());
+
+		std::size_t numVoxels = 0;
+		for (int z = 0; z < 10; z++)
+		for (int y = 0; y < 10; y++)
+		for (int x = 0; x < 10; x++) {
+
+			BOOST_CHECK_EQUAL((*m)(x, y, z), (*v)(x, y, z));
+			if ((*v)(x, y, z))
+				numVoxels++;
+		}
+
+		BOOST_CHECK_EQUAL(r->numVoxels(), numVoxels);
+
+		runs.push_back(r);
+	}
+
+	// merging runs gives the same union as the dense UnionVolume
+
+	auto expected = UnionVolume(dense).materialize();
+	auto united   = RunLengthVolume::unite(runs);
+	auto mixed    = UnionVolume(
+			std::vector<std::shared_ptr<CragVolume>>{dense[0]},
+			std::vector<std::shared_ptr<RunLengthVolume>>{runs[1], runs[2]});
+
+	BOOST_CHECK_EQUAL(united->getBoundingBox(), expected->getBoundingBox());
+	BOOST_CHECK_EQUAL(mixed.getBoundingBox(), expected->getBoundingBox());
+
+	auto materialized      = united->materialize();
+	auto mixedMaterialized = mixed.materialize();
+	auto mixedRuns         = mixed.materializeRuns()->materialize();
+
+	std::size_t numVoxels = 0;
+	for (unsigned int z = 0; z < expected->depth();  z++)
+	for (unsigned int y = 0; y < expected->height(); y++)
+	for (unsigned int x = 0; x < expected->width();  x++) {
+
+		BOOST_CHECK_EQUAL((*materialized)(x, y, z), (*expected)(x, y, z));
+		BOOST_CHECK_EQUAL((*mixedMaterialized)(x, y, z), (*expected)(x, y, z));
+		BOOST_CHECK_EQUAL((*mixedRuns)(x, y, z), (*expected)(x, y, z));
+		if ((*expected)(x, y, z))
+			numVoxels++;
+	}
+
+	BOOST_CHECK_EQUAL(united->numVoxels(), numVoxels);
+
+	// runs are sorted and disjoint
+
+	for (std::size_t i = 1; i < united->runs().size(); i++) {
+
+		const RunLengthVolume::Run& prev = united->runs()[i-1];
+		const RunLengthVolume::Run& run  = united->runs()[i];
+
+		if (prev.z == run.z && prev.y == run.y)
+			BOOST_CHECK_LT(prev.x + prev.length, run.x);
+		else
+			BOOST_CHECK(prev.z < run.z || (prev.z == run.z && prev.y < run.y));
+	}
+
+	// overlaps agree with dense overlaps
+
+	Overlap overlap;
+	for (int i = 0; i < 3; i++)
+		for (int j = 0; j < 3; j++) {
+
+			BOOST_CHECK_EQUAL(overlap(*runs[i], *runs[j]), overlap(*dense[i], *dense[j]));
+			BOOST_CHECK_EQUAL(overlap(*runs[i], *united), overlap(*dense[i], *expected));
+		}
+
+	// CragVolumes with run-length encoded leaf volumes
+
+	Crag crag;
+	CragVolumes volumes(crag);
+
+	for (int i = 0; i < 4; i++)
+		crag.addNode();
+	crag.addSubsetArc(crag.nodeFromId(0), crag.nodeFromId(3));
+	crag.addSubsetArc(crag.nodeFromId(1), crag.nodeFromId(3));
+	crag.addSubsetArc(crag.nodeFromId(2), crag.nodeFromId(3));
+
+	volumes.setVolume(crag.nodeFromId(0), dense[0]);
+	volumes.setVolume(crag.nodeFromId(1), runs[1]);
+	volumes.setVolume(crag.nodeFromId(2), runs[2]);
+
+	BOOST_CHECK_EQUAL(volumes.getBoundingBox(crag.nodeFromId(3)), expected->getBoundingBox());
+	BOOST_CHECK_EQUAL(volumes.getRunLengthVolume(crag.nodeFromId(3))->numVoxels(), numVoxels);
+	BOOST_CHECK_EQUAL(volumes.getRunLengthVolume(crag.nodeFromId(1)), runs[1]);
+	BOOST_CHECK_EQUAL(volumes[crag.nodeFromId(0)], dense[0]);
+	BOOST_CHECK_EQUAL(overlap(*volumes[crag.nodeFromId(3)], *expected), overlap(*expected, *expected));
+}
@@ -0,0 +1,125 @@
+#include <tests.h>
+#include <set>
+#include <tuple>
+#include <crag/Crag.h>
+#include <crag/CragStackCombiner.h>
+#include <crag/CragVolumes.h>
+
+namespace {
+
+// a stack of 2D CRAGs, each with strips of varying width as leaf nodes and a 
+// parent for each pair of strips
+void
+createSections(
+		std::vector<std::unique_ptr<Crag>>&        crags,
+		std::vector<std::unique_ptr<CragVolumes>>& volumes) {
+
+	for (int z = 0; z < 7; z++) {
+
+		crags.push_back(std::unique_ptr<Crag>(new Crag()));
+		volumes.push_back(std::unique_ptr<CragVolumes>(new CragVolumes(*crags.back())));
+
+		Crag&        crag = *crags.back();
+		CragVolumes& vols = *volumes.back();
+
+		int x = 0;
+		std::vector<Crag::CragNode> strips;
+		for (int i = 0; i < 6; i++) {
+
+			int width = 2 + (i + z)%3;
+
+			std::shared_ptr<CragVolume> volume = std::make_shared<CragVolume>(width, 10, 1);
+			volume->data() = 1;
+			volume->setResolution(util::point<float, 3>(1, 1, 1));
+			volume->setOffset(util::point<float, 3>(x, 0, z));
+			x += width;
+
+			Crag::CragNode n = crag.addNode(Crag::SliceNode);
+			vols.setVolume(n, volume);
+			strips.push_back(n);
+
+			if (i > 0)
+				crag.addAdjacencyEdge(strips[i-1], n);
+		}
+
+		for (int i = 0; i < 6; i += 2) {
+
+			Crag::CragNode parent = crag.addNode(Crag::SliceNode);
+			crag.addSubsetArc(strips[i], parent);
+			crag.addSubsetArc(strips[i+1], parent);
+		}
+	}
+}
+
+void
+combine(Crag& crag, CragVolumes& volumes, int numThreads) {
+
+	std::vector<std::unique_ptr<Crag>>        crags;
+	std::vector<std::unique_ptr<CragVolumes>> cragsVolumes;
+	createSections(crags, cragsVolumes);
+
+	CragStackCombiner combiner;
+	combiner.setNumThreads(numThreads);
+	combiner.combine(crags, cragsVolumes, crag, volumes);
+
+	BOOST_CHECK(crags.empty());
+}
+
+} // anonymous namespace
+
+void stack_combiner() {
+
+	Crag        serial;
+	CragVolumes serialVolumes(serial);
+	combine(serial, serialVolumes, 1);
+
+	// every strip overlaps with at least one strip in the next section
+	int numAssignments = 0;
+	for (Crag::CragNode n : serial.nodes())
+		if (serial.type(n) == Crag::AssignmentNode)
+			numAssignments++;
+	BOOST_CHECK(numAssignments >= 6*6);
+
+	for (int numThreads : { 2, 3, 8 }) {
+
+		Crag        parallel;
+		CragVolumes parallelVolumes(parallel);
+		combine(parallel, parallelVolumes, numThreads);
+
+		BOOST_REQUIRE_EQUAL(serial.numNodes(), parallel.numNodes());
+		BOOST_CHECK_EQUAL(serial.numEdges(), parallel.numEdges());
+		BOOST_CHECK_EQUAL(serial.numArcs(),  parallel.numArcs());
+
+		// node ids do not depend on the number of threads
+		for (Crag::CragNode n : serial.nodes()) {
+
+			Crag::CragNode m = parallel.nodeFromId(serial.id(n));
+
+			BOOST_CHECK_EQUAL(serial.type(n), parallel.type(m));
+
+			if (serial.isLeafNode(n)) {
+
+				util::box<float, 3> a = serialVolumes.getBoundingBox(n);
+				util::box<float, 3> b = parallelVolumes.getBoundingBox(m);
+
+				BOOST_CHECK_EQUAL(a.min().x(), b.min().x());
+				BOOST_CHECK_EQUAL(a.min().z(), b.min().z());
+				BOOST_CHECK_EQUAL(a.max().x(), b.max().x());
+			}
+		}
+
+		std::set<std::tuple<int, int, int>> serialEdges, parallelEdges;
+		for (Crag::CragEdge e : serial.edges())
+			serialEdges.insert(std::make_tuple(serial.id(e.u()), serial.id(e.v()), static_cast<int>(serial.type(e))));
+		for (Crag::CragEdge e : parallel.edges())
+			parallelEdges.insert(std::make_tuple(parallel.id(e.u()), parallel.id(e.v()), static_cast<int>(parallel.type(e))));
+		BOOST_CHECK(serialEdges == parallelEdges);
+
+		std::set<std::pair<int, int>> serialArcs, parallelArcs;
+		for (Crag::CragArc a : serial.arcs())
+			serialArcs.insert(std::make_pair(serial.id(a.source()), serial.id(a.target())));
+		for (Crag::CragArc a : parallel.arcs())
+			parallelArcs.insert(std::make_pair(parallel.id(a.source()), parallel.id(a.target())));
+		BOOST_CHECK(serialArcs == parallelArcs);
+	}
+}
@@ -5,7 +5,18 @@ BEGIN_TEST_SUITE(crag)
 	ADD_TEST_CASE(create_crag)
 	ADD_TEST_CASE(modify_crag)
 	ADD_TEST_CASE(hdf5_store)
+	ADD_TEST_CASE(hdf5_store_layouts)
+	ADD_TEST_CASE(hdf5_store_empty_volume)
+	ADD_TEST_CASE(crag_snapshot)
+	ADD_TEST_CASE(blockwise_adjacency)
+	ADD_TEST_CASE(stack_combiner)
+	ADD_TEST_CASE(crag_spatial_index)
 	ADD_TEST_CASE(crag_iterators)
+	ADD_TEST_CASE(hierarchy_index)
+	ADD_TEST_CASE(hierarchy_index_stack)
 	ADD_TEST_CASE(volumes)
+	ADD_TEST_CASE(run_length_volume)
+	ADD_TEST_CASE(volume_cache)
+	ADD_TEST_CASE(ground_truth_overlaps)
 
 END_TEST_SUITE()
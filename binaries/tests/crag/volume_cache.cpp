@@ -0,0 +1,87 @@
+#include <tests.h>
+#include <crag/Crag.h>
+#include <crag/CragVolumes.h>
+#include <crag/VolumeCache.h>
+
+void volume_cache() {
+
+	// volumes of 1000 voxels each
+	auto create = []{ return std::make_shared<CragVolume>(10, 10, 10); };
+	std::size_t bytes = VolumeCache::getBytes(*create());
+
+	VolumeCache cache(3*bytes);
+
+	auto v0 = cache.get(0, create);
+	auto v1 = cache.get(1, create);
+	auto v2 = cache.get(2, create);
+
+	VolumeCache::Statistics statistics = cache.getStatistics();
+	BOOST_CHECK_EQUAL(statistics.misses, 3);
+	BOOST_CHECK_EQUAL(statistics.hits, 0);
+	BOOST_CHECK_EQUAL(statistics.entries, 3);
+	BOOST_CHECK_EQUAL(statistics.bytes, 3*bytes);
+
+	// cached volumes are returned without creating them again
+	BOOST_CHECK_EQUAL(cache.get(0, create), v0);
+	BOOST_CHECK_EQUAL(cache.getStatistics().hits, 1);
+
+	// dense and run-length volumes of the same node are different entries
+	cache.getRuns(0, [&]{ return std::make_shared<RunLengthVolume>(*v0); });
+	BOOST_CHECK_EQUAL(cache.getStatistics().misses, 4);
+
+	// 1 is the least recently used volume and got evicted
+	statistics = cache.getStatistics();
+	BOOST_CHECK_EQUAL(statistics.evictions, 1);
+	BOOST_CHECK_EQUAL(statistics.entries, 3);
+	BOOST_CHECK_EQUAL(cache.get(0, create), v0);
+	BOOST_CHECK(cache.get(1, create) != v1);
+
+	// volumes larger than the cache are not cached
+	cache.get(3, []{ return std::make_shared<CragVolume>(100, 100, 10); });
+	BOOST_CHECK_LE(cache.getStatistics().bytes, 3*bytes);
+
+	cache.setMaxBytes(bytes);
+	BOOST_CHECK_EQUAL(cache.getStatistics().entries, 1);
+	BOOST_CHECK_EQUAL(cache.getStatistics().bytes, bytes);
+
+	cache.clear();
+	BOOST_CHECK_EQUAL(cache.getStatistics().entries, 0);
+	BOOST_CHECK_EQUAL(cache.getStatistics().bytes, 0);
+
+	// CragVolumes respects the cache size
+
+	Crag crag;
+	CragVolumes volumes(crag);
+
+	for (int i = 0; i < 5; i++)
+		crag.addNode();
+	crag.addSubsetArc(crag.nodeFromId(0), crag.nodeFromId(3));
+	crag.addSubsetArc(crag.nodeFromId(1), crag.nodeFromId(3));
+	crag.addSubsetArc(crag.nodeFromId(2), crag.nodeFromId(4));
+	crag.addSubsetArc(crag.nodeFromId(3), crag.nodeFromId(4));
+
+	for (int i = 0; i < 3; i++) {
+
+		auto v = std::make_shared<CragVolume>(10, 10, 10);
+		v->setOffset(i, i, i);
+		volumes.setVolume(crag.nodeFromId(i), v);
+	}
+
+	// the combined bounding box does not need any materialization
+	BOOST_CHECK_EQUAL(
+			volumes.getBoundingBox(),
+			volumes[crag.nodeFromId(0)]->getBoundingBox() + volumes[crag.nodeFromId(2)]->getBoundingBox());
+	BOOST_CHECK_EQUAL(volumes.getCacheStatistics().misses, 0);
+
+	volumes.setCacheSize(0);
+	volumes[crag.nodeFromId(3)];
+	volumes[crag.nodeFromId(4)];
+	BOOST_CHECK_EQUAL(volumes.getCacheStatistics().misses, 2);
+	BOOST_CHECK_EQUAL(volumes.getCacheStatistics().bytes, 0);
+
+	volumes.setCacheSize(100*bytes);
+	volumes[crag.nodeFromId(4)];
+	volumes[crag.nodeFromId(4)];
+	BOOST_CHECK_EQUAL(volumes.getCacheStatistics().hits, 1);
+	BOOST_CHECK_EQUAL(volumes.getCacheStatistics().entries, 1);
+}
@@ -0,0 +1,81 @@
+#include <tests.h>
+#include <crag/Crag.h>
+#include <crag/CragVolumes.h>
+#include <features/HausdorffDistance.h>
+#include <features/BoundaryHausdorffDistance.h>
+
+void boundary_hausdorff() {
+
+	Crag crag;
+	CragVolumes volumes(crag);
+
+	// blobs of pseudo-random shape, some overlapping, some far apart, and one
+	// empty candidate
+	unsigned int seed = 42;
+	auto random = [&seed](unsigned int n) {
+
+		seed = seed*1103515245 + 12345;
+		return (seed/65536)%n;
+	};
+
+	for (int i = 0; i < 12; i++) {
+
+		Crag::CragNode n = crag.addNode();
+
+		int width  = 3 + random(15);
+		int height = 3 + random(15);
+
+		std::shared_ptr<CragVolume> volume = std::make_shared<CragVolume>(width, height, 1);
+		volume->setResolution(2, 1, 1);
+		volume->setOffset(2*random(40), random(40), 0);
+		volume->data() = 0;
+
+		if (i != 5)
+			for (int y = 0; y < height; y++)
+				for (int x = 0; x < width; x++)
+					if (random(4) != 0)
+						(*volume)(x, y, 0) = 1;
+
+		volumes.setVolume(n, volume);
+	}
+
+	for (double maxDistance : { 5.0, 100.0 }) {
+
+		HausdorffDistance reference(maxDistance);
+
+		// a cache of a few boundaries to exercise evictions
+		BoundaryHausdorffDistance hausdorff(crag, volumes, maxDistance, 4096);
+
+		std::vector<BoundaryHausdorffDistance::NodePair> pairs;
+		std::vector<std::pair<double, double>> expected;
+
+		for (Crag::CragNode i : crag.nodes())
+			for (Crag::CragNode j : crag.nodes()) {
+
+				if (i == j)
+					continue;
+
+				double i_j, j_i;
+				double ref_i_j, ref_j_i;
+				hausdorff(i, j, i_j, j_i);
+				reference(*volumes[i], *volumes[j], ref_i_j, ref_j_i);
+
+				BOOST_CHECK_CLOSE(i_j, ref_i_j, 1e-6);
+				BOOST_CHECK_CLOSE(j_i, ref_j_i, 1e-6);
+
+				pairs.push_back(std::make_pair(i, j));
+				expected.push_back(std::make_pair(ref_i_j, ref_j_i));
+			}
+
+		// same results in parallel
+		std::vector<std::pair<double, double>> distances;
+		hausdorff(pairs, distances, 4);
+
+		BOOST_REQUIRE_EQUAL(distances.size(), expected.size());
+		for (std::size_t k = 0; k < distances.size(); k++) {
+
+			BOOST_CHECK_CLOSE(distances[k].first,  expected[k].first,  1e-6);
+			BOOST_CHECK_CLOSE(distances[k].second, expected[k].second, 1e-6);
+		}
+	}
+}
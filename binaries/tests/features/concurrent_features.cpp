@@ -0,0 +1,122 @@
+#include <tests.h>
+#include <crag/Crag.h>
+#include <crag/CragVolumes.h>
+#include <features/NodeFeatures.h>
+#include <features/EdgeFeatures.h>
+#include <features/CompositeFeatureProvider.h>
+#include <features/TopologicalFeatureProvider.h>
+#include <features/Overlap.h>
+
+/**
+ * Features that depend on the (materialized) volumes of candidates.
+ */
+class VolumeSizeFeatureProvider : public FeatureProvider<VolumeSizeFeatureProvider> {
+
+public:
+
+	VolumeSizeFeatureProvider(const CragVolumes& volumes) :
+		_volumes(volumes) {}
+
+	bool supportsConcurrency() const override { return true; }
+
+	template <typename ContainerT>
+	void appendNodeFeatures(const Crag::CragNode n, ContainerT& adaptor) {
+
+		std::shared_ptr<CragVolume> volume = _volumes[n];
+
+		adaptor.append(volume->getDiscreteBoundingBox().volume());
+		adaptor.append(_volumes.getRunLengthVolume(n)->numVoxels());
+	}
+
+	template <typename ContainerT>
+	void appendEdgeFeatures(const Crag::CragEdge e, ContainerT& adaptor) {
+
+		Overlap overlap;
+		adaptor.append(overlap(*_volumes.getRunLengthVolume(e.u()), *_volumes.getRunLengthVolume(e.v())));
+		adaptor.append(overlap(*_volumes[e.u()], *_volumes[e.v()]));
+	}
+
+private:
+
+	const CragVolumes& _volumes;
+};
+
+void
+extractFeatures(
+		const Crag&        crag,
+		const CragVolumes& volumes,
+		int                numThreads,
+		NodeFeatures&      nodeFeatures,
+		EdgeFeatures&      edgeFeatures) {
+
+	CompositeFeatureProvider provider;
+	provider.emplace_back<VolumeSizeFeatureProvider>(volumes);
+	provider.emplace_back<TopologicalFeatureProvider>(crag);
+	provider.setNumThreads(numThreads);
+
+	provider.appendFeatures(crag, nodeFeatures);
+	provider.appendFeatures(crag, edgeFeatures);
+}
+
+void concurrent_features() {
+
+	Crag crag;
+	CragVolumes volumes(crag);
+
+	// a row of overlapping leaf nodes, merged pairwise into a binary tree
+
+	std::vector<Crag::CragNode> level;
+	for (int i = 0; i < 64; i++) {
+
+		Crag::CragNode n = crag.addNode();
+
+		auto volume = std::make_shared<CragVolume>(6, 5, 1);
+		volume->setOffset(4*i, i%3, 0);
+		for (int y = 0; y < 5; y++)
+			for (int x = 0; x < 6; x++)
+				(*volume)(x, y, 0) = ((x + y + i)%4 != 0);
+		volumes.setVolume(n, volume);
+
+		if (i > 0)
+			crag.addAdjacencyEdge(level.back(), n);
+
+		level.push_back(n);
+	}
+
+	while (level.size() > 1) {
+
+		std::vector<Crag::CragNode> parents;
+		for (unsigned int i = 0; i + 1 < level.size(); i += 2) {
+
+			Crag::CragNode parent = crag.addNode();
+			crag.addSubsetArc(level[i], parent);
+			crag.addSubsetArc(level[i+1], parent);
+			parents.push_back(parent);
+
+			if (parents.size() > 1)
+				crag.addAdjacencyEdge(parents[parents.size() - 2], parent);
+		}
+		level = parents;
+	}
+
+	// a tiny cache forces concurrent materialization and eviction
+	volumes.setCacheSize(1024);
+
+	NodeFeatures serialNodeFeatures(crag);
+	EdgeFeatures serialEdgeFeatures(crag);
+	extractFeatures(crag, volumes, 1, serialNodeFeatures, serialEdgeFeatures);
+
+	volumes.clearCache();
+
+	NodeFeatures concurrentNodeFeatures(crag);
+	EdgeFeatures concurrentEdgeFeatures(crag);
+	extractFeatures(crag, volumes, 4, concurrentNodeFeatures, concurrentEdgeFeatures);
+
+	BOOST_CHECK_EQUAL(concurrentNodeFeatures.dims(Crag::VolumeNode), 4);
+	BOOST_CHECK_EQUAL(concurrentEdgeFeatures.dims(Crag::AdjacencyEdge), 7);
+
+	for (Crag::CragNode n : crag.nodes())
+		BOOST_CHECK(serialNodeFeatures[n] == concurrentNodeFeatures[n]);
+	for (Crag::CragEdge e : crag.edges())
+		BOOST_CHECK(serialEdgeFeatures[e] == concurrentEdgeFeatures[e]);
+}
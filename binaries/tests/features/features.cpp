@@ -46,4 +46,76 @@ void features() {
 		BOOST_CHECK_EQUAL(features.dims(Crag::AdjacencyEdge), 2);
 		BOOST_CHECK_EQUAL(features.dims(Crag::NoAssignmentEdge), 0);
 	}
+
+	{
+		NodeFeatures features(crag);
+
+		// more features than the initial stride of the matrix
+		for (int i = 0; i < 20; i++) {
+
+			features.append(n3, 3*i);
+			features.append(n1, i);
+			features.append(n2, 2*i);
+		}
+
+		const NodeFeatures::FeaturesType& matrix = features.getFeatures(Crag::VolumeNode);
+
+		// rows in the order of first appearance
+		BOOST_CHECK_EQUAL(matrix.size(), 3);
+		BOOST_CHECK_EQUAL(matrix.getIds()[0], crag.id(n3));
+		BOOST_CHECK_EQUAL(matrix.getIds()[1], crag.id(n1));
+		BOOST_CHECK_EQUAL(matrix.getIds()[2], crag.id(n2));
+		BOOST_CHECK_EQUAL(matrix.getRow(n2), 2);
+		BOOST_CHECK_GE(matrix.getStride(), 20);
+
+		features.compact();
+
+		BOOST_CHECK_EQUAL(matrix.getStride(), 20);
+		BOOST_CHECK_EQUAL(features.dims(Crag::VolumeNode), 20);
+
+		for (int i = 0; i < 20; i++) {
+
+			BOOST_CHECK_EQUAL(features[n1][i], i);
+			BOOST_CHECK_EQUAL(matrix.data()[2*20 + i], 2*i);
+		}
+
+		std::vector<double> weights(20, 0);
+		weights[1] = 1;
+		weights[2] = 0.5;
+
+		std::vector<double> products;
+		matrix.dot(weights, products);
+
+		BOOST_REQUIRE_EQUAL(products.size(), 3);
+		BOOST_CHECK_EQUAL(products[0], 3 + 3);
+		BOOST_CHECK_EQUAL(products[1], 1 + 1);
+		BOOST_CHECK_EQUAL(products[2], 2 + 2);
+
+		std::vector<double> coefficients = { 1, -1, 0 };
+		std::vector<double> sum(20, 0);
+		matrix.accumulate(coefficients, sum);
+
+		for (int i = 0; i < 20; i++)
+			BOOST_CHECK_EQUAL(sum[i], 2*i);
+
+		features.normalize();
+
+		for (int i = 1; i < 20; i++) {
+
+			BOOST_CHECK_EQUAL(features[n1][i], 0);
+			BOOST_CHECK_EQUAL(features[n2][i], 0.5);
+			BOOST_CHECK_EQUAL(features[n3][i], 1);
+		}
+
+		// constant features are not normalized
+		BOOST_CHECK_EQUAL(features[n1][0], 0);
+
+		// replace all features at once
+		features.set(Crag::VolumeNode, { crag.id(n2), crag.id(n1) }, { 1, 2, 3, 4 }, 2);
+
+		BOOST_CHECK_EQUAL(features.dims(Crag::VolumeNode), 2);
+		BOOST_CHECK(features[n1].toVector() == std::vector<double>({ 3, 4 }));
+		BOOST_CHECK(features[n2].toVector() == std::vector<double>({ 1, 2 }));
+		BOOST_CHECK(features[n3].empty());
+	}
 }
@@ -0,0 +1,173 @@
+#include <chrono>
+#include <random>
+#include <tests.h>
+#include <crag/Crag.h>
+#include <features/LinearCosts.h>
+
+namespace linear_costs_case {
+
+// the per-element loops replaced by LinearCosts
+
+double dot(const std::vector<double>& weights, const FeatureRow& features) {
+
+	double sum = 0;
+	for (std::size_t i = 0; i < weights.size(); i++)
+		sum += weights[i]*features[i];
+
+	return sum;
+}
+
+void
+loopCosts(
+		const Crag&            crag,
+		const NodeFeatures&    nodeFeatures,
+		const EdgeFeatures&    edgeFeatures,
+		const FeatureWeights&  weights,
+		Crag::NodeMap<double>& nodeCosts,
+		Crag::EdgeMap<double>& edgeCosts) {
+
+	for (Crag::CragNode n : crag.nodes())
+		nodeCosts[n] = dot(weights[crag.type(n)], nodeFeatures[n]);
+	for (Crag::CragEdge e : crag.edges())
+		edgeCosts[e] = dot(weights[crag.type(e)], edgeFeatures[e]);
+}
+
+void
+loopAccumulate(
+		const Crag&                  crag,
+		const NodeFeatures&          nodeFeatures,
+		const EdgeFeatures&          edgeFeatures,
+		const Crag::NodeMap<double>& nodeCoefficients,
+		const Crag::EdgeMap<double>& edgeCoefficients,
+		FeatureWeights&              sum) {
+
+	for (Crag::CragNode n : crag.nodes()) {
+
+		FeatureRow           f = nodeFeatures[n];
+		std::vector<double>& g = sum[crag.type(n)];
+		for (unsigned int i = 0; i < f.size(); i++)
+			g[i] += f[i]*nodeCoefficients[n];
+	}
+
+	for (Crag::CragEdge e : crag.edges()) {
+
+		FeatureRow           f = edgeFeatures[e];
+		std::vector<double>& g = sum[crag.type(e)];
+		for (unsigned int i = 0; i < f.size(); i++)
+			g[i] += f[i]*edgeCoefficients[e];
+	}
+}
+
+template <typename F>
+double
+millisecondsPerCall(F f, int repetitions) {
+
+	auto begin = std::chrono::steady_clock::now();
+	for (int i = 0; i < repetitions; i++)
+		f();
+	auto end = std::chrono::steady_clock::now();
+
+	return std::chrono::duration<double, std::milli>(end - begin).count()/repetitions;
+}
+
+} using namespace linear_costs_case;
+
+void linear_costs() {
+
+	const int numNodes     = 20000;
+	const int numNodeDims  = 40;
+	const int numEdgeDims  = 25;
+	const int repetitions  = 5;
+
+	std::mt19937 generator(42);
+	std::uniform_real_distribution<double> uniform(-1, 1);
+
+	Crag crag;
+	std::vector<Crag::CragNode> nodes;
+	for (int i = 0; i < numNodes; i++) {
+
+		nodes.push_back(crag.addNode());
+		if (i > 0)
+			crag.addAdjacencyEdge(nodes[i - 1], nodes[i]);
+	}
+
+	NodeFeatures nodeFeatures(crag);
+	EdgeFeatures edgeFeatures(crag);
+
+	for (Crag::CragNode n : crag.nodes())
+		for (int i = 0; i < numNodeDims; i++)
+			nodeFeatures.append(n, uniform(generator));
+	for (Crag::CragEdge e : crag.edges())
+		for (int i = 0; i < numEdgeDims; i++)
+			edgeFeatures.append(e, uniform(generator));
+
+	nodeFeatures.compact();
+	edgeFeatures.compact();
+
+	FeatureWeights weights(nodeFeatures, edgeFeatures, 0);
+	for (double& w : weights[Crag::VolumeNode])
+		w = uniform(generator);
+	for (double& w : weights[Crag::AdjacencyEdge])
+		w = uniform(generator);
+
+	Crag::NodeMap<double> nodeCoefficients(crag);
+	Crag::EdgeMap<double> edgeCoefficients(crag);
+	for (Crag::CragNode n : crag.nodes())
+		nodeCoefficients[n] = (crag.id(n)%3) - 1;
+	for (Crag::CragEdge e : crag.edges())
+		edgeCoefficients[e] = (crag.id(e)%3) - 1;
+
+	// reference results
+
+	Crag::NodeMap<double> loopNodeCosts(crag);
+	Crag::EdgeMap<double> loopEdgeCosts(crag);
+	FeatureWeights loopSum(nodeFeatures, edgeFeatures, 0);
+
+	double loopCostsTime = millisecondsPerCall([&]{
+		loopCosts(crag, nodeFeatures, edgeFeatures, weights, loopNodeCosts, loopEdgeCosts);
+	}, repetitions);
+
+	double loopAccumulateTime = millisecondsPerCall([&]{
+		loopSum.fill(0);
+		loopAccumulate(crag, nodeFeatures, edgeFeatures, nodeCoefficients, edgeCoefficients, loopSum);
+	}, repetitions);
+
+	LOG_USER(testslog)
+			<< "loops: costs " << loopCostsTime << "ms, "
+			<< "gradient " << loopAccumulateTime << "ms" << std::endl;
+
+	LinearCosts linearCosts(crag, nodeFeatures, edgeFeatures);
+
+	for (int numThreads : { 1, 4 }) {
+
+		linearCosts.setNumThreads(numThreads);
+
+		Crag::NodeMap<double> nodeCosts(crag);
+		Crag::EdgeMap<double> edgeCosts(crag);
+		FeatureWeights sum(nodeFeatures, edgeFeatures, 0);
+
+		double costsTime = millisecondsPerCall([&]{
+			linearCosts.computeCosts(weights, nodeCosts, edgeCosts);
+		}, repetitions);
+
+		double accumulateTime = millisecondsPerCall([&]{
+			sum.fill(0);
+			linearCosts.accumulate(nodeCoefficients, edgeCoefficients, sum);
+		}, repetitions);
+
+		LOG_USER(testslog)
+				<< "LinearCosts with " << numThreads << " threads: "
+				<< "costs " << costsTime << "ms, "
+				<< "gradient " << accumulateTime << "ms" << std::endl;
+
+		// results are identical, not only close
+
+		for (Crag::CragNode n : crag.nodes())
+			BOOST_CHECK_EQUAL(nodeCosts[n], loopNodeCosts[n]);
+		for (Crag::CragEdge e : crag.edges())
+			BOOST_CHECK_EQUAL(edgeCosts[e], loopEdgeCosts[e]);
+
+		BOOST_CHECK(sum[Crag::VolumeNode] == loopSum[Crag::VolumeNode]);
+		BOOST_CHECK(sum[Crag::AdjacencyEdge] == loopSum[Crag::AdjacencyEdge]);
+	}
+}
@@ -4,9 +4,12 @@ BEGIN_TEST_SUITE(features)
 
 	ADD_TEST_CASE(hausdorff)
 	ADD_TEST_CASE(hausdorff_anisotropic)
+	ADD_TEST_CASE(boundary_hausdorff)
 	ADD_TEST_CASE(overlap)
 	ADD_TEST_CASE(pointiness)
 	ADD_TEST_CASE(features)
+	ADD_TEST_CASE(concurrent_features)
+	ADD_TEST_CASE(linear_costs)
 	ADD_TEST_CASE(feature_weights)
 
 END_TEST_SUITE()
@@ -0,0 +1,67 @@
+#include <tests.h>
+#include <inference/CycleConstraintPool.h>
+#include <io/Hdf5CragStore.h>
+
+void cycle_constraint_pool() {
+
+	CycleConstraintPool pool(2);
+
+	// edges 0-3 form a cycle with cut edge 0, edges 0,4,5 one with cut edge 4
+
+	std::size_t a = pool.add(0, {1, 2, 3});
+	std::size_t b = pool.add(4, {0, 5});
+
+	BOOST_CHECK_EQUAL(pool.size(), 2);
+	BOOST_CHECK(a != b);
+
+	// same cycle, different order of path edges
+	BOOST_CHECK_EQUAL(pool.add(0, {3, 1, 2}), a);
+	BOOST_CHECK_EQUAL(pool.size(), 2);
+
+	// a is tight (all path edges merged, cut edge cut), b is not
+	std::vector<double> edgeValues = {0, 1, 1, 1, 0, 0};
+
+	for (int round = 0; round < 2; round++) {
+
+		BOOST_CHECK_EQUAL(pool.nextRound(), 0);
+		pool.updateActivity(edgeValues);
+	}
+
+	BOOST_CHECK_EQUAL(pool.nextRound(), 1);
+	BOOST_CHECK_EQUAL(pool.size(), 1);
+	BOOST_CHECK(pool.contains(a));
+	BOOST_CHECK(!pool.contains(b));
+	BOOST_CHECK_EQUAL(pool.getAge(pool.getCycles()[0]), 1);
+
+	// cycles added with an age get evicted earlier
+	std::size_t c = pool.add(4, {0, 5}, 2);
+	BOOST_CHECK(c != b);
+	BOOST_CHECK_EQUAL(pool.nextRound(), 1);
+	BOOST_CHECK(!pool.contains(c));
+
+	// storing an empty pool replaces previously stored constraints
+	{
+		Crag crag;
+		for (int i = 0; i < 4; i++)
+			crag.addNode();
+		for (int i = 0; i < 4; i++)
+			crag.addAdjacencyEdge(crag.nodeFromId(i), crag.nodeFromId((i + 1)%4));
+
+		CycleConstraintPool stored;
+		stored.add(0, {1, 2, 3});
+
+		Hdf5CragStore store("test_cycle_constraints.hdf");
+		store.saveCrag(crag);
+		store.saveCycleConstraints(crag, stored);
+
+		CycleConstraintPool retrieved;
+		store.retrieveCycleConstraints(crag, retrieved);
+		BOOST_CHECK_EQUAL(retrieved.size(), 1);
+
+		store.saveCycleConstraints(crag, CycleConstraintPool());
+
+		CycleConstraintPool cleared;
+		store.retrieveCycleConstraints(crag, cleared);
+		BOOST_CHECK_EQUAL(cleared.size(), 0);
+	}
+}
@@ -0,0 +1,85 @@
+#include <tests.h>
+#include <inference/CycleSeparator.h>
+
+void cycle_separator() {
+
+	/**
+	 *  Adjacencies:
+	 *
+	 *      n1---n2---n3
+	 *      |    |    |
+	 *     d|   e|    |b
+	 *      |    |    |
+	 *      n6---n5---n4
+	 *         f    c
+	 *
+	 *  n1-n2 is a, n2-n3 is g
+	 */
+
+	Crag crag;
+	Crag::CragNode n1 = crag.addNode();
+	Crag::CragNode n2 = crag.addNode();
+	Crag::CragNode n3 = crag.addNode();
+	Crag::CragNode n4 = crag.addNode();
+	Crag::CragNode n5 = crag.addNode();
+	Crag::CragNode n6 = crag.addNode();
+
+	Crag::CragEdge a = crag.addAdjacencyEdge(n1, n2);
+	Crag::CragEdge g = crag.addAdjacencyEdge(n2, n3);
+	Crag::CragEdge b = crag.addAdjacencyEdge(n3, n4);
+	Crag::CragEdge c = crag.addAdjacencyEdge(n4, n5);
+	Crag::CragEdge f = crag.addAdjacencyEdge(n5, n6);
+	Crag::CragEdge d = crag.addAdjacencyEdge(n6, n1);
+	Crag::CragEdge e = crag.addAdjacencyEdge(n2, n5);
+
+	CragSolution solution(crag);
+	for (Crag::CragNode n : crag.nodes())
+		solution.setSelected(n, true);
+	for (Crag::CragEdge edge : crag.edges())
+		solution.setSelected(edge, true);
+
+	std::vector<double> edgeValues(crag.getAdjacencyGraph().maxEdgeId() + 1, 1.0);
+
+	CycleSeparator separator(crag);
+
+	// everything merged, no violated cycles
+	BOOST_CHECK(separator.findViolatedCycles(solution, edgeValues).empty());
+	BOOST_CHECK_EQUAL(separator.getStatistics().numComponents, 1);
+
+	// cut e and d: both are still connected via the outer ring
+	solution.setSelected(e, false);
+	solution.setSelected(d, false);
+	edgeValues[crag.id(e)] = 0;
+	edgeValues[crag.id(d)] = 0;
+
+	std::vector<CycleSeparator::Cycle> cycles = separator.findViolatedCycles(solution, edgeValues);
+
+	BOOST_REQUIRE_EQUAL(cycles.size(), 2);
+
+	// cycles are sorted by length, e closes a cycle of length 4 (g, b, c), d 
+	// one of length 6 (a, g, b, c, f)
+	BOOST_CHECK_EQUAL(cycles[0].cutEdge, crag.id(e));
+	BOOST_CHECK_EQUAL(cycles[0].pathEdges.size(), 3);
+	BOOST_CHECK_EQUAL(cycles[0].violation, 1.0);
+	BOOST_CHECK_EQUAL(cycles[1].cutEdge, crag.id(d));
+	BOOST_CHECK_EQUAL(cycles[1].pathEdges.size(), 5);
+	BOOST_CHECK_EQUAL(cycles[1].violation, 1.0);
+
+	// cut c as well: n1, n2, n3, n4 and n5, n6 are separate components
+	solution.setSelected(c, false);
+	edgeValues[crag.id(c)] = 0;
+
+	cycles = separator.findViolatedCycles(solution, edgeValues);
+
+	BOOST_CHECK(cycles.empty());
+	BOOST_CHECK_EQUAL(separator.getStatistics().numComponents, 2);
+	BOOST_CHECK_EQUAL(separator.label(n1), separator.label(n4));
+	BOOST_CHECK_EQUAL(separator.label(n5), separator.label(n6));
+	BOOST_CHECK(separator.label(n1) != separator.label(n5));
+
+	// rejected nodes are labelled -1
+	solution.setSelected(n6, false);
+	solution.setSelected(f, false);
+	separator.findViolatedCycles(solution, edgeValues);
+	BOOST_CHECK_EQUAL(separator.label(n6), -1);
+}
@@ -0,0 +1,66 @@
+#include <tests.h>
+#include <inference/DecomposingMultiCutSolver.h>
+#include <inference/MultiCutSolver.h>
+
+void decomposing_multicut_solver() {
+
+	/**
+	 *  Adjacencies (all nodes are leaves):
+	 *
+	 *         g
+	 *      -------
+	 *     /       \
+	 *   n1---n2---n3---n4---n5---n6
+	 *      a    b    c    d    e
+	 *
+	 *  With b, d, and g not profitable, there are three subproblems: {n1,n2}, 
+	 *  {n3,n4}, and {n5,n6}.
+	 */
+
+	Crag crag;
+	Crag::CragNode n1 = crag.addNode();
+	Crag::CragNode n2 = crag.addNode();
+	Crag::CragNode n3 = crag.addNode();
+	Crag::CragNode n4 = crag.addNode();
+	Crag::CragNode n5 = crag.addNode();
+	Crag::CragNode n6 = crag.addNode();
+
+	Crag::CragEdge a = crag.addAdjacencyEdge(n1, n2);
+	Crag::CragEdge b = crag.addAdjacencyEdge(n2, n3);
+	Crag::CragEdge c = crag.addAdjacencyEdge(n3, n4);
+	Crag::CragEdge d = crag.addAdjacencyEdge(n4, n5);
+	Crag::CragEdge e = crag.addAdjacencyEdge(n5, n6);
+	Crag::CragEdge g = crag.addAdjacencyEdge(n1, n3);
+
+	Costs costs(crag);
+	for (Crag::CragNode n : crag.nodes())
+		costs.node[n] = -1;
+	costs.edge[a] = -2;
+	costs.edge[b] =  3;
+	costs.edge[c] = -1;
+	costs.edge[d] =  0;
+	costs.edge[e] = -1;
+	costs.edge[g] =  1;
+
+	CragSolution x(crag);
+	DecomposingMultiCutSolver solver(crag, CragSolver::Parameters(), 2);
+	solver.setCosts(costs);
+	BOOST_CHECK_EQUAL(solver.solve(x), CragSolver::SolutionFound);
+
+	CragSolution y(crag);
+	MultiCutSolver reference(crag);
+	reference.setCosts(costs);
+	reference.solve(y);
+
+	BOOST_CHECK_EQUAL(solver.getValue(), -10);
+	BOOST_CHECK_EQUAL(solver.getValue(), reference.getValue());
+
+	for (Crag::CragNode n : crag.nodes())
+		BOOST_CHECK(x.selected(n));
+	for (Crag::CragEdge edge : crag.edges()) {
+
+		int id = crag.id(edge);
+		BOOST_CHECK_EQUAL(x.selected(edge), (id == crag.id(a) || id == crag.id(c) || id == crag.id(e)));
+		BOOST_CHECK_EQUAL(x.selected(edge), y.selected(edge));
+	}
+}
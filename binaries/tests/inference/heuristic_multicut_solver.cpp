@@ -0,0 +1,116 @@
+#include <tests.h>
+#include <inference/HeuristicMultiCutSolver.h>
+
+void heuristic_multicut_solver() {
+
+	/**
+	 *  Subsets:
+	 *              n7
+	 *            /    \
+	 *           /      \
+	 *          /        \
+	 *         n5        n6
+	 *        / \       /  \
+	 *      n1   n2    n3   n4
+	 *
+	 *  Adjacencies:
+	 *
+	 *              d
+	 *         n5--------n6
+	 *           \     /
+	 *
+	 *          e  \ /  f
+	 *
+	 *             / \
+	 *      n1---n2----n3---n4
+	 *         a    b     c
+	 */
+
+	Crag crag;
+	Crag::CragNode n1 = crag.addNode();
+	Crag::CragNode n2 = crag.addNode();
+	Crag::CragNode n3 = crag.addNode();
+	Crag::CragNode n4 = crag.addNode();
+	Crag::CragNode n5 = crag.addNode();
+	Crag::CragNode n6 = crag.addNode();
+	Crag::CragNode n7 = crag.addNode();
+
+	crag.addSubsetArc(n1, n5);
+	crag.addSubsetArc(n2, n5);
+	crag.addSubsetArc(n3, n6);
+	crag.addSubsetArc(n4, n6);
+	crag.addSubsetArc(n5, n7);
+	crag.addSubsetArc(n6, n7);
+
+	Crag::CragEdge a = crag.addAdjacencyEdge(n1, n2);
+	Crag::CragEdge b = crag.addAdjacencyEdge(n2, n3);
+	Crag::CragEdge c = crag.addAdjacencyEdge(n3, n4);
+	Crag::CragEdge d = crag.addAdjacencyEdge(n5, n6);
+	Crag::CragEdge e = crag.addAdjacencyEdge(n5, n3);
+	Crag::CragEdge f = crag.addAdjacencyEdge(n2, n6);
+
+	CragSolution x(crag);
+
+	{
+		// the root is the only candidate worth selecting
+		HeuristicMultiCutSolver solver(crag);
+		Costs costs(crag);
+		costs.node[n7] = -10;
+		solver.setCosts(costs);
+		solver.solve(x);
+
+		for (Crag::CragNode n : crag.nodes())
+			BOOST_CHECK(n == n7 ? x.selected(n) : !x.selected(n));
+		for (Crag::CragEdge edge : crag.edges())
+			BOOST_CHECK(!x.selected(edge));
+		BOOST_CHECK_EQUAL(solver.getValue(), -10);
+	}
+
+	{
+		// leaves are cheap and attractive to each other, all higher 
+		// candidates and edges are expensive
+		HeuristicMultiCutSolver solver(crag);
+		Costs costs(crag);
+		for (Crag::CragNode n : { n1, n2, n3, n4 })
+			costs.node[n] = -1;
+		for (Crag::CragEdge edge : { a, b, c })
+			costs.edge[edge] = -1;
+		for (Crag::CragEdge edge : { d, e, f })
+			costs.edge[edge] = 1;
+		solver.setCosts(costs);
+		solver.solve(x);
+
+		for (Crag::CragNode n : crag.nodes())
+			BOOST_CHECK(crag.isLeafNode(n) ? x.selected(n) : !x.selected(n));
+		BOOST_CHECK(x.selected(a));
+		BOOST_CHECK(x.selected(b));
+		BOOST_CHECK(x.selected(c));
+		BOOST_CHECK_EQUAL(x.label(n1), x.label(n4));
+		BOOST_CHECK_EQUAL(solver.getValue(), -7);
+	}
+
+	{
+		// everything is expensive, without explanation nothing gets selected
+		HeuristicMultiCutSolver solver(crag);
+		Costs costs(crag);
+		for (Crag::CragNode n : crag.nodes())
+			costs.node[n] = (crag.isLeafNode(n) ? 1 : 5);
+		solver.setCosts(costs);
+		solver.solve(x);
+
+		for (Crag::CragNode n : crag.nodes())
+			BOOST_CHECK(!x.selected(n));
+		BOOST_CHECK_EQUAL(solver.getValue(), 0);
+
+		// with explanation, the leaves are the cheapest cover
+		CragSolver::Parameters parameters;
+		parameters.forceExplanation = true;
+		HeuristicMultiCutSolver forcedSolver(crag, parameters);
+		forcedSolver.setCosts(costs);
+		forcedSolver.solve(x);
+
+		for (Crag::CragNode n : crag.nodes())
+			BOOST_CHECK(crag.isLeafNode(n) ? x.selected(n) : !x.selected(n));
+		BOOST_CHECK_EQUAL(forcedSolver.getValue(), 4);
+	}
+}
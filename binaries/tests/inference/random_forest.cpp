@@ -0,0 +1,105 @@
+#include <random>
+#include <tests.h>
+#include <inference/RandomForest.h>
+
+void random_forest() {
+
+	const int numSamples  = 500;
+	const int numFeatures = 3;
+
+	// label 1 if the first two features sum up to more than 1
+
+	std::mt19937 generator(42);
+	std::uniform_real_distribution<double> uniform(0, 1);
+
+	RandomForest rf;
+	rf.prepareTraining(numSamples, numFeatures);
+
+	for (int i = 0; i < numSamples; i++) {
+
+		std::vector<double> sample(numFeatures);
+		for (double& f : sample)
+			f = uniform(generator);
+
+		rf.addSample(sample, (sample[0] + sample[1] > 1 ? 1 : 0));
+	}
+
+	rf.train(10);
+
+	BOOST_REQUIRE_EQUAL(rf.getNumFeatures(), static_cast<unsigned int>(numFeatures));
+	BOOST_REQUIRE_EQUAL(rf.getNumClasses(), 2u);
+
+	// a CRAG with a slice node for each test sample, and a few assignment 
+	// nodes that should be ignored
+
+	Crag crag;
+	NodeFeatures features(crag);
+	std::vector<Crag::CragNode> nodes;
+
+	for (int i = 0; i < numSamples; i++) {
+
+		Crag::CragNode a = crag.addNode(Crag::AssignmentNode);
+		features.append(a, 0);
+
+		Crag::CragNode n = crag.addNode(Crag::SliceNode);
+		nodes.push_back(n);
+
+		for (int j = 0; j < numFeatures; j++)
+			features.append(n, uniform(generator));
+	}
+
+	// the padded matrix is used in-place, as well as the compact one
+
+	for (bool compact : { false, true }) {
+
+		if (compact)
+			features.compact();
+
+		for (int numThreads : { 1, 4 }) {
+
+			Crag::NodeMap<double> probs(crag, -1);
+			rf.getProbabilitiesBatch(crag, features, Crag::SliceNode, probs, 1, numThreads);
+
+			for (Crag::CragNode n : crag.nodes()) {
+
+				if (crag.type(n) == Crag::AssignmentNode) {
+
+					BOOST_CHECK_EQUAL(probs[n], -1);
+					continue;
+				}
+
+				std::vector<double> p = rf.getProbabilities(features[n].toVector());
+				BOOST_CHECK_EQUAL(probs[n], p[1]);
+			}
+		}
+	}
+
+	// the class distributions of a whole matrix
+
+	const NodeFeatures::FeaturesType& sliceFeatures = features.getFeatures(Crag::SliceNode);
+
+	RandomForest::SamplesView samples(
+			RandomForest::SamplesSize(sliceFeatures.size(), numFeatures),
+			RandomForest::SamplesSize(sliceFeatures.getStride(), 1),
+			sliceFeatures.data());
+	RandomForest::ProbsType probs(RandomForest::ProbsSize(sliceFeatures.size(), 2));
+
+	rf.getProbabilitiesBatch(samples, probs, 3);
+
+	for (std::size_t row = 0; row < sliceFeatures.size(); row++) {
+
+		Crag::CragNode n = crag.nodeFromId(sliceFeatures.getIds()[row]);
+		std::vector<double> p = rf.getProbabilities(features[n].toVector());
+
+		BOOST_CHECK_EQUAL(probs(row, 0), p[0]);
+		BOOST_CHECK_EQUAL(probs(row, 1), p[1]);
+		BOOST_CHECK_CLOSE(probs(row, 0) + probs(row, 1), 1.0, 1e-6);
+	}
+
+	// assignment nodes have a different number of features
+
+	Crag::NodeMap<double> assignmentProbs(crag);
+	BOOST_CHECK_THROW(
+			rf.getProbabilitiesBatch(crag, features, Crag::AssignmentNode, assignmentProbs),
+			UsageError);
+}
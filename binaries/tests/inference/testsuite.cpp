@@ -3,6 +3,11 @@
 BEGIN_TEST_SUITE(inference)
 
 	ADD_TEST_CASE(closed_set_solver)
+	ADD_TEST_CASE(cycle_constraint_pool)
+	ADD_TEST_CASE(cycle_separator)
+	ADD_TEST_CASE(decomposing_multicut_solver)
+	ADD_TEST_CASE(heuristic_multicut_solver)
+	ADD_TEST_CASE(random_forest)
 
 END_TEST_SUITE()
 
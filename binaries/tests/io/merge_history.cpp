@@ -0,0 +1,82 @@
+#include <tests.h>
+#include <fstream>
+#include <util/exceptions.h>
+#include <io/MergeHistory.h>
+
+namespace {
+
+void
+checkMerges(const std::vector<MergeHistory::Merge>& merges, bool withScores) {
+
+	BOOST_REQUIRE_EQUAL(merges.size(), 3);
+
+	BOOST_CHECK_EQUAL(merges[0].a, 1);
+	BOOST_CHECK_EQUAL(merges[0].b, 2);
+	BOOST_CHECK_EQUAL(merges[0].c, 10);
+	BOOST_CHECK_EQUAL(merges[1].a, 3);
+	BOOST_CHECK_EQUAL(merges[1].b, 10);
+	BOOST_CHECK_EQUAL(merges[1].c, 11);
+	BOOST_CHECK_EQUAL(merges[2].a, 4);
+	BOOST_CHECK_EQUAL(merges[2].b, 11);
+	BOOST_CHECK_EQUAL(merges[2].c, 12);
+
+	if (withScores) {
+
+		BOOST_CHECK_CLOSE(merges[0].score, 0.5, 1e-4);
+		BOOST_CHECK_CLOSE(merges[1].score, 1.25e-3, 1e-4);
+		BOOST_CHECK_CLOSE(merges[2].score, 7, 1e-4);
+
+	} else {
+
+		for (const MergeHistory::Merge& merge : merges)
+			BOOST_CHECK_EQUAL(merge.score, 0);
+	}
+}
+
+} // anonymous namespace
+
+void merge_history() {
+
+	// text without scores, separated by tabs and spaces
+	{
+		std::ofstream out("merge_history_test.txt");
+		out << "1\t2\t10\n3 10 11\n  4  11\t12\n";
+	}
+	BOOST_CHECK(!MergeHistory::isBinary("merge_history_test.txt"));
+	checkMerges(MergeHistory::read("merge_history_test.txt", false), false);
+
+	// text with scores, without a final newline
+	{
+		std::ofstream out("merge_history_test.txt");
+		out << "1\t2\t10\t0.5\n3\t10\t11\t1.25e-3\n4\t11\t12\t7";
+	}
+	std::vector<MergeHistory::Merge> merges = MergeHistory::read("merge_history_test.txt", true);
+	checkMerges(merges, true);
+
+	// binary round-trip
+	MergeHistory::writeBinary(merges, "merge_history_test.bin");
+	BOOST_CHECK(MergeHistory::isBinary("merge_history_test.bin"));
+	checkMerges(MergeHistory::read("merge_history_test.bin", false), true);
+
+	// empty histories
+	{
+		std::ofstream out("merge_history_test.txt");
+	}
+	BOOST_CHECK(MergeHistory::read("merge_history_test.txt", true).empty());
+	MergeHistory::writeBinary(std::vector<MergeHistory::Merge>(), "merge_history_test.bin");
+	BOOST_CHECK(MergeHistory::read("merge_history_test.bin", true).empty());
+
+	// malformed text
+	{
+		std::ofstream out("merge_history_test.txt");
+		out << "1 2 10\n3 x 11\n";
+	}
+	BOOST_CHECK_THROW(MergeHistory::read("merge_history_test.txt", false), IOError);
+	{
+		std::ofstream out("merge_history_test.txt");
+		out << "1 2 10\n3 10\n";
+	}
+	BOOST_CHECK_THROW(MergeHistory::read("merge_history_test.txt", false), IOError);
+
+	BOOST_CHECK_THROW(MergeHistory::read("merge_history_does_not_exist.txt", false), IOError);
+}
@@ -0,0 +1,85 @@
+#include <tests.h>
+#include <cstdint>
+#include <vigra/hdf5impex.hxx>
+#include <util/exceptions.h>
+#include <crag/Crag.h>
+#include <crag/CragVolumes.h>
+#include <inference/CragSolution.h>
+#include <io/SolutionImageWriter.h>
+
+void solution_image_writer() {
+
+	Crag crag;
+	CragVolumes volumes(crag);
+
+	// two leaf nodes in sections 0 and 1, merged by node 3, and a leaf node 2
+	// next to them
+	for (int i = 0; i < 4; i++)
+		crag.addNode();
+	crag.addSubsetArc(crag.nodeFromId(0), crag.nodeFromId(3));
+	crag.addSubsetArc(crag.nodeFromId(1), crag.nodeFromId(3));
+
+	std::shared_ptr<CragVolume> v0 = std::make_shared<CragVolume>(2, 2, 1);
+	std::shared_ptr<CragVolume> v1 = std::make_shared<CragVolume>(2, 2, 1);
+	std::shared_ptr<CragVolume> v2 = std::make_shared<CragVolume>(2, 2, 1);
+	v0->setOffset(0, 0, 0);
+	v1->setOffset(0, 0, 1);
+	v2->setOffset(2, 0, 0);
+	v0->data() = 1;
+	v1->data() = 1;
+	v2->data() = 0;
+	v2->data()(1, 1, 0) = 1;
+
+	volumes.setVolume(crag.nodeFromId(0), v0);
+	volumes.setVolume(crag.nodeFromId(1), v1);
+	volumes.setVolume(crag.nodeFromId(2), v2);
+
+	CragSolution solution(crag);
+	solution.setSelected(crag.nodeFromId(2), true);
+	solution.setSelected(crag.nodeFromId(3), true);
+
+	int label2 = solution.label(crag.nodeFromId(2));
+	int label3 = solution.label(crag.nodeFromId(3));
+	BOOST_REQUIRE(label2 != 0);
+	BOOST_REQUIRE(label3 != 0);
+	BOOST_REQUIRE(label2 != label3);
+
+	for (unsigned int slabSize : { 0, 1 }) {
+
+		SolutionImageWriter writer;
+		writer.setExportArea(
+				util::box<float, 3>(
+						util::point<float, 3>(0, 0, 0),
+						util::point<float, 3>(4, 2, 2)));
+		writer.setSlabSize(slabSize);
+		writer.setNumThreads(2);
+		writer.writeHdf5Labels(crag, volumes, solution, "solution_image_writer_test.hdf", "labels", SolutionImageWriter::UInt64Labels);
+
+		vigra::HDF5File file("solution_image_writer_test.hdf", vigra::HDF5File::OpenMode::ReadOnly);
+		vigra::MultiArray<3, std::uint64_t> labels;
+		file.readAndResize("labels", labels);
+
+		BOOST_REQUIRE_EQUAL(labels.shape(0), 4);
+		BOOST_REQUIRE_EQUAL(labels.shape(1), 2);
+		BOOST_REQUIRE_EQUAL(labels.shape(2), 2);
+
+		for (int z = 0; z < 2; z++)
+			for (int y = 0; y < 2; y++)
+				for (int x = 0; x < 4; x++) {
+
+					std::uint64_t expected = 0;
+					if (x < 2)
+						expected = label3;
+					else if (x == 3 && y == 1 && z == 0)
+						expected = label2;
+
+					BOOST_CHECK_EQUAL(labels(x, y, z), expected);
+				}
+	}
+
+	// images support only 32-bit labels
+	SolutionImageWriter writer;
+	BOOST_CHECK_THROW(
+			writer.writeLabels(crag, volumes, solution, "solution_image_writer_test", SolutionImageWriter::UInt64Labels),
+			UsageError);
+}
@@ -3,6 +3,9 @@
 BEGIN_TEST_SUITE(io)
 
 	ADD_TEST_CASE(io_feature_weights)
+	ADD_TEST_CASE(volume_store_roi)
+	ADD_TEST_CASE(merge_history)
+	ADD_TEST_CASE(solution_image_writer)
 
 END_TEST_SUITE()
 
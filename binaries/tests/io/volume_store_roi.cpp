@@ -0,0 +1,92 @@
+#include <tests.h>
+#include <io/Hdf5CragStore.h>
+#include <io/Hdf5VolumeStore.h>
+
+void volume_store_roi() {
+
+	ExplicitVolume<float> intensities(20, 30, 10);
+	intensities.setResolution(2, 2, 4);
+	intensities.setOffset(10, 20, 40);
+
+	for (int z = 0; z < 10; z++)
+		for (int y = 0; y < 30; y++)
+			for (int x = 0; x < 20; x++)
+				intensities.data()(x, y, z) = x + 100*y + 10000*z;
+
+	{
+		// create the project file
+		Hdf5CragStore cragStore("io_volumes_test.hdf");
+	}
+
+	Hdf5VolumeStore store("io_volumes_test.hdf");
+	store.saveIntensities(intensities);
+
+	// geometry only
+	VolumeInfo info = store.retrieveVolumeInfo("intensities");
+	BOOST_CHECK_EQUAL(info.width(),  20);
+	BOOST_CHECK_EQUAL(info.height(), 30);
+	BOOST_CHECK_EQUAL(info.depth(),  10);
+	BOOST_CHECK_EQUAL(info.resolution, intensities.getResolution());
+	BOOST_CHECK_EQUAL(info.offset, intensities.getOffset());
+	BOOST_CHECK_EQUAL(info.getBoundingBox(), intensities.getBoundingBox());
+
+	// region of interest in world units, covering voxels [3,8)x[5,9)x[2,5)
+	ExplicitVolume<float> roi;
+	store.retrieveIntensities(
+			roi,
+			util::box<float, 3>(
+					util::point<float, 3>(16.5, 30, 48),
+					util::point<float, 3>(26,   38, 60)));
+
+	BOOST_CHECK_EQUAL(roi.width(),  5);
+	BOOST_CHECK_EQUAL(roi.height(), 4);
+	BOOST_CHECK_EQUAL(roi.depth(),  3);
+	BOOST_CHECK_EQUAL(roi.getResolution(), intensities.getResolution());
+	BOOST_CHECK_EQUAL(roi.getOffset(), util::point<float, 3>(16, 30, 48));
+
+	for (int z = 0; z < 3; z++)
+		for (int y = 0; y < 4; y++)
+			for (int x = 0; x < 5; x++)
+				BOOST_CHECK_EQUAL(roi.data()(x, y, z), intensities.data()(x + 3, y + 5, z + 2));
+
+	// regions of interest are clipped to the volume
+	store.retrieveIntensities(
+			roi,
+			util::box<float, 3>(
+					util::point<float, 3>(0,    0,    0),
+					util::point<float, 3>(1000, 1000, 1000)));
+
+	BOOST_CHECK_EQUAL(roi.getBoundingBox(), intensities.getBoundingBox());
+	BOOST_CHECK(roi.data() == intensities.data());
+
+	// blocks with halo
+	VolumeBlocks blocks = store.getBlocks("intensities", util::point<unsigned int, 3>(8, 8, 8), 2);
+
+	BOOST_CHECK_EQUAL(blocks.size(), 3*4*2);
+
+	std::size_t coreVoxels = 0;
+	for (VolumeBlock block : blocks) {
+
+		coreVoxels += block.core.width()*block.core.height()*block.core.depth();
+
+		ExplicitVolume<float> data;
+		store.retrieveVolume(data, "intensities", block.extended);
+
+		BOOST_CHECK_EQUAL(data.width(),  block.extended.width());
+		BOOST_CHECK_EQUAL(data.height(), block.extended.height());
+		BOOST_CHECK_EQUAL(data.depth(),  block.extended.depth());
+
+		BOOST_CHECK_EQUAL(
+				data.data()(0, 0, 0),
+				intensities.data()(
+						block.extended.min().x(),
+						block.extended.min().y(),
+						block.extended.min().z()));
+
+		// the halo is at most 2 voxels, and only cut by the volume boundary
+		BOOST_CHECK(block.extended.min().x() + 2 >= block.core.min().x());
+		BOOST_CHECK(block.extended.max().x() == std::min(block.core.max().x() + 2, 20u));
+	}
+
+	BOOST_CHECK_EQUAL(coreVoxels, 20*30*10);
+}
@@ -0,0 +1,93 @@
+#include <tests.h>
+#include <util/exceptions.h>
+#include <features/FeatureWeights.h>
+#include <learning/CompositeOracle.h>
+
+// a linear objective <a,w> + b
+class LinearOracle : public Oracle<FeatureWeights> {
+
+public:
+
+	LinearOracle(std::vector<double> a, double b) : _a(a), _b(b) {}
+
+	void valueGradientP(
+			const FeatureWeights& weights,
+			double&               value,
+			FeatureWeights&       gradient) override {
+
+		std::vector<double> w = weights.exportToVector();
+
+		value = _b;
+		for (std::size_t i = 0; i < w.size(); i++)
+			value += _a[i]*w[i];
+
+		gradient.importFromVector(_a);
+	}
+
+private:
+
+	std::vector<double> _a;
+	double              _b;
+};
+
+class FailingOracle : public Oracle<FeatureWeights> {
+
+public:
+
+	void valueGradientP(
+			const FeatureWeights&,
+			double&,
+			FeatureWeights&) override {
+
+		UTIL_THROW_EXCEPTION(
+				Exception,
+				"solution not found");
+	}
+};
+
+void composite_oracle() {
+
+	FeatureWeights weights;
+	weights[Crag::SliceNode]     = std::vector<double>(2, 1);
+	weights[Crag::AdjacencyEdge] = std::vector<double>(1, 2);
+
+	LinearOracle a({ 1, 2, 3 }, 1);
+	LinearOracle b({ -1, 0, 1 }, 0);
+	LinearOracle c({ 0, 0, 1 }, 10);
+
+	for (int numThreads : { 1, 2, 0 }) {
+
+		CompositeOracle oracle(numThreads);
+		oracle.addOracle(a, "a");
+		oracle.addOracle(b, "b");
+		oracle.addOracle(c, "c");
+
+		BOOST_CHECK_EQUAL(oracle.size(), 3);
+		BOOST_CHECK(!oracle.haveConcavePart());
+
+		double         value;
+		FeatureWeights gradient;
+		oracle.valueGradientP(weights, value, gradient);
+
+		// (1 + 2 + 6 + 1) + (-1 + 0 + 2) + (2 + 10)
+		BOOST_CHECK_EQUAL(value, 23);
+
+		std::vector<double> expected = { 0, 2, 5 };
+		std::vector<double> g = gradient.exportToVector();
+		BOOST_CHECK_EQUAL_COLLECTIONS(g.begin(), g.end(), expected.begin(), expected.end());
+
+		// R is zero for all samples
+		oracle.valueGradientR(weights, value, gradient);
+		BOOST_CHECK_EQUAL(value, 0);
+	}
+
+	// errors of a sample are passed on
+	FailingOracle failing;
+	CompositeOracle oracle(2);
+	oracle.addOracle(a, "a");
+	oracle.addOracle(failing, "failing");
+
+	double         value;
+	FeatureWeights gradient;
+	BOOST_CHECK_THROW(oracle.valueGradientP(weights, value, gradient), Exception);
+}
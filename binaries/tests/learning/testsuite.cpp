@@ -3,6 +3,7 @@
 BEGIN_TEST_SUITE(learning)
 
 	ADD_TEST_CASE(hamming_loss)
+	ADD_TEST_CASE(composite_oracle)
 
 END_TEST_SUITE()
 
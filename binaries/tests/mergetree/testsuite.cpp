@@ -0,0 +1,7 @@
+#include <tests.h>
+
+BEGIN_TEST_SUITE(mergetree)
+
+	ADD_TEST_CASE(union_find_merging)
+
+END_TEST_SUITE()
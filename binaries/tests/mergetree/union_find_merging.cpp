@@ -0,0 +1,106 @@
+#include <tests.h>
+#include <algorithm>
+#include <vigra/multi_array.hxx>
+#include <mergetree/IterativeRegionMerging.h>
+#include <mergetree/MedianEdgeIntensity.h>
+#include <mergetree/MultiplyMinRegionSize.h>
+#include <mergetree/UnionFindRegionMerging.h>
+
+namespace {
+
+void
+checkMerge(const UnionFindRegionMerging& merging, std::size_t i, int u, int v, int parent, float score) {
+
+	int mu, mv, mparent;
+	float mscore;
+	merging.getMerge(i, mu, mv, mparent, mscore);
+
+	BOOST_CHECK_EQUAL(mu, u);
+	BOOST_CHECK_EQUAL(mv, v);
+	BOOST_CHECK_EQUAL(mparent, parent);
+	BOOST_CHECK_CLOSE(mscore, score, 1e-4);
+}
+
+} // anonymous namespace
+
+void union_find_merging() {
+
+	// 1 2 3
+	// 1 2 3
+	// 4 4 4
+	vigra::MultiArray<3, int>   regions(vigra::Shape3(3, 3, 1));
+	vigra::MultiArray<3, float> intensities(vigra::Shape3(3, 3, 1));
+
+	int   labels[3][3] = { { 1, 2, 3 }, { 1, 2, 3 }, { 4, 4, 4 } };
+	float values[3][3] = { { 0, 2, 6 }, { 0, 4, 6 }, { 8, 8, 8 } };
+
+	for (int y = 0; y < 3; y++)
+		for (int x = 0; x < 3; x++) {
+
+			regions(x, y, 0)     = labels[y][x];
+			intensities(x, y, 0) = values[y][x];
+		}
+
+	// boundaries are 1-2: {1, 2}, 2-3: {4, 5}, 1-4: {4}, 2-4: {6}, 3-4: {7}
+
+	{
+		// median boundary intensities only
+		UnionFindRegionMerging merging(regions, intensities);
+		merging.createMergeTree(0);
+
+		BOOST_REQUIRE_EQUAL(merging.getNumMerges(), 3);
+		checkMerge(merging, 0, 1, 2, 5, 2);
+		// 5-4 is {4, 6}
+		checkMerge(merging, 1, 5, 3, 6, 5);
+		// 6-4 is {4, 6, 7}
+		checkMerge(merging, 2, 6, 4, 7, 6);
+	}
+
+	{
+		// multiplied with the size of the smaller region
+		UnionFindRegionMerging merging(regions, intensities);
+		merging.createMergeTree(1);
+
+		BOOST_REQUIRE_EQUAL(merging.getNumMerges(), 3);
+		checkMerge(merging, 0, 1, 2, 5, 2*2);
+		checkMerge(merging, 1, 5, 3, 6, 5*2);
+		checkMerge(merging, 2, 6, 4, 7, 6*3);
+	}
+
+	{
+		// with a single bin, the median is the mean of the boundary
+		UnionFindRegionMerging merging(regions, intensities, 1);
+		merging.createMergeTree(0);
+
+		BOOST_REQUIRE_EQUAL(merging.getNumMerges(), 3);
+		checkMerge(merging, 0, 1, 2, 5, 1.5);
+		checkMerge(merging, 1, 5, 3, 6, 4.5);
+		checkMerge(merging, 2, 6, 4, 7, 17.0/3);
+	}
+
+	{
+		// same merges as the iterative region merging
+		UnionFindRegionMerging merging(regions, intensities);
+		merging.createMergeTree(1);
+
+		IterativeRegionMerging<3> iterative(regions);
+		MedianEdgeIntensity<3> mei(intensities);
+		MultiplyMinRegionSize<MedianEdgeIntensity<3>> scoringFunction(iterative.getRag(), regions, mei);
+		iterative.createMergeTree(scoringFunction);
+
+		BOOST_REQUIRE_EQUAL(merging.getNumMerges(), iterative.getNumMerges());
+
+		for (std::size_t i = 0; i < merging.getNumMerges(); i++) {
+
+			int u, v, parent, iu, iv, iparent;
+			float score, iscore;
+			merging.getMerge(i, u, v, parent, score);
+			iterative.getMerge(i, iu, iv, iparent, iscore);
+
+			BOOST_CHECK_EQUAL(std::min(u, v), std::min(iu, iv));
+			BOOST_CHECK_EQUAL(std::max(u, v), std::max(iu, iv));
+			BOOST_CHECK_EQUAL(parent, iparent);
+			BOOST_CHECK_CLOSE(score, iscore, 1e-4);
+		}
+	}
+}
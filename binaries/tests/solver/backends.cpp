@@ -35,6 +35,21 @@ void testSolver(LinearSolverBackend* solver) {
 	BOOST_CHECK_EQUAL(x[0], 1);
 	for (int i = 1; i < numVars; i++)
 		BOOST_CHECK_EQUAL(x[i], 0);
+
+	// a feasible, but suboptimal initial solution should not change the result
+	Solution initial(numVars);
+	for (int i = 0; i < numVars; i++)
+		initial[i] = 0;
+	initial[numVars - 1] = 1;
+
+	solver->setObjective(objective);
+	solver->setConstraints(constraints);
+	solver->setInitialSolution(initial);
+	solver->solve(x, _);
+
+	BOOST_CHECK_EQUAL(x.getValue(), 5001);
+	BOOST_CHECK_EQUAL(x[0], 1);
+	BOOST_CHECK(solver->getTimeToFirstIncumbent() >= 0);
 }
 
 } using namespace backends_test;
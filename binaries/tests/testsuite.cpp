@@ -12,6 +12,7 @@ BEGIN_TEST_MODULE(candidate_mc)
 	ADD_TEST_SUITE(inference);
 	ADD_TEST_SUITE(learning);
 	ADD_TEST_SUITE(io);
+	ADD_TEST_SUITE(mergetree);
 	ADD_TEST_SUITE(third_party);
 	ADD_TEST_SUITE(util);
 
@@ -6,9 +6,25 @@ Crag::CragNode Crag::Invalid;
 const std::vector<Crag::NodeType> Crag::NodeTypes = { VolumeNode, SliceNode, AssignmentNode, NoAssignmentNode };
 const std::vector<Crag::EdgeType> Crag::EdgeTypes = { AdjacencyEdge, SeparationEdge, AssignmentEdge, NoAssignmentEdge };
 
+bool
+Crag::buildHierarchyIndex() {
+
+	if (!CragHierarchyIndex::isApplicable(*this)) {
+
+		_hierarchyIndex.reset();
+		return false;
+	}
+
+	_hierarchyIndex = std::make_shared<CragHierarchyIndex>(*this);
+	return true;
+}
+
 int
 Crag::getLevel(Crag::CragNode n) const {
 
+	if (_hierarchyIndex)
+		return _hierarchyIndex->getLevel(id(n));
+
 	if (isLeafNode(n))
 		return 0;
 
@@ -23,6 +39,17 @@ std::set<Crag::CragNode>
 Crag::leafNodes(CragNode n) const {
 
 	std::set<CragNode> leafNodes;
+
+	if (_hierarchyIndex) {
+
+		std::vector<int> ids;
+		_hierarchyIndex->leafNodes(id(n), ids);
+		for (int i : ids)
+			leafNodes.insert(nodeFromId(i));
+
+		return leafNodes;
+	}
+
 	recLeafNodes(n, leafNodes);
 
 	return leafNodes;
@@ -31,6 +58,14 @@ Crag::leafNodes(CragNode n) const {
 std::set<Crag::CragEdge>
 Crag::leafEdges(CragNode n) const {
 
+	if (_hierarchyIndex) {
+
+		std::vector<int> ids;
+		_hierarchyIndex->leafEdges(id(n), ids);
+
+		return edgesFromIds(ids);
+	}
+
 	std::set<CragNode> nleafNodes = leafNodes(n);
 	std::set<CragEdge> leafEdges;
 
@@ -52,6 +87,14 @@ Crag::leafEdges(CragNode n) const {
 std::set<Crag::CragEdge>
 Crag::leafEdges(CragEdge e) const {
 
+	if (_hierarchyIndex) {
+
+		std::vector<int> ids;
+		_hierarchyIndex->leafEdges(id(e.u()), id(e.v()), ids);
+
+		return edgesFromIds(ids);
+	}
+
 	std::set<CragEdge> leafEdges;
 	std::set<CragNode> uLeafNodes;
 	std::set<CragNode> vLeafNodes;
@@ -80,6 +123,14 @@ Crag::descendantEdges(CragEdge e) const {
 std::set<Crag::CragEdge>
 Crag::descendantEdges(CragNode u, CragNode v) const {
 
+	if (_hierarchyIndex) {
+
+		std::vector<int> ids;
+		_hierarchyIndex->descendantEdges(id(u), id(v), ids);
+
+		return edgesFromIds(ids);
+	}
+
 	std::set<CragEdge> uEdges;
 	std::set<CragEdge> vEdges;
 	recCollectEdges(u, uEdges);
@@ -113,3 +164,13 @@ Crag::recCollectEdges(Crag::CragNode n, std::set<Crag::CragEdge>& edges) const {
 	for (Crag::CragArc a : inArcs(n))
 		recCollectEdges(a.source(), edges);
 }
+
+std::set<Crag::CragEdge>
+Crag::edgesFromIds(const std::vector<int>& ids) const {
+
+	std::set<CragEdge> edges;
+	for (int i : ids)
+		edges.insert(CragEdge(*this, _rag.edgeFromId(i)));
+
+	return edges;
+}
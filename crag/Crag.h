@@ -1,11 +1,13 @@
 #ifndef CANDIDATE_MC_CRAG_CRAG_H__
 #define CANDIDATE_MC_CRAG_CRAG_H__
 
+#include <memory>
 #include <set>
 #include <lemon/list_graph.h>
 #define WITH_LEMON
 #include <vigra/multi_gridgraph.hxx>
 #include <util/exceptions.h>
+#include "CragHierarchyIndex.h"
 
 /**
  * Candidate region adjacency graph.
@@ -255,6 +257,8 @@ public:
 	 */
 	inline CragNode addNode(NodeType type) {
 
+		_hierarchyIndex.reset();
+
 		_ssg.addNode();
 		CragNode n = _rag.addNode();
 		_nodeTypes[n] = type;
@@ -268,6 +272,7 @@ public:
 	 */
 	inline void erase(Crag::CragNode n) {
 
+		_hierarchyIndex.reset();
 		_ssg.erase(toSubset(n));
 		_rag.erase(n);
 	}
@@ -277,6 +282,7 @@ public:
 	 */
 	inline void erase(Crag::CragEdge e) {
 
+		_hierarchyIndex.reset();
 		_rag.erase(e);
 	}
 
@@ -285,6 +291,7 @@ public:
 	 */
 	inline void erase(Crag::CragArc a) {
 
+		_hierarchyIndex.reset();
 		_ssg.erase(a);
 	}
 
@@ -294,6 +301,8 @@ public:
 	 */
 	inline CragEdge addAdjacencyEdge(CragNode u, CragNode v, EdgeType type) {
 
+		_hierarchyIndex.reset();
+
 		CragEdge e(*this, _rag.addEdge(u, v));
 		_edgeTypes[e] = type;
 
@@ -307,6 +316,7 @@ public:
 	 */
 	inline CragArc addSubsetArc(CragNode u, CragNode v) {
 
+		_hierarchyIndex.reset();
 		return CragArc(*this, _ssg.addArc(toSubset(u), toSubset(v)));
 	}
 
@@ -396,6 +406,30 @@ public:
 	 */
 	int getLevel(Crag::CragNode n) const;
 
+	/**
+	 * Build an index of the subset hierarchy, which makes getLevel(), 
+	 * leafNodes(), leafEdges(), and descendantEdges() run without recursion. 
+	 * The index is discarded whenever the CRAG is modified through its 
+	 * methods. Modifications of the underlying lemon graphs are not tracked, 
+	 * call this method again after those.
+	 *
+	 * The index can only be built if the subset graph is a forest. If a node 
+	 * has more than one parent (like the slice nodes of a CRAG combined from 
+	 * a stack of sections, which are children of their AssignmentNodes as 
+	 * well), no index is built and false is returned.
+	 */
+	bool buildHierarchyIndex();
+
+	/**
+	 * Discard the hierarchy index.
+	 */
+	void clearHierarchyIndex() { _hierarchyIndex.reset(); }
+
+	/**
+	 * Get the hierarchy index, or 0 if it was not built.
+	 */
+	const CragHierarchyIndex* getHierarchyIndex() const { return _hierarchyIndex.get(); }
+
 	/**
 	 * Return true for candidates that are leaf nodes in the subset graph.
 	 */
@@ -435,6 +469,14 @@ public:
 		return CragNode(_rag.nodeFromId(id));
 	}
 
+	/**
+	 * Convenience function to create an adjacency edge from an id.
+	 */
+	inline CragEdge edgeFromId(int id) const {
+
+		return CragEdge(*this, _rag.edgeFromId(id));
+	}
+
 	/**
 	 * Get the opposite node of an adjacency edge.
 	 */
@@ -519,6 +561,8 @@ private:
 
 	void recCollectEdges(Crag::CragNode n, std::set<Crag::CragEdge>& edges) const;
 
+	std::set<CragEdge> edgesFromIds(const std::vector<int>& ids) const;
+
 	// adjacency graph
 	lemon::ListGraph _rag;
 
@@ -533,6 +577,9 @@ private:
 
 	// voxel edges between adjacent leaf nodes
 	EdgeMap<std::vector<vigra::GridGraph<3>::Edge>> _affiliatedEdges;
+
+	// optional index of the subset hierarchy
+	std::shared_ptr<const CragHierarchyIndex> _hierarchyIndex;
 };
 
 #endif // CANDIDATE_MC_CRAG_CRAG_H__
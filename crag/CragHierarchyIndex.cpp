@@ -0,0 +1,288 @@
+#include <algorithm>
+#include <util/Logger.h>
+#include <util/exceptions.h>
+#include <util/timing.h>
+#include "Crag.h"
+#include "CragHierarchyIndex.h"
+
+logger::LogChannel craghierarchyindexlog("craghierarchyindexlog", "[CragHierarchyIndex] ");
+
+CragHierarchyIndex::CragHierarchyIndex(const Crag& crag) {
+
+	UTIL_TIME_METHOD;
+
+	// shared subtrees would be visited once per parent, and their ranges 
+	// overwritten
+	if (!isApplicable(crag))
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"the subset graph of the CRAG is not a forest, can not build a hierarchy index");
+
+	int numNodeIds = crag.getAdjacencyGraph().maxNodeId() + 1;
+
+	_positions.resize(numNodeIds, -1);
+	_begin.resize(numNodeIds, -1);
+	_end.resize(numNodeIds, -1);
+	_leafBegin.resize(numNodeIds, 0);
+	_leafEnd.resize(numNodeIds, 0);
+	_levels.resize(numNodeIds, 0);
+	_numLeafEdges.resize(numNodeIds, 0);
+	_isLeaf.resize(numNodeIds, 0);
+
+	std::vector<std::vector<int>> children(numNodeIds);
+	for (Crag::CragArc a : crag.arcs())
+		children[crag.id(a.target())].push_back(crag.id(a.source()));
+
+	for (Crag::CragNode n : crag.nodes())
+		_isLeaf[crag.id(n)] = crag.isLeafNode(n);
+
+	// depth-first traversal of the subset trees, assigning pre-order positions
+	// on the way down and levels and ranges on the way up
+
+	std::vector<std::pair<int, unsigned int>> stack;
+
+	// depth and parent id of the node at each position, to find lowest common
+	// ancestors
+	std::vector<int> depths;
+	std::vector<int> parents;
+
+	for (Crag::CragNode root : crag.nodes()) {
+
+		if (!crag.isRootNode(root))
+			continue;
+
+		stack.push_back(std::make_pair(crag.id(root), 0u));
+
+		while (!stack.empty()) {
+
+			int           n = stack.back().first;
+			unsigned int& i = stack.back().second;
+
+			if (i == 0) {
+
+				_positions[n] = _nodes.size();
+				_begin[n]     = _nodes.size();
+				_leafBegin[n] = _leaves.size();
+				_nodes.push_back(n);
+				depths.push_back(stack.size() - 1);
+				parents.push_back(stack.size() > 1 ? stack[stack.size() - 2].first : -1);
+
+				if (_isLeaf[n])
+					_leaves.push_back(n);
+			}
+
+			if (i < children[n].size()) {
+
+				stack.push_back(std::make_pair(children[n][i++], 0u));
+				continue;
+			}
+
+			_end[n]     = _nodes.size();
+			_leafEnd[n] = _leaves.size();
+
+			for (int child : children[n])
+				_levels[n] = std::max(_levels[n], _levels[child] + 1);
+
+			stack.pop_back();
+		}
+	}
+
+	// adjacency array sorted by position of the opposite node
+
+	std::vector<std::vector<std::pair<int, int>>> adjacencies(_nodes.size());
+	for (Crag::CragEdge e : crag.edges()) {
+
+		int u = _positions[crag.id(e.u())];
+		int v = _positions[crag.id(e.v())];
+
+		adjacencies[u].push_back(std::make_pair(v, crag.id(e)));
+		adjacencies[v].push_back(std::make_pair(u, crag.id(e)));
+	}
+
+	_adjOffsets.push_back(0);
+	for (auto& adjacency : adjacencies) {
+
+		std::sort(adjacency.begin(), adjacency.end());
+
+		for (const auto& neighbor : adjacency) {
+
+			_adjPositions.push_back(neighbor.first);
+			_adjEdges.push_back(neighbor.second);
+		}
+
+		_adjOffsets.push_back(_adjPositions.size());
+	}
+
+	// count leaf edges under each node: every leaf edge is counted at the
+	// lowest common ancestor of its nodes, and the counts are accumulated
+	// bottom-up afterwards
+
+	// for positions p < q in the same tree, the lowest common ancestor is the
+	// parent of the shallowest node in (p, q], which we find with a sparse
+	// table over the positions: minDepth[k][p] is the position of the
+	// shallowest node in [p, p + 2^k)
+	std::vector<std::vector<int>> minDepth(1);
+	minDepth[0].resize(_nodes.size());
+	for (std::size_t p = 0; p < _nodes.size(); p++)
+		minDepth[0][p] = p;
+	for (std::size_t k = 1; (std::size_t(1) << k) <= _nodes.size(); k++) {
+
+		const std::vector<int>& prev = minDepth[k - 1];
+		std::size_t half = std::size_t(1) << (k - 1);
+
+		minDepth.emplace_back(_nodes.size() - 2*half + 1);
+		for (std::size_t p = 0; p < minDepth[k].size(); p++) {
+
+			int a = prev[p];
+			int b = prev[p + half];
+			minDepth[k][p] = (depths[b] < depths[a] ? b : a);
+		}
+	}
+
+	for (Crag::CragEdge e : crag.edges()) {
+
+		if (!_isLeaf[crag.id(e.u())] || !_isLeaf[crag.id(e.v())])
+			continue;
+
+		int p = _positions[crag.id(e.u())];
+		int q = _positions[crag.id(e.v())];
+		if (p > q)
+			std::swap(p, q);
+
+		// query [p + 1, q + 1)
+		int k = 0;
+		while ((2 << k) <= q - p)
+			k++;
+		int a = minDepth[k][p + 1];
+		int b = minDepth[k][q + 1 - (1 << k)];
+		int shallowest = (depths[b] < depths[a] ? b : a);
+
+		// leaves in different subset trees don't have a common ancestor
+		if (parents[shallowest] != -1)
+			_numLeafEdges[parents[shallowest]]++;
+	}
+
+	// in reverse pre-order, all children are visited before their parent
+	for (int p = _nodes.size() - 1; p >= 0; p--)
+		if (parents[p] != -1)
+			_numLeafEdges[parents[p]] += _numLeafEdges[_nodes[p]];
+
+	LOG_DEBUG(craghierarchyindexlog)
+			<< "indexed " << _nodes.size() << " nodes with "
+			<< _leaves.size() << " leaves" << std::endl;
+}
+
+bool
+CragHierarchyIndex::isApplicable(const Crag& crag) {
+
+	std::vector<char> hasParent(crag.getAdjacencyGraph().maxNodeId() + 1, 0);
+
+	for (Crag::CragArc a : crag.arcs()) {
+
+		int child = crag.id(a.source());
+
+		if (hasParent[child])
+			return false;
+		hasParent[child] = 1;
+	}
+
+	return true;
+}
+
+void
+CragHierarchyIndex::leafNodes(int node, std::vector<int>& nodes) const {
+
+	nodes.insert(nodes.end(), _leaves.begin() + _leafBegin[node], _leaves.begin() + _leafEnd[node]);
+}
+
+void
+CragHierarchyIndex::leafEdges(int node, std::vector<int>& edges) const {
+
+	for (int l = _leafBegin[node]; l < _leafEnd[node]; l++) {
+
+		// only edges to leaves with a higher position, to report each edge once
+		int p = _positions[_leaves[l]];
+		int first, last;
+		adjacentInRange(p, p + 1, _end[node], first, last);
+
+		for (int j = first; j < last; j++)
+			if (_isLeaf[_nodes[_adjPositions[j]]])
+				edges.push_back(_adjEdges[j]);
+	}
+}
+
+void
+CragHierarchyIndex::leafEdges(int u, int v, std::vector<int>& edges) const {
+
+	bool nested = (contains(u, _begin[v]) || contains(v, _begin[u]));
+
+	// iterate over the smaller set of leaves
+	if (!nested && getNumLeafNodes(v) < getNumLeafNodes(u))
+		std::swap(u, v);
+
+	std::size_t numBefore = edges.size();
+
+	for (int l = _leafBegin[u]; l < _leafEnd[u]; l++) {
+
+		int first, last;
+		adjacentInRange(_positions[_leaves[l]], _begin[v], _end[v], first, last);
+
+		for (int j = first; j < last; j++)
+			if (_isLeaf[_nodes[_adjPositions[j]]])
+				edges.push_back(_adjEdges[j]);
+	}
+
+	// edges between leaves shared by u and v are found twice
+	if (nested) {
+
+		std::sort(edges.begin() + numBefore, edges.end());
+		edges.erase(std::unique(edges.begin() + numBefore, edges.end()), edges.end());
+	}
+}
+
+void
+CragHierarchyIndex::descendantEdges(int u, int v, std::vector<int>& edges) const {
+
+	// if one subtree contains the other, all edges of the inner subtree are
+	// incident to both
+	int inner = -1;
+	if (contains(u, _begin[v]))
+		inner = v;
+	else if (contains(v, _begin[u]))
+		inner = u;
+
+	if (inner != -1) {
+
+		for (int p = _begin[inner]; p < _end[inner]; p++)
+			for (int j = _adjOffsets[p]; j < _adjOffsets[p + 1]; j++) {
+
+				// edges within the subtree are found from both sides
+				int q = _adjPositions[j];
+				if (!contains(inner, q) || q > p)
+					edges.push_back(_adjEdges[j]);
+			}
+
+		return;
+	}
+
+	if (_end[v] - _begin[v] < _end[u] - _begin[u])
+		std::swap(u, v);
+
+	for (int p = _begin[u]; p < _end[u]; p++) {
+
+		int first, last;
+		adjacentInRange(p, _begin[v], _end[v], first, last);
+
+		edges.insert(edges.end(), _adjEdges.begin() + first, _adjEdges.begin() + last);
+	}
+}
+
+void
+CragHierarchyIndex::adjacentInRange(int p, int begin, int end, int& first, int& last) const {
+
+	auto b = _adjPositions.begin() + _adjOffsets[p];
+	auto e = _adjPositions.begin() + _adjOffsets[p + 1];
+
+	first = std::lower_bound(b, e, begin) - _adjPositions.begin();
+	last  = std::lower_bound(b, e, end)   - _adjPositions.begin();
+}
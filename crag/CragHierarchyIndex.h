@@ -0,0 +1,111 @@
+#ifndef CANDIDATE_MC_CRAG_CRAG_HIERARCHY_INDEX_H__
+#define CANDIDATE_MC_CRAG_CRAG_HIERARCHY_INDEX_H__
+
+#include <vector>
+
+class Crag;
+
+/**
+ * An immutable index of the subset hierarchy of a CRAG, built in a single
+ * depth-first pass. Nodes are laid out in DFS pre-order, such that the
+ * descendants of each node (and, separately, its leaf nodes) form a contiguous
+ * range. Adjacency edges are stored per node, sorted by the position of the
+ * opposite node, such that all edges into a subtree can be found with a
+ * binary search.
+ *
+ * The subset graph has to be a forest, see isApplicable().
+ *
+ * All nodes and edges are referred to by their CRAG ids. The index is only
+ * valid as long as the CRAG it was built for is not modified.
+ */
+class CragHierarchyIndex {
+
+public:
+
+	/**
+	 * Build the index. Throws a UsageError if the subset graph of the CRAG is
+	 * not a forest.
+	 */
+	CragHierarchyIndex(const Crag& crag);
+
+	/**
+	 * Check whether an index can be built for the given CRAG, i.e., whether 
+	 * its subset graph is a forest.
+	 */
+	static bool isApplicable(const Crag& crag);
+
+	/**
+	 * Get the level of a node, i.e., the size of the longest subset-tree path
+	 * to a leaf node.
+	 */
+	int getLevel(int node) const { return _levels[node]; }
+
+	/**
+	 * Get the number of leaf nodes under a node.
+	 */
+	int getNumLeafNodes(int node) const { return _leafEnd[node] - _leafBegin[node]; }
+
+	/**
+	 * Get the number of leaf edges under a node, i.e., the number of edges
+	 * between its leaf nodes.
+	 */
+	int getNumLeafEdges(int node) const { return _numLeafEdges[node]; }
+
+	/**
+	 * Get the ids of the leaf nodes under a node.
+	 */
+	void leafNodes(int node, std::vector<int>& nodes) const;
+
+	/**
+	 * Get the ids of the leaf edges under a node.
+	 */
+	void leafEdges(int node, std::vector<int>& edges) const;
+
+	/**
+	 * Get the ids of the leaf edges between the leaf nodes of u and the leaf
+	 * nodes of v.
+	 */
+	void leafEdges(int u, int v, std::vector<int>& edges) const;
+
+	/**
+	 * Get the ids of all edges that are incident to descendants of u (including
+	 * u) and descendants of v (including v).
+	 */
+	void descendantEdges(int u, int v, std::vector<int>& edges) const;
+
+private:
+
+	// find the adjacency array entries of the node at position p, for which
+	// the opposite node is in [begin, end)
+	void adjacentInRange(int p, int begin, int end, int& first, int& last) const;
+
+	inline bool contains(int node, int p) const { return p >= _begin[node] && p < _end[node]; }
+
+	// DFS pre-order position of each node by id, and the node id for each
+	// position
+	std::vector<int> _positions;
+	std::vector<int> _nodes;
+
+	// the range of positions of the descendants of a node (including itself)
+	std::vector<int> _begin;
+	std::vector<int> _end;
+
+	// leaf node ids in DFS order, and the range of leaf nodes under a node
+	std::vector<int> _leaves;
+	std::vector<int> _leafBegin;
+	std::vector<int> _leafEnd;
+
+	std::vector<int>  _levels;
+	std::vector<int>  _numLeafEdges;
+	std::vector<char> _isLeaf;
+
+	// adjacency array by position: the neighbors of the node at position p
+	// are _adjPositions[_adjOffsets[p]] to _adjPositions[_adjOffsets[p+1]-1],
+	// sorted by position, the corresponding edge ids are in _adjEdges
+	std::vector<int> _adjOffsets;
+	std::vector<int> _adjPositions;
+	std::vector<int> _adjEdges;
+};
+
+#endif // CANDIDATE_MC_CRAG_CRAG_HIERARCHY_INDEX_H__
+
@@ -0,0 +1,180 @@
+#include <limits>
+#include <util/Logger.h>
+#include <util/timing.h>
+#include "CragSpatialIndex.h"
+
+logger::LogChannel cragspatialindexlog("cragspatialindexlog", "[CragSpatialIndex] ");
+
+CragSpatialIndex::CragSpatialIndex(const Crag& crag, const CragVolumes& volumes, float cellSize) :
+	_crag(crag),
+	_cellSize(cellSize),
+	_entryIndex(crag.getAdjacencyGraph().maxNodeId() + 1, std::numeric_limits<std::size_t>::max()) {
+
+	UTIL_TIME_METHOD;
+
+	// the z resolution, to find the sections of each candidate
+	float resolutionZ = 1;
+	for (Crag::CragNode n : crag.nodes())
+		if (crag.isLeafNode(n)) {
+
+			resolutionZ = volumes[n]->getResolution().z();
+			break;
+		}
+
+	double sumExtents = 0;
+	for (Crag::CragNode n : crag.nodes()) {
+
+		util::box<float, 3> bb = volumes.getBoundingBox(n);
+
+		Entry entry;
+		entry.node         = n;
+		entry.bb           = bb.project<2>();
+		entry.firstSection = static_cast<int>(std::round(bb.min().z()/resolutionZ));
+		entry.endSection   = std::max(entry.firstSection + 1, static_cast<int>(std::round(bb.max().z()/resolutionZ)));
+
+		_entryIndex[crag.id(n)] = _entries.size();
+		_entries.push_back(entry);
+
+		sumExtents += std::max(entry.bb.width(), entry.bb.height());
+	}
+
+	if (_cellSize <= 0 && _entries.size() > 0)
+		_cellSize = sumExtents/_entries.size();
+	if (_cellSize <= 0)
+		_cellSize = 1;
+
+	// the extents of each section
+	std::map<int, util::box<float, 2>> sectionBbs;
+	for (const Entry& entry : _entries)
+		for (int z = entry.firstSection; z < entry.endSection; z++) {
+
+			if (sectionBbs.count(z))
+				sectionBbs[z] += entry.bb;
+			else
+				sectionBbs[z] = entry.bb;
+		}
+
+	for (const auto& p : sectionBbs) {
+
+		Grid& grid = _sections[p.first];
+
+		grid.minX   = p.second.min().x();
+		grid.minY   = p.second.min().y();
+		grid.width  = std::max(1, static_cast<int>(std::ceil(p.second.width()/_cellSize)));
+		grid.height = std::max(1, static_cast<int>(std::ceil(p.second.height()/_cellSize)));
+		grid.cells.resize(static_cast<std::size_t>(grid.width)*grid.height);
+	}
+
+	for (std::size_t i = 0; i < _entries.size(); i++) {
+
+		const Entry& entry = _entries[i];
+
+		for (int z = entry.firstSection; z < entry.endSection; z++) {
+
+			Grid& grid = _sections[z];
+
+			int beginX = cell(entry.bb.min().x(), grid.minX, grid.width);
+			int endX   = cell(entry.bb.max().x(), grid.minX, grid.width) + 1;
+			int beginY = cell(entry.bb.min().y(), grid.minY, grid.height);
+			int endY   = cell(entry.bb.max().y(), grid.minY, grid.height) + 1;
+
+			for (int y = beginY; y < endY; y++)
+				for (int x = beginX; x < endX; x++)
+					grid.cells[y*grid.width + x].push_back(i);
+		}
+	}
+
+	LOG_DEBUG(cragspatialindexlog)
+			<< "indexed " << _entries.size() << " candidates in "
+			<< _sections.size() << " sections with cell size "
+			<< _cellSize << std::endl;
+}
+
+std::vector<Crag::CragNode>
+CragSpatialIndex::find(const util::box<float, 2>& box, float distance) const {
+
+	std::vector<std::size_t> indices;
+	for (const auto& p : _sections)
+		collect(p.second, box, distance, indices);
+
+	return filter(indices, box, distance);
+}
+
+std::vector<Crag::CragNode>
+CragSpatialIndex::find(const util::box<float, 2>& box, float distance, int section) const {
+
+	std::vector<std::size_t> indices;
+
+	auto grid = _sections.find(section);
+	if (grid != _sections.end())
+		collect(grid->second, box, distance, indices);
+
+	return filter(indices, box, distance);
+}
+
+std::vector<Crag::CragNode>
+CragSpatialIndex::findNeighbors(Crag::CragNode n, float distance) const {
+
+	const Entry& entry = _entries[_entryIndex[_crag.id(n)]];
+
+	std::vector<std::size_t> indices;
+	for (int section : { entry.firstSection - 1, entry.endSection }) {
+
+		auto grid = _sections.find(section);
+		if (grid != _sections.end())
+			collect(grid->second, entry.bb, distance, indices);
+	}
+
+	std::vector<Crag::CragNode> neighbors = filter(indices, entry.bb, distance);
+
+	// candidates spanning several sections can be in the section below and
+	// above, but n is never its own neighbor
+	neighbors.erase(std::remove(neighbors.begin(), neighbors.end(), n), neighbors.end());
+
+	return neighbors;
+}
+
+void
+CragSpatialIndex::collect(
+		const Grid&                grid,
+		const util::box<float, 2>& box,
+		float                      distance,
+		std::vector<std::size_t>&  indices) const {
+
+	int beginX = cell(box.min().x() - distance, grid.minX, grid.width);
+	int endX   = cell(box.max().x() + distance, grid.minX, grid.width) + 1;
+	int beginY = cell(box.min().y() - distance, grid.minY, grid.height);
+	int endY   = cell(box.max().y() + distance, grid.minY, grid.height) + 1;
+
+	for (int y = beginY; y < endY; y++)
+		for (int x = beginX; x < endX; x++) {
+
+			const std::vector<std::size_t>& entries = grid.cells[y*grid.width + x];
+			indices.insert(indices.end(), entries.begin(), entries.end());
+		}
+}
+
+std::vector<Crag::CragNode>
+CragSpatialIndex::filter(
+		std::vector<std::size_t>&  indices,
+		const util::box<float, 2>& box,
+		float                      distance) const {
+
+	std::sort(indices.begin(), indices.end());
+	indices.erase(std::unique(indices.begin(), indices.end()), indices.end());
+
+	std::vector<Crag::CragNode> nodes;
+	for (std::size_t i : indices) {
+
+		const util::box<float, 2>& bb = _entries[i].bb;
+
+		if (bb.max().x() < box.min().x() - distance || bb.min().x() > box.max().x() + distance)
+			continue;
+		if (bb.max().y() < box.min().y() - distance || bb.min().y() > box.max().y() + distance)
+			continue;
+
+		nodes.push_back(_entries[i].node);
+	}
+
+	return nodes;
+}
@@ -0,0 +1,116 @@
+#ifndef CANDIDATE_MC_CRAG_CRAG_SPATIAL_INDEX_H__
+#define CANDIDATE_MC_CRAG_CRAG_SPATIAL_INDEX_H__
+
+#include <algorithm>
+#include <cmath>
+#include <map>
+#include <vector>
+#include <util/box.hpp>
+#include "Crag.h"
+#include "CragVolumes.h"
+
+/**
+ * An immutable spatial index over the bounding boxes of the candidates of a
+ * CRAG, to find candidates in the same or neighboring sections that are close
+ * to each other. The 2D bounding boxes of the candidates are stored per
+ * section in a uniform grid of square cells, such that a query only visits
+ * the candidates in the cells covered by the query box.
+ *
+ * A candidate belongs to each section its bounding box covers. Results are
+ * returned in the order of Crag::nodes(), such that they do not depend on the
+ * layout of the index.
+ *
+ * The index is only valid as long as the CRAG and the volumes it was built
+ * for are not modified.
+ */
+class CragSpatialIndex {
+
+public:
+
+	/**
+	 * Create an index over all candidates of the given CRAG.
+	 *
+	 * @param cellSize
+	 *              The side length of the grid cells in world units. If 0
+	 *              (the default), the mean extent of the bounding boxes is
+	 *              used.
+	 */
+	CragSpatialIndex(const Crag& crag, const CragVolumes& volumes, float cellSize = 0);
+
+	/**
+	 * Get all candidates whose 2D bounding box is within the given distance
+	 * of a box, i.e., intersects or touches the box grown by the distance in x
+	 * and y.
+	 */
+	std::vector<Crag::CragNode> find(const util::box<float, 2>& box, float distance) const;
+
+	/**
+	 * Same as find(box, distance), but only for candidates of one section.
+	 */
+	std::vector<Crag::CragNode> find(const util::box<float, 2>& box, float distance, int section) const;
+
+	/**
+	 * Get all candidates in the sections directly below and above candidate n
+	 * (z-1 and z+1 for a 2D candidate in section z), whose 2D bounding box is
+	 * within the given distance of the bounding box of n.
+	 */
+	std::vector<Crag::CragNode> findNeighbors(Crag::CragNode n, float distance) const;
+
+	/**
+	 * Get the first section of a candidate, i.e., the z coordinate of its
+	 * bounding box in voxels.
+	 */
+	int getFirstSection(Crag::CragNode n) const { return _entries[_entryIndex[_crag.id(n)]].firstSection; }
+
+	/**
+	 * Get the section after the last section of a candidate.
+	 */
+	int getEndSection(Crag::CragNode n) const { return _entries[_entryIndex[_crag.id(n)]].endSection; }
+
+private:
+
+	struct Entry {
+
+		Crag::CragNode      node;
+		util::box<float, 2> bb;
+		int                 firstSection;
+		int                 endSection;
+	};
+
+	// a uniform grid of cells, each holding the entries whose bounding box
+	// overlaps with the cell
+	struct Grid {
+
+		float minX;
+		float minY;
+		int   width;
+		int   height;
+
+		std::vector<std::vector<std::size_t>> cells;
+	};
+
+	// add the indices of all entries of the grid that might be within distance
+	// of the box
+	void collect(const Grid& grid, const util::box<float, 2>& box, float distance, std::vector<std::size_t>& indices) const;
+
+	// sort and deduplicate the indices and keep the nodes of the entries that
+	// are within distance of the box
+	std::vector<Crag::CragNode> filter(std::vector<std::size_t>& indices, const util::box<float, 2>& box, float distance) const;
+
+	inline int cell(float x, float min, int size) const {
+
+		return std::max(0, std::min(size - 1, static_cast<int>(std::floor((x - min)/_cellSize))));
+	}
+
+	const Crag& _crag;
+
+	float _cellSize;
+
+	// entries in the order of Crag::nodes(), and the entry of each node by id
+	std::vector<Entry>       _entries;
+	std::vector<std::size_t> _entryIndex;
+
+	std::map<int, Grid> _sections;
+};
+
+#endif // CANDIDATE_MC_CRAG_CRAG_SPATIAL_INDEX_H__
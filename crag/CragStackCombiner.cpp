@@ -1,9 +1,14 @@
+#include <atomic>
+#include <exception>
+#include <mutex>
+#include <thread>
 #include <features/HausdorffDistance.h>
 #include <util/Logger.h>
 #include <util/ProgramOptions.h>
 #include <util/assert.h>
 #include <util/exceptions.h>
 #include <util/timing.h>
+#include "CragSpatialIndex.h"
 #include "CragStackCombiner.h"
 
 logger::LogChannel cragstackcombinerlog("cragstackcombinerlog", "[CragStackCombiner] ");
@@ -39,7 +44,8 @@ util::ProgramOption optionMaxZLinkBoundingBoxDistance(
 CragStackCombiner::CragStackCombiner() :
 	_maxHausdorffDistance(optionMaxZLinkHausdorffDistance),
 	_maxBbDistance(optionMaxZLinkBoundingBoxDistance),
-	_requireBbOverlap(optionRequireBoundingBoxOverlap) {}
+	_requireBbOverlap(optionRequireBoundingBoxOverlap),
+	_numThreads(0) {}
 
 void
 CragStackCombiner::combine(
@@ -76,6 +82,25 @@ CragStackCombiner::combine(
 				UsageError,
 				"all provided CRAGs are empty");
 
+	std::vector<Links> links;
+	findAllLinks(sourcesCrags, sourcesVolumes, links);
+
+	// reserve space for the no-assignment nodes, the nodes of all sections, 
+	// and the assignment nodes
+	std::size_t numNodes = targetCrag.numNodes() + sourcesCrags.size() + 1;
+	std::size_t numEdges = targetCrag.numEdges();
+	std::size_t numArcs  = targetCrag.numArcs();
+	for (unsigned int z = 0; z < sourcesCrags.size(); z++) {
+
+		numNodes += sourcesCrags[z]->numNodes() + links[z].size();
+		numEdges += 2*sourcesCrags[z]->numNodes() + sourcesCrags[z]->numEdges() + 2*links[z].size();
+		numArcs  += sourcesCrags[z]->numArcs() + 2*links[z].size();
+	}
+	targetCrag.getAdjacencyGraph().reserveNode(numNodes);
+	targetCrag.getAdjacencyGraph().reserveEdge(numEdges);
+	targetCrag.getSubsetGraph().reserveNode(numNodes);
+	targetCrag.getSubsetGraph().reserveArc(numArcs);
+
 	// add one NoAssignmentNode between each pair of crags, and before first and 
 	// after last section
 	_noAssignmentNodes.clear();
@@ -110,33 +135,27 @@ CragStackCombiner::combine(
 
 	for (unsigned int z = 1; z < sourcesCrags.size(); z++) {
 
-		LOG_USER(cragstackcombinerlog) << "linking CRAG " << (z-1) << " and " << z << std::endl;
-
-		std::vector<std::pair<Crag::CragNode, Crag::CragNode>> links =
-				findLinks(
-						*sourcesCrags[z-1],
-						*sourcesVolumes[z-1],
-						*sourcesCrags[z],
-						*sourcesVolumes[z]);
-
 		if (z == 1)
 			_prevNodeMap = copyNodes(0, *sourcesCrags[0], targetCrag);
 		else
-			_prevNodeMap = _nextNodeMap;
+			_prevNodeMap.swap(_nextNodeMap);
 
 		_nextNodeMap = copyNodes(z, *sourcesCrags[z], targetCrag);
 
-		for (const auto& pair : links) {
+		for (const auto& pair : links[z]) {
+
+			Crag::CragNode prev = _prevNodeMap[sourcesCrags[z-1]->id(pair.first)];
+			Crag::CragNode next = _nextNodeMap[sourcesCrags[z]->id(pair.second)];
 
 			Crag::CragNode assignment = targetCrag.addNode(Crag::AssignmentNode);
 
-			targetCrag.addAdjacencyEdge(_prevNodeMap[pair.first], assignment, Crag::AssignmentEdge);
-			targetCrag.addAdjacencyEdge(_nextNodeMap[pair.second], assignment, Crag::AssignmentEdge);
-			targetCrag.addSubsetArc(_prevNodeMap[pair.first], assignment);
-			targetCrag.addSubsetArc(_nextNodeMap[pair.second], assignment);
+			targetCrag.addAdjacencyEdge(prev, assignment, Crag::AssignmentEdge);
+			targetCrag.addAdjacencyEdge(next, assignment, Crag::AssignmentEdge);
+			targetCrag.addSubsetArc(prev, assignment);
+			targetCrag.addSubsetArc(next, assignment);
 		}
 
-		nodesAdded += links.size();
+		nodesAdded += links[z].size();
 
 		copyVolumes(*sourcesVolumes[z-1], targetVolumes, _prevNodeMap);
 		if (z == sourcesCrags.size() - 1)
@@ -146,6 +165,7 @@ CragStackCombiner::combine(
 		// anymore. free some memory.
 		sourcesCrags[z-1].reset();
 		sourcesVolumes[z-1].reset();
+		Links().swap(links[z]);
 	}
 
 	// clear the sources
@@ -155,20 +175,87 @@ CragStackCombiner::combine(
 	LOG_USER(cragstackcombinerlog) << "added " << nodesAdded << " link nodes" << std::endl;
 }
 
-std::map<Crag::CragNode, Crag::CragNode>
+void
+CragStackCombiner::findAllLinks(
+		const std::vector<std::unique_ptr<Crag>>&        sourcesCrags,
+		const std::vector<std::unique_ptr<CragVolumes>>& sourcesVolumes,
+		std::vector<Links>&                              links) {
+
+	UTIL_TIME_METHOD;
+
+	links.clear();
+	links.resize(sourcesCrags.size());
+
+	int numPairs = static_cast<int>(sourcesCrags.size()) - 1;
+	if (numPairs <= 0)
+		return;
+
+	int numThreads = _numThreads;
+	if (numThreads <= 0)
+		numThreads = std::max(1u, std::thread::hardware_concurrency());
+	numThreads = std::min(numThreads, numPairs);
+
+	LOG_USER(cragstackcombinerlog)
+			<< "linking " << sourcesCrags.size() << " CRAGs with "
+			<< numThreads << " threads" << std::endl;
+
+	// each pair only reads its two sections, volumes of the same section are 
+	// shared between neighboring pairs, which CragVolumes allows
+	std::atomic<int>   nextPair(1);
+	std::exception_ptr error;
+	std::mutex         errorMutex;
+
+	auto worker = [&]() {
+
+		for (int z = nextPair++; z <= numPairs; z = nextPair++) {
+
+			try {
+
+				LOG_DEBUG(cragstackcombinerlog) << "linking CRAG " << (z-1) << " and " << z << std::endl;
+
+				links[z] = findLinks(
+						*sourcesCrags[z-1],
+						*sourcesVolumes[z-1],
+						*sourcesCrags[z],
+						*sourcesVolumes[z]);
+
+			} catch (...) {
+
+				std::lock_guard<std::mutex> lock(errorMutex);
+				if (!error)
+					error = std::current_exception();
+
+				// skip the remaining pairs
+				nextPair = numPairs + 1;
+			}
+		}
+	};
+
+	std::vector<std::thread> threads;
+	for (int i = 1; i < numThreads; i++)
+		threads.emplace_back(worker);
+	worker();
+	for (std::thread& thread : threads)
+		thread.join();
+
+	if (error)
+		std::rethrow_exception(error);
+}
+
+CragStackCombiner::NodeMapping
 CragStackCombiner::copyNodes(
 		unsigned int       z,
 		const Crag&        source,
 		Crag&              target) {
 
-	std::map<Crag::CragNode, Crag::CragNode> nodeMap;
+	NodeMapping nodeMap(source.getAdjacencyGraph().maxNodeId() + 1);
 
 	// copy nodes
 	for (Crag::CragNode i : source.nodes()) {
 
 		Crag::CragNode n = target.addNode(Crag::SliceNode);
 
-		nodeMap[i] = n;
+		nodeMap[source.id(i)] = n;
 
 		// add adjacencies to NoAssignmentNodes before and after
 		target.addAdjacencyEdge(n, _noAssignmentNodes[z], Crag::NoAssignmentEdge);
@@ -178,8 +265,8 @@ CragStackCombiner::copyNodes(
 	// copy adjacencies
 	for (Crag::CragEdge e : source.edges()) {
 
-		Crag::CragNode u = nodeMap[e.u()];
-		Crag::CragNode v = nodeMap[e.v()];
+		Crag::CragNode u = nodeMap[source.id(e.u())];
+		Crag::CragNode v = nodeMap[source.id(e.v())];
 
 		target.addAdjacencyEdge(u, v, source.type(e));
 	}
@@ -187,8 +274,8 @@ CragStackCombiner::copyNodes(
 	// copy subset relations
 	for (Crag::CragArc a : source.arcs()) {
 
-		Crag::CragNode s = nodeMap[a.source()];
-		Crag::CragNode t = nodeMap[a.target()];
+		Crag::CragNode s = nodeMap[source.id(a.source())];
+		Crag::CragNode t = nodeMap[source.id(a.target())];
 
 		target.addSubsetArc(s, t);
 	}
@@ -199,8 +286,8 @@ CragStackCombiner::copyNodes(
 void
 CragStackCombiner::copyVolumes(
 		const CragVolumes& sourceVolumes,
-		CragVolumes& targetVolumes,
-		const std::map<Crag::CragNode, Crag::CragNode>& sourceTargetNodeMap) {
+		CragVolumes&       targetVolumes,
+		const NodeMapping& sourceTargetNodeMap) {
 
 	// copy nodes
 	for (Crag::CragNode i : sourceVolumes.getCrag().nodes()) {
@@ -209,7 +296,7 @@ CragStackCombiner::copyVolumes(
 		if (!sourceVolumes.getCrag().isLeafNode(i))
 			continue;
 
-		Crag::CragNode n = sourceTargetNodeMap.at(i);
+		Crag::CragNode n = sourceTargetNodeMap.at(sourceVolumes.getCrag().id(i));
 		targetVolumes.setVolume(n, sourceVolumes[i]);
 	}
 }
@@ -235,9 +322,33 @@ CragStackCombiner::findLinks(
 			volsA[*cragA.nodes().begin()]->getResolutionY());
 	HausdorffDistance hausdorff(_maxHausdorffDistance + maxResolution);
 
+	// Each criterion bounds the distance between the bounding boxes of linked 
+	// candidates: overlapping boxes have distance 0, the bounding box and 
+	// Hausdorff distances are upper bounds. Use the tightest bound to find 
+	// the candidates of b to test with an index, instead of testing all 
+	// pairs.
+	float maxDistance = -1;
+	if (_requireBbOverlap)
+		maxDistance = 0;
+	if (_maxBbDistance > 0 && (maxDistance < 0 || _maxBbDistance < maxDistance))
+		maxDistance = _maxBbDistance;
+	if (_maxHausdorffDistance > 0 && (maxDistance < 0 || _maxHausdorffDistance < maxDistance))
+		maxDistance = _maxHausdorffDistance;
+
+	std::unique_ptr<CragSpatialIndex> indexB;
+	std::vector<Crag::CragNode> nodesB;
+	if (maxDistance >= 0)
+		indexB = std::unique_ptr<CragSpatialIndex>(new CragSpatialIndex(cragB, volsB));
+	else
+		for (Crag::CragNode j : cragB.nodes())
+			nodesB.push_back(j);
+
 	for (Crag::CragNode i : cragA.nodes()) {
 
-		for (Crag::CragNode j : cragB.nodes()) {
+		if (indexB)
+			nodesB = indexB->find(volsA.getBoundingBox(i).project<2>(), maxDistance);
+
+		for (Crag::CragNode j : nodesB) {
 
 			LOG_ALL(cragstackcombinerlog)
 					<< "check linking of nodes " << cragA.id(i)
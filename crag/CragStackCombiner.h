@@ -15,10 +15,20 @@ public:
 
 	CragStackCombiner();
 
+	/**
+	 * Set the number of threads to use to find links between successive 
+	 * sections. If 0 (the default), the number of hardware threads is used.
+	 */
+	void setNumThreads(int numThreads) { _numThreads = numThreads; }
+
 	/**
 	 * Combine a stack of 2D CRAGS into one 3D CRAG. Adds hyperedges between the 
 	 * candidates of two successive source CRAGS in the target CRAG.
 	 *
+	 * Links between all pairs of successive sections are found in parallel. 
+	 * The target CRAG is then filled section by section, after reserving 
+	 * space for all nodes, edges, and arcs.
+	 *
 	 * This delallocates the source CRAGs.
 	 */
 	void combine(
@@ -29,15 +39,27 @@ public:
 
 private:
 
-	std::map<Crag::CragNode, Crag::CragNode> copyNodes(
+	// target nodes by source node id
+	typedef std::vector<Crag::CragNode> NodeMapping;
+
+	typedef std::vector<std::pair<Crag::CragNode, Crag::CragNode>> Links;
+
+	NodeMapping copyNodes(
 			unsigned int       z,
 			const Crag&        source,
 			Crag&              target);
 
 	void copyVolumes(
 			const CragVolumes& sourceVolumes,
-			CragVolumes& targetVolumes,
-			const std::map<Crag::CragNode, Crag::CragNode>& sourceTargetNodeMap);
+			CragVolumes&       targetVolumes,
+			const NodeMapping& sourceTargetNodeMap);
+
+	// find the links between each pair of successive sections, links[z] holds 
+	// the links between sections z-1 and z
+	void findAllLinks(
+			const std::vector<std::unique_ptr<Crag>>&        sourcesCrags,
+			const std::vector<std::unique_ptr<CragVolumes>>& sourcesVolumes,
+			std::vector<Links>&                              links);
 
 	std::vector<std::pair<Crag::CragNode, Crag::CragNode>> findLinks(const Crag& a, const Crag& b);
 
@@ -52,8 +74,10 @@ private:
 
 	bool _requireBbOverlap;
 
-	std::map<Crag::CragNode, Crag::CragNode> _prevNodeMap;
-	std::map<Crag::CragNode, Crag::CragNode> _nextNodeMap;
+	int _numThreads;
+
+	NodeMapping _prevNodeMap;
+	NodeMapping _nextNodeMap;
 
 	std::vector<Crag::CragNode> _noAssignmentNodes;
 };
@@ -1,33 +1,75 @@
 #include "CragVolumes.h"
 #include <util/Logger.h>
 #include <util/assert.h>
+#include <util/ProgramOptions.h>
 
 logger::LogChannel cragvolumeslog("cragvolumeslog", "[CragVolumes] ");
 
+util::ProgramOption optionVolumeCacheSize(
+		util::_long_name        = "volumeCacheSize",
+		util::_description_text = "The maximal size in MB of volumes of higher-order candidates that are kept in memory "
+		                          "after they have been generated from the leaf node volumes.",
+		util::_default_value    = 1024);
+
 CragVolumes::CragVolumes(const Crag& crag) :
 	_crag(crag),
-	_volumes(crag) {
+	_volumes(crag),
+	_cache(optionVolumeCacheSize.as<std::size_t>()*1024*1024) {}
+
+void
+CragVolumes::setVolume(Crag::CragNode n, std::shared_ptr<CragVolume> volume) {
 
-	_cache.set_max_size(1024);
+	_volumes[n] = UnionVolume(volume);
+	_volumes[n].getBoundingBox();
+	setBoundingBoxDirty();
 }
 
 void
-CragVolumes::setVolume(Crag::CragNode n, std::shared_ptr<CragVolume> volume) {
+CragVolumes::setVolume(Crag::CragNode n, std::shared_ptr<RunLengthVolume> volume) {
 
 	_volumes[n] = UnionVolume(volume);
+	_volumes[n].getBoundingBox();
 	setBoundingBoxDirty();
 }
 
 std::shared_ptr<CragVolume>
 CragVolumes::operator[](Crag::CragNode n) const {
 
-	// if this is already a leaf node volume, no need to materialize
-	if (_volumes[n].numUnionVolumes() == 1)
-		return _volumes[n].getUnionVolume(0);
+	const UnionVolume& v = getUnion(n);
+
+	// if this is already a dense leaf node volume, no need to materialize
+	if (v.numUnionVolumes() == 1 && v.numRunLengthVolumes() == 0)
+		return v.getUnionVolume(0);
+
+	return _cache.get(_crag.id(n), [v]{ return v.materialize(); });
+}
+
+std::shared_ptr<RunLengthVolume>
+CragVolumes::getRunLengthVolume(Crag::CragNode n) const {
+
+	const UnionVolume& v = getUnion(n);
+
+	// if this is already a run-length leaf node volume, no need to merge
+	if (v.numUnionVolumes() == 0 && v.numRunLengthVolumes() == 1)
+		return v.getRunLengthVolume(0);
+
+	return _cache.getRuns(_crag.id(n), [v]{ return v.materializeRuns(); });
+}
+
+const UnionVolume&
+CragVolumes::getUnion(Crag::CragNode n) const {
+
+	std::lock_guard<std::mutex> lock(_volumesMutex);
+
+	return getUnionUnlocked(n);
+}
+
+const UnionVolume&
+CragVolumes::getUnionUnlocked(Crag::CragNode n) const {
 
 	// if this volume is empty, we need to find all leaf node volumes that 
 	// create it
-	if (_volumes[n].numUnionVolumes() == 0) {
+	if (_volumes[n].numUnionVolumes() == 0 && _volumes[n].numRunLengthVolumes() == 0) {
 
 		if (_crag.isLeafNode(n))
 			UTIL_THROW_EXCEPTION(
@@ -35,15 +77,27 @@ CragVolumes::operator[](Crag::CragNode n) const {
 					"node " << _crag.id(n) << " is a leaf node but has no volume assigned");
 
 		auto leafNodes = _crag.leafNodes(n);
-		std::vector<std::shared_ptr<CragVolume>> leafVolumes;
+		std::vector<std::shared_ptr<CragVolume>>      leafVolumes;
+		std::vector<std::shared_ptr<RunLengthVolume>> leafRunVolumes;
 
-		for (Crag::CragNode l : leafNodes)
-			leafVolumes.push_back(this->operator[](l));
-		_volumes[n] = UnionVolume(leafVolumes);
+		for (Crag::CragNode l : leafNodes) {
+
+			const UnionVolume& leaf = getUnionUnlocked(l);
+
+			for (size_t i = 0; i < leaf.numUnionVolumes(); i++)
+				leafVolumes.push_back(leaf.getUnionVolume(i));
+			for (size_t i = 0; i < leaf.numRunLengthVolumes(); i++)
+				leafRunVolumes.push_back(leaf.getRunLengthVolume(i));
+		}
+
+		_volumes[n] = UnionVolume(leafVolumes, leafRunVolumes);
+
+		// bounding boxes are computed lazily, do it here while we hold the 
+		// lock
+		_volumes[n].getBoundingBox();
 	}
 
-	UnionVolume& v = _volumes[n];
-	return _cache.get(n, [v]{ return v.materialize(); });
+	return _volumes[n];
 }
 
 bool
@@ -60,4 +114,11 @@ void
 CragVolumes::clearCache() {
 
 	_cache.clear();
+
+	VolumeCache::Statistics statistics = _cache.getStatistics();
+
+	LOG_DEBUG(cragvolumeslog)
+			<< "cleared volume cache, " << statistics.hits << " hits, "
+			<< statistics.misses << " misses, " << statistics.evictions
+			<< " evictions" << std::endl;
 }
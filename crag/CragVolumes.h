@@ -2,15 +2,20 @@
 #define CANDIDATE_MC_CRAG_CRAG_VOLUMES_H__
 
 #include <memory>
+#include <mutex>
 #include <imageprocessing/ExplicitVolume.h>
-#include <util/cache.hpp>
 #include "Crag.h"
 #include "CragVolume.h"
+#include "RunLengthVolume.h"
 #include "UnionVolume.h"
+#include "VolumeCache.h"
 
 /**
  * A node property map for Crags that provides the volumes of candidates as 
  * CragVolume.
+ *
+ * Volumes can be accessed concurrently, as long as no volumes are set at the 
+ * same time.
  */
 class CragVolumes : public Volume {
 
@@ -26,7 +31,8 @@ public:
 
 	CragVolumes(CragVolumes&& other) :
 		_crag(other._crag),
-		_volumes(other._crag) {
+		_volumes(other._crag),
+		_cache(other._cache.getMaxBytes()) {
 
 		for (Crag::CragNode n : _crag.nodes()) {
 
@@ -40,12 +46,25 @@ public:
 	 */
 	void setVolume(Crag::CragNode n, std::shared_ptr<CragVolume> volume);
 
+	/**
+	 * Set the volume of a leaf node as a RunLengthVolume. Dense volumes of 
+	 * this node will only be created on demand by operator[]().
+	 */
+	void setVolume(Crag::CragNode n, std::shared_ptr<RunLengthVolume> volume);
+
 	/**
 	 * Get the volume of a candidate. If the candidate is a higher candidate, 
 	 * it's volume will be materialized from the leaf node volume it merges.
 	 */
 	std::shared_ptr<CragVolume> operator[](Crag::CragNode n) const;
 
+	/**
+	 * Get the volume of a candidate as a RunLengthVolume. For higher 
+	 * candidates, the runs of the leaf node volumes are merged without 
+	 * materializing a dense volume.
+	 */
+	std::shared_ptr<RunLengthVolume> getRunLengthVolume(Crag::CragNode n) const;
+
 	/**
 	 * Get the bounding box of all volumes combined.
 	 */
@@ -58,7 +77,7 @@ public:
 	 * volumes[n].getBoundingBox().
 	 */
 	util::box<float,3> getBoundingBox(Crag::CragNode n) const {
-		return _volumes[n].getBoundingBox();
+		return getUnion(n).getBoundingBox();
 	}
 
 	/**
@@ -73,28 +92,52 @@ public:
 
 	/**
 	 * Clear volumes of higher-order nodes that have been generated on-the-fly 
-	 * by operator[]().
+	 * by operator[]() or getRunLengthVolume().
 	 */
 	void clearCache();
 
+	/**
+	 * Set the maximal number of bytes used by volumes of higher-order nodes 
+	 * that have been generated on-the-fly. The default is given by program 
+	 * option --volumeCacheSize.
+	 */
+	void setCacheSize(std::size_t bytes) { _cache.setMaxBytes(bytes); }
+
+	std::size_t getCacheSize() const { return _cache.getMaxBytes(); }
+
+	/**
+	 * Get hit, miss, and eviction counts and the current size of the volume 
+	 * cache.
+	 */
+	VolumeCache::Statistics getCacheStatistics() const { return _cache.getStatistics(); }
+
 protected:
 
 	util::box<float,3> computeBoundingBox() const override {
 
+		// the union volumes know their bounding boxes without materializing 
+		// them, and the leaf node volumes cover all higher candidates
 		util::box<float, 3> bb;
 		for (Crag::CragNode n : _crag.nodes())
 			if (!_volumes[n].getBoundingBox().isZero())
-				bb += operator[](n)->getBoundingBox();
+				bb += _volumes[n].getBoundingBox();
 
 		return bb;
 	}
 
 private:
 
+	// get the union of leaf node volumes of a candidate
+	const UnionVolume& getUnion(Crag::CragNode n) const;
+	const UnionVolume& getUnionUnlocked(Crag::CragNode n) const;
+
 	const Crag& _crag;
 
 	mutable Crag::NodeMap<UnionVolume> _volumes;
-	mutable cache<Crag::CragNode, std::shared_ptr<CragVolume>> _cache;
+	mutable VolumeCache _cache;
+
+	// protects the creation of union volumes in _volumes
+	mutable std::mutex _volumesMutex;
 };
 
 #endif // CANDIDATE_MC_CRAG_CRAG_VOLUMES_H__
@@ -0,0 +1,189 @@
+#include <algorithm>
+#include <atomic>
+#include <exception>
+#include <mutex>
+#include <thread>
+#include <vector>
+#include <util/Logger.h>
+#include <util/exceptions.h>
+#include <util/timing.h>
+#include "GroundTruthOverlaps.h"
+
+logger::LogChannel groundtruthoverlapslog("groundtruthoverlapslog", "[GroundTruthOverlaps] ");
+
+GroundTruthOverlaps::GroundTruthOverlaps(const Crag& crag) :
+	_crag(crag),
+	_overlaps(crag),
+	_sizes(crag, 0) {}
+
+GroundTruthOverlaps::GroundTruthOverlaps(
+		const Crag&                crag,
+		const CragVolumes&         volumes,
+		const ExplicitVolume<int>& groundTruth,
+		int                        numThreads) :
+	GroundTruthOverlaps(crag) {
+
+	UTIL_TIME_METHOD;
+
+	_gtSizes = countLabels(groundTruth);
+
+	computeLeafOverlaps(volumes, groundTruth, numThreads);
+	propagate();
+}
+
+GroundTruthOverlaps::Overlaps
+GroundTruthOverlaps::countLabels(const ExplicitVolume<int>& groundTruth) {
+
+	Overlaps sizes;
+	for (int l : groundTruth.data())
+		sizes[l]++;
+
+	return sizes;
+}
+
+void
+GroundTruthOverlaps::setLeafOverlaps(Crag::CragNode n, const Overlaps& overlaps) {
+
+	if (!_crag.isLeafNode(n))
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"node " << _crag.id(n) << " is not a leaf node");
+
+	_overlaps[n] = overlaps;
+}
+
+void
+GroundTruthOverlaps::propagate() {
+
+	// visit the nodes in post-order with an explicit stack, such that the
+	// depth of the subset hierarchy is not limited by the call stack
+	Crag::NodeMap<bool> done(_crag, false);
+	Crag::NodeMap<bool> open(_crag, false);
+	std::vector<Crag::CragNode> stack;
+
+	for (Crag::CragNode root : _crag.nodes()) {
+
+		if (done[root])
+			continue;
+
+		stack.push_back(root);
+
+		while (!stack.empty()) {
+
+			Crag::CragNode n = stack.back();
+
+			if (done[n]) {
+
+				stack.pop_back();
+				continue;
+			}
+
+			// first visit: process the children first
+			if (!open[n]) {
+
+				open[n] = true;
+				for (Crag::CragArc childArc : _crag.inArcs(n))
+					if (!done[childArc.source()])
+						stack.push_back(childArc.source());
+				continue;
+			}
+
+			stack.pop_back();
+			sumChildren(n);
+			done[n] = true;
+		}
+	}
+}
+
+void
+GroundTruthOverlaps::computeLeafOverlaps(
+		const CragVolumes&         volumes,
+		const ExplicitVolume<int>& groundTruth,
+		int                        numThreads) {
+
+	std::vector<Crag::CragNode> leafNodes;
+	for (Crag::CragNode n : _crag.nodes())
+		if (_crag.isLeafNode(n) && _crag.type(n) != Crag::NoAssignmentNode)
+			leafNodes.push_back(n);
+
+	LOG_DEBUG(groundtruthoverlapslog)
+			<< "computing overlaps of " << leafNodes.size()
+			<< " leaf nodes" << std::endl;
+
+	if (numThreads <= 0)
+		numThreads = std::max(1u, std::thread::hardware_concurrency());
+	numThreads = std::min(numThreads, static_cast<int>(std::max(leafNodes.size(), std::size_t(1))));
+
+	std::atomic<std::size_t> next(0);
+	std::exception_ptr       error;
+	std::mutex               errorMutex;
+
+	// every leaf node is visited by exactly one thread, which is the only one
+	// writing to its table
+	auto worker = [&]() {
+
+		while (true) {
+
+			std::size_t i = next++;
+			if (i >= leafNodes.size())
+				return;
+
+			try {
+
+				Crag::CragNode n = leafNodes[i];
+
+				// visit only the foreground runs of the candidate
+				const RunLengthVolume& region = *volumes.getRunLengthVolume(n);
+
+				util::point<int, 3> offset = region.getDiscreteOffset(groundTruth.getOffset());
+
+				Overlaps& overlaps = _overlaps[n];
+				overlaps.clear();
+
+				for (const RunLengthVolume::Run& run : region.runs())
+					for (unsigned int x = run.x; x < run.x + run.length; x++) {
+
+						int gtLabel = groundTruth.data()(
+								offset.x() + x,
+								offset.y() + run.y,
+								offset.z() + run.z);
+
+						overlaps[gtLabel]++;
+					}
+
+			} catch (...) {
+
+				std::lock_guard<std::mutex> lock(errorMutex);
+				if (!error)
+					error = std::current_exception();
+				next = leafNodes.size();
+			}
+		}
+	};
+
+	std::vector<std::thread> threads;
+	for (int t = 0; t < numThreads; t++)
+		threads.push_back(std::thread(worker));
+	for (std::thread& thread : threads)
+		thread.join();
+
+	if (error)
+		std::rethrow_exception(error);
+}
+
+void
+GroundTruthOverlaps::sumChildren(Crag::CragNode n) {
+
+	if (!_crag.isLeafNode(n)) {
+
+		_overlaps[n].clear();
+
+		for (Crag::CragArc childArc : _crag.inArcs(n))
+			for (const auto& p : _overlaps[childArc.source()])
+				_overlaps[n][p.first] += p.second;
+	}
+
+	_sizes[n] = 0;
+	for (const auto& p : _overlaps[n])
+		_sizes[n] += p.second;
+}
@@ -0,0 +1,124 @@
+#ifndef CANDIDATE_MC_CRAG_GROUND_TRUTH_OVERLAPS_H__
+#define CANDIDATE_MC_CRAG_GROUND_TRUTH_OVERLAPS_H__
+
+#include <map>
+#include <imageprocessing/ExplicitVolume.h>
+#include "Crag.h"
+#include "CragVolumes.h"
+
+/**
+ * Tables of the number of voxels each candidate of a CRAG shares with each
+ * ground-truth label (including the background label 0).
+ *
+ * Only the volumes of the leaf candidates are visited, in one pass over their
+ * runs and the ground truth. Since the volume of a higher candidate is the
+ * union of the (disjoint) volumes of its children, the tables of all other
+ * candidates are the sums of the tables of their children, and are
+ * propagated up the subset hierarchy without touching any voxel.
+ *
+ * NoAssignmentNodes do not cover any voxels and have empty tables.
+ */
+class GroundTruthOverlaps {
+
+public:
+
+	/**
+	 * Number of voxels by ground-truth label.
+	 */
+	typedef std::map<int, int> Overlaps;
+
+	/**
+	 * Create empty tables for the candidates of the given CRAG, to be filled
+	 * with setLeafOverlaps() and propagate().
+	 */
+	GroundTruthOverlaps(const Crag& crag);
+
+	/**
+	 * Compute the tables for all candidates of the given CRAG.
+	 *
+	 * @param numThreads
+	 *              The number of threads to visit the leaf candidates with. If
+	 *              0 (the default), one thread per core is used.
+	 */
+	GroundTruthOverlaps(
+			const Crag&                crag,
+			const CragVolumes&         volumes,
+			const ExplicitVolume<int>& groundTruth,
+			int                        numThreads = 0);
+
+	/**
+	 * Get the overlaps of a candidate with each ground-truth label.
+	 */
+	const Overlaps& operator[](Crag::CragNode n) const { return _overlaps[n]; }
+
+	/**
+	 * Get the overlap of a candidate with a single ground-truth label.
+	 */
+	int getOverlap(Crag::CragNode n, int gtLabel) const {
+
+		auto i = _overlaps[n].find(gtLabel);
+		return (i == _overlaps[n].end() ? 0 : i->second);
+	}
+
+	/**
+	 * Get the number of voxels of a candidate.
+	 */
+	int getSize(Crag::CragNode n) const { return _sizes[n]; }
+
+	/**
+	 * Get the number of voxels of each ground-truth label.
+	 */
+	const Overlaps& getGroundTruthSizes() const { return _gtSizes; }
+
+	/**
+	 * Get the number of voxels of a single ground-truth label.
+	 */
+	int getGroundTruthSize(int gtLabel) const {
+
+		auto i = _gtSizes.find(gtLabel);
+		return (i == _gtSizes.end() ? 0 : i->second);
+	}
+
+	/**
+	 * Count the voxels of each label in a ground-truth volume.
+	 */
+	static Overlaps countLabels(const ExplicitVolume<int>& groundTruth);
+
+	/**
+	 * Set the table of a leaf candidate. Call propagate() after all leaf
+	 * tables have been set.
+	 */
+	void setLeafOverlaps(Crag::CragNode n, const Overlaps& overlaps);
+
+	/**
+	 * Set the number of voxels of each ground-truth label.
+	 */
+	void setGroundTruthSizes(const Overlaps& sizes) { _gtSizes = sizes; }
+
+	/**
+	 * Recompute the tables of all non-leaf candidates from the tables of the
+	 * leaf candidates.
+	 */
+	void propagate();
+
+private:
+
+	void computeLeafOverlaps(
+			const CragVolumes&         volumes,
+			const ExplicitVolume<int>& groundTruth,
+			int                        numThreads);
+
+	// set the table of a non-leaf node to the sum of the tables of its 
+	// children, and update its size
+	void sumChildren(Crag::CragNode n);
+
+	const Crag& _crag;
+
+	Crag::NodeMap<Overlaps> _overlaps;
+	Crag::NodeMap<int>      _sizes;
+
+	Overlaps _gtSizes;
+};
+
+#endif // CANDIDATE_MC_CRAG_GROUND_TRUTH_OVERLAPS_H__
+
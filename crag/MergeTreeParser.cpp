@@ -56,6 +56,7 @@ MergeTreeParser::MergeTreeVisitor::MergeTreeVisitor(
 	_minSize(minRegionSize),
 	_maxSize(maxRegionSize),
 	_extents(_crag),
+	_levels(_crag),
 	_maxMerges(maxMerges) {}
 
 void
@@ -87,7 +88,7 @@ MergeTreeParser::MergeTreeVisitor::finalizeComponent(
 	while (!_roots.empty() && contained(_extents[_roots.top()], std::make_pair(begin, end))) {
 
 		children.push_back(_roots.top());
-		level = std::max(level, _crag.getLevel(_roots.top()) + 1);
+		level = std::max(level, _levels[_roots.top()] + 1);
 		_roots.pop();
 	}
 
@@ -103,6 +104,7 @@ MergeTreeParser::MergeTreeVisitor::finalizeComponent(
 	// create a node (all nodes from a 2D merge-tree are slice nodes)
 	Crag::CragNode node = _crag.addNode(Crag::SliceNode);
 	_extents[node] = std::make_pair(begin, end);
+	_levels[node]  = level;
 
 	// connect it to children
 	for (Crag::CragNode child : children)
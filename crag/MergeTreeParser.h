@@ -124,6 +124,9 @@ private:
 		// extents of all regions
 		Crag::NodeMap<std::pair<PixelList::const_iterator, PixelList::const_iterator>> _extents;
 
+		// levels of all regions
+		Crag::NodeMap<int> _levels;
+
 		int _maxMerges;
 	};
 
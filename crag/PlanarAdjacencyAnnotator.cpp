@@ -1,3 +1,9 @@
+#include <algorithm>
+#include <atomic>
+#include <cstdlib>
+#include <exception>
+#include <mutex>
+#include <thread>
 #include <util/Logger.h>
 #include <util/ProgramOptions.h>
 #include <util/box.hpp>
@@ -55,6 +61,51 @@ PlanarAdjacencyAnnotator::annotate(Crag& crag, const CragVolumes& volumes) {
 	if (resolution.isZero())
 		return;
 
+	GridGraphType   grid;
+	LeafAdjacencies adjacencies;
+
+	if (_blockBudget > 0)
+		findLeafAdjacenciesBlockwise(crag, volumes, cragBB, resolution, grid, adjacencies);
+	else
+		findLeafAdjacencies(crag, volumes, cragBB, resolution, grid, adjacencies);
+
+	unsigned int numAdded = 0;
+	crag.setGridGraph(grid);
+	for (auto& p : adjacencies) {
+
+		int u = p.first.first;
+		int v = p.first.second;
+
+		Crag::CragEdge newEdge = crag.addAdjacencyEdge(
+				crag.nodeFromId(u),
+				crag.nodeFromId(v));
+		crag.setAffiliatedEdges(
+				newEdge,
+				p.second);
+		numAdded++;
+
+		LOG_ALL(planaradjacencyannotatorlog)
+				<< "adding leaf node adjacency between "
+				<< u << " and " << v << std::endl;
+	}
+
+	LOG_USER(planaradjacencyannotatorlog)
+			<< "added " << numAdded << " leaf node adjacency edges"
+			<< std::endl;
+
+	if (optionCragType.as<std::string>() == "full")
+		propagateLeafAdjacencies(crag);
+}
+
+void
+PlanarAdjacencyAnnotator::findLeafAdjacencies(
+		const Crag&                  crag,
+		const CragVolumes&           volumes,
+		const util::box<float, 3>&   cragBB,
+		const util::point<float, 3>& resolution,
+		GridGraphType&               grid,
+		LeafAdjacencies&             adjacencies) {
+
 	// create a vigra multi-array large enough to hold all volumes
 	vigra::MultiArray<3, int> ids(
 			vigra::Shape3(
@@ -68,8 +119,8 @@ PlanarAdjacencyAnnotator::annotate(Crag& crag, const CragVolumes& volumes) {
 		if (!crag.isLeafNode(n))
 			continue;
 
-		const util::point<float, 3>&      volumeOffset     = volumes[n]->getOffset();
-		const util::box<unsigned int, 3>& volumeDiscreteBB = volumes[n]->getDiscreteBoundingBox();
+		util::point<float, 3>      volumeOffset     = volumes[n]->getOffset();
+		util::box<unsigned int, 3> volumeDiscreteBB = volumes[n]->getDiscreteBoundingBox();
 
 		util::point<unsigned int, 3> begin = (volumeOffset - cragBB.min())/resolution;
 		util::point<unsigned int, 3> end   = begin +
@@ -109,10 +160,9 @@ PlanarAdjacencyAnnotator::annotate(Crag& crag, const CragVolumes& volumes) {
 			//ids.bind<2>(0),
 			//vigra::ImageExportInfo("debug/ids.tif"));
 
-	typedef vigra::GridGraph<3>       GridGraphType;
 	typedef vigra::AdjacencyListGraph RagType;
 
-	GridGraphType grid(
+	grid = GridGraphType(
 			ids.shape(),
 			_neighborhood == Direct ? vigra::DirectNeighborhood : vigra::IndirectNeighborhood);
 	RagType rag;
@@ -125,30 +175,191 @@ PlanarAdjacencyAnnotator::annotate(Crag& crag, const CragVolumes& volumes) {
 			affiliatedEdges,
 			std::numeric_limits<int>::max());
 
-	unsigned int numAdded = 0;
-	crag.setGridGraph(grid);
 	for (RagType::EdgeIt e(rag); e != lemon::INVALID; ++e) {
 
 		int u = rag.id(rag.u(*e));
 		int v = rag.id(rag.v(*e));
 
-		Crag::CragEdge newEdge = crag.addAdjacencyEdge(
-				crag.nodeFromId(u),
-				crag.nodeFromId(v));
-		crag.setAffiliatedEdges(
-				newEdge,
-				affiliatedEdges[*e]);
-		numAdded++;
+		adjacencies[std::make_pair(std::min(u, v), std::max(u, v))] = affiliatedEdges[*e];
+	}
+}
 
-		LOG_ALL(planaradjacencyannotatorlog)
-				<< "adding leaf node adjacency between "
-				<< u << " and " << v << std::endl;
+void
+PlanarAdjacencyAnnotator::findLeafAdjacenciesBlockwise(
+		const Crag&                  crag,
+		const CragVolumes&           volumes,
+		const util::box<float, 3>&   cragBB,
+		const util::point<float, 3>& resolution,
+		GridGraphType&               grid,
+		LeafAdjacencies&             adjacencies) {
+
+	const int background = std::numeric_limits<int>::max();
+
+	vigra::Shape3 shape(
+			cragBB.width() /resolution.x(),
+			cragBB.height()/resolution.y(),
+			cragBB.depth() /resolution.z());
+
+	grid = GridGraphType(
+			shape,
+			_neighborhood == Direct ? vigra::DirectNeighborhood : vigra::IndirectNeighborhood);
+
+	// offsets to the neighbors of a voxel that come after it in scan order, 
+	// such that each pair of neighbors is visited once
+	std::vector<vigra::Shape3> neighborOffsets;
+	for (int dz = -1; dz <= 1; dz++)
+	for (int dy = -1; dy <= 1; dy++)
+	for (int dx = -1; dx <= 1; dx++) {
+
+		bool forward = (dz > 0 || (dz == 0 && (dy > 0 || (dy == 0 && dx > 0))));
+		bool direct  = (std::abs(dx) + std::abs(dy) + std::abs(dz) == 1);
+
+		if (forward && (direct || _neighborhood == Indirect))
+			neighborOffsets.push_back(vigra::Shape3(dx, dy, dz));
 	}
 
+	// the slabs: each holds sectionsPerSlab sections plus one section of the 
+	// next slab to find adjacencies across slab boundaries
+	std::size_t sectionBytes = static_cast<std::size_t>(shape[0])*shape[1]*sizeof(int);
+	std::size_t numSections  = std::max<std::size_t>(_blockBudget/sectionBytes, 2);
+
+	int numThreads = _numThreads;
+	if (numThreads <= 0)
+		numThreads = std::max(1u, std::thread::hardware_concurrency());
+	numThreads = std::max<int>(1, std::min<std::size_t>(numThreads, numSections/2));
+
+	int sectionsPerSlab = numSections/numThreads - 1;
+	int numSlabs        = (shape[2] + sectionsPerSlab - 1)/sectionsPerSlab;
+	numThreads = std::min(numThreads, numSlabs);
+
 	LOG_USER(planaradjacencyannotatorlog)
-			<< "added " << numAdded << " leaf node adjacency edges"
-			<< std::endl;
+			<< "finding adjacencies in " << numSlabs << " slabs of " << sectionsPerSlab
+			<< " sections with " << numThreads << " threads" << std::endl;
 
-	if (optionCragType.as<std::string>() == "full")
-		propagateLeafAdjacencies(crag);
+	// the leaf volumes, their offsets in the label image, and the slabs they 
+	// intersect
+	struct Leaf {
+
+		int                          id;
+		std::shared_ptr<CragVolume>  volume;
+		util::point<unsigned int, 3> begin;
+	};
+	std::vector<Leaf>             leaves;
+	std::vector<std::vector<int>> slabLeaves(numSlabs);
+
+	for (Crag::NodeIt n(crag); n != lemon::INVALID; ++n) {
+
+		if (!crag.isLeafNode(n))
+			continue;
+
+		Leaf leaf;
+		leaf.id     = crag.id(n);
+		leaf.volume = volumes[n];
+		leaf.begin  = (leaf.volume->getOffset() - cragBB.min())/resolution;
+
+		int zBegin = leaf.begin.z();
+		int zEnd   = zBegin + leaf.volume->depth();
+
+		// slab s covers sections [s*sectionsPerSlab, (s + 1)*sectionsPerSlab]
+		int firstSlab = std::max(0, (zBegin - 1)/sectionsPerSlab);
+		int lastSlab  = std::min(numSlabs - 1, (zEnd - 1)/sectionsPerSlab);
+		for (int s = firstSlab; s <= lastSlab; s++)
+			slabLeaves[s].push_back(leaves.size());
+
+		leaves.push_back(leaf);
+	}
+
+	std::vector<LeafAdjacencies> slabAdjacencies(numSlabs);
+
+	std::atomic<int>   nextSlab(0);
+	std::exception_ptr error;
+	std::mutex         errorMutex;
+
+	auto worker = [&]() {
+
+		for (int s = nextSlab++; s < numSlabs; s = nextSlab++) {
+
+			try {
+
+				int zBegin = s*sectionsPerSlab;
+				int zEnd   = std::min<int>(zBegin + sectionsPerSlab, shape[2]);
+				int zHalo  = std::min<int>(zEnd + 1, shape[2]);
+
+				vigra::MultiArray<3, int> ids(vigra::Shape3(shape[0], shape[1], zHalo - zBegin), background);
+
+				for (int l : slabLeaves[s]) {
+
+					const Leaf&       leaf   = leaves[l];
+					const CragVolume& volume = *leaf.volume;
+
+					int begin = std::max<int>(leaf.begin.z(), zBegin);
+					int end   = std::min<int>(leaf.begin.z() + volume.depth(), zHalo);
+
+					for (int z = begin; z < end; z++)
+					for (unsigned int y = 0; y < volume.height(); y++)
+					for (unsigned int x = 0; x < volume.width();  x++)
+						if (volume.data()(x, y, z - leaf.begin.z()) == 1)
+							ids(leaf.begin.x() + x, leaf.begin.y() + y, z - zBegin) = leaf.id;
+				}
+
+				LeafAdjacencies& found = slabAdjacencies[s];
+
+				for (int z = zBegin; z < zEnd; z++)
+				for (int y = 0; y < shape[1]; y++)
+				for (int x = 0; x < shape[0]; x++) {
+
+					int u = ids(x, y, z - zBegin);
+					if (u == background)
+						continue;
+
+					for (const vigra::Shape3& offset : neighborOffsets) {
+
+						vigra::Shape3 p(x, y, z);
+						vigra::Shape3 q = p + offset;
+
+						if (q[0] < 0 || q[0] >= shape[0] || q[1] < 0 || q[1] >= shape[1] || q[2] >= zHalo)
+							continue;
+
+						int v = ids(q[0], q[1], q[2] - zBegin);
+						if (v == background || v == u)
+							continue;
+
+						found[std::make_pair(std::min(u, v), std::max(u, v))].push_back(grid.findEdge(p, q));
+					}
+				}
+
+			} catch (...) {
+
+				std::lock_guard<std::mutex> lock(errorMutex);
+				if (!error)
+					error = std::current_exception();
+
+				// skip the remaining slabs
+				nextSlab = numSlabs;
+			}
+		}
+	};
+
+	std::vector<std::thread> threads;
+	for (int i = 1; i < numThreads; i++)
+		threads.emplace_back(worker);
+	worker();
+	for (std::thread& thread : threads)
+		thread.join();
+
+	if (error)
+		std::rethrow_exception(error);
+
+	// stitch the slabs in order, such that the result does not depend on the 
+	// number of threads
+	for (LeafAdjacencies& found : slabAdjacencies) {
+
+		for (auto& p : found) {
+
+			std::vector<GridGraphType::Edge>& edges = adjacencies[p.first];
+			edges.insert(edges.end(), p.second.begin(), p.second.end());
+		}
+
+		LeafAdjacencies().swap(found);
+	}
 }
@@ -1,6 +1,8 @@
 #ifndef CANDIDATE_MC_CRAG_PLANAR_ADJACENCY_ANNOTATOR_H__
 #define CANDIDATE_MC_CRAG_PLANAR_ADJACENCY_ANNOTATOR_H__
 
+#include <map>
+#include <vector>
 #include "AdjacencyAnnotator.h"
 
 /**
@@ -24,7 +26,24 @@ public:
 	};
 
 	PlanarAdjacencyAnnotator(Neighborhood neighborhood) :
-		_neighborhood(neighborhood) {}
+		_neighborhood(neighborhood),
+		_blockBudget(0),
+		_numThreads(0) {}
+
+	/**
+	 * Find adjacencies block-wise: The bounding box of the CRAG is split into 
+	 * slabs of consecutive sections, which are processed in parallel. At most 
+	 * the given number of bytes are used for the label images of all slabs 
+	 * processed at the same time (but at least one section per slab). If 0 
+	 * (the default), a label image of the whole CRAG is created.
+	 */
+	void setBlockBudget(std::size_t bytes) { _blockBudget = bytes; }
+
+	/**
+	 * The number of slabs to process in parallel, if a block budget is set. If 
+	 * 0 (the default), the number of hardware threads is used.
+	 */
+	void setNumThreads(int numThreads) { _numThreads = numThreads; }
 
 	/**
 	 * Annotate the leaf nodes of the given CRAG with adjacency edges. An edge 
@@ -35,7 +54,31 @@ public:
 
 private:
 
+	typedef vigra::GridGraph<3>                                             GridGraphType;
+	typedef std::map<std::pair<int, int>, std::vector<GridGraphType::Edge>> LeafAdjacencies;
+
+	// find leaf adjacencies on one label image of the whole CRAG
+	void findLeafAdjacencies(
+			const Crag&                  crag,
+			const CragVolumes&           volumes,
+			const util::box<float, 3>&   cragBB,
+			const util::point<float, 3>& resolution,
+			GridGraphType&               grid,
+			LeafAdjacencies&             adjacencies);
+
+	// find leaf adjacencies slab by slab
+	void findLeafAdjacenciesBlockwise(
+			const Crag&                  crag,
+			const CragVolumes&           volumes,
+			const util::box<float, 3>&   cragBB,
+			const util::point<float, 3>& resolution,
+			GridGraphType&               grid,
+			LeafAdjacencies&             adjacencies);
+
 	Neighborhood _neighborhood;
+
+	std::size_t _blockBudget;
+	int         _numThreads;
 };
 
 #endif // CANDIDATE_MC_CRAG_PLANAR_ADJACENCY_ANNOTATOR_H__
@@ -0,0 +1,174 @@
+#include <algorithm>
+#include <cmath>
+#include <util/assert.h>
+#include "RunLengthVolume.h"
+
+RunLengthVolume::RunLengthVolume(const CragVolume& volume) :
+	_discreteBb(
+			util::point<unsigned int, 3>(),
+			util::point<unsigned int, 3>(volume.width(), volume.height(), volume.depth())) {
+
+	for (unsigned int z = 0; z < volume.depth();  z++)
+	for (unsigned int y = 0; y < volume.height(); y++)
+	for (unsigned int x = 0; x < volume.width();) {
+
+		if (volume(x, y, z) == 0) {
+
+			x++;
+			continue;
+		}
+
+		Run run;
+		run.x = x;
+		run.y = y;
+		run.z = z;
+
+		while (x < volume.width() && volume(x, y, z) > 0)
+			x++;
+
+		run.length = x - run.x;
+		_runs.push_back(run);
+	}
+
+	setResolution(volume.getResolution());
+	setOffset(volume.getOffset());
+	setDiscreteBoundingBoxDirty();
+}
+
+RunLengthVolume::RunLengthVolume(
+		unsigned int width,
+		unsigned int height,
+		unsigned int depth,
+		std::vector<Run> runs) :
+	_runs(std::move(runs)),
+	_discreteBb(
+			util::point<unsigned int, 3>(),
+			util::point<unsigned int, 3>(width, height, depth)) {
+
+	setDiscreteBoundingBoxDirty();
+}
+
+std::shared_ptr<RunLengthVolume>
+RunLengthVolume::unite(const std::vector<std::shared_ptr<RunLengthVolume>>& volumes) {
+
+	// get union stats
+	util::box<float, 3>   bb;
+	util::point<float, 3> resolution;
+	std::size_t           numRuns = 0;
+
+	for (auto volume : volumes) {
+
+		bb += volume->getBoundingBox();
+		numRuns += volume->runs().size();
+
+		if (resolution.isZero())
+			resolution = volume->getResolution();
+		else
+			UTIL_ASSERT_REL(resolution, ==, volume->getResolution());
+	}
+
+	// collect the runs of all volumes in the discrete frame of the union
+	std::vector<Run> runs;
+	runs.reserve(numRuns);
+
+	for (auto volume : volumes) {
+
+		util::point<int, 3> offset = volume->getDiscreteOffset(bb.min());
+
+		UTIL_ASSERT_REL(offset.x(), >=, 0);
+		UTIL_ASSERT_REL(offset.y(), >=, 0);
+		UTIL_ASSERT_REL(offset.z(), >=, 0);
+
+		for (Run run : volume->runs()) {
+
+			run.x += offset.x();
+			run.y += offset.y();
+			run.z += offset.z();
+			runs.push_back(run);
+		}
+	}
+
+	std::sort(runs.begin(), runs.end(), [](const Run& a, const Run& b) {
+
+		if (a.z != b.z) return a.z < b.z;
+		if (a.y != b.y) return a.y < b.y;
+		return a.x < b.x;
+	});
+
+	// merge overlapping and touching runs
+	std::vector<Run> merged;
+	merged.reserve(runs.size());
+
+	for (const Run& run : runs) {
+
+		if (!merged.empty()) {
+
+			Run& last = merged.back();
+
+			if (last.z == run.z && last.y == run.y && run.x <= last.x + last.length) {
+
+				last.length = std::max(last.x + last.length, run.x + run.length) - last.x;
+				continue;
+			}
+		}
+
+		merged.push_back(run);
+	}
+
+	auto u = std::make_shared<RunLengthVolume>(
+			static_cast<unsigned int>(std::round(bb.width() /resolution.x())),
+			static_cast<unsigned int>(std::round(bb.height()/resolution.y())),
+			static_cast<unsigned int>(std::round(bb.depth() /resolution.z())),
+			std::move(merged));
+	u->setResolution(resolution);
+	u->setOffset(bb.min());
+
+	return u;
+}
+
+std::shared_ptr<CragVolume>
+RunLengthVolume::materialize() const {
+
+	const util::box<unsigned int, 3>& dbb = getDiscreteBoundingBox();
+
+	auto m = std::make_shared<CragVolume>(
+			dbb.width(),
+			dbb.height(),
+			dbb.depth());
+	CragVolume& materialized = *m;
+	materialized.setOffset(getOffset());
+	materialized.setResolution(getResolution());
+
+	for (const Run& run : _runs) {
+
+		UTIL_ASSERT_REL(run.x + run.length, <=, dbb.width());
+		UTIL_ASSERT_REL(run.y, <, dbb.height());
+		UTIL_ASSERT_REL(run.z, <, dbb.depth());
+
+		for (unsigned int x = run.x; x < run.x + run.length; x++)
+			materialized(x, run.y, run.z) = 1;
+	}
+
+	return m;
+}
+
+std::size_t
+RunLengthVolume::numVoxels() const {
+
+	std::size_t n = 0;
+	for (const Run& run : _runs)
+		n += run.length;
+
+	return n;
+}
+
+util::point<int, 3>
+RunLengthVolume::getDiscreteOffset(const util::point<float, 3>& offset) const {
+
+	util::point<float, 3> d = (getOffset() - offset)/getResolution();
+
+	return util::point<int, 3>(
+			static_cast<int>(std::round(d.x())),
+			static_cast<int>(std::round(d.y())),
+			static_cast<int>(std::round(d.z())));
+}
@@ -0,0 +1,96 @@
+#ifndef CANDIDATE_MC_CRAG_RUN_LENGTH_VOLUME_H__
+#define CANDIDATE_MC_CRAG_RUN_LENGTH_VOLUME_H__
+
+#include <memory>
+#include <vector>
+#include <imageprocessing/DiscreteVolume.h>
+#include "CragVolume.h"
+
+/**
+ * A compact representation of a CragVolume as runs of non-zero voxels along
+ * the x-axis. Runs are sorted by z, y, and x, and do not overlap or touch.
+ *
+ * Only the foreground of a volume is represented, i.e., all non-zero voxels of
+ * a CragVolume are set to 1 when materialized.
+ */
+class RunLengthVolume : public DiscreteVolume {
+
+public:
+
+	/**
+	 * A run of foreground voxels, starting at discrete position (x, y, z)
+	 * (relative to the discrete bounding box of the volume) and extending over
+	 * length voxels in x.
+	 */
+	struct Run {
+
+		unsigned int x;
+		unsigned int y;
+		unsigned int z;
+		unsigned int length;
+	};
+
+	/**
+	 * Create an empty volume.
+	 */
+	RunLengthVolume() {}
+
+	/**
+	 * Encode the non-zero voxels of the given volume.
+	 */
+	explicit RunLengthVolume(const CragVolume& volume);
+
+	/**
+	 * Create a volume of the given discrete size from a list of runs. The runs
+	 * have to be sorted and must not overlap or touch.
+	 */
+	RunLengthVolume(
+			unsigned int width,
+			unsigned int height,
+			unsigned int depth,
+			std::vector<Run> runs);
+
+	/**
+	 * Create the union of several volumes by merging their runs. All volumes
+	 * need to have the same resolution.
+	 */
+	static std::shared_ptr<RunLengthVolume> unite(
+			const std::vector<std::shared_ptr<RunLengthVolume>>& volumes);
+
+	/**
+	 * Convert this volume into a dense CragVolume.
+	 */
+	std::shared_ptr<CragVolume> materialize() const;
+
+	/**
+	 * Get the runs of this volume.
+	 */
+	const std::vector<Run>& runs() const { return _runs; }
+
+	/**
+	 * Get the number of foreground voxels.
+	 */
+	std::size_t numVoxels() const;
+
+	/**
+	 * Get the discrete offset of this volume in a volume with the given
+	 * offset and the same resolution.
+	 */
+	util::point<int, 3> getDiscreteOffset(const util::point<float, 3>& offset) const;
+
+protected:
+
+	util::box<unsigned int,3> computeDiscreteBoundingBox() const override {
+
+		return _discreteBb;
+	}
+
+private:
+
+	std::vector<Run> _runs;
+
+	util::box<unsigned int, 3> _discreteBb;
+};
+
+#endif // CANDIDATE_MC_CRAG_RUN_LENGTH_VOLUME_H__
+
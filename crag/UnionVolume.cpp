@@ -51,6 +51,28 @@ UnionVolume::materialize() const {
 		}
 	}
 
+	for (auto v : _runUnion) {
+
+		const RunLengthVolume& volume = *v;
+
+		// offset to get from positions in materialized to positions in 
+		// volume
+		util::point<int, 3> offset = volume.getDiscreteOffset(bb.min());
+
+		for (const RunLengthVolume::Run& run : volume.runs()) {
+
+			UTIL_ASSERT_REL(offset.x() + run.x + run.length, <=, dbb.width());
+			UTIL_ASSERT_REL(offset.y() + run.y, <, dbb.height());
+			UTIL_ASSERT_REL(offset.z() + run.z, <, dbb.depth());
+
+			for (unsigned int x = run.x; x < run.x + run.length; x++)
+				materialized(
+						offset.x() + x,
+						offset.y() + run.y,
+						offset.z() + run.z) = 1;
+		}
+	}
+
 	UTIL_ASSERT_REL(bb, ==, materialized.getBoundingBox());
 	UTIL_ASSERT_REL(resolution, ==, materialized.getResolution());
 	UTIL_ASSERT_REL(offset, ==, materialized.getOffset());
@@ -59,6 +81,19 @@ UnionVolume::materialize() const {
 	return m;
 }
 
+std::shared_ptr<RunLengthVolume>
+UnionVolume::materializeRuns() const {
+
+	if (_union.size() == 0 && _runUnion.size() == 1)
+		return _runUnion[0];
+
+	std::vector<std::shared_ptr<RunLengthVolume>> volumes = _runUnion;
+	for (auto v : _union)
+		volumes.push_back(std::make_shared<RunLengthVolume>(*v));
+
+	return RunLengthVolume::unite(volumes);
+}
+
 void
 UnionVolume::updateResolutionOffset() {
 
@@ -76,6 +111,16 @@ UnionVolume::updateResolutionOffset() {
 			UTIL_ASSERT_REL(resolution, ==, volume->getResolution());
 	}
 
+	for (auto volume : _runUnion) {
+
+		bb += volume->getBoundingBox();
+
+		if (resolution.isZero())
+			resolution = volume->getResolution();
+		else
+			UTIL_ASSERT_REL(resolution, ==, volume->getResolution());
+	}
+
 	util::point<unsigned int, 3> discreteSize(
 			bb.width() /resolution.x(),
 			bb.height()/resolution.y(),
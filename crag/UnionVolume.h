@@ -5,9 +5,10 @@
 #include <imageprocessing/DiscreteVolume.h>
 #include <util/assert.h>
 #include "CragVolume.h"
+#include "RunLengthVolume.h"
 
 /**
- * Union of several CragVolumes.
+ * Union of several CragVolumes and RunLengthVolumes.
  */
 class UnionVolume : public DiscreteVolume {
 
@@ -26,21 +27,36 @@ public:
 	}
 
 	/**
-	 * Create a UnionVolume from a vector of CragVolume.
+	 * Create a UnionVolume from a single RunLengthVolume.
 	 */
-	UnionVolume(std::vector<std::shared_ptr<CragVolume>> volumes) {
+	UnionVolume(std::shared_ptr<RunLengthVolume> volume) {
+
+		_runUnion.push_back(volume);
+		updateResolutionOffset();
+		setDiscreteBoundingBoxDirty();
+	}
+
+	/**
+	 * Create a UnionVolume from a vector of CragVolume and (optionally) a 
+	 * vector of RunLengthVolume.
+	 */
+	UnionVolume(
+			std::vector<std::shared_ptr<CragVolume>>      volumes,
+			std::vector<std::shared_ptr<RunLengthVolume>> runVolumes = std::vector<std::shared_ptr<RunLengthVolume>>()) {
 
 		_union = volumes;
+		_runUnion = runVolumes;
 		updateResolutionOffset();
 		setDiscreteBoundingBoxDirty();
 	}
 
 	bool clear() {
 
-		if (numUnionVolumes() == 0)
+		if (numUnionVolumes() == 0 && numRunLengthVolumes() == 0)
 			return false;
 
 		_union.clear();
+		_runUnion.clear();
 
 		setResolution(util::point<float,3>(1,1,1));
 		setOffset(util::point<float,3>(0,0,0));
@@ -53,11 +69,21 @@ public:
 
 	std::shared_ptr<CragVolume> getUnionVolume(size_t i) const { return _union[i]; }
 
+	size_t numRunLengthVolumes() const { return _runUnion.size(); }
+
+	std::shared_ptr<RunLengthVolume> getRunLengthVolume(size_t i) const { return _runUnion[i]; }
+
 	/**
 	 * Convert this UnionVolume into a CragVolume.
 	 */
 	std::shared_ptr<CragVolume> materialize() const;
 
+	/**
+	 * Convert this UnionVolume into a RunLengthVolume, by merging the runs of 
+	 * all volumes in the union. This does not create a dense volume.
+	 */
+	std::shared_ptr<RunLengthVolume> materializeRuns() const;
+
 protected:
 
 	util::box<unsigned int,3> computeDiscreteBoundingBox() const override {
@@ -70,6 +96,7 @@ private:
 	void updateResolutionOffset();
 
 	std::vector<std::shared_ptr<CragVolume>> _union;
+	std::vector<std::shared_ptr<RunLengthVolume>> _runUnion;
 	util::box<unsigned int, 3> _discreteBb;
 };
 
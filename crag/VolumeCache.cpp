@@ -0,0 +1,103 @@
+#include <util/Logger.h>
+#include "VolumeCache.h"
+
+logger::LogChannel volumecachelog("volumecachelog", "[VolumeCache] ");
+
+VolumeCache::VolumeCache(std::size_t maxBytes) :
+	_maxBytes(maxBytes) {}
+
+void
+VolumeCache::setMaxBytes(std::size_t maxBytes) {
+
+	std::lock_guard<std::mutex> lock(_mutex);
+
+	_maxBytes = maxBytes;
+	shrink();
+}
+
+VolumeCache::Statistics
+VolumeCache::getStatistics() const {
+
+	std::lock_guard<std::mutex> lock(_mutex);
+
+	return _statistics;
+}
+
+void
+VolumeCache::resetStatistics() {
+
+	std::lock_guard<std::mutex> lock(_mutex);
+
+	_statistics.hits      = 0;
+	_statistics.misses    = 0;
+	_statistics.evictions = 0;
+}
+
+void
+VolumeCache::clear() {
+
+	std::lock_guard<std::mutex> lock(_mutex);
+
+	_lru.clear();
+	_entries.clear();
+	_statistics.bytes   = 0;
+	_statistics.entries = 0;
+}
+
+std::size_t
+VolumeCache::getBytes(const CragVolume& volume) {
+
+	return sizeof(CragVolume) + volume.width()*volume.height()*volume.depth()*sizeof(unsigned char);
+}
+
+std::size_t
+VolumeCache::getBytes(const RunLengthVolume& volume) {
+
+	return sizeof(RunLengthVolume) + volume.runs().size()*sizeof(RunLengthVolume::Run);
+}
+
+void
+VolumeCache::insert(int key, std::shared_ptr<void> volume, std::size_t bytes) {
+
+	std::lock_guard<std::mutex> lock(_mutex);
+
+	if (bytes > _maxBytes) {
+
+		LOG_DEBUG(volumecachelog)
+				<< "volume with " << bytes << " bytes exceeds cache size of "
+				<< _maxBytes << " bytes, not caching it" << std::endl;
+		return;
+	}
+
+	// another thread might have created the same volume in the meantime
+	if (_entries.count(key))
+		return;
+
+	Entry entry;
+	entry.key    = key;
+	entry.volume = volume;
+	entry.bytes  = bytes;
+
+	_lru.push_front(entry);
+	_entries[key] = _lru.begin();
+	_statistics.bytes += bytes;
+	_statistics.entries++;
+
+	shrink();
+}
+
+void
+VolumeCache::shrink() {
+
+	while (_statistics.bytes > _maxBytes && !_lru.empty()) {
+
+		const Entry& entry = _lru.back();
+
+		_statistics.bytes -= entry.bytes;
+		_statistics.entries--;
+		_statistics.evictions++;
+
+		_entries.erase(entry.key);
+		_lru.pop_back();
+	}
+}
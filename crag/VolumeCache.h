@@ -0,0 +1,145 @@
+#ifndef CANDIDATE_MC_CRAG_VOLUME_CACHE_H__
+#define CANDIDATE_MC_CRAG_VOLUME_CACHE_H__
+
+#include <list>
+#include <memory>
+#include <mutex>
+#include <unordered_map>
+#include "CragVolume.h"
+#include "RunLengthVolume.h"
+
+/**
+ * A least-recently-used cache for materialized candidate volumes (dense
+ * CragVolumes and RunLengthVolumes), bounded by the number of bytes of the
+ * cached volumes. Volumes are identified by the id of their CRAG node.
+ *
+ * The cache can be accessed concurrently. Volumes are created outside of the
+ * lock, such that several volumes can be materialized in parallel.
+ */
+class VolumeCache {
+
+public:
+
+	struct Statistics {
+
+		Statistics() :
+			hits(0),
+			misses(0),
+			evictions(0),
+			bytes(0),
+			entries(0) {}
+
+		std::size_t hits;
+		std::size_t misses;
+		std::size_t evictions;
+
+		// the number of bytes and volumes currently in the cache
+		std::size_t bytes;
+		std::size_t entries;
+	};
+
+	/**
+	 * Create a cache that holds at most maxBytes bytes of volumes. A single
+	 * volume exceeding this limit will not be cached.
+	 */
+	VolumeCache(std::size_t maxBytes);
+
+	/**
+	 * Get the dense volume of node id. If not cached, it will be created with
+	 * create(), which has to return a std::shared_ptr<CragVolume>.
+	 */
+	template <typename F>
+	std::shared_ptr<CragVolume> get(int id, F create) {
+
+		return std::static_pointer_cast<CragVolume>(lookup(2*id, create));
+	}
+
+	/**
+	 * Get the run-length encoded volume of node id. If not cached, it will be
+	 * created with create(), which has to return a
+	 * std::shared_ptr<RunLengthVolume>.
+	 */
+	template <typename F>
+	std::shared_ptr<RunLengthVolume> getRuns(int id, F create) {
+
+		return std::static_pointer_cast<RunLengthVolume>(lookup(2*id + 1, create));
+	}
+
+	/**
+	 * Change the maximal number of bytes in this cache. Volumes will be
+	 * evicted, if needed.
+	 */
+	void setMaxBytes(std::size_t maxBytes);
+
+	std::size_t getMaxBytes() const { return _maxBytes; }
+
+	/**
+	 * Get the hit, miss, and eviction counts since the last call to
+	 * resetStatistics(), and the current size of this cache.
+	 */
+	Statistics getStatistics() const;
+
+	void resetStatistics();
+
+	/**
+	 * Remove all volumes from this cache.
+	 */
+	void clear();
+
+	/**
+	 * Get the number of bytes used by a volume.
+	 */
+	static std::size_t getBytes(const CragVolume& volume);
+	static std::size_t getBytes(const RunLengthVolume& volume);
+
+private:
+
+	struct Entry {
+
+		int                   key;
+		std::shared_ptr<void> volume;
+		std::size_t           bytes;
+	};
+
+	template <typename F>
+	std::shared_ptr<void> lookup(int key, F create) {
+
+		{
+			std::lock_guard<std::mutex> lock(_mutex);
+
+			auto i = _entries.find(key);
+			if (i != _entries.end()) {
+
+				// move to front of LRU list
+				_lru.splice(_lru.begin(), _lru, i->second);
+				_statistics.hits++;
+				return i->second->volume;
+			}
+
+			_statistics.misses++;
+		}
+
+		auto volume = create();
+		insert(key, volume, getBytes(*volume));
+
+		return volume;
+	}
+
+	void insert(int key, std::shared_ptr<void> volume, std::size_t bytes);
+
+	// evict least recently used volumes until the cache fits into maxBytes
+	void shrink();
+
+	std::size_t _maxBytes;
+
+	// entries, most recently used first
+	std::list<Entry> _lru;
+	std::unordered_map<int, std::list<Entry>::iterator> _entries;
+
+	Statistics _statistics;
+
+	mutable std::mutex _mutex;
+};
+
+#endif // CANDIDATE_MC_CRAG_VOLUME_CACHE_H__
+
@@ -20,6 +20,8 @@ public:
 		_values(values),
 		_valuesName(valuesName){}
 
+	bool supportsConcurrency() const override { return true; }
+
 	template <typename ContainerT>
 	void appendEdgeFeatures(const Crag::CragEdge e, ContainerT& adaptor) {
 
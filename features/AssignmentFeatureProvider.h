@@ -1,8 +1,9 @@
 #ifndef CANDIDATE_MC_FEATURES_ASSIGNMENT_FEATURE_PROVIDER_H__
 #define CANDIDATE_MC_FEATURES_ASSIGNMENT_FEATURE_PROVIDER_H__
 
+#include <mutex>
 #include "FeatureProvider.h"
-#include "HausdorffDistance.h"
+#include "BoundaryHausdorffDistance.h"
 #include "Overlap.h"
 #include <util/helpers.hpp>
 
@@ -39,10 +40,12 @@ public:
 		_volumes (volumes),
 		_affs(affinitiesZ),
 		_features(nodeFeatures),
-		_hausdorff(parameters.maxHausdorffDistance),
+		_hausdorff(crag, volumes, parameters.maxHausdorffDistance),
 		_sizeFeatureIndex(-1),
 		_parameters(parameters) {}
 
+	bool supportsConcurrency() const override { return true; }
+
 	template <typename ContainerT>
 	void appendNodeFeatures(const Crag::CragNode n, ContainerT& adaptor) {
 
@@ -94,7 +97,7 @@ private:
 	inline double getHausdorffDistance(Crag::CragNode i, Crag::CragNode j) {
 
 		double i_j, j_i;
-		_hausdorff(*_volumes[i], *_volumes[j], i_j, j_i);
+		_hausdorff(i, j, i_j, j_i);
 
 		return std::max(i_j, j_i);
 	}
@@ -103,8 +106,7 @@ private:
 
 		UTIL_ASSERT_REL(_crag.type(n), ==, Crag::SliceNode);
 
-		if (_sizeFeatureIndex == -1)
-			findSizeFeature();
+		std::call_once(_sizeFeatureFound, [this]{ findSizeFeature(); });
 
 		return _features[n][_sizeFeatureIndex];
 	}
@@ -128,7 +130,8 @@ private:
 
 	double differences(Crag::CragNode i, double overlap) {
 
-		CragVolume& vol_i = *_volumes[i];
+		std::shared_ptr<CragVolume> volPtr_i = _volumes[i];
+		CragVolume& vol_i = *volPtr_i;
 
 		double totalVolume = 0.0;
 		for (int z = 0; z < vol_i.depth();  z++)
@@ -157,8 +160,10 @@ private:
 		// list of voxel affinity values between the two slice nodes
 		std::vector<float> contactAffinities;
 
-		const CragVolume& vol_i = *_volumes[i];
-		const CragVolume& vol_j = *_volumes[j];
+		std::shared_ptr<CragVolume> volPtr_i = _volumes[i];
+		const CragVolume& vol_i = *volPtr_i;
+		std::shared_ptr<CragVolume> volPtr_j = _volumes[j];
+		const CragVolume& vol_j = *volPtr_j;
 
 		util::point<int,3> discreteGlobalOffset_i = vol_i.getOffset()/vol_i.getResolution();
 		util::point<int,3> discreteGlobalOffset_j = vol_j.getOffset()/vol_j.getResolution();
@@ -227,10 +232,11 @@ private:
 	// already extracted features
 	const NodeFeatures& _features;
 
-	HausdorffDistance _hausdorff;
+	BoundaryHausdorffDistance _hausdorff;
 	Overlap _overlap;
 
 	int _sizeFeatureIndex;
+	std::once_flag _sizeFeatureFound;
 
 	Parameters _parameters;
 };
@@ -0,0 +1,270 @@
+#include <algorithm>
+#include <atomic>
+#include <cmath>
+#include <exception>
+#include <thread>
+#include <util/Logger.h>
+#include <util/timing.h>
+#include "BoundaryHausdorffDistance.h"
+
+logger::LogChannel boundaryhausdorffdistancelog("boundaryhausdorffdistancelog", "[BoundaryHausdorffDistance] ");
+
+BoundaryHausdorffDistance::BoundaryHausdorffDistance(
+		const Crag&        crag,
+		const CragVolumes& volumes,
+		double             maxDistance,
+		std::size_t        maxCachedBytes) :
+	_crag(crag),
+	_volumes(volumes),
+	_maxDistance(maxDistance),
+	_maxCachedBytes(maxCachedBytes),
+	_cachedBytes(0) {}
+
+void
+BoundaryHausdorffDistance::operator()(Crag::CragNode i, Crag::CragNode j, double& i_j, double& j_i) {
+
+	std::shared_ptr<const Boundary> boundary_i = getBoundary(i);
+	std::shared_ptr<const Boundary> boundary_j = getBoundary(j);
+
+	i_j = directedDistance(*boundary_i, *boundary_j);
+	j_i = directedDistance(*boundary_j, *boundary_i);
+}
+
+void
+BoundaryHausdorffDistance::operator()(
+		const std::vector<NodePair>&            pairs,
+		std::vector<std::pair<double, double>>& distances,
+		int                                     numThreads) {
+
+	UTIL_TIME_METHOD;
+
+	distances.resize(pairs.size());
+
+	if (numThreads <= 0)
+		numThreads = std::max(1u, std::thread::hardware_concurrency());
+	numThreads = std::min(numThreads, static_cast<int>(std::max(pairs.size(), std::size_t(1))));
+
+	std::atomic<std::size_t> next(0);
+	std::exception_ptr       error;
+	std::mutex               errorMutex;
+
+	auto worker = [&]() {
+
+		while (true) {
+
+			std::size_t i = next++;
+			if (i >= pairs.size())
+				return;
+
+			try {
+
+				(*this)(pairs[i].first, pairs[i].second, distances[i].first, distances[i].second);
+
+			} catch (...) {
+
+				std::lock_guard<std::mutex> lock(errorMutex);
+				if (!error)
+					error = std::current_exception();
+				next = pairs.size();
+			}
+		}
+	};
+
+	std::vector<std::thread> threads;
+	for (int t = 0; t < numThreads; t++)
+		threads.push_back(std::thread(worker));
+	for (std::thread& thread : threads)
+		thread.join();
+
+	if (error)
+		std::rethrow_exception(error);
+}
+
+std::shared_ptr<const BoundaryHausdorffDistance::Boundary>
+BoundaryHausdorffDistance::getBoundary(Crag::CragNode n) {
+
+	int id = _crag.id(n);
+
+	{
+		std::lock_guard<std::mutex> lock(_mutex);
+
+		auto i = _entries.find(id);
+		if (i != _entries.end()) {
+
+			// move to front of LRU list
+			_lru.splice(_lru.begin(), _lru, i->second);
+			return i->second->second;
+		}
+	}
+
+	// KD-trees are built outside of the lock, such that several can be built
+	// in parallel
+	std::shared_ptr<const Boundary> boundary = createBoundary(n);
+
+	std::lock_guard<std::mutex> lock(_mutex);
+
+	// another thread might have been faster
+	auto i = _entries.find(id);
+	if (i != _entries.end())
+		return i->second->second;
+
+	// a single boundary exceeding the limit is not cached
+	if (boundary->bytes > _maxCachedBytes)
+		return boundary;
+
+	_lru.push_front(std::make_pair(id, boundary));
+	_entries[id] = _lru.begin();
+	_cachedBytes += boundary->bytes;
+
+	while (_cachedBytes > _maxCachedBytes) {
+
+		_cachedBytes -= _lru.back().second->bytes;
+		_entries.erase(_lru.back().first);
+		_lru.pop_back();
+	}
+
+	return boundary;
+}
+
+std::shared_ptr<const BoundaryHausdorffDistance::Boundary>
+BoundaryHausdorffDistance::createBoundary(Crag::CragNode n) {
+
+	std::shared_ptr<Boundary> boundary = std::make_shared<Boundary>();
+
+	// the volume is only needed while the boundary is extracted
+	std::shared_ptr<CragVolume> volumePtr = _volumes[n];
+	const CragVolume& volume = *volumePtr;
+
+	const util::box<int, 2>& bb = (volume.getBoundingBox()/volume.getResolution()).project<2>();
+	boundary->offset = bb.min();
+
+	int width  = volume.width();
+	int height = volume.height();
+
+	boundary->width       = width;
+	boundary->height      = height;
+	boundary->boundingBox = volume.getBoundingBox();
+	boundary->resolution  = volume.getResolution();
+	boundary->inside.resize(width*height);
+
+	for (int y = 0; y < height; y++)
+	for (int x = 0; x < width;  x++)
+		boundary->inside[y*width + x] = (volume(x, y, 0) != 0);
+
+	// the closest point of a candidate to any point outside of it is on the
+	// boundary
+	for (int y = 0; y < height; y++)
+	for (int x = 0; x < width;  x++) {
+
+		if (!volume(x, y, 0))
+			continue;
+
+		bool onBoundary =
+				x == 0 || x == width  - 1 ||
+				y == 0 || y == height - 1 ||
+				!volume(x - 1, y, 0) || !volume(x + 1, y, 0) ||
+				!volume(x, y - 1, 0) || !volume(x, y + 1, 0);
+
+		if (!onBoundary)
+			continue;
+
+		boundary->cloud.points.push_back((boundary->offset.x() + x)*volume.getResolutionX());
+		boundary->cloud.points.push_back((boundary->offset.y() + y)*volume.getResolutionY());
+	}
+
+	if (boundary->cloud.kdtree_get_point_count() > 0) {
+
+		boundary->tree.reset(new KdTree(2, boundary->cloud, nanoflann::KDTreeSingleIndexAdaptorParams(10)));
+		boundary->tree->buildIndex();
+	}
+
+	boundary->bytes =
+			sizeof(Boundary) +
+			boundary->inside.size()/8 +
+			boundary->cloud.points.capacity()*sizeof(double) +
+			(boundary->tree ? sizeof(KdTree) + boundary->tree->usedMemory() : 0);
+
+	LOG_ALL(boundaryhausdorffdistancelog)
+			<< "candidate " << _crag.id(n) << " has "
+			<< boundary->cloud.kdtree_get_point_count() << " boundary points" << std::endl;
+
+	return boundary;
+}
+
+double
+BoundaryHausdorffDistance::directedDistance(const Boundary& boundary_i, const Boundary& boundary_j) {
+
+	if (lowerBound(boundary_i, boundary_j) >= _maxDistance)
+		return _maxDistance;
+
+	int width_j  = boundary_j.width;
+	int height_j = boundary_j.height;
+
+	double maxDistanceSquared = _maxDistance*_maxDistance;
+
+	double maxDistance = 0;
+	for (int y = 0; y < boundary_i.height; y++)
+	for (int x = 0; x < boundary_i.width;  x++) {
+
+		if (!boundary_i.isInside(x, y))
+			continue;
+
+		// point in global coordinates
+		util::point<int, 2> p = boundary_i.offset + util::point<int, 2>(x, y);
+
+		// point relative to volume j
+		util::point<int, 2> p_j = p - boundary_j.offset;
+
+		// inside of j
+		if (p_j.x() >= 0 && p_j.x() < width_j && p_j.y() >= 0 && p_j.y() < height_j && boundary_j.isInside(p_j.x(), p_j.y()))
+			continue;
+
+		double distance = _maxDistance;
+
+		if (boundary_j.tree) {
+
+			double query[2] = {
+					p.x()*boundary_j.resolution.x(),
+					p.y()*boundary_j.resolution.y()
+			};
+
+			// only search for boundary points closer than the maximal distance
+			std::size_t index;
+			double      distanceSquared;
+			nanoflann::KNNResultSet<double> result(1);
+			result.init(&index, &distanceSquared);
+			distanceSquared = maxDistanceSquared;
+
+			boundary_j.tree->findNeighbors(result, query, nanoflann::SearchParams());
+
+			if (result.size() > 0)
+				distance = std::min(_maxDistance, sqrt(distanceSquared));
+		}
+
+		maxDistance = std::max(maxDistance, distance);
+
+		// can not get any larger
+		if (maxDistance >= _maxDistance)
+			return _maxDistance;
+	}
+
+	return maxDistance;
+}
+
+double
+BoundaryHausdorffDistance::lowerBound(const Boundary& a, const Boundary& b) {
+
+	// get max x separation
+	double maxSeparationX =
+			std::max(
+					b.boundingBox.min().x() - a.boundingBox.min().x(),
+					a.boundingBox.max().x() - b.boundingBox.max().x());
+
+	// get max y separation
+	double maxSeparationY =
+			std::max(
+					b.boundingBox.min().y() - a.boundingBox.min().y(),
+					a.boundingBox.max().y() - b.boundingBox.max().y());
+
+	return std::max(maxSeparationX, maxSeparationY);
+}
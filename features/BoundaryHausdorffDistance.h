@@ -0,0 +1,165 @@
+#ifndef CANDIDATE_MC_FEATURES_BOUNDARY_HAUSDORFF_DISTANCE_H__
+#define CANDIDATE_MC_FEATURES_BOUNDARY_HAUSDORFF_DISTANCE_H__
+
+#include <list>
+#include <memory>
+#include <mutex>
+#include <unordered_map>
+#include <vector>
+#include <nanoflann.hpp>
+#include <crag/Crag.h>
+#include <crag/CragVolumes.h>
+
+/**
+ * Computes the Hausdorff distance of pairs of CRAG candidates, with the same
+ * results as HausdorffDistance. Like HausdorffDistance, ignores the
+ * z-dimension and assumes the volumes of the candidates to have a depth of 1.
+ *
+ * Instead of a distance map per target candidate, a KD-tree over the boundary
+ * points of each candidate is built once. The distance of a point to a
+ * candidate is zero if the point is inside the candidate, otherwise the
+ * distance to the closest boundary point. Searches for the closest boundary
+ * point do not look further than the maximal distance, and a directed
+ * distance is final as soon as one point reaches the maximal distance.
+ *
+ * The boundary points, KD-trees, and a bit mask of the foreground of each
+ * candidate are kept in a least-recently-used cache bounded by a number of
+ * bytes, keyed by the ids of the candidates. The volumes of the candidates
+ * themselves are not kept.
+ *
+ * The functor can be called concurrently.
+ */
+class BoundaryHausdorffDistance {
+
+public:
+
+	typedef std::pair<Crag::CragNode, Crag::CragNode> NodePair;
+
+	/**
+	 * Create a new functor that can compute the Hausdorff distance for pairs of
+	 * candidates.
+	 *
+	 * @param maxDistance
+	 *              The maximal Hausdorff distance to be reported. If two
+	 *              candidates exceed this value, this is the value that will
+	 *              be reported.
+	 *
+	 * @param maxCachedBytes
+	 *              The maximal number of bytes of boundaries (points, KD-trees,
+	 *              and foreground masks) to keep in the cache.
+	 */
+	BoundaryHausdorffDistance(
+			const Crag&        crag,
+			const CragVolumes& volumes,
+			double             maxDistance,
+			std::size_t        maxCachedBytes = 256*1024*1024);
+
+	/**
+	 * Compute the distances for candidates i and j. Results are returned in
+	 * reference i_j (distance of candidate i to j) and j_i (vice versa).
+	 */
+	void operator()(Crag::CragNode i, Crag::CragNode j, double& i_j, double& j_i);
+
+	/**
+	 * Compute the distances for several pairs of candidates in parallel. The
+	 * ith entry of distances will be (i_j, j_i) of the ith pair.
+	 *
+	 * @param numThreads
+	 *              The number of threads to use. If 0, one thread per core is
+	 *              used.
+	 */
+	void operator()(
+			const std::vector<NodePair>&            pairs,
+			std::vector<std::pair<double, double>>& distances,
+			int                                     numThreads = 0);
+
+	/**
+	 * Free memory allocated for the cache.
+	 */
+	void clearCache() {
+
+		std::lock_guard<std::mutex> lock(_mutex);
+		_lru.clear();
+		_entries.clear();
+		_cachedBytes = 0;
+	}
+
+private:
+
+	// the boundary points of a candidate in world units, as data source for
+	// nanoflann
+	struct PointCloud {
+
+		std::vector<double> points;
+
+		inline std::size_t kdtree_get_point_count() const { return points.size()/2; }
+
+		inline double kdtree_distance(const double* p, const std::size_t i, std::size_t) const {
+
+			double dx = p[0] - points[2*i];
+			double dy = p[1] - points[2*i + 1];
+
+			return dx*dx + dy*dy;
+		}
+
+		inline double kdtree_get_pt(const std::size_t i, int d) const { return points[2*i + d]; }
+
+		template <class BBox>
+		bool kdtree_get_bbox(BBox&) const { return false; }
+	};
+
+	typedef nanoflann::KDTreeSingleIndexAdaptor<
+			nanoflann::L2_Simple_Adaptor<double, PointCloud>,
+			PointCloud,
+			2> KdTree;
+
+	struct Boundary {
+
+		// the discrete offset of the volume in the global grid
+		util::point<int, 2> offset;
+
+		int width;
+		int height;
+
+		util::box<float, 3>   boundingBox;
+		util::point<float, 3> resolution;
+
+		// the foreground of the volume, one bit per voxel in the first
+		// section
+		std::vector<bool> inside;
+
+		PointCloud              cloud;
+		std::unique_ptr<KdTree> tree;
+
+		// estimated memory footprint
+		std::size_t bytes;
+
+		bool isInside(int x, int y) const { return inside[y*width + x]; }
+	};
+
+	std::shared_ptr<const Boundary> getBoundary(Crag::CragNode n);
+
+	std::shared_ptr<const Boundary> createBoundary(Crag::CragNode n);
+
+	double directedDistance(const Boundary& i, const Boundary& j);
+
+	// lower bound HausdorffDistance between a and b based on bounding boxes
+	double lowerBound(const Boundary& a, const Boundary& b);
+
+	const Crag&        _crag;
+	const CragVolumes& _volumes;
+
+	double _maxDistance;
+
+	std::size_t _maxCachedBytes;
+	std::size_t _cachedBytes;
+
+	// boundaries, most recently used first
+	std::list<std::pair<int, std::shared_ptr<const Boundary>>> _lru;
+	std::unordered_map<int, std::list<std::pair<int, std::shared_ptr<const Boundary>>>::iterator> _entries;
+
+	// protects the cache
+	std::mutex _mutex;
+};
+
+#endif // CANDIDATE_MC_FEATURES_BOUNDARY_HAUSDORFF_DISTANCE_H__
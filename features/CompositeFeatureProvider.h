@@ -1,6 +1,7 @@
 #ifndef CANDIDATE_MC_COMPOSITE_FEATURE_PROVIDER_H__
 #define CANDIDATE_MC_COMPOSITE_FEATURE_PROVIDER_H__
 
+#include <chrono>
 #include <util/typename.h>
 
 #include "FeatureProvider.h"
@@ -13,22 +14,49 @@ public:
 			const Crag& crag,
 			NodeFeatures& nodeFeatures) override {
 
-		for (FeatureProviderBase* provider : _providers)
+		for (FeatureProviderBase* provider : _providers) {
+
+			auto start = std::chrono::steady_clock::now();
+
 			provider->appendFeatures(crag, nodeFeatures);
+
+			LOG_USER(featureproviderlog)
+					<< "extracted node features of " << typeName(*provider) << " in "
+					<< std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count()
+					<< "s" << std::endl;
+		}
 	}
 
 	void appendFeatures(
 			const Crag& crag,
 			EdgeFeatures& edgeFeatures) override {
 
-		for (FeatureProviderBase* provider : _providers)
+		for (FeatureProviderBase* provider : _providers) {
+
+			auto start = std::chrono::steady_clock::now();
+
 			provider->appendFeatures(crag, edgeFeatures);
+
+			LOG_USER(featureproviderlog)
+					<< "extracted edge features of " << typeName(*provider) << " in "
+					<< std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count()
+					<< "s" << std::endl;
+		}
+	}
+
+	void setNumThreads(int numThreads) override {
+
+		FeatureProviderBase::setNumThreads(numThreads);
+
+		for (FeatureProviderBase* provider : _providers)
+			provider->setNumThreads(numThreads);
 	}
 
 	template <typename ProviderType, typename... Args>
 	void emplace_back(Args&&... args) {
 
 		ProviderType* provider = new ProviderType(std::forward<Args>(args)...);
+		provider->setNumThreads(getNumThreads());
 		_providers.push_back(provider);
 	}
 
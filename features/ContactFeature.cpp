@@ -85,7 +85,8 @@ ContactFeature::compute(Crag::CragEdge e) {
 std::vector<int>
 ContactFeature::countVoxels(Crag::CragNode n) {
 
-	const CragVolume& volume = *_volumes[n];
+	std::shared_ptr<CragVolume> volumePtr = _volumes[n];
+	const CragVolume& volume = *volumePtr;
 
 	const util::box<float, 3>&   nodeBoundingBox    = volume.getBoundingBox();
 	util::point<unsigned int, 3> nodeSize           = (nodeBoundingBox.max() - nodeBoundingBox.min())/volume.getResolution();
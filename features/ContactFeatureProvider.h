@@ -19,6 +19,8 @@ public:
 		_valuesName(valuesName){
 	}
 
+	bool supportsConcurrency() const override { return true; }
+
 	template <typename ContainerT>
 	void appendEdgeFeatures(const Crag::CragEdge e, ContainerT& adaptor) {
 
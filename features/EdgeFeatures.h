@@ -6,10 +6,10 @@
 
 class EdgeFeatures {
 
-	typedef Features<Crag::CragEdge> FeaturesType;
-
 public:
 
+	typedef Features<Crag::CragEdge> FeaturesType;
+
 	EdgeFeatures(const Crag& crag) :
 			_crag(crag),
 			_features(Crag::EdgeTypes.size(), FeaturesType(crag)) {}
@@ -34,7 +34,7 @@ public:
 		return features(type).getFeatureNames();
 	}
 
-	const std::vector<double>& operator[](Crag::CragEdge e) const {
+	FeatureRow operator[](Crag::CragEdge e) const {
 
 		return features(_crag.type(e))[e];
 	}
@@ -44,11 +44,42 @@ public:
 		features(_crag.type(e)).set(e, v);
 	}
 
+	/**
+	 * Replace the features of all edges of the given type with the rows of a
+	 * row-major matrix of size ids.size() x dims.
+	 */
+	void set(Crag::EdgeType type, const std::vector<int>& ids, std::vector<double> matrix, unsigned int dims) {
+
+		features(type).set(ids, std::move(matrix), dims);
+	}
+
+	/**
+	 * Get the feature matrix and row ids of all edges of the given type.
+	 */
+	inline const FeaturesType& getFeatures(Crag::EdgeType type) const {
+
+		return features(type);
+	}
+
+	inline FeaturesType& getFeatures(Crag::EdgeType type) {
+
+		return features(type);
+	}
+
 	inline unsigned int dims(Crag::EdgeType type) const {
 
 		return features(type).dims();
 	}
 
+	/**
+	 * Remove the padding between the rows of the feature matrices.
+	 */
+	void compact() {
+
+		for (auto& f : _features)
+			f.compact();
+	}
+
 	void normalize() {
 
 		for (auto& f : _features)
@@ -17,14 +17,39 @@ util::ProgramOption optionDumpFeatureNames(
 	                          "for the respective node and edge types."
 );
 
+util::ProgramOption optionNumThreads(
+	util::_long_name        = "numThreads",
+	util::_description_text = "The number of threads to use for feature extraction and for computing costs and gradients from "
+	                          "features. If 0, the number of hardware threads is used. Features and costs are identical to the "
+	                          "ones of a single-threaded computation.",
+	util::_default_value    = 1
+);
+
+FeatureExtractor::FeatureExtractor(
+		Crag&        crag,
+		CragVolumes& volumes) :
+	_crag(crag),
+	_volumes(volumes),
+	_numThreads(optionNumThreads.as<int>()),
+	_numOriginalVolumeNodeFeatures(0),
+	_numOriginalSliceNodeFeatures(0),
+	_numOriginalAssignmentNodeFeatures(0),
+	_numOriginalEdgeFeatures(0){}
+
 void
 FeatureExtractor::extract(
 		FeatureProviderBase& featureProvider,
 		NodeFeatures& nodeFeatures,
 		EdgeFeatures& edgeFeatures) {
 
+	featureProvider.setNumThreads(_numThreads);
+
 	extractNodeFeatures(featureProvider, nodeFeatures);
 	extractEdgeFeatures(featureProvider, nodeFeatures, edgeFeatures);
+
+	// remove the padding of the feature matrices left from appending
+	nodeFeatures.compact();
+	edgeFeatures.compact();
 }
 
 void
@@ -1,24 +1,28 @@
 #ifndef CANDIDATE_MC_FEATURES_FEATURE_EXTRACTOR_H__
 #define CANDIDATE_MC_FEATURES_FEATURE_EXTRACTOR_H__
 
+#include <util/ProgramOptions.h>
 #include <io/CragStore.h>
 #include "NodeFeatures.h"
 #include "EdgeFeatures.h"
 #include "FeatureProvider.h"
 
+extern util::ProgramOption optionNumThreads;
+
 class FeatureExtractor {
 
 public:
 
 	FeatureExtractor(
 			Crag&        crag,
-			CragVolumes& volumes) :
-		_crag(crag),
-		_volumes(volumes),
-		_numOriginalVolumeNodeFeatures(0),
-		_numOriginalSliceNodeFeatures(0),
-		_numOriginalAssignmentNodeFeatures(0),
-		_numOriginalEdgeFeatures(0){}
+			CragVolumes& volumes);
+
+	/**
+	 * Set the number of threads to use for feature extraction. If 0, the 
+	 * number of hardware threads is used. The default is given by program 
+	 * option --numThreads.
+	 */
+	void setNumThreads(int numThreads) { _numThreads = numThreads; }
 
 	/**
 	 * Extract node and edge features, along with the respective min and max 
@@ -53,6 +57,8 @@ private:
 	Crag&        _crag;
 	CragVolumes& _volumes;
 
+	int _numThreads;
+
 	// number of "real" node features, before add squares and bias
 	int _numOriginalVolumeNodeFeatures;
 	int _numOriginalSliceNodeFeatures;
@@ -0,0 +1,3 @@
+#include <util/Logger.h>
+
+logger::LogChannel featureproviderlog("featureproviderlog", "[FeatureProvider] ");
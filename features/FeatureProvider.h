@@ -1,10 +1,22 @@
 #ifndef CANDIDATE_MC_FEATURE_PROVIDER_H__
 #define CANDIDATE_MC_FEATURE_PROVIDER_H__
 
+#include <algorithm>
+#include <atomic>
+#include <exception>
+#include <mutex>
+#include <thread>
+#include <util/exceptions.h>
+#include <util/Logger.h>
+
+extern logger::LogChannel featureproviderlog;
+
 class FeatureProviderBase {
 
 public:
 
+	FeatureProviderBase() : _numThreads(1) {}
+
 	virtual ~FeatureProviderBase() {}
 
 	virtual void appendFeatures(
@@ -14,6 +26,26 @@ public:
 	virtual void appendFeatures(
 			const Crag& crag,
 			EdgeFeatures& edgeFeatures) = 0;
+
+	/**
+	 * Set the number of threads to use for the extraction of features. If 0, 
+	 * the number of hardware threads is used. Only providers that support 
+	 * concurrency will use more than one thread.
+	 */
+	virtual void setNumThreads(int numThreads) { _numThreads = numThreads; }
+
+protected:
+
+	int getNumThreads() const {
+
+		if (_numThreads <= 0)
+			return std::max(1u, std::thread::hardware_concurrency());
+		return _numThreads;
+	}
+
+private:
+
+	int _numThreads;
 };
 
 /**
@@ -26,10 +58,23 @@ public:
 
 	void appendFeatures(const Crag& crag, NodeFeatures& nodeFeatures) override {
 
-		for (auto n : crag.nodes()) {
+		if (useThreads()) {
+
+			std::vector<Crag::CragNode> nodes;
+			for (auto n : crag.nodes())
+				nodes.push_back(n);
+
+			appendFeaturesConcurrently(nodes, nodeFeatures, [this](Crag::CragNode n, FeatureBufferAdaptor& adaptor) {
+				static_cast<Derived*>(this)->appendNodeFeatures(n, adaptor);
+			});
 
-			FeatureNodeAdaptor adaptor(nodeFeatures, n);
-			static_cast<Derived*>(this)->appendNodeFeatures(n, adaptor);
+		} else {
+
+			for (auto n : crag.nodes()) {
+
+				FeatureNodeAdaptor adaptor(nodeFeatures, n);
+				static_cast<Derived*>(this)->appendNodeFeatures(n, adaptor);
+			}
 		}
 
 		for (const auto& p : getNodeFeatureNames())
@@ -38,16 +83,36 @@ public:
 
 	void appendFeatures(const Crag& crag, EdgeFeatures& edgeFeatures) override {
 
-		for (auto e : crag.edges()) {
+		if (useThreads()) {
+
+			std::vector<Crag::CragEdge> edges;
+			for (auto e : crag.edges())
+				edges.push_back(e);
+
+			appendFeaturesConcurrently(edges, edgeFeatures, [this](Crag::CragEdge e, FeatureBufferAdaptor& adaptor) {
+				static_cast<Derived*>(this)->appendEdgeFeatures(e, adaptor);
+			});
 
-			FeatureEdgeAdaptor adaptor(edgeFeatures, e);
-			static_cast<Derived*>(this)->appendEdgeFeatures(e, adaptor);
+		} else {
+
+			for (auto e : crag.edges()) {
+
+				FeatureEdgeAdaptor adaptor(edgeFeatures, e);
+				static_cast<Derived*>(this)->appendEdgeFeatures(e, adaptor);
+			}
 		}
 
 		for (const auto& p : getEdgeFeatureNames())
 			edgeFeatures.appendFeatureNames(p.first, p.second);
 	}
 
+	/**
+	 * Return true, if appendNodeFeatures() and appendEdgeFeatures() can be 
+	 * called concurrently for different nodes and edges. Providers that do 
+	 * not modify shared state while computing features should override this.
+	 */
+	virtual bool supportsConcurrency() const { return false; }
+
 	template <typename ContainerT>
 	void appendNodeFeatures(const Crag::CragNode n, ContainerT& features) {}
 
@@ -66,6 +131,105 @@ public:
 
 private:
 
+	/**
+	 * Adaptor to be used with RegionFeatures for concurrent feature 
+	 * extraction. Appends to a per-element buffer, which will later be copied 
+	 * to the features in the order of the elements.
+	 */
+	class FeatureBufferAdaptor {
+
+	public:
+		FeatureBufferAdaptor(std::vector<double>& buffer) : _buffer(buffer) {}
+
+		inline void append(double value)                           { _buffer.push_back(value); }
+		inline void append(unsigned int /*ignored*/, double value) { _buffer.push_back(value); }
+
+		// providers that need access to previously extracted features do not 
+		// support concurrency
+		inline std::vector<double> getFeatures() {
+			UTIL_THROW_EXCEPTION(UsageError, "previous features are not accessible in concurrent feature extraction");
+		}
+		template <typename TypeT>
+		inline const std::vector<std::string> getFeatureNames(TypeT) {
+			UTIL_THROW_EXCEPTION(UsageError, "feature names are not accessible in concurrent feature extraction");
+		}
+
+	private:
+
+		std::vector<double>& _buffer;
+	};
+
+	inline bool useThreads() const {
+
+		return supportsConcurrency() && getNumThreads() > 1;
+	}
+
+	/**
+	 * Compute the features of the given elements with several threads, and 
+	 * append them in the order of the elements. The result is identical to a 
+	 * sequential extraction.
+	 */
+	template <typename ElementT, typename FeaturesT, typename AppendT>
+	void appendFeaturesConcurrently(
+			const std::vector<ElementT>& elements,
+			FeaturesT&                   features,
+			AppendT                      append) {
+
+		// elements are handed out to threads in chunks of this size
+		const std::size_t chunkSize = 16;
+
+		std::vector<std::vector<double>> buffers(elements.size());
+
+		std::atomic<std::size_t> next(0);
+		std::exception_ptr       error;
+		std::mutex               errorMutex;
+
+		auto worker = [&]() {
+
+			for (std::size_t begin = next.fetch_add(chunkSize); begin < elements.size(); begin = next.fetch_add(chunkSize)) {
+
+				try {
+
+					std::size_t end = std::min(begin + chunkSize, elements.size());
+					for (std::size_t i = begin; i < end; i++) {
+
+						FeatureBufferAdaptor adaptor(buffers[i]);
+						append(elements[i], adaptor);
+					}
+
+				} catch (...) {
+
+					std::lock_guard<std::mutex> lock(errorMutex);
+					if (!error)
+						error = std::current_exception();
+
+					// skip the remaining elements
+					next = elements.size();
+				}
+			}
+		};
+
+		int numThreads = std::min(getNumThreads(), static_cast<int>(elements.size()/chunkSize + 1));
+
+		LOG_DEBUG(featureproviderlog)
+				<< "computing features of " << elements.size()
+				<< " elements with " << numThreads << " threads" << std::endl;
+
+		std::vector<std::thread> threads;
+		for (int i = 1; i < numThreads; i++)
+			threads.emplace_back(worker);
+		worker();
+		for (std::thread& thread : threads)
+			thread.join();
+
+		if (error)
+			std::rethrow_exception(error);
+
+		for (std::size_t i = 0; i < elements.size(); i++)
+			for (double value : buffers[i])
+				features.append(elements[i], value);
+	}
+
 	/**
 	 * Adaptor to be used with RegionFeatures. Just appends to a vector, 
 	 * ignoring the "id" of the region.
@@ -77,7 +241,8 @@ private:
 
 		inline void append(double value)                           { _features.append(_n, value); }
 		inline void append(unsigned int /*ignored*/, double value) { _features.append(_n, value); }
-		inline const std::vector<double>& getFeatures(){ return _features[_n]; }
+		// a copy, since the features are modified while the result is used
+		inline std::vector<double> getFeatures(){ return _features[_n].toVector(); }
 		inline const std::vector<std::string> getFeatureNames(Crag::NodeType type){ return _features.getFeatureNames(type); }
 
 	private:
@@ -97,7 +262,8 @@ private:
 
 		inline void append(double value)                           { _features.append(_e, value); }
 		inline void append(unsigned int /*ignored*/, double value) { _features.append(_e, value); }
-		inline const std::vector<double>& getFeatures(){ return _features[_e]; }
+		// a copy, since the features are modified while the result is used
+		inline std::vector<double> getFeatures(){ return _features[_e].toVector(); }
 		inline const std::vector<std::string> getFeatureNames(Crag::EdgeType type){ return _features.getFeatureNames(type); }
 
 	private:
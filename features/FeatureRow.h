@@ -0,0 +1,72 @@
+#ifndef CANDIDATE_MC_FEATURES_FEATURE_ROW_H__
+#define CANDIDATE_MC_FEATURES_FEATURE_ROW_H__
+
+#include <algorithm>
+#include <iostream>
+#include <vector>
+
+/**
+ * A read-only view on the feature vector of a single node or edge, i.e., a
+ * row in the feature matrix of the node or edge type. The view is invalidated
+ * by any modification of the features it was obtained from.
+ */
+class FeatureRow {
+
+public:
+
+	typedef const double* const_iterator;
+
+	/**
+	 * Create an empty row.
+	 */
+	FeatureRow() : _begin(0), _size(0) {}
+
+	FeatureRow(const double* begin, std::size_t size) : _begin(begin), _size(size) {}
+
+	inline const double* begin() const { return _begin; }
+	inline const double* end()   const { return _begin + _size; }
+	inline const double* data()  const { return _begin; }
+
+	inline std::size_t size()  const { return _size; }
+	inline bool        empty() const { return _size == 0; }
+
+	inline double operator[](std::size_t i) const { return _begin[i]; }
+
+	/**
+	 * Copy the features of this row into a vector.
+	 */
+	std::vector<double> toVector() const { return std::vector<double>(begin(), end()); }
+
+	bool operator==(const FeatureRow& other) const {
+
+		return _size == other._size && std::equal(begin(), end(), other.begin());
+	}
+
+	bool operator!=(const FeatureRow& other) const {
+
+		return !(*this == other);
+	}
+
+private:
+
+	const double* _begin;
+	std::size_t   _size;
+};
+
+inline std::ostream&
+operator<<(std::ostream& os, const FeatureRow& row) {
+
+	os << "[";
+	for (std::size_t i = 0; i < row.size(); i++) {
+
+		if (i > 0)
+			os << ", ";
+		os << row[i];
+	}
+	os << "]";
+
+	return os;
+}
+
+#endif // CANDIDATE_MC_FEATURES_FEATURE_ROW_H__
+
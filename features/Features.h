@@ -1,37 +1,64 @@
 #ifndef CANDIDATE_MC_FEATURES_FEATURES_H__
 #define CANDIDATE_MC_FEATURES_FEATURES_H__
 
+#include <algorithm>
+#include <iostream>
+#include <limits>
 #include <vector>
 #include <util/exceptions.h>
 #include "Crag.h"
-
+#include "FeatureRow.h"
+
+/**
+ * Feature vectors for nodes or edges of a CRAG, stored as one row-major
+ * matrix. Each node or edge with features occupies one row, rows are assigned
+ * in the order in which nodes or edges are first seen. The ids of the nodes or
+ * edges of each row are available through getIds().
+ *
+ * While features are appended, rows are padded to a stride larger than the
+ * number of features, such that not every append reallocates the matrix. Call
+ * compact() to remove the padding.
+ *
+ * Views on the feature matrix and ids can be registered with addView() (e.g.,
+ * NumPy arrays sharing the memory). While views exist, methods that might
+ * reallocate the storage throw a UsageError.
+ *
+ * Concurrent const access is safe.
+ */
 template <typename KeyType>
 class Features {
 
 public:
 
-	Features(const Crag& crag) : _crag(crag), _dimsDirty(true) {}
+	Features(const Crag& crag) : _crag(crag), _stride(0), _numViews(0) {}
 
 	/**
-	 * Add a single feature to the feature vector for a node. Converts nan into 
+	 * Add a single feature to the feature vector for a node. Converts nan into
 	 * 0.
 	 */
 	inline void append(KeyType n, double feature) {
 
+		checkNoViews("append");
+
+		int row = getOrAddRow(n);
+
 		if (feature != feature)
 			feature = 0;
 
 		if (feature == std::numeric_limits<double>::infinity() || feature == -std::numeric_limits<double>::infinity()) {
 
 			std::string name = "(not known yet)";
-			if (_featureNames.size() > _features[n].size())
-				name = _featureNames[_features[n].size()];
-			std::cout << "Warning: feature " << _features[n].size() << " " << name << " of element " << _crag.id(n) << " is " << feature << std::endl;
+			if (_featureNames.size() > _lengths[row])
+				name = _featureNames[_lengths[row]];
+			std::cout << "Warning: feature " << _lengths[row] << " " << name << " of element " << _crag.id(n) << " is " << feature << std::endl;
 		}
 
-		_features[n].push_back(feature);
+		// grow rows geometrically, starting with 8 features
+		if (_lengths[row] == _stride)
+			restride(std::max<std::size_t>(2*_stride, 8));
 
-		_dimsDirty = true;
+		_data[row*_stride + _lengths[row]] = feature;
+		_lengths[row]++;
 	}
 
 	/**
@@ -58,51 +85,185 @@ public:
 	 */
 	inline void set(KeyType n, const std::vector<double>& v) {
 
-		_features[n] = v;
-		_dimsDirty = true;
+		checkNoViews("set");
+
+		int row = getOrAddRow(n);
+
+		if (v.size() > _stride)
+			restride(v.size());
+
+		std::copy(v.begin(), v.end(), _data.begin() + row*_stride);
+		_lengths[row] = v.size();
 	}
 
 	/**
-	 * The size of the feature vectors.
+	 * Replace all feature vectors with the rows of the given row-major matrix
+	 * of size ids.size() x dims. ids contains the node or edge id of each row.
+	 */
+	void set(const std::vector<int>& ids, std::vector<double> matrix, unsigned int dims) {
+
+		checkNoViews("set");
+
+		if (matrix.size() != ids.size()*dims)
+			UTIL_THROW_EXCEPTION(
+					UsageError,
+					"matrix of size " << matrix.size() << " does not contain " <<
+					ids.size() << " rows with " << dims << " features");
+
+		_rows.clear();
+		for (std::size_t row = 0; row < ids.size(); row++) {
+
+			int id = ids[row];
+
+			if (id >= static_cast<int>(_rows.size()))
+				_rows.resize(id + 1, -1);
+
+			if (_rows[id] != -1)
+				UTIL_THROW_EXCEPTION(
+						UsageError,
+						"id " << id << " appears more than once");
+
+			_rows[id] = row;
+		}
+
+		_ids = ids;
+		_lengths.assign(ids.size(), dims);
+		_data   = std::move(matrix);
+		_stride = dims;
+	}
+
+	/**
+	 * The size of the feature vectors. Does not modify the features and can be 
+	 * called concurrently with other const methods.
 	 */
 	inline unsigned int dims() const {
 
-		if (!_dimsDirty)
-			return _dims;
+		std::size_t dims = (_lengths.empty() ? 0 : _lengths[0]);
 
-		_dims = 0;
+		for (std::size_t row = 1; row < _lengths.size(); row++)
+			if (_lengths[row] != dims)
+				UTIL_THROW_EXCEPTION(
+						UsageError,
+						"Features contains vectors of different sizes: "
+						"expected " << dims << " (as seen for id " << _ids[0] << ")" <<
+						", found " << _lengths[row] << " for id " << _ids[row]);
 
-		bool first = true;
-		int firstId = -1;
-		for (auto& p : _features) {
+		return dims;
+	}
 
-			KeyType n = p.first;
-			const std::vector<double>& f = p.second;
+	/**
+	 * The number of rows, i.e., nodes or edges with features.
+	 */
+	inline std::size_t size() const { return _ids.size(); }
 
-			if (first) {
+	/**
+	 * Get the node or edge id of each row.
+	 */
+	inline const std::vector<int>& getIds() const { return _ids; }
 
-				_dims = f.size();
-				first = false;
-				firstId = _crag.id(n);
+	/**
+	 * Get the row of a node or edge, or -1 if it does not have features.
+	 */
+	inline int getRow(KeyType k) const {
 
-			} else {
+		int id = _crag.id(k);
 
-				if (f.size() != _dims)
-					UTIL_THROW_EXCEPTION(
-							UsageError,
-							"Features contains vectors of different sizes: "
-							"expected " << _dims << " (as seen for id " << firstId << ")" <<
-							", found " << f.size() << " for id " << _crag.id(n));
-			}
+		if (id >= static_cast<int>(_rows.size()))
+			return -1;
+
+		return _rows[id];
+	}
+
+	/**
+	 * Get the feature matrix. Row i starts at data() + i*getStride().
+	 */
+	inline const double* data() const { return _data.data(); }
+
+	/**
+	 * Get the number of doubles between the starts of consecutive rows. Equal
+	 * to dims() after compact().
+	 */
+	inline std::size_t getStride() const { return _stride; }
+
+	/**
+	 * Remove the padding between rows, such that the feature matrix is dense.
+	 */
+	void compact() {
+
+		std::size_t maxLength = 0;
+		for (std::size_t length : _lengths)
+			maxLength = std::max(maxLength, length);
+
+		if (maxLength != _stride)
+			restride(maxLength);
+	}
+
+	/**
+	 * Register a view on the memory returned by data() and getIds(). Until
+	 * the view is removed with removeView(), append(), set(), and compact()
+	 * (unless the matrix is compact already) throw.
+	 */
+	void addView() { _numViews++; }
+
+	void removeView() { _numViews--; }
+
+	bool hasViews() const { return _numViews > 0; }
+
+	/**
+	 * Compute the dot product of each row with the given weights. The
+	 * products are stored in the order of the rows.
+	 */
+	void dot(const std::vector<double>& weights, std::vector<double>& products) const {
+
+		if (weights.size() != dims())
+			UTIL_THROW_EXCEPTION(
+					UsageError,
+					"weights have size " << weights.size() << ", features " << dims());
+
+		products.resize(_ids.size());
+
+		for (std::size_t row = 0; row < _ids.size(); row++) {
+
+			const double* f = _data.data() + row*_stride;
+
+			double sum = 0;
+			for (std::size_t i = 0; i < weights.size(); i++)
+				sum += weights[i]*f[i];
+
+			products[row] = sum;
 		}
+	}
+
+	/**
+	 * Add each row, multiplied with its coefficient, to sum.
+	 */
+	void accumulate(const std::vector<double>& coefficients, std::vector<double>& sum) const {
 
-		_dimsDirty = false;
-		return _dims;
+		if (coefficients.size() != _ids.size())
+			UTIL_THROW_EXCEPTION(
+					UsageError,
+					"got " << coefficients.size() << " coefficients for " << _ids.size() << " rows");
+
+		if (sum.size() != dims())
+			UTIL_THROW_EXCEPTION(
+					UsageError,
+					"sum has size " << sum.size() << ", features " << dims());
+
+		for (std::size_t row = 0; row < _ids.size(); row++) {
+
+			if (coefficients[row] == 0)
+				continue;
+
+			const double* f = _data.data() + row*_stride;
+
+			for (std::size_t i = 0; i < sum.size(); i++)
+				sum[i] += f[i]*coefficients[row];
+		}
 	}
 
 	/**
-	 * Normalize all features, such that they are in the range [0,1]. The min 
-	 * and max values used for the transformation can be queried with getMin() 
+	 * Normalize all features, such that they are in the range [0,1]. The min
+	 * and max values used for the transformation can be queried with getMin()
 	 * and getMax().
 	 */
 	void normalize() {
@@ -112,8 +273,8 @@ public:
 	}
 
 	/**
-	 * Normalize all features, but instead of searching for the min and max, use 
-	 * the provided ones. This will also set the min and max returned by 
+	 * Normalize all features, but instead of searching for the min and max, use
+	 * the provided ones. This will also set the min and max returned by
 	 * getMin() and getMax().
 	 */
 	void normalize(
@@ -147,36 +308,86 @@ public:
 		return _max;
 	}
 
-	const std::vector<double>& operator[](KeyType k) const { return _features[k]; }
+	/**
+	 * Get the features of a node or edge. The returned row is invalidated by
+	 * any modification of the features.
+	 */
+	FeatureRow operator[](KeyType k) const {
 
-protected:
+		int row = getRow(k);
 
-	// don't allow non-const access to feature vectors
-	std::vector<double>& operator[](KeyType k) { return _features[k]; }
+		if (row == -1)
+			return FeatureRow();
+
+		return FeatureRow(_data.data() + row*_stride, _lengths[row]);
+	}
 
 private:
 
+	int getOrAddRow(KeyType k) {
+
+		int id = _crag.id(k);
+
+		if (id >= static_cast<int>(_rows.size()))
+			_rows.resize(id + 1, -1);
+
+		if (_rows[id] == -1) {
+
+			_rows[id] = _ids.size();
+			_ids.push_back(id);
+			_lengths.push_back(0);
+			_data.resize(_ids.size()*_stride);
+		}
+
+		return _rows[id];
+	}
+
+	void checkNoViews(const char* operation) const {
+
+		if (_numViews > 0)
+			UTIL_THROW_EXCEPTION(
+					UsageError,
+					"can not " << operation << " features while " << _numViews <<
+					" views on them exist");
+	}
+
+	void restride(std::size_t stride) {
+
+		checkNoViews("reallocate");
+
+		std::vector<double> data(_ids.size()*stride);
+
+		for (std::size_t row = 0; row < _ids.size(); row++)
+			std::copy(
+					_data.begin() + row*_stride,
+					_data.begin() + row*_stride + _lengths[row],
+					data.begin() + row*stride);
+
+		_data.swap(data);
+		_stride = stride;
+	}
+
 	void findMinMax() {
 
 		_min.clear();
 		_max.clear();
 
-		for (auto& p : _features) {
+		if (_ids.empty())
+			return;
 
-			const std::vector<double>& f = p.second;
+		unsigned int dims = this->dims();
 
-			if (_min.size() == 0) {
+		_min.assign(_data.begin(), _data.begin() + dims);
+		_max = _min;
 
-				_min = f;
-				_max = f;
+		for (std::size_t row = 1; row < _ids.size(); row++) {
 
-			} else {
+			const double* f = _data.data() + row*_stride;
 
-				for (unsigned int i = 0; i < _min.size(); i++) {
+			for (unsigned int i = 0; i < dims; i++) {
 
-					_min[i] = std::min(_min[i], f[i]);
-					_max[i] = std::max(_max[i], f[i]);
-				}
+				_min[i] = std::min(_min[i], f[i]);
+				_max[i] = std::max(_max[i], f[i]);
 			}
 		}
 	}
@@ -195,14 +406,9 @@ private:
 					UsageError,
 					"provided min and max have different size " << min.size() << " than features " << dims());
 
-		for (auto& p : _features) {
+		for (std::size_t row = 0; row < _ids.size(); row++) {
 
-			std::vector<double>& f = p.second;
-
-			if (f.size() != min.size())
-				UTIL_THROW_EXCEPTION(
-						UsageError,
-						"encountered a feature with differnt size " << f.size() << " than given min " << min.size());
+			double* f = _data.data() + row*_stride;
 
 			for (unsigned int i = 0; i < min.size(); i++) {
 
@@ -216,13 +422,23 @@ private:
 
 	const Crag& _crag;
 
-	mutable std::map<KeyType, std::vector<double>> _features;
-	mutable std::vector<std::string>               _featureNames;
+	// row-major feature matrix, each row padded to _stride
+	std::vector<double> _data;
+	std::size_t         _stride;
+
+	// the number of features in each row
+	std::vector<std::size_t> _lengths;
+
+	// the node or edge id of each row, and the row of each id (or -1)
+	std::vector<int> _ids;
+	std::vector<int> _rows;
+
+	std::vector<std::string> _featureNames;
 
 	std::vector<double> _min, _max;
 
-	mutable unsigned int _dims;
-	mutable bool         _dimsDirty;
+	// the number of views on _data and _ids
+	int _numViews;
 };
 
 #endif // CANDIDATE_MC_FEATURES_FEATURES_H__
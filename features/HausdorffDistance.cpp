@@ -14,19 +14,25 @@ HausdorffDistance::HausdorffDistance(int maxDistance) :
 void
 HausdorffDistance::operator()(const CragVolume& i, const CragVolume& j, double& i_j, double& j_i) {
 
-	if (_cache.count(std::make_pair(&i, &j))) {
+	{
+		std::lock_guard<std::mutex> lock(_mutex);
 
-		LOG_ALL(hausdorffdistancelog) << "reuse cached values" << std::endl;
+		auto cached = _cache.find(std::make_pair(&i, &j));
+		if (cached != _cache.end()) {
 
-		i_j = _cache[std::make_pair(&i, &j)].first;
-		j_i = _cache[std::make_pair(&i, &j)].second;
+			LOG_ALL(hausdorffdistancelog) << "reuse cached values" << std::endl;
 
-		return;
+			i_j = cached->second.first;
+			j_i = cached->second.second;
+
+			return;
+		}
 	}
 
 	volumesDistance(i, j, i_j);
 	volumesDistance(j, i, j_i);
 
+	std::lock_guard<std::mutex> lock(_mutex);
 	_cache[std::make_pair(&i, &j)] = std::make_pair(i_j, j_i);
 }
 
@@ -48,7 +54,10 @@ HausdorffDistance::volumesDistance(
 	LOG_ALL(hausdorffdistancelog) << "bb_i: " << bb_i << " " << volume_i.getBoundingBox() << std::endl;
 	LOG_ALL(hausdorffdistancelog) << "bb_j: " << bb_j << " " << volume_j.getBoundingBox() << std::endl;
 
-	vigra::MultiArray<2, double>& distances_j = getDistanceMap(volume_j);
+	const vigra::MultiArray<2, double>& distances_j = getDistanceMap(volume_j);
+
+	int padX, padY;
+	getPadding(volume_j, padX, padY);
 
 	double maxDistance = 0;
 	for (int y = 0; y < bb_i.height(); y++)
@@ -66,7 +75,7 @@ HausdorffDistance::volumesDistance(
 		LOG_ALL(hausdorffdistancelog) << "point " << p << " in i corresponds to point " << p_j << " in j" << std::endl;
 
 		// point relative to distance map
-		util::point<int, 2> p_d = p_j + util::point<int, 2>(_padX, _padY);
+		util::point<int, 2> p_d = p_j + util::point<int, 2>(padX, padY);
 
 		LOG_ALL(hausdorffdistancelog) << "point " << p << " in i corresponds to point " << p_d << " in distance map of j" << std::endl;
 
@@ -111,30 +120,34 @@ HausdorffDistance::lowerBound(const CragVolume& a, const CragVolume& b) {
 	return std::max(maxSeparationX, maxSeparationY);
 }
 
-vigra::MultiArray<2, double>&
+const vigra::MultiArray<2, double>&
 HausdorffDistance::getDistanceMap(const CragVolume& volume) {
 
-	if (_distanceMaps.count(&volume))
-		return _distanceMaps[&volume];
+	{
+		std::lock_guard<std::mutex> lock(_mutex);
+
+		auto cached = _distanceMaps.find(&volume);
+		if (cached != _distanceMaps.end())
+			return cached->second;
+	}
 
-	_padX = (int)(ceil(_maxDistance/volume.getResolutionX()));
-	_padY = (int)(ceil(_maxDistance/volume.getResolutionY()));
+	int padX, padY;
+	getPadding(volume, padX, padY);
 
-	vigra::Shape2 size(volume.width() + 2*_padX, volume.height() + 2*_padY);
+	vigra::Shape2 size(volume.width() + 2*padX, volume.height() + 2*padY);
 
-	vigra::MultiArray<2, double>& distanceMap = _distanceMaps[&volume];
-	distanceMap.reshape(size);
+	vigra::MultiArray<2, double> distanceMap(size);
 	distanceMap = 0;
 
 	vigra::copyMultiArray(
 			volume.data().bind<2>(0),
 			distanceMap.subarray(
 					vigra::Shape2(
-							_padX,
-							_padY),
+							padX,
+							padY),
 					vigra::Shape2(
-							_padX + volume.width(),
-							_padY + volume.height())));
+							padX + volume.width(),
+							padY + volume.height())));
 
 	double pitch[2];
 	pitch[0] = volume.getResolutionX();
@@ -148,6 +161,20 @@ HausdorffDistance::getDistanceMap(const CragVolume& volume) {
 			true, /* get distance from object */
 			pitch);
 
-	return distanceMap;
+	// map entries are not moved by insertions, it is safe to return a 
+	// reference after releasing the lock
+	std::lock_guard<std::mutex> lock(_mutex);
+	vigra::MultiArray<2, double>& cached = _distanceMaps[&volume];
+	if (cached.size() == 0)
+		cached.swap(distanceMap);
+
+	return cached;
+}
+
+void
+HausdorffDistance::getPadding(const CragVolume& volume, int& padX, int& padY) {
+
+	padX = (int)(ceil(_maxDistance/volume.getResolutionX()));
+	padY = (int)(ceil(_maxDistance/volume.getResolutionY()));
 }
 
@@ -2,6 +2,7 @@
 #define CANDIDATE_MC_FEATURES_HAUSDORFF_DISTANCE_H__
 
 #include <map>
+#include <mutex>
 #include <crag/Crag.h>
 #include <crag/CragVolumes.h>
 
@@ -12,6 +13,8 @@
  * CragVolume objects, so be aware that re-allocation of your volumes can 
  * invalidate the cache. The cache can be cleared with a call to clearCache(), 
  * which is also usefull to free up memory.
+ *
+ * The functor can be called concurrently.
  */
 class HausdorffDistance {
 
@@ -37,7 +40,12 @@ public:
 	/**
 	 * Free memory allocated for the cache.
 	 */
-	void clearCache() { _cache.clear(); _distanceMaps.clear(); }
+	void clearCache() {
+
+		std::lock_guard<std::mutex> lock(_mutex);
+		_cache.clear();
+		_distanceMaps.clear();
+	}
 
 private:
 
@@ -49,7 +57,10 @@ private:
 	// lower bound HausdorffDistance between a and b based on bounding boxes
 	double lowerBound(const CragVolume& a, const CragVolume& b);
 
-	vigra::MultiArray<2, double>& getDistanceMap(const CragVolume& volume);
+	const vigra::MultiArray<2, double>& getDistanceMap(const CragVolume& volume);
+
+	// the padding of the distance map of a volume
+	void getPadding(const CragVolume& volume, int& padX, int& padY);
 
 	std::map<std::pair<const CragVolume*, const CragVolume*>, std::pair<double, double>> _cache;
 
@@ -57,8 +68,8 @@ private:
 
 	double _maxDistance;
 
-	int _padX;
-	int _padY;
+	// protects the caches
+	std::mutex _mutex;
 };
 
 #endif // CANDIDATE_MC_FEATURES_HAUSDORFF_DISTANCE_H__
@@ -0,0 +1,270 @@
+#include <algorithm>
+#include <thread>
+#include <util/exceptions.h>
+#include "FeatureExtractor.h"
+#include "LinearCosts.h"
+
+namespace {
+
+// the minimal number of feature values to process per thread
+const std::size_t MinValuesPerThread = 1 << 16;
+
+/**
+ * Call f(begin, end) for numRanges consecutive ranges covering [0, size), each 
+ * in its own thread.
+ */
+template <typename F>
+void
+forRanges(std::size_t size, std::size_t numRanges, F f) {
+
+	if (numRanges <= 1) {
+
+		f(0, size);
+		return;
+	}
+
+	std::vector<std::thread> threads;
+	for (std::size_t r = 1; r < numRanges; r++)
+		threads.emplace_back(f, r*size/numRanges, (r + 1)*size/numRanges);
+
+	f(0, size/numRanges);
+
+	for (std::thread& thread : threads)
+		thread.join();
+}
+
+/**
+ * Compute the dot products of numRows rows of a row-major matrix with the 
+ * weights. Four rows are processed at once with independent accumulators. 
+ * Each accumulator sums in the order of the features, such that the result is 
+ * the same as for one row at a time.
+ */
+void
+rowProducts(
+		const double* rows,
+		std::size_t   stride,
+		std::size_t   numRows,
+		const double* weights,
+		std::size_t   dims,
+		double*       products) {
+
+	std::size_t row = 0;
+
+	for (; row + 4 <= numRows; row += 4) {
+
+		const double* f0 = rows + row*stride;
+		const double* f1 = f0 + stride;
+		const double* f2 = f1 + stride;
+		const double* f3 = f2 + stride;
+
+		double s0 = 0;
+		double s1 = 0;
+		double s2 = 0;
+		double s3 = 0;
+
+		for (std::size_t i = 0; i < dims; i++) {
+
+			double w = weights[i];
+
+			s0 += w*f0[i];
+			s1 += w*f1[i];
+			s2 += w*f2[i];
+			s3 += w*f3[i];
+		}
+
+		products[row]     = s0;
+		products[row + 1] = s1;
+		products[row + 2] = s2;
+		products[row + 3] = s3;
+	}
+
+	for (; row < numRows; row++) {
+
+		const double* f = rows + row*stride;
+
+		double s = 0;
+		for (std::size_t i = 0; i < dims; i++)
+			s += weights[i]*f[i];
+
+		products[row] = s;
+	}
+}
+
+/**
+ * Add the columns [begin, end) of the rows of a row-major matrix, multiplied 
+ * with the coefficient of each row, to sum.
+ */
+void
+columnSums(
+		const double* rows,
+		std::size_t   stride,
+		std::size_t   numRows,
+		const double* coefficients,
+		std::size_t   begin,
+		std::size_t   end,
+		double*       sum) {
+
+	for (std::size_t row = 0; row < numRows; row++) {
+
+		double c = coefficients[row];
+
+		if (c == 0)
+			continue;
+
+		const double* f = rows + row*stride;
+
+		for (std::size_t i = begin; i < end; i++)
+			sum[i] += f[i]*c;
+	}
+}
+
+} // anonymous namespace
+
+LinearCosts::LinearCosts(
+		const Crag&         crag,
+		const NodeFeatures& nodeFeatures,
+		const EdgeFeatures& edgeFeatures) :
+	_crag(crag),
+	_nodeFeatures(nodeFeatures),
+	_edgeFeatures(edgeFeatures),
+	_numThreads(optionNumThreads.as<int>()) {
+
+	for (Crag::NodeType type : Crag::NodeTypes) {
+
+		std::vector<Crag::CragNode>& nodes = _nodes[type];
+		for (int id : nodeFeatures.getFeatures(type).getIds())
+			nodes.push_back(crag.nodeFromId(id));
+	}
+
+	for (Crag::EdgeType type : Crag::EdgeTypes) {
+
+		std::vector<Crag::CragEdge>& edges = _edges[type];
+		for (int id : edgeFeatures.getFeatures(type).getIds())
+			edges.push_back(crag.edgeFromId(id));
+	}
+}
+
+void
+LinearCosts::computeCosts(
+		const FeatureWeights&  weights,
+		Crag::NodeMap<double>& nodeCosts,
+		Crag::EdgeMap<double>& edgeCosts) const {
+
+	for (Crag::CragNode n : _crag.nodes())
+		nodeCosts[n] = 0;
+	for (Crag::CragEdge e : _crag.edges())
+		edgeCosts[e] = 0;
+
+	for (Crag::NodeType type : Crag::NodeTypes)
+		if (_nodeFeatures.dims(type) > 0)
+			computeCosts(_nodeFeatures.getFeatures(type), _nodes.at(type), weights[type], nodeCosts);
+
+	for (Crag::EdgeType type : Crag::EdgeTypes)
+		if (_edgeFeatures.dims(type) > 0)
+			computeCosts(_edgeFeatures.getFeatures(type), _edges.at(type), weights[type], edgeCosts);
+}
+
+void
+LinearCosts::accumulate(
+		const Crag::NodeMap<double>& nodeCoefficients,
+		const Crag::EdgeMap<double>& edgeCoefficients,
+		FeatureWeights&              sum) const {
+
+	for (Crag::NodeType type : Crag::NodeTypes)
+		if (_nodeFeatures.dims(type) > 0)
+			accumulate(_nodeFeatures.getFeatures(type), _nodes.at(type), nodeCoefficients, sum[type]);
+
+	for (Crag::EdgeType type : Crag::EdgeTypes)
+		if (_edgeFeatures.dims(type) > 0)
+			accumulate(_edgeFeatures.getFeatures(type), _edges.at(type), edgeCoefficients, sum[type]);
+}
+
+template <typename FeaturesT, typename ElementT, typename CostsT>
+void
+LinearCosts::computeCosts(
+		const FeaturesT&             features,
+		const std::vector<ElementT>& elements,
+		const std::vector<double>&   weights,
+		CostsT&                      costs) const {
+
+	if (weights.size() != features.dims())
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"weights of size " << weights.size() << " do not match features of size " << features.dims());
+
+	if (elements.size() != features.size())
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"features changed since the creation of LinearCosts");
+
+	std::size_t numRows   = elements.size();
+	std::size_t numRanges = std::min(getNumThreads(), std::max(numRows*weights.size()/MinValuesPerThread, std::size_t(1)));
+
+	forRanges(numRows, numRanges, [&](std::size_t begin, std::size_t end) {
+
+		std::vector<double> products(end - begin);
+
+		rowProducts(
+				features.data() + begin*features.getStride(),
+				features.getStride(),
+				end - begin,
+				weights.data(),
+				weights.size(),
+				products.data());
+
+		// different threads write to different elements
+		for (std::size_t row = begin; row < end; row++)
+			costs[elements[row]] = products[row - begin];
+	});
+}
+
+template <typename FeaturesT, typename ElementT, typename CoefficientsT>
+void
+LinearCosts::accumulate(
+		const FeaturesT&             features,
+		const std::vector<ElementT>& elements,
+		const CoefficientsT&         coefficients,
+		std::vector<double>&         sum) const {
+
+	if (sum.size() != features.dims())
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"sum of size " << sum.size() << " does not match features of size " << features.dims());
+
+	if (elements.size() != features.size())
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"features changed since the creation of LinearCosts");
+
+	std::size_t numRows = elements.size();
+
+	std::vector<double> rowCoefficients(numRows);
+	for (std::size_t row = 0; row < numRows; row++)
+		rowCoefficients[row] = coefficients[elements[row]];
+
+	// split the columns over threads, such that each element of sum is 
+	// accumulated in the order of the rows
+	std::size_t numRanges = std::min(
+			std::min(getNumThreads(), sum.size()),
+			std::max(numRows*sum.size()/MinValuesPerThread, std::size_t(1)));
+
+	forRanges(sum.size(), numRanges, [&](std::size_t begin, std::size_t end) {
+
+		columnSums(
+				features.data(),
+				features.getStride(),
+				numRows,
+				rowCoefficients.data(),
+				begin,
+				end,
+				sum.data());
+	});
+}
+
+std::size_t
+LinearCosts::getNumThreads() const {
+
+	if (_numThreads <= 0)
+		return std::max(1u, std::thread::hardware_concurrency());
+	return _numThreads;
+}
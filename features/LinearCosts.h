@@ -0,0 +1,90 @@
+#ifndef CANDIDATE_MC_FEATURES_LINEAR_COSTS_H__
+#define CANDIDATE_MC_FEATURES_LINEAR_COSTS_H__
+
+#include <map>
+#include <vector>
+#include <crag/Crag.h>
+#include "NodeFeatures.h"
+#include "EdgeFeatures.h"
+#include "FeatureWeights.h"
+
+/**
+ * Batched evaluation of the linear costs <w,φ_i> of all nodes and edges i of a 
+ * CRAG, and of weighted feature sums Σ_i c_i·φ_i (as needed for the gradient 
+ * in learning). Both are computed on the feature matrices of each node and 
+ * edge type, distributed over several threads.
+ *
+ * The results are identical to the ones of a plain loop over all nodes and 
+ * edges, independent of the number of threads. The features must not change 
+ * while this object is in use.
+ */
+class LinearCosts {
+
+public:
+
+	/**
+	 * Create a cost function for the given features. The number of threads to 
+	 * use is read from the program options.
+	 */
+	LinearCosts(
+			const Crag&         crag,
+			const NodeFeatures& nodeFeatures,
+			const EdgeFeatures& edgeFeatures);
+
+	/**
+	 * Set the number of threads to use. If 0, the number of hardware threads 
+	 * is used. The default is given by program option --numThreads.
+	 */
+	void setNumThreads(int numThreads) { _numThreads = numThreads; }
+
+	/**
+	 * Compute the costs <w,φ_i> of all nodes and edges. Nodes and edges without 
+	 * features get a cost of 0.
+	 */
+	void computeCosts(
+			const FeatureWeights&  weights,
+			Crag::NodeMap<double>& nodeCosts,
+			Crag::EdgeMap<double>& edgeCosts) const;
+
+	/**
+	 * Add Σ_i c_i·φ_i over all nodes and edges i to sum, separately for each 
+	 * node and edge type. The weights in sum have to have the sizes of the 
+	 * features.
+	 */
+	void accumulate(
+			const Crag::NodeMap<double>& nodeCoefficients,
+			const Crag::EdgeMap<double>& edgeCoefficients,
+			FeatureWeights&              sum) const;
+
+private:
+
+	template <typename FeaturesT, typename ElementT, typename CostsT>
+	void computeCosts(
+			const FeaturesT&             features,
+			const std::vector<ElementT>& elements,
+			const std::vector<double>&   weights,
+			CostsT&                      costs) const;
+
+	template <typename FeaturesT, typename ElementT, typename CoefficientsT>
+	void accumulate(
+			const FeaturesT&             features,
+			const std::vector<ElementT>& elements,
+			const CoefficientsT&         coefficients,
+			std::vector<double>&         sum) const;
+
+	std::size_t getNumThreads() const;
+
+	const Crag& _crag;
+
+	const NodeFeatures& _nodeFeatures;
+	const EdgeFeatures& _edgeFeatures;
+
+	// the node or edge of each row in the feature matrices
+	std::map<Crag::NodeType, std::vector<Crag::CragNode>> _nodes;
+	std::map<Crag::EdgeType, std::vector<Crag::CragEdge>> _edges;
+
+	int _numThreads;
+};
+
+#endif // CANDIDATE_MC_FEATURES_LINEAR_COSTS_H__
+
@@ -6,10 +6,10 @@
 
 class NodeFeatures {
 
-	typedef Features<Crag::CragNode> FeaturesType;
-
 public:
 
+	typedef Features<Crag::CragNode> FeaturesType;
+
 	NodeFeatures(const Crag& crag) :
 			_crag(crag),
 			_features(Crag::NodeTypes.size(), FeaturesType(crag)) {}
@@ -34,7 +34,7 @@ public:
 		return features(type).getFeatureNames();
 	}
 
-	const std::vector<double>& operator[](Crag::CragNode n) const {
+	FeatureRow operator[](Crag::CragNode n) const {
 
 		return features(_crag.type(n))[n];
 	}
@@ -44,11 +44,42 @@ public:
 		features(_crag.type(n)).set(n, v);
 	}
 
+	/**
+	 * Replace the features of all nodes of the given type with the rows of a
+	 * row-major matrix of size ids.size() x dims.
+	 */
+	void set(Crag::NodeType type, const std::vector<int>& ids, std::vector<double> matrix, unsigned int dims) {
+
+		features(type).set(ids, std::move(matrix), dims);
+	}
+
+	/**
+	 * Get the feature matrix and row ids of all nodes of the given type.
+	 */
+	inline const FeaturesType& getFeatures(Crag::NodeType type) const {
+
+		return features(type);
+	}
+
+	inline FeaturesType& getFeatures(Crag::NodeType type) {
+
+		return features(type);
+	}
+
 	inline unsigned int dims(Crag::NodeType type) const {
 
 		return features(type).dims();
 	}
 
+	/**
+	 * Remove the padding between the rows of the feature matrices.
+	 */
+	void compact() {
+
+		for (auto& f : _features)
+			f.compact();
+	}
+
 	void normalize() {
 
 		for (auto& f : _features)
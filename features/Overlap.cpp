@@ -1,3 +1,4 @@
+#include <algorithm>
 #include "Overlap.h"
 #include <util/assert.h>
 
@@ -41,3 +42,66 @@ Overlap::exceeds(const CragVolume& a, CragVolume& b, double value) {
 
 	return (*this)(a, b) > value;
 }
+
+double
+Overlap::operator()(const RunLengthVolume& a, const RunLengthVolume& b) {
+
+	UTIL_ASSERT_REL(a.getResolution(), ==, b.getResolution());
+
+	double voxelVolume = a.getResolution().x()*a.getResolution().y()*a.getResolution().z();
+
+	// discrete offset of b in a
+	util::point<int, 3> offset = b.getDiscreteOffset(a.getOffset());
+
+	const std::vector<RunLengthVolume::Run>& runsA = a.runs();
+	const std::vector<RunLengthVolume::Run>& runsB = b.runs();
+
+	long overlap = 0;
+
+	// both lists of runs are sorted by z, y, and x, walk them in parallel
+	auto i = runsA.begin();
+	auto j = runsB.begin();
+	while (i != runsA.end() && j != runsB.end()) {
+
+		long za = i->z;
+		long ya = i->y;
+		long zb = static_cast<long>(j->z) + offset.z();
+		long yb = static_cast<long>(j->y) + offset.y();
+
+		if (za < zb || (za == zb && ya < yb)) {
+
+			i++;
+			continue;
+		}
+
+		if (zb < za || (zb == za && yb < ya)) {
+
+			j++;
+			continue;
+		}
+
+		long beginA = i->x;
+		long endA   = beginA + i->length;
+		long beginB = static_cast<long>(j->x) + offset.x();
+		long endB   = beginB + j->length;
+
+		overlap += std::max(0L, std::min(endA, endB) - std::max(beginA, beginB));
+
+		// advance the run that ends first
+		if (endA < endB)
+			i++;
+		else
+			j++;
+	}
+
+	return overlap*voxelVolume;
+}
+
+bool
+Overlap::exceeds(const RunLengthVolume& a, const RunLengthVolume& b, double value) {
+
+	if (a.getBoundingBox().intersection(b.getBoundingBox()).volume() <= value)
+		return false;
+
+	return (*this)(a, b) > value;
+}
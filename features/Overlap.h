@@ -19,6 +19,17 @@ public:
 	 * is usually faster then computing the exact overlap.
 	 */
 	bool exceeds(const CragVolume& a, CragVolume& b, double value);
+
+	/**
+	 * Same as above, but for run-length encoded volumes. Only the runs of a 
+	 * and b are visited, empty space in the bounding boxes is skipped.
+	 */
+	double operator()(const RunLengthVolume& a, const RunLengthVolume& b);
+
+	/**
+	 * Same as above, but for run-length encoded volumes.
+	 */
+	bool exceeds(const RunLengthVolume& a, const RunLengthVolume& b, double value);
 };
 
 #endif // CANDIDATE_MC_FEATURES_OVERLAP_H__
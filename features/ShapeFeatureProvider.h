@@ -64,16 +64,21 @@ public:
 			_3dRegionFeatures = RegionFeatures<3, float, unsigned char>(parameters3d);
 		}
 
+	bool supportsConcurrency() const override { return true; }
+
 	template <typename ContainerT>
 	void appendNodeFeatures(const Crag::CragNode n, ContainerT& adaptor) {
 
 		// the "label" image
-		const vigra::MultiArray<3, unsigned char>& labelImage = _volumes[n]->data();
+		std::shared_ptr<CragVolume> volume = _volumes[n];
+		const vigra::MultiArray<3, unsigned char>& labelImage = volume->data();
 
+		// fill copies of the region features, such that nodes can be processed 
+		// concurrently
 		if (_crag.type(n) == Crag::SliceNode)
-			_2dRegionFeatures.fill(labelImage.bind<2>(0), adaptor);
+			RegionFeatures<2, float, unsigned char>(_2dRegionFeatures).fill(labelImage.bind<2>(0), adaptor);
 		else
-			_3dRegionFeatures.fill(labelImage, adaptor);
+			RegionFeatures<3, float, unsigned char>(_3dRegionFeatures).fill(labelImage, adaptor);
 	}
 
 	std::map<Crag::NodeType, std::vector<std::string>> getNodeFeatureNames() const override {
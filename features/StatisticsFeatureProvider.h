@@ -40,7 +40,9 @@ public:
 
 	/**
 	 * @param values
-	 *              An array of values to compute statistics over.
+	 *              An array of values to compute statistics over. Needs to 
+	 *              cover only the candidates, e.g., the result of reading the 
+	 *              bounding box of the CRAG volumes from a VolumeStore.
 	 *
 	 * @pararm valuesName
 	 *              An optional name for the values. Will pre prepended to 
@@ -78,17 +80,40 @@ public:
 			_3dRegionFeatures = RegionFeatures<3, float, unsigned char>(parameters3d);
 		}
 
+	bool supportsConcurrency() const override { return true; }
+
 	template <typename ContainerT>
 	void appendNodeFeatures(const Crag::CragNode n, ContainerT& adaptor) {
 
 		if (_crag.type(n) == Crag::NoAssignmentNode)
 			return;
 
+		std::shared_ptr<CragVolume> volume = _volumes[n];
+
 		// the bounding box of the volume
-		const util::box<float, 3>&   nodeBoundingBox    = _volumes[n]->getBoundingBox();
-		util::point<unsigned int, 3> nodeSize           = (nodeBoundingBox.max() - nodeBoundingBox.min())/_volumes[n]->getResolution();
+		const util::box<float, 3>&   nodeBoundingBox    = volume->getBoundingBox();
+		util::point<unsigned int, 3> nodeSize           = (nodeBoundingBox.max() - nodeBoundingBox.min())/volume->getResolution();
 		util::point<float, 3>        nodeOffset         = nodeBoundingBox.min() - _values.getBoundingBox().min();
-		util::point<unsigned int, 3> nodeDiscreteOffset = nodeOffset/_volumes[n]->getResolution();
+		util::point<int, 3>          nodeSignedOffset   = nodeOffset/volume->getResolution();
+
+		// converting a negative offset to unsigned is undefined, reject it 
+		// before the cast
+		if (nodeOffset.x() < 0 || nodeOffset.y() < 0 || nodeOffset.z() < 0 ||
+		    nodeSignedOffset.x() < 0 || nodeSignedOffset.y() < 0 || nodeSignedOffset.z() < 0)
+			UTIL_THROW_EXCEPTION(
+					UsageError,
+					"candidate " << _crag.id(n) << " with bounding box " << nodeBoundingBox <<
+					" is not contained in the values at " << _values.getBoundingBox());
+
+		util::point<unsigned int, 3> nodeDiscreteOffset = nodeSignedOffset;
+
+		if (nodeDiscreteOffset.x() + nodeSize.x() > _values.width()  ||
+		    nodeDiscreteOffset.y() + nodeSize.y() > _values.height() ||
+		    nodeDiscreteOffset.z() + nodeSize.z() > _values.depth())
+			UTIL_THROW_EXCEPTION(
+					UsageError,
+					"candidate " << _crag.id(n) << " with bounding box " << nodeBoundingBox <<
+					" is not contained in the values at " << _values.getBoundingBox());
 
 		// a view to the values image for the node bounding box
 		typedef vigra::MultiArrayView<3, float>::difference_type Shape;
@@ -104,14 +129,16 @@ public:
 								nodeDiscreteOffset.z() + nodeSize.z()));
 
 		// the "label" image
-		const vigra::MultiArray<3, unsigned char>& labelImage = _volumes[n]->data();
+		const vigra::MultiArray<3, unsigned char>& labelImage = volume->data();
 
+		// use copies of the region features, fill() is not guaranteed to be 
+		// reentrant
 		if (_parameters.wholeVolume) {
 
 			if (_crag.type(n) == Crag::SliceNode)
-				_2dRegionFeatures.fill(valuesNodeImage.bind<2>(0), labelImage.bind<2>(0), adaptor);
+				RegionFeatures<2, float, unsigned char>(_2dRegionFeatures).fill(valuesNodeImage.bind<2>(0), labelImage.bind<2>(0), adaptor);
 			else
-				_3dRegionFeatures.fill(valuesNodeImage, labelImage, adaptor);
+				RegionFeatures<3, float, unsigned char>(_3dRegionFeatures).fill(valuesNodeImage, labelImage, adaptor);
 		}
 
 		if (_parameters.boundaryVoxels) {
@@ -119,9 +146,9 @@ public:
 			vigra::MultiArray<3, unsigned char> boundaryImage = getBoundaryVoxelMask(labelImage);
 
 			if (_crag.type(n) == Crag::SliceNode)
-				_2dRegionFeatures.fill(valuesNodeImage.bind<2>(0), boundaryImage.bind<2>(0), adaptor);
+				RegionFeatures<2, float, unsigned char>(_2dRegionFeatures).fill(valuesNodeImage.bind<2>(0), boundaryImage.bind<2>(0), adaptor);
 			else
-				_3dRegionFeatures.fill(valuesNodeImage, boundaryImage, adaptor);
+				RegionFeatures<3, float, unsigned char>(_3dRegionFeatures).fill(valuesNodeImage, boundaryImage, adaptor);
 		}
 	}
 
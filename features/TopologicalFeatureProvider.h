@@ -16,6 +16,8 @@ public:
 				recExtractTopologicalFeatures(n);
 	}
 
+	bool supportsConcurrency() const override { return true; }
+
 	template <typename ContainerT>
 	void appendNodeFeatures(const Crag::CragNode n, ContainerT& adaptor) {
 
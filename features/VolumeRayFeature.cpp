@@ -8,7 +8,8 @@ VolumeRayFeature::maxVolumeRayPiercingDepth(Crag::CragNode u, Crag::CragNode v,
 	//if (_rays.getCrag().id(u) == 142 && _rays.getCrag().id(v) == 144)
 		//debug = true;
 
-	const CragVolume& volume = *_volumes[v];
+	std::shared_ptr<CragVolume> volumePtr = _volumes[v];
+	const CragVolume& volume = *volumePtr;
 	const util::point<float, 3> resolution = volume.getResolution();
 	const util::point<float, 3> offset     = volume.getOffset();
 
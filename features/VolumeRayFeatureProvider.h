@@ -19,6 +19,8 @@ public:
 		_volumes (volumes),
 		_rays(rays){}
 
+	bool supportsConcurrency() const override { return true; }
+
 	template <typename ContainerT>
 	void appendEdgeFeatures(const Crag::CragEdge e, ContainerT& adaptor) {
 
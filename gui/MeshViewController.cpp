@@ -280,7 +280,8 @@ MeshViewController::addMesh(Crag::CragNode n) {
 		return;
 	}
 
-	const CragVolume& volume = *_volumes[n];
+	std::shared_ptr<CragVolume> volumePtr = _volumes[n];
+	const CragVolume& volume = *volumePtr;
 
 	typedef ExplicitVolumeAdaptor<CragVolume> Adaptor;
 	Adaptor adaptor(volume);
@@ -1,3 +1,4 @@
+#include <chrono>
 #include <boost/filesystem.hpp>
 #include <lemon/dijkstra.h>
 #include <lemon/connectivity.h>
@@ -242,7 +243,19 @@ ClosedSetSolver::findMinClosedSet(CragSolution& solution) {
 
 	// re-set constraints to inform solver about potential changes
 	_solver->setConstraints(_constraints);
+
+	// warm-start from the previous solution, if there is one and it is still 
+	// feasible
+	if (_initialSolution.size() == _numNodes + _numEdges) {
+
+		if (_constraints.isSatisfied(_initialSolution))
+			_solver->setInitialSolution(_initialSolution);
+		else
+			LOG_DEBUG(closedsetlog) << "previous solution is infeasible, not using it as a MIP start" << std::endl;
+	}
+
 	std::string msg;
+	auto start = std::chrono::steady_clock::now();
 	if (!_solver->solve(_solution, msg)) {
 
 		LOG_ERROR(closedsetlog) << "solver did not find optimal solution: " << msg << std::endl;
@@ -252,6 +265,19 @@ ClosedSetSolver::findMinClosedSet(CragSolution& solution) {
 		LOG_DEBUG(closedsetlog) << "solver returned solution with message: " << msg << std::endl;
 	}
 
+	LOG_USER(closedsetlog)
+			<< "solved ILP in "
+			<< std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count()
+			<< "s, first incumbent after "
+			<< _solver->getTimeToFirstIncumbent() << "s"
+			<< std::endl;
+
+	// candidate MIP start for the next iteration or call to solve(), rounded 
+	// to the binary values of the variables
+	_initialSolution = _solution;
+	for (unsigned int i = 0; i < _initialSolution.size(); i++)
+		_initialSolution[i] = (_initialSolution[i] > 0.5 ? 1.0 : 0.0);
+
 	// get selected candidates
 	for (Crag::CragNode n : _crag.nodes()) {
 
@@ -408,6 +434,16 @@ ClosedSetSolver::findViolatedConstraints(CragSolution& solution) {
 			<< "added " << constraintsAdded
 			<< " cycle constraints" << std::endl;
 
+	// the current solution violates the added cycle constraints, select all 
+	// leaf edges within components to satisfy them in the initial solution for 
+	// the next iteration
+	if (constraintsAdded > 0)
+		for (Crag::CragEdge e : _crag.edges())
+			if (_crag.isLeafEdge(e) &&
+			    solution.selected(e.u()) &&
+			    solution.label(e.u()) == solution.label(e.v()))
+				_initialSolution[edgeIdToVar(_crag.id(e))] = 1.0;
+
 	return constraintsAdded > 0;
 }
 
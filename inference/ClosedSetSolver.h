@@ -63,6 +63,9 @@ private:
 	LinearSolverBackend* _solver;
 	Solution             _solution;
 
+	// the previous solution, used as a MIP start if it is feasible
+	Solution             _initialSolution;
+
 	Parameters _parameters;
 };
 
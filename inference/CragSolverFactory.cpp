@@ -10,11 +10,29 @@ util::ProgramOption optionClosedSetSolver(
 		util::_long_name        = "closedSetSolver",
 		util::_description_text = "Use the closed set solver to get a solution.");
 
+util::ProgramOption optionHeuristicSolver(
+		util::_long_name        = "heuristicSolver",
+		util::_description_text = "Use a heuristic multi-cut solver (greedy additive edge contraction followed by "
+		                          "Kernighan-Lin refinement) to get a solution. This does not need an ILP solver, "
+		                          "but the solution is not guaranteed to be optimal.");
+
+util::ProgramOption optionDecompose(
+		util::_long_name        = "decompose",
+		util::_description_text = "Split the multi-cut problem into independent subproblems and solve them "
+		                          "concurrently.");
+
+util::ProgramOption optionNumSolverThreads(
+		util::_long_name        = "numSolverThreads",
+		util::_description_text = "The number of subproblems to solve concurrently with --decompose. 0 uses all "
+		                          "hardware threads.",
+		util::_default_value    = 0);
+
 CragSolver*
 CragSolverFactory::createSolver(
 		const Crag& crag,
 		const CragVolumes& volumes,
-		CragSolver::Parameters parameters) {
+		CragSolver::Parameters parameters,
+		CycleConstraintPool* cyclePool) {
 
 	if (optionAssignmentSolver) {
 
@@ -24,8 +42,16 @@ CragSolverFactory::createSolver(
 
 		return new ClosedSetSolver(crag, parameters);
 
+	} else if (optionHeuristicSolver) {
+
+		return new HeuristicMultiCutSolver(crag, parameters);
+
+	} else if (optionDecompose) {
+
+		return new DecomposingMultiCutSolver(crag, parameters, optionNumSolverThreads.as<int>());
+
 	} else {
 
-		return new MultiCutSolver(crag, parameters);
+		return new MultiCutSolver(crag, parameters, cyclePool);
 	}
 }
@@ -4,15 +4,23 @@
 #include "AssignmentSolver.h"
 #include "MultiCutSolver.h"
 #include "ClosedSetSolver.h"
+#include "HeuristicMultiCutSolver.h"
+#include "DecomposingMultiCutSolver.h"
 
 class CragSolverFactory {
 
 public:
 
+	/**
+	 * Create the solver selected by the program options. If a cycle constraint 
+	 * pool is given, it will be shared with the created solver (if the solver 
+	 * supports it).
+	 */
 	static CragSolver* createSolver(
 			const Crag& crag,
 			const CragVolumes& volumes,
-			CragSolver::Parameters parameters = CragSolver::Parameters());
+			CragSolver::Parameters parameters = CragSolver::Parameters(),
+			CycleConstraintPool* cyclePool = 0);
 };
 
 #endif // CANDIDATE_MC_INFERENCE_CRAG_SOLVER_FACTORY_H__
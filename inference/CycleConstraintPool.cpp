@@ -0,0 +1,121 @@
+#include <algorithm>
+#include <util/Logger.h>
+#include "CycleConstraintPool.h"
+
+logger::LogChannel cyclepoollog("cyclepoollog", "[CycleConstraintPool] ");
+
+util::ProgramOption optionCycleConstraintPool(
+		util::_long_name        = "cycleConstraintPool",
+		util::_description_text = "Seed the multi-cut solver with the cycle constraints stored in the project file, "
+		                          "and store the found cycle constraints for later runs.");
+
+util::ProgramOption optionCyclePoolMaxInactiveRounds(
+		util::_long_name        = "cyclePoolMaxInactiveRounds",
+		util::_description_text = "The number of solver calls after which a cycle constraint that was never tight "
+		                          "gets removed from the cycle constraint pool. 0 keeps all constraints.",
+		util::_default_value    = 10);
+
+CycleConstraintPool::CycleConstraintPool(int maxInactiveRounds) :
+	_maxInactiveRounds(maxInactiveRounds),
+	_round(0),
+	_nextId(0) {}
+
+std::size_t
+CycleConstraintPool::add(int cutEdge, const std::vector<int>& pathEdges, int age) {
+
+	std::vector<int> key = getKey(cutEdge, pathEdges);
+
+	auto i = _positions.find(key);
+	if (i != _positions.end()) {
+
+		Cycle& cycle = _cycles[i->second];
+		cycle.lastActive = std::max(cycle.lastActive, _round - age);
+		return cycle.id;
+	}
+
+	Cycle cycle;
+	cycle.id         = _nextId++;
+	cycle.cutEdge    = cutEdge;
+	cycle.pathEdges  = pathEdges;
+	cycle.lastActive = _round - age;
+
+	_positions[key] = _cycles.size();
+	_ids.insert(cycle.id);
+	_cycles.push_back(cycle);
+
+	return cycle.id;
+}
+
+void
+CycleConstraintPool::updateActivity(const std::vector<double>& edgeValues) {
+
+	for (Cycle& cycle : _cycles) {
+
+		double pathValue = 0;
+		for (int e : cycle.pathEdges)
+			pathValue += edgeValues[e];
+
+		// Σ_path x_p - x_e <= |path| - 1, active if slack is less than 1/2
+		double slack = (cycle.pathEdges.size() - 1.0) - (pathValue - edgeValues[cycle.cutEdge]);
+
+		if (slack < 0.5)
+			cycle.lastActive = _round;
+	}
+}
+
+int
+CycleConstraintPool::nextRound() {
+
+	_round++;
+
+	if (_maxInactiveRounds <= 0)
+		return 0;
+
+	std::vector<Cycle> kept;
+	kept.reserve(_cycles.size());
+
+	for (Cycle& cycle : _cycles)
+		if (getAge(cycle) <= _maxInactiveRounds)
+			kept.push_back(std::move(cycle));
+
+	int numEvicted = _cycles.size() - kept.size();
+
+	if (numEvicted == 0)
+		return 0;
+
+	_cycles.swap(kept);
+	_ids.clear();
+	_positions.clear();
+
+	for (std::size_t i = 0; i < _cycles.size(); i++) {
+
+		_positions[getKey(_cycles[i].cutEdge, _cycles[i].pathEdges)] = i;
+		_ids.insert(_cycles[i].id);
+	}
+
+	LOG_USER(cyclepoollog)
+			<< "evicted " << numEvicted << " inactive cycle constraints, "
+			<< _cycles.size() << " remaining" << std::endl;
+
+	return numEvicted;
+}
+
+void
+CycleConstraintPool::clear() {
+
+	_cycles.clear();
+	_ids.clear();
+	_positions.clear();
+}
+
+std::vector<int>
+CycleConstraintPool::getKey(int cutEdge, const std::vector<int>& pathEdges) {
+
+	std::vector<int> key;
+	key.reserve(pathEdges.size() + 1);
+	key.push_back(cutEdge);
+	key.insert(key.end(), pathEdges.begin(), pathEdges.end());
+	std::sort(key.begin() + 1, key.end());
+
+	return key;
+}
@@ -0,0 +1,112 @@
+#ifndef CANDIDATE_MC_INFERENCE_CYCLE_CONSTRAINT_POOL_H__
+#define CANDIDATE_MC_INFERENCE_CYCLE_CONSTRAINT_POOL_H__
+
+#include <map>
+#include <set>
+#include <vector>
+#include <util/ProgramOptions.h>
+
+extern util::ProgramOption optionCycleConstraintPool;
+extern util::ProgramOption optionCyclePoolMaxInactiveRounds;
+
+/**
+ * A pool of cycle constraints of the multi-cut problem on a CRAG. Cycle
+ * constraints do not depend on the costs, they stay valid for different costs
+ * on the same CRAG. MultiCutSolvers sharing a pool seed their constraints from
+ * it and add newly found cycles to it.
+ *
+ * The pool is used in rounds, which are started by the owner of the pool with
+ * nextRound() (e.g., once per training iteration, however many solvers share
+ * the pool). Cycles that have not been active (i.e., tight or violated) for
+ * more than a given number of rounds are evicted.
+ */
+class CycleConstraintPool {
+
+public:
+
+	/**
+	 * A cycle, consisting of a cut edge and a path of merged edges connecting
+	 * the nodes of the cut edge. Edges are given by their CRAG ids.
+	 */
+	struct Cycle {
+
+		// a unique id of this cycle within the pool
+		std::size_t id;
+
+		int cutEdge;
+
+		std::vector<int> pathEdges;
+
+		// the round in which this cycle was active the last time
+		int lastActive;
+	};
+
+	/**
+	 * Create a new pool.
+	 *
+	 * @param maxInactiveRounds
+	 *              The number of rounds after which an inactive cycle gets
+	 *              evicted. 0 disables eviction.
+	 */
+	CycleConstraintPool(int maxInactiveRounds = 0);
+
+	/**
+	 * Add a cycle to the pool. If the cycle is already contained, its id is
+	 * returned and it is marked active.
+	 *
+	 * @param age
+	 *              The number of rounds since the cycle was active the last
+	 *              time.
+	 */
+	std::size_t add(int cutEdge, const std::vector<int>& pathEdges, int age = 0);
+
+	/**
+	 * Check whether the cycle with the given id is still part of the pool.
+	 */
+	bool contains(std::size_t id) const { return _ids.count(id); }
+
+	/**
+	 * Mark all cycles as active that are tight or violated for the given
+	 * values of the edge variables, indexed by CRAG edge id.
+	 */
+	void updateActivity(const std::vector<double>& edgeValues);
+
+	/**
+	 * Start a new round and evict all cycles that have not been active in the
+	 * last maxInactiveRounds rounds. Returns the number of evicted cycles.
+	 */
+	int nextRound();
+
+	/**
+	 * Get the number of rounds since the given cycle was active the last time.
+	 */
+	int getAge(const Cycle& cycle) const { return _round - cycle.lastActive; }
+
+	const std::vector<Cycle>& getCycles() const { return _cycles; }
+
+	std::size_t size() const { return _cycles.size(); }
+
+	void clear();
+
+private:
+
+	static std::vector<int> getKey(int cutEdge, const std::vector<int>& pathEdges);
+
+	int _maxInactiveRounds;
+
+	int _round;
+
+	std::size_t _nextId;
+
+	std::vector<Cycle> _cycles;
+
+	// the ids of all cycles in the pool
+	std::set<std::size_t> _ids;
+
+	// map from edges of a cycle (cut edge first, followed by the sorted path
+	// edges) to its position in _cycles
+	std::map<std::vector<int>, std::size_t> _positions;
+};
+
+#endif // CANDIDATE_MC_INFERENCE_CYCLE_CONSTRAINT_POOL_H__
+
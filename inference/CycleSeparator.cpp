@@ -0,0 +1,259 @@
+#include <algorithm>
+#include <chrono>
+#include <deque>
+#include <util/Logger.h>
+#include "CycleSeparator.h"
+
+logger::LogChannel cycleseparatorlog("cycleseparatorlog", "[CycleSeparator] ");
+
+CycleSeparator::CycleSeparator(const Crag& crag) :
+	_crag(crag),
+	_currentSearch(0) {
+
+	int numNodeIds = _crag.getAdjacencyGraph().maxNodeId() + 1;
+	int numEdgeIds = _crag.getAdjacencyGraph().maxEdgeId() + 1;
+
+	_u.resize(numEdgeIds, -1);
+	_v.resize(numEdgeIds, -1);
+
+	for (Crag::CragEdge e : _crag.edges()) {
+
+		_u[_crag.id(e)] = _crag.id(e.u());
+		_v[_crag.id(e)] = _crag.id(e.v());
+	}
+
+	_offsets.resize(numNodeIds + 1);
+	_labels.resize(numNodeIds);
+	_predEdge.resize(numNodeIds);
+	_visited.resize(numNodeIds, -1);
+}
+
+std::vector<CycleSeparator::Cycle>
+CycleSeparator::findViolatedCycles(
+		const CragSolution&        solution,
+		const std::vector<double>& edgeValues) {
+
+	auto start = std::chrono::steady_clock::now();
+
+	_statistics = Statistics();
+
+	buildCutGraph(solution);
+	findComponents(solution);
+
+	// collect all cut edges with incident nodes in the same component, as
+	// (source, edge) pairs
+
+	std::vector<int> numCutEdges(_labels.size(), 0);
+	std::vector<int> cutEdges;
+
+	for (Crag::CragEdge e : _crag.edges()) {
+
+		if (solution.selected(e))
+			continue;
+
+		int u = _u[_crag.id(e)];
+		int v = _v[_crag.id(e)];
+
+		if (_labels[u] == -1 || _labels[u] != _labels[v])
+			continue;
+
+		cutEdges.push_back(_crag.id(e));
+		numCutEdges[u]++;
+		numCutEdges[v]++;
+	}
+
+	// use the node with more cut edges as the source, such that one search
+	// serves as many cut edges as possible
+	std::vector<std::pair<int, int>> sourceEdges;
+	sourceEdges.reserve(cutEdges.size());
+	for (int e : cutEdges) {
+
+		int u = _u[e];
+		int v = _v[e];
+
+		sourceEdges.push_back(std::make_pair(numCutEdges[v] > numCutEdges[u] ? v : u, e));
+	}
+	std::sort(sourceEdges.begin(), sourceEdges.end());
+
+	std::vector<Cycle> cycles;
+	cycles.reserve(sourceEdges.size());
+
+	std::vector<int> sourceCutEdges;
+	for (unsigned int i = 0; i < sourceEdges.size(); i++) {
+
+		sourceCutEdges.push_back(sourceEdges[i].second);
+
+		if (i + 1 < sourceEdges.size() && sourceEdges[i + 1].first == sourceEdges[i].first)
+			continue;
+
+		searchPaths(sourceEdges[i].first, sourceCutEdges, edgeValues, cycles);
+		sourceCutEdges.clear();
+	}
+
+	// most violated and shortest cycles first
+	std::sort(cycles.begin(), cycles.end(), [](const Cycle& a, const Cycle& b) {
+
+		if (a.violation != b.violation)
+			return a.violation > b.violation;
+		if (a.pathEdges.size() != b.pathEdges.size())
+			return a.pathEdges.size() < b.pathEdges.size();
+		return a.cutEdge < b.cutEdge;
+	});
+
+	_statistics.numViolatedCycles = cycles.size();
+	_statistics.seconds = std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+
+	return cycles;
+}
+
+void
+CycleSeparator::buildCutGraph(const CragSolution& solution) {
+
+	std::fill(_offsets.begin(), _offsets.end(), 0);
+
+	// count merged edges per node
+	for (Crag::CragEdge e : _crag.edges())
+		if (solution.selected(e)) {
+
+			_offsets[_u[_crag.id(e)] + 1]++;
+			_offsets[_v[_crag.id(e)] + 1]++;
+		}
+
+	for (unsigned int i = 1; i < _offsets.size(); i++)
+		_offsets[i] += _offsets[i - 1];
+
+	_neighbors.resize(_offsets.back());
+	_neighborEdges.resize(_offsets.back());
+
+	std::vector<int> next(_offsets.begin(), _offsets.end() - 1);
+
+	for (Crag::CragEdge e : _crag.edges())
+		if (solution.selected(e)) {
+
+			int id = _crag.id(e);
+			int u  = _u[id];
+			int v  = _v[id];
+
+			_neighbors[next[u]]     = v;
+			_neighborEdges[next[u]] = id;
+			next[u]++;
+
+			_neighbors[next[v]]     = u;
+			_neighborEdges[next[v]] = id;
+			next[v]++;
+		}
+}
+
+void
+CycleSeparator::findComponents(const CragSolution& solution) {
+
+	std::fill(_labels.begin(), _labels.end(), -1);
+
+	std::vector<int> queue;
+	queue.reserve(_labels.size());
+
+	int label = 0;
+	for (Crag::CragNode n : _crag.nodes()) {
+
+		int id = _crag.id(n);
+		if (_labels[id] != -1 || !solution.selected(n))
+			continue;
+
+		queue.clear();
+		queue.push_back(id);
+		_labels[id] = label;
+
+		for (unsigned int i = 0; i < queue.size(); i++) {
+
+			int cur = queue[i];
+			for (int j = _offsets[cur]; j < _offsets[cur + 1]; j++)
+				if (_labels[_neighbors[j]] == -1) {
+
+					_labels[_neighbors[j]] = label;
+					queue.push_back(_neighbors[j]);
+				}
+		}
+
+		label++;
+	}
+
+	_statistics.numComponents = label;
+}
+
+void
+CycleSeparator::searchPaths(
+		int                        source,
+		const std::vector<int>&    cutEdges,
+		const std::vector<double>& edgeValues,
+		std::vector<Cycle>&        cycles) {
+
+	_currentSearch++;
+	_statistics.numSearches++;
+
+	// mark the targets we are looking for
+	std::vector<int> targets;
+	for (int e : cutEdges)
+		targets.push_back(_u[e] == source ? _v[e] : _u[e]);
+	std::sort(targets.begin(), targets.end());
+	targets.erase(std::unique(targets.begin(), targets.end()), targets.end());
+
+	unsigned int numTargetsFound = 0;
+
+	// breadth-first search from source until all targets are found
+	std::deque<int> queue;
+	queue.push_back(source);
+	_visited[source]  = _currentSearch;
+	_predEdge[source] = -1;
+
+	while (!queue.empty() && numTargetsFound < targets.size()) {
+
+		int cur = queue.front();
+		queue.pop_front();
+
+		for (int j = _offsets[cur]; j < _offsets[cur + 1]; j++) {
+
+			int neighbor = _neighbors[j];
+			if (_visited[neighbor] == _currentSearch)
+				continue;
+
+			_visited[neighbor]  = _currentSearch;
+			_predEdge[neighbor] = _neighborEdges[j];
+			queue.push_back(neighbor);
+
+			if (std::binary_search(targets.begin(), targets.end(), neighbor))
+				numTargetsFound++;
+		}
+	}
+
+	for (int e : cutEdges) {
+
+		int target = (_u[e] == source ? _v[e] : _u[e]);
+
+		if (_visited[target] != _currentSearch) {
+
+			LOG_ERROR(cycleseparatorlog)
+					<< "could not find a path for cut edge " << e
+					<< std::endl;
+			continue;
+		}
+
+		Cycle cycle;
+		cycle.cutEdge = e;
+
+		// walk back along the shortest path from target to source
+		double pathValue = 0;
+		int cur = target;
+		while (cur != source) {
+
+			int pathEdge = _predEdge[cur];
+			cycle.pathEdges.push_back(pathEdge);
+			pathValue += edgeValues[pathEdge];
+			cur = (_u[pathEdge] == cur ? _v[pathEdge] : _u[pathEdge]);
+		}
+
+		// Σ_path x_p - x_e <= |path| - 1
+		cycle.violation = pathValue - edgeValues[e] - (cycle.pathEdges.size() - 1.0);
+
+		cycles.push_back(cycle);
+	}
+}
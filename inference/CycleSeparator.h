@@ -0,0 +1,121 @@
+#ifndef CANDIDATE_MC_INFERENCE_CYCLE_SEPARATOR_H__
+#define CANDIDATE_MC_INFERENCE_CYCLE_SEPARATOR_H__
+
+#include <vector>
+#include <crag/Crag.h>
+#include "CragSolution.h"
+
+/**
+ * Finds violated cycle constraints of a multi-cut solution. A cycle constraint
+ * is violated, if an adjacency edge is cut, but its incident nodes are
+ * connected via a path of merged edges.
+ *
+ * The cut graph (the graph of merged edges) is stored as an adjacency array
+ * that maps directly to CRAG edge ids. For all cut edges sharing the same
+ * source node, a single breadth-first search is performed, which gives the
+ * shortest paths to all their targets at once.
+ */
+class CycleSeparator {
+
+public:
+
+	/**
+	 * A violated cycle, consisting of a cut edge and a path of merged edges
+	 * connecting the nodes of the cut edge.
+	 */
+	struct Cycle {
+
+		// the id of the cut edge
+		int cutEdge;
+
+		// the ids of the merged edges along the path
+		std::vector<int> pathEdges;
+
+		// the amount by which the cycle constraint is violated
+		double violation;
+	};
+
+	/**
+	 * Statistics about the last call to findViolatedCycles().
+	 */
+	struct Statistics {
+
+		Statistics() :
+			numComponents(0),
+			numSearches(0),
+			numViolatedCycles(0),
+			seconds(0) {}
+
+		int numComponents;
+		int numSearches;
+		int numViolatedCycles;
+		double seconds;
+	};
+
+	CycleSeparator(const Crag& crag);
+
+	/**
+	 * Find all violated cycles in the given solution. Cycles are sorted by
+	 * decreasing violation and, for the same violation, by increasing length.
+	 *
+	 * @param solution
+	 *              The current solution, selected edges are considered merged.
+	 *
+	 * @param edgeValues
+	 *              The values of the edge variables in the current solution,
+	 *              indexed by CRAG edge id. Used to compute the violation of
+	 *              each cycle.
+	 */
+	std::vector<Cycle> findViolatedCycles(
+			const CragSolution&        solution,
+			const std::vector<double>& edgeValues);
+
+	/**
+	 * Get the connected component label of a node as found in the last call to
+	 * findViolatedCycles(). Nodes that are not selected are labelled with -1.
+	 */
+	int label(Crag::CragNode n) const { return _labels[_crag.id(n)]; }
+
+	/**
+	 * Get statistics about the last call to findViolatedCycles().
+	 */
+	const Statistics& getStatistics() const { return _statistics; }
+
+private:
+
+	void buildCutGraph(const CragSolution& solution);
+
+	void findComponents(const CragSolution& solution);
+
+	void searchPaths(
+			int                        source,
+			const std::vector<int>&    cutEdges,
+			const std::vector<double>& edgeValues,
+			std::vector<Cycle>&        cycles);
+
+	const Crag& _crag;
+
+	// incident nodes of each edge, indexed by edge id
+	std::vector<int> _u;
+	std::vector<int> _v;
+
+	// the cut graph as adjacency array: the merged neighbors of node i are
+	// _neighbors[_offsets[i]] to _neighbors[_offsets[i+1]-1], the
+	// corresponding CRAG edge ids are in _neighborEdges
+	std::vector<int> _offsets;
+	std::vector<int> _neighbors;
+	std::vector<int> _neighborEdges;
+
+	// component labels of nodes, indexed by node id
+	std::vector<int> _labels;
+
+	// BFS state, indexed by node id
+	std::vector<int> _predEdge;
+	std::vector<int> _visited;
+	int              _currentSearch;
+
+	Statistics _statistics;
+};
+
+#endif // CANDIDATE_MC_INFERENCE_CYCLE_SEPARATOR_H__
+
@@ -0,0 +1,258 @@
+#include <algorithm>
+#include <atomic>
+#include <chrono>
+#include <exception>
+#include <mutex>
+#include <numeric>
+#include <thread>
+#include <util/Logger.h>
+#include "DecomposingMultiCutSolver.h"
+#include "MultiCutSolver.h"
+
+logger::LogChannel decomposingmulticutlog("decomposingmulticutlog", "[DecomposingMultiCutSolver] ");
+
+DecomposingMultiCutSolver::DecomposingMultiCutSolver(
+		const Crag&       crag,
+		const Parameters& parameters,
+		int               numThreads) :
+	_crag(crag),
+	_parameters(parameters),
+	_numThreads(numThreads),
+	_value(0) {
+
+	_nodeCosts.resize(_crag.getAdjacencyGraph().maxNodeId() + 1, 0);
+	_edgeCosts.resize(_crag.getAdjacencyGraph().maxEdgeId() + 1, 0);
+}
+
+void
+DecomposingMultiCutSolver::setCosts(const Costs& costs) {
+
+	for (Crag::CragNode n : _crag.nodes())
+		_nodeCosts[_crag.id(n)] = costs.node[n];
+	for (Crag::CragEdge e : _crag.edges())
+		_edgeCosts[_crag.id(e)] = costs.edge[e];
+}
+
+DecomposingMultiCutSolver::Status
+DecomposingMultiCutSolver::solve(CragSolution& solution) {
+
+	auto start = std::chrono::steady_clock::now();
+
+	std::vector<Subproblem> subproblems;
+	findSubproblems(subproblems);
+
+	// solve the largest subproblems first, to balance the load between threads
+	std::vector<std::size_t> order(subproblems.size());
+	std::iota(order.begin(), order.end(), 0);
+	std::sort(order.begin(), order.end(), [&](std::size_t a, std::size_t b) {
+
+		return subproblems[a].nodeIds.size() > subproblems[b].nodeIds.size();
+	});
+
+	int numThreads = _numThreads;
+	if (numThreads <= 0)
+		numThreads = std::max(1u, std::thread::hardware_concurrency());
+	numThreads = std::min(numThreads, static_cast<int>(subproblems.size()));
+
+	LOG_USER(decomposingmulticutlog)
+			<< "solving " << subproblems.size()
+			<< " subproblems (largest with "
+			<< (subproblems.size() > 0 ? subproblems[order[0]].nodeIds.size() : 0)
+			<< " candidates) with " << numThreads << " threads" << std::endl;
+
+	std::atomic<std::size_t> next(0);
+	std::exception_ptr       error;
+	std::mutex               errorMutex;
+
+	auto worker = [&]() {
+
+		for (std::size_t i = next++; i < order.size(); i = next++) {
+
+			try {
+
+				solveSubproblem(subproblems[order[i]]);
+
+			} catch (...) {
+
+				std::lock_guard<std::mutex> lock(errorMutex);
+				if (!error)
+					error = std::current_exception();
+
+				// skip the remaining subproblems
+				next = order.size();
+			}
+		}
+	};
+
+	std::vector<std::thread> threads;
+	for (int i = 1; i < numThreads; i++)
+		threads.emplace_back(worker);
+	worker();
+	for (std::thread& thread : threads)
+		thread.join();
+
+	if (error)
+		std::rethrow_exception(error);
+
+	// stitch solutions, edges between subproblems are never merged
+
+	for (Crag::CragNode n : _crag.nodes())
+		solution.setSelected(n, false);
+	for (Crag::CragEdge e : _crag.edges())
+		solution.setSelected(e, false);
+
+	Status status = SolutionFound;
+	_value = 0;
+
+	for (const Subproblem& subproblem : subproblems) {
+
+		for (unsigned int i = 0; i < subproblem.nodeIds.size(); i++)
+			solution.setSelected(_crag.nodeFromId(subproblem.nodeIds[i]), subproblem.selectedNodes[i]);
+		for (unsigned int i = 0; i < subproblem.edgeIds.size(); i++)
+			if (subproblem.selectedEdges[i])
+				solution.setSelected(
+						Crag::CragEdge(_crag, _crag.getAdjacencyGraph().edgeFromId(subproblem.edgeIds[i])),
+						true);
+
+		_value += subproblem.value;
+
+		if (subproblem.status != SolutionFound)
+			status = subproblem.status;
+	}
+
+	LOG_USER(decomposingmulticutlog)
+			<< "found solution with value " << _value << " in "
+			<< std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count()
+			<< "s" << std::endl;
+
+	return status;
+}
+
+void
+DecomposingMultiCutSolver::findSubproblems(std::vector<Subproblem>& subproblems) {
+
+	// union-find over candidates, linked by subset arcs and profitable edges
+
+	std::vector<int> parents(_nodeCosts.size());
+	std::iota(parents.begin(), parents.end(), 0);
+
+	auto find = [&](int n) -> int {
+
+		while (parents[n] != n) {
+
+			parents[n] = parents[parents[n]];
+			n = parents[n];
+		}
+		return n;
+	};
+
+	auto join = [&](int u, int v) {
+
+		u = find(u);
+		v = find(v);
+		if (u != v)
+			parents[std::max(u, v)] = std::min(u, v);
+	};
+
+	for (Crag::CragArc a : _crag.arcs())
+		join(_crag.id(a.source()), _crag.id(a.target()));
+
+	for (Crag::CragEdge e : _crag.edges())
+		if (profitable(_edgeCosts[_crag.id(e)]))
+			join(_crag.id(e.u()), _crag.id(e.v()));
+
+	// create one CRAG per component
+
+	std::vector<int> subproblemIds(_nodeCosts.size(), -1);
+	std::vector<int> localIds(_nodeCosts.size(), -1);
+
+	for (Crag::CragNode n : _crag.nodes()) {
+
+		int root = find(_crag.id(n));
+
+		if (subproblemIds[root] == -1) {
+
+			subproblemIds[root] = subproblems.size();
+			subproblems.emplace_back();
+			subproblems.back().crag.reset(new Crag());
+		}
+
+		Subproblem& subproblem = subproblems[subproblemIds[root]];
+
+		Crag::CragNode local = subproblem.crag->addNode(_crag.type(n));
+		localIds[_crag.id(n)] = subproblem.crag->id(local);
+
+		subproblem.nodeIds.resize(subproblem.crag->id(local) + 1, -1);
+		subproblem.nodeIds[subproblem.crag->id(local)] = _crag.id(n);
+	}
+
+	for (Crag::CragArc a : _crag.arcs()) {
+
+		Subproblem& subproblem = subproblems[subproblemIds[find(_crag.id(a.source()))]];
+
+		subproblem.crag->addSubsetArc(
+				subproblem.crag->nodeFromId(localIds[_crag.id(a.source())]),
+				subproblem.crag->nodeFromId(localIds[_crag.id(a.target())]));
+	}
+
+	// all edges within a component are part of the subproblem, independent of
+	// their costs
+	for (Crag::CragEdge e : _crag.edges()) {
+
+		int u = _crag.id(e.u());
+		int v = _crag.id(e.v());
+
+		if (find(u) != find(v))
+			continue;
+
+		Subproblem& subproblem = subproblems[subproblemIds[find(u)]];
+
+		Crag::CragEdge local = subproblem.crag->addAdjacencyEdge(
+				subproblem.crag->nodeFromId(localIds[u]),
+				subproblem.crag->nodeFromId(localIds[v]),
+				_crag.type(e));
+
+		subproblem.edgeIds.resize(subproblem.crag->id(local) + 1, -1);
+		subproblem.edgeIds[subproblem.crag->id(local)] = _crag.id(e);
+	}
+}
+
+void
+DecomposingMultiCutSolver::solveSubproblem(Subproblem& subproblem) {
+
+	const Crag& crag = *subproblem.crag;
+
+	subproblem.selectedNodes.resize(subproblem.nodeIds.size(), 0);
+	subproblem.selectedEdges.resize(subproblem.edgeIds.size(), 0);
+
+	// a single candidate, no need for an ILP
+	if (subproblem.nodeIds.size() == 1) {
+
+		double cost = _nodeCosts[subproblem.nodeIds[0]];
+		bool   forced = (_parameters.forceExplanation && !_parameters.noConstraints);
+
+		subproblem.selectedNodes[0] = (forced || profitable(cost));
+		subproblem.value  = (subproblem.selectedNodes[0] ? cost : 0);
+		subproblem.status = SolutionFound;
+
+		return;
+	}
+
+	Costs costs(crag);
+	for (Crag::CragNode n : crag.nodes())
+		costs.node[n] = _nodeCosts[subproblem.nodeIds[crag.id(n)]];
+	for (Crag::CragEdge e : crag.edges())
+		costs.edge[e] = _edgeCosts[subproblem.edgeIds[crag.id(e)]];
+
+	MultiCutSolver solver(crag, _parameters);
+	solver.setCosts(costs);
+
+	CragSolution solution(crag);
+	subproblem.status = solver.solve(solution);
+	subproblem.value  = solver.getValue();
+
+	for (Crag::CragNode n : crag.nodes())
+		subproblem.selectedNodes[crag.id(n)] = solution.selected(n);
+	for (Crag::CragEdge e : crag.edges())
+		subproblem.selectedEdges[crag.id(e)] = solution.selected(e);
+}
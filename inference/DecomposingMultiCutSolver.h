@@ -0,0 +1,89 @@
+#ifndef CANDIDATE_MC_INFERENCE_DECOMPOSING_MULTI_CUT_SOLVER_H__
+#define CANDIDATE_MC_INFERENCE_DECOMPOSING_MULTI_CUT_SOLVER_H__
+
+#include <memory>
+#include <vector>
+#include <crag/Crag.h>
+#include "Costs.h"
+#include "CragSolver.h"
+
+/**
+ * A multi-cut solver that splits the problem into independent subproblems and
+ * solves them concurrently with one MultiCutSolver each.
+ *
+ * Subproblems are the connected components of the CRAG, where two candidates
+ * are connected if they are linked by a subset arc or by an adjacency edge
+ * with a profitable cost (negative for minimization, positive for
+ * maximization). Adjacency edges between subproblems are never merged in an
+ * optimal solution, so solving the subproblems separately gives an optimal
+ * solution of the whole problem.
+ */
+class DecomposingMultiCutSolver : public CragSolver {
+
+public:
+
+	/**
+	 * Create a new decomposing solver.
+	 *
+	 * @param numThreads
+	 *              The number of subproblems to solve concurrently. If 0, the
+	 *              number of hardware threads is used.
+	 */
+	DecomposingMultiCutSolver(
+			const Crag&       crag,
+			const Parameters& parameters = Parameters(),
+			int               numThreads = 0);
+
+	/**
+	 * Set the costs (or reward, if negative) of accepting a node or an edge.
+	 */
+	void setCosts(const Costs& costs) override;
+
+	Status solve(CragSolution& solution) override;
+
+	/**
+	 * Get the value of the current solution, i.e., the sum of the values of
+	 * all subproblems.
+	 */
+	double getValue() override { return _value; }
+
+private:
+
+	struct Subproblem {
+
+		std::unique_ptr<Crag> crag;
+
+		// ids of the nodes and edges in the original CRAG, in the order of
+		// their creation in crag
+		std::vector<int> nodeIds;
+		std::vector<int> edgeIds;
+
+		// the solution, in the same order
+		std::vector<char> selectedNodes;
+		std::vector<char> selectedEdges;
+
+		double value;
+		Status status;
+	};
+
+	void findSubproblems(std::vector<Subproblem>& subproblems);
+
+	void solveSubproblem(Subproblem& subproblem);
+
+	inline bool profitable(double cost) const { return (_parameters.minimize ? cost < 0 : cost > 0); }
+
+	const Crag& _crag;
+
+	Parameters _parameters;
+
+	int _numThreads;
+
+	// costs by node and edge id
+	std::vector<double> _nodeCosts;
+	std::vector<double> _edgeCosts;
+
+	double _value;
+};
+
+#endif // CANDIDATE_MC_INFERENCE_DECOMPOSING_MULTI_CUT_SOLVER_H__
+
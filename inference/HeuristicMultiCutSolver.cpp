@@ -0,0 +1,632 @@
+#include <algorithm>
+#include <chrono>
+#include <functional>
+#include <limits>
+#include <queue>
+#include <util/Logger.h>
+#include "HeuristicMultiCutSolver.h"
+
+logger::LogChannel heuristicmulticutlog("heuristicmulticutlog", "[HeuristicMultiCutSolver] ");
+
+// changes of the objective smaller than this are not considered improvements
+static const double Epsilon = 1e-9;
+
+// the number of consecutive moves without improvement after which a
+// Kernighan-Lin pass is stopped
+static const int MaxNonImprovingMoves = 100;
+
+HeuristicMultiCutSolver::HeuristicMultiCutSolver(const Crag& crag, const Parameters& parameters) :
+	_crag(crag),
+	_parameters(parameters),
+	_nextCluster(0),
+	_value(0) {
+
+	int numNodeIds = _crag.getAdjacencyGraph().maxNodeId() + 1;
+	int numEdgeIds = _crag.getAdjacencyGraph().maxEdgeId() + 1;
+
+	_nodeCosts.resize(numNodeIds, 0);
+	_edgeCosts.resize(numEdgeIds, 0);
+	_u.resize(numEdgeIds, -1);
+	_v.resize(numEdgeIds, -1);
+	_incEdges.resize(numNodeIds);
+	_parent.resize(numNodeIds, -1);
+	_children.resize(numNodeIds);
+	_selected.resize(numNodeIds, 0);
+	_cluster.resize(numNodeIds, -1);
+
+	for (Crag::CragNode n : _crag.nodes())
+		_nodes.push_back(_crag.id(n));
+
+	for (Crag::CragEdge e : _crag.edges()) {
+
+		int id = _crag.id(e);
+
+		_edges.push_back(id);
+		_u[id] = _crag.id(e.u());
+		_v[id] = _crag.id(e.v());
+		_incEdges[_u[id]].push_back(id);
+		_incEdges[_v[id]].push_back(id);
+	}
+
+	for (Crag::CragArc a : _crag.arcs()) {
+
+		int child  = _crag.id(a.source());
+		int parent = _crag.id(a.target());
+
+		_parent[child] = parent;
+		_children[parent].push_back(child);
+	}
+
+	// find post-order of non-leaf nodes
+	std::vector<std::pair<int, unsigned int>> stack;
+	for (int root : _nodes) {
+
+		if (_parent[root] != -1)
+			continue;
+
+		stack.push_back(std::make_pair(root, 0));
+		while (!stack.empty()) {
+
+			int n = stack.back().first;
+			unsigned int& nextChild = stack.back().second;
+
+			if (nextChild < _children[n].size()) {
+
+				int child = _children[n][nextChild];
+				nextChild++;
+				stack.push_back(std::make_pair(child, 0));
+
+			} else {
+
+				if (!_children[n].empty())
+					_postOrder.push_back(n);
+				stack.pop_back();
+			}
+		}
+	}
+}
+
+void
+HeuristicMultiCutSolver::setCosts(const Costs& costs) {
+
+	double sign = (_parameters.minimize ? 1 : -1);
+
+	for (Crag::CragNode n : _crag.nodes())
+		_nodeCosts[_crag.id(n)] = sign*costs.node[n];
+
+	for (Crag::CragEdge e : _crag.edges())
+		if (_crag.type(e) == Crag::SeparationEdge)
+			_edgeCosts[_crag.id(e)] = std::numeric_limits<double>::infinity();
+		else
+			_edgeCosts[_crag.id(e)] = sign*costs.edge[e];
+}
+
+HeuristicMultiCutSolver::Status
+HeuristicMultiCutSolver::solve(CragSolution& solution) {
+
+	auto start = std::chrono::steady_clock::now();
+
+	initialize();
+	greedyAdditiveEdgeContraction();
+
+	_value = computeValue();
+
+	LOG_USER(heuristicmulticutlog)
+			<< "value after edge contraction is "
+			<< getValue() << std::endl;
+
+	Status status = MaxIterationsReached;
+
+	for (int i = 0; i < _parameters.numIterations; i++) {
+
+		bool changed = false;
+
+		if (contractHierarchy())
+			changed = true;
+		if (splitHierarchy())
+			changed = true;
+		if (kernighanLinPass())
+			changed = true;
+		if (!_parameters.forceExplanation && rejectAndAcceptNodes())
+			changed = true;
+
+		// avoid accumulation of rounding errors
+		_value = computeValue();
+
+		LOG_DEBUG(heuristicmulticutlog)
+				<< "value after refinement round " << i
+				<< " is " << getValue() << std::endl;
+
+		if (!changed) {
+
+			status = SolutionFound;
+			break;
+		}
+	}
+
+	if (status == MaxIterationsReached)
+		LOG_USER(heuristicmulticutlog) << "maximum number of iterations reached" << std::endl;
+
+	int numSelected = 0;
+	int numMerged = 0;
+
+	for (Crag::CragNode n : _crag.nodes()) {
+
+		solution.setSelected(n, _selected[_crag.id(n)]);
+		if (_selected[_crag.id(n)])
+			numSelected++;
+	}
+
+	for (Crag::CragEdge e : _crag.edges()) {
+
+		int id = _crag.id(e);
+		bool merged =
+				_selected[_u[id]] &&
+				_selected[_v[id]] &&
+				_cluster[_u[id]] == _cluster[_v[id]];
+
+		solution.setSelected(e, merged);
+		if (merged)
+			numMerged++;
+	}
+
+	LOG_USER(heuristicmulticutlog)
+			<< "found solution with value " << getValue()
+			<< " in " << std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count()
+			<< "s" << std::endl;
+	LOG_USER(heuristicmulticutlog)
+			<< numSelected << " candidates selected, "
+			<< numMerged << " adjacent candidates merged"
+			<< std::endl;
+
+	return status;
+}
+
+void
+HeuristicMultiCutSolver::initialize() {
+
+	// start with all leaf nodes selected, each in its own cluster
+
+	std::fill(_selected.begin(), _selected.end(), 0);
+	std::fill(_cluster.begin(), _cluster.end(), -1);
+	_nextCluster = 0;
+
+	for (int n : _nodes)
+		if (_children[n].empty()) {
+
+			_selected[n] = 1;
+			_cluster[n]  = _nextCluster++;
+		}
+}
+
+void
+HeuristicMultiCutSolver::greedyAdditiveEdgeContraction() {
+
+	// union-find on clusters
+	std::vector<int> parents(_nextCluster);
+	for (int i = 0; i < _nextCluster; i++)
+		parents[i] = i;
+
+	auto find = [&parents](int c) -> int {
+
+		int root = c;
+		while (parents[root] != root)
+			root = parents[root];
+		while (parents[c] != root) {
+
+			int next = parents[c];
+			parents[c] = root;
+			c = next;
+		}
+		return root;
+	};
+
+	// summed edge costs between clusters
+	std::vector<std::map<int, double>> adjacency(_nextCluster);
+
+	for (int e : _edges) {
+
+		if (!_selected[_u[e]] || !_selected[_v[e]])
+			continue;
+
+		int a = _cluster[_u[e]];
+		int b = _cluster[_v[e]];
+
+		adjacency[a][b] += _edgeCosts[e];
+		adjacency[b][a] += _edgeCosts[e];
+	}
+
+	typedef std::pair<double, std::pair<int, int>> Entry;
+	std::priority_queue<Entry, std::vector<Entry>, std::greater<Entry>> queue;
+
+	for (int a = 0; a < _nextCluster; a++)
+		for (auto& p : adjacency[a])
+			if (a < p.first && p.second < 0)
+				queue.push(Entry(p.second, std::make_pair(a, p.first)));
+
+	int numContractions = 0;
+
+	while (!queue.empty()) {
+
+		double costs = queue.top().first;
+		int a = queue.top().second.first;
+		int b = queue.top().second.second;
+		queue.pop();
+
+		// outdated entry?
+		if (find(a) != a || find(b) != b)
+			continue;
+		auto ab = adjacency[a].find(b);
+		if (ab == adjacency[a].end() || ab->second != costs)
+			continue;
+
+		// contract b into a, keeping the larger adjacency
+		if (adjacency[a].size() < adjacency[b].size())
+			std::swap(a, b);
+
+		parents[b] = a;
+		adjacency[a].erase(b);
+		adjacency[b].erase(a);
+
+		for (auto& p : adjacency[b]) {
+
+			int c = p.first;
+
+			adjacency[c].erase(b);
+
+			double& ac = adjacency[a][c];
+			ac += p.second;
+			adjacency[c][a] = ac;
+
+			if (ac < 0)
+				queue.push(Entry(ac, std::make_pair(std::min(a, c), std::max(a, c))));
+		}
+
+		adjacency[b].clear();
+		numContractions++;
+	}
+
+	for (int n : _nodes)
+		if (_selected[n])
+			_cluster[n] = find(_cluster[n]);
+
+	LOG_DEBUG(heuristicmulticutlog)
+			<< "performed " << numContractions
+			<< " edge contractions" << std::endl;
+}
+
+bool
+HeuristicMultiCutSolver::contractHierarchy() {
+
+	// bottom-up, try to replace the selected descendants of a node by the node
+	// itself
+
+	bool changed = false;
+	std::vector<int> descendants;
+	std::vector<int> oldClusters;
+
+	for (int p : _postOrder) {
+
+		if (_selected[p])
+			continue;
+
+		descendants.clear();
+		collectSelectedDescendants(p, descendants);
+
+		if (descendants.empty())
+			continue;
+
+		oldClusters.clear();
+		for (int d : descendants)
+			oldClusters.push_back(_cluster[d]);
+
+		double delta = 0;
+		for (int d : descendants)
+			delta += deselect(d);
+
+		double joinCosts;
+		int cluster = bestCluster(p, joinCosts);
+		delta += select(p, cluster);
+
+		if (delta < -Epsilon) {
+
+			changed = true;
+			continue;
+		}
+
+		// revert
+		deselect(p);
+		for (unsigned int i = 0; i < descendants.size(); i++)
+			select(descendants[i], oldClusters[i]);
+	}
+
+	return changed;
+}
+
+bool
+HeuristicMultiCutSolver::splitHierarchy() {
+
+	// top-down, try to replace selected nodes by their children
+
+	bool changed = false;
+
+	for (auto i = _postOrder.rbegin(); i != _postOrder.rend(); i++) {
+
+		int p = *i;
+
+		if (!_selected[p])
+			continue;
+
+		int oldCluster = _cluster[p];
+
+		double delta = deselect(p);
+		for (int c : _children[p]) {
+
+			double joinCosts;
+			int cluster = bestCluster(c, joinCosts);
+			delta += select(c, cluster);
+		}
+
+		if (delta < -Epsilon) {
+
+			changed = true;
+			continue;
+		}
+
+		// revert
+		for (int c : _children[p])
+			deselect(c);
+		select(p, oldCluster);
+	}
+
+	return changed;
+}
+
+bool
+HeuristicMultiCutSolver::kernighanLinPass() {
+
+	// Move each selected node once to the cluster that decreases the objective
+	// the most (or increases it the least). Keep the sequence of moves that
+	// led to the lowest objective, revert all later moves.
+
+	std::vector<Move> moves;
+	std::vector<char> moved(_selected.size(), 0);
+
+	double cumulativeDelta = 0;
+	double bestDelta       = 0;
+	unsigned int bestNumMoves = 0;
+	int numNonImprovingMoves  = 0;
+
+	std::map<int, double> costs;
+
+	for (int n : _nodes) {
+
+		if (!_selected[n] || moved[n])
+			continue;
+
+		costs.clear();
+		clusterCosts(n, costs);
+
+		int current = _cluster[n];
+		auto currentCosts = costs.find(current);
+
+		// n can be split from its current cluster, if it has neighbors in it
+		int    target      = -1;
+		double targetCosts = std::numeric_limits<double>::infinity();
+		if (currentCosts != costs.end()) {
+
+			target      = _nextCluster;
+			targetCosts = 0;
+		}
+
+		for (auto& p : costs)
+			if (p.first != current && p.second < targetCosts) {
+
+				target      = p.first;
+				targetCosts = p.second;
+			}
+
+		if (target == -1)
+			continue;
+
+		if (target == _nextCluster)
+			_nextCluster++;
+
+		cumulativeDelta += move(n, target);
+		moved[n] = 1;
+
+		Move m;
+		m.node        = n;
+		m.fromCluster = current;
+		moves.push_back(m);
+
+		if (cumulativeDelta < bestDelta - Epsilon) {
+
+			bestDelta    = cumulativeDelta;
+			bestNumMoves = moves.size();
+			numNonImprovingMoves = 0;
+
+		} else if (++numNonImprovingMoves >= MaxNonImprovingMoves) {
+
+			break;
+		}
+	}
+
+	while (moves.size() > bestNumMoves) {
+
+		move(moves.back().node, moves.back().fromCluster);
+		moves.pop_back();
+	}
+
+	LOG_DEBUG(heuristicmulticutlog)
+			<< "Kernighan-Lin pass kept " << bestNumMoves
+			<< " moves, objective changed by " << bestDelta
+			<< std::endl;
+
+	return bestNumMoves > 0;
+}
+
+bool
+HeuristicMultiCutSolver::rejectAndAcceptNodes() {
+
+	bool changed = false;
+
+	for (int n : _nodes) {
+
+		if (_selected[n]) {
+
+			int oldCluster = _cluster[n];
+
+			if (deselect(n) < -Epsilon)
+				changed = true;
+			else
+				select(n, oldCluster);
+
+		} else if (!hasSelectedRelative(n)) {
+
+			double joinCosts;
+			int cluster = bestCluster(n, joinCosts);
+
+			if (_nodeCosts[n] + joinCosts < -Epsilon) {
+
+				select(n, cluster);
+				changed = true;
+			}
+		}
+	}
+
+	return changed;
+}
+
+void
+HeuristicMultiCutSolver::collectSelectedDescendants(int n, std::vector<int>& descendants) {
+
+	for (int c : _children[n])
+		if (_selected[c])
+			descendants.push_back(c);
+		else
+			collectSelectedDescendants(c, descendants);
+}
+
+bool
+HeuristicMultiCutSolver::hasSelectedRelative(int n) {
+
+	for (int a = _parent[n]; a != -1; a = _parent[a])
+		if (_selected[a])
+			return true;
+
+	std::vector<int> descendants;
+	collectSelectedDescendants(n, descendants);
+
+	return !descendants.empty();
+}
+
+void
+HeuristicMultiCutSolver::clusterCosts(int n, std::map<int, double>& costs) {
+
+	for (int e : _incEdges[n]) {
+
+		int m = opposite(e, n);
+		if (_selected[m])
+			costs[_cluster[m]] += _edgeCosts[e];
+	}
+}
+
+int
+HeuristicMultiCutSolver::bestCluster(int n, double& costs) {
+
+	std::map<int, double> clusters;
+	clusterCosts(n, clusters);
+
+	// a new cluster, by default
+	int cluster = _nextCluster;
+	costs = 0;
+
+	for (auto& p : clusters)
+		if (p.second < costs) {
+
+			cluster = p.first;
+			costs   = p.second;
+		}
+
+	if (cluster == _nextCluster)
+		_nextCluster++;
+
+	return cluster;
+}
+
+double
+HeuristicMultiCutSolver::select(int n, int cluster) {
+
+	double delta = _nodeCosts[n];
+
+	for (int e : _incEdges[n]) {
+
+		int m = opposite(e, n);
+		if (_selected[m] && _cluster[m] == cluster)
+			delta += _edgeCosts[e];
+	}
+
+	_selected[n] = 1;
+	_cluster[n]  = cluster;
+	_value += delta;
+
+	return delta;
+}
+
+double
+HeuristicMultiCutSolver::deselect(int n) {
+
+	double delta = -_nodeCosts[n];
+
+	for (int e : _incEdges[n]) {
+
+		int m = opposite(e, n);
+		if (_selected[m] && _cluster[m] == _cluster[n])
+			delta -= _edgeCosts[e];
+	}
+
+	_selected[n] = 0;
+	_value += delta;
+
+	return delta;
+}
+
+double
+HeuristicMultiCutSolver::move(int n, int cluster) {
+
+	double delta = 0;
+
+	for (int e : _incEdges[n]) {
+
+		int m = opposite(e, n);
+		if (!_selected[m])
+			continue;
+
+		if (_cluster[m] == cluster)
+			delta += _edgeCosts[e];
+		if (_cluster[m] == _cluster[n])
+			delta -= _edgeCosts[e];
+	}
+
+	_cluster[n] = cluster;
+	_value += delta;
+
+	return delta;
+}
+
+double
+HeuristicMultiCutSolver::computeValue() {
+
+	double value = 0;
+
+	for (int n : _nodes)
+		if (_selected[n])
+			value += _nodeCosts[n];
+
+	for (int e : _edges)
+		if (_selected[_u[e]] && _selected[_v[e]] && _cluster[_u[e]] == _cluster[_v[e]])
+			value += _edgeCosts[e];
+
+	return value;
+}
@@ -0,0 +1,137 @@
+#ifndef CANDIDATE_MC_INFERENCE_HEURISTIC_MULTI_CUT_SOLVER_H__
+#define CANDIDATE_MC_INFERENCE_HEURISTIC_MULTI_CUT_SOLVER_H__
+
+#include <map>
+#include <vector>
+#include <crag/Crag.h>
+#include "Costs.h"
+#include "CragSolver.h"
+
+/**
+ * A solver for the candidate multi-cut problem that does not need an ILP
+ * backend. The solution is found with greedy additive edge contraction (GAEC)
+ * on the leaf candidates, followed by a greedy contraction of the candidate
+ * hierarchy and Kernighan-Lin refinement.
+ *
+ * The solution respects the same constraints as the MultiCutSolver: at most
+ * one candidate (exactly one, if forceExplanation is set) is selected on each
+ * root-to-leaf path of the subset tree, only edges between selected
+ * candidates are merged, and merged edges are consistent with the connected
+ * components of the solution. Candidates linked by a SeparationEdge are never
+ * merged.
+ *
+ * The solution is not guaranteed to be optimal. Parameter numIterations
+ * limits the number of refinement rounds.
+ */
+class HeuristicMultiCutSolver : public CragSolver {
+
+public:
+
+	HeuristicMultiCutSolver(const Crag& crag, const Parameters& parameters = Parameters());
+
+	/**
+	 * Set the costs (or reward, if negative) of accepting a node or an edge.
+	 */
+	void setCosts(const Costs& costs) override;
+
+	Status solve(CragSolution& solution) override;
+
+	/**
+	 * Get the value of the current solution.
+	 */
+	double getValue() override { return (_parameters.minimize ? _value : -_value); }
+
+private:
+
+	// an entry of the move log of a Kernighan-Lin pass
+	struct Move {
+
+		int node;
+		int fromCluster;
+	};
+
+	void initialize();
+
+	void greedyAdditiveEdgeContraction();
+
+	bool contractHierarchy();
+
+	bool splitHierarchy();
+
+	bool kernighanLinPass();
+
+	bool rejectAndAcceptNodes();
+
+	void collectSelectedDescendants(int n, std::vector<int>& descendants);
+
+	bool hasSelectedRelative(int n);
+
+	/**
+	 * Get the sum of costs of edges linking n to selected nodes, per cluster.
+	 */
+	void clusterCosts(int n, std::map<int, double>& costs);
+
+	/**
+	 * Find the cluster for n that minimizes the costs of merged edges. Returns
+	 * a new cluster, if this is cheapest. The costs of joining the cluster are
+	 * stored in costs.
+	 */
+	int bestCluster(int n, double& costs);
+
+	/**
+	 * Select n as part of the given cluster, returns the change of the
+	 * objective.
+	 */
+	double select(int n, int cluster);
+
+	/**
+	 * Deselect n, returns the change of the objective.
+	 */
+	double deselect(int n);
+
+	/**
+	 * Move a selected node to another cluster, returns the change of the
+	 * objective.
+	 */
+	double move(int n, int cluster);
+
+	double computeValue();
+
+	inline int opposite(int e, int n) const { return (_u[e] == n ? _v[e] : _u[e]); }
+
+	const Crag& _crag;
+
+	Parameters _parameters;
+
+	// the valid node and edge ids
+	std::vector<int> _nodes;
+	std::vector<int> _edges;
+
+	// costs by node and edge id, negated for maximization
+	std::vector<double> _nodeCosts;
+	std::vector<double> _edgeCosts;
+
+	// incident nodes by edge id
+	std::vector<int> _u;
+	std::vector<int> _v;
+
+	// incident edges by node id
+	std::vector<std::vector<int>> _incEdges;
+
+	// the subset tree by node id
+	std::vector<int>              _parent;
+	std::vector<std::vector<int>> _children;
+
+	// non-leaf nodes, children before parents
+	std::vector<int> _postOrder;
+
+	// current solution by node id
+	std::vector<char> _selected;
+	std::vector<int>  _cluster;
+	int               _nextCluster;
+
+	double _value;
+};
+
+#endif // CANDIDATE_MC_INFERENCE_HEURISTIC_MULTI_CUT_SOLVER_H__
+
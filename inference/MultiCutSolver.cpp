@@ -1,6 +1,5 @@
+#include <chrono>
 #include <boost/filesystem.hpp>
-#include <lemon/dijkstra.h>
-#include <lemon/connectivity.h>
 #include <solver/SolverFactory.h>
 #include <util/Logger.h>
 #include <util/ProgramOptions.h>
@@ -24,14 +23,19 @@ util::ProgramOption optionDismissPositiveCosts(
 		util::_description_text = "If set, the costs of non-leaf nodes and non-leaf edges that are positive "
 								  "will be set to inf.");
 
-MultiCutSolver::MultiCutSolver(const Crag& crag, const Parameters& parameters) :
+MultiCutSolver::MultiCutSolver(
+		const Crag&          crag,
+		const Parameters&    parameters,
+		CycleConstraintPool* cyclePool) :
 	_crag(crag),
 	_numNodes(0),
 	_numEdges(0),
 	_solver(0),
 	_parameters(parameters),
 	_numPositiveCostPinConstraints(0),
-	_labels(crag) {
+	_labels(crag),
+	_separator(crag),
+	_cyclePool(cyclePool ? cyclePool : &_ownCyclePool) {
 
 	_numNodes = _crag.nodes().size();
 	_numEdges = _crag.edges().size();
@@ -114,6 +118,15 @@ MultiCutSolver::solve(CragSolution& solution) {
 
 	_solver->setObjective(_objective);
 
+	if (!_parameters.noConstraints) {
+
+		// a shared pool is advanced by its owner, who knows which solves
+		// belong to the same round
+		if (_cyclePool == &_ownCyclePool)
+			_cyclePool->nextRound();
+		addPooledCycleConstraints();
+	}
+
 	for (unsigned int i = 0; i < _parameters.numIterations; i++) {
 
 		LOG_USER(multicutlog)
@@ -180,6 +193,9 @@ MultiCutSolver::setVariables() {
 	// node ids match 1:1 with variable numbers
 	unsigned int nextVar = _numNodes;
 
+	_edgeIdToVarMap.resize(_crag.getAdjacencyGraph().maxEdgeId() + 1);
+	_edgeValues.resize(_crag.getAdjacencyGraph().maxEdgeId() + 1);
+
 	// adjacency edges are mapped in order of appearance
 	for (Crag::CragEdge e : _crag.edges()) {
 
@@ -365,8 +381,24 @@ MultiCutSolver::findCut(CragSolution& solution) {
 	LOG_USER(multicutlog) << "searching for cut..." << std::endl;
 
 	// re-set constraints to inform solver about potential changes
-	_solver->setConstraints(_constraints);
+	LinearConstraints constraints(_constraints.size() + _cycleConstraints.size());
+	constraints.addAll(_constraints);
+	constraints.addAll(_cycleConstraints);
+	_solver->setConstraints(constraints);
+
+	// warm-start from the previous solution, if there is one and it is still 
+	// feasible (the pin constraints of new costs and the repair after adding 
+	// cycle constraints can invalidate it)
+	if (_initialSolution.size() == _numNodes + _numEdges) {
+
+		if (_constraints.isSatisfied(_initialSolution) && _cycleConstraints.isSatisfied(_initialSolution))
+			_solver->setInitialSolution(_initialSolution);
+		else
+			LOG_DEBUG(multicutlog) << "previous solution is infeasible, not using it as a MIP start" << std::endl;
+	}
+
 	std::string msg;
+	auto start = std::chrono::steady_clock::now();
 	if (!_solver->solve(_solution, msg)) {
 
 		LOG_ERROR(multicutlog) << "solver did not find optimal solution: " << msg << std::endl;
@@ -376,6 +408,19 @@ MultiCutSolver::findCut(CragSolution& solution) {
 		LOG_DEBUG(multicutlog) << "solver returned solution with message: " << msg << std::endl;
 	}
 
+	LOG_USER(multicutlog)
+			<< "solved ILP in "
+			<< std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count()
+			<< "s, first incumbent after "
+			<< _solver->getTimeToFirstIncumbent() << "s"
+			<< std::endl;
+
+	// candidate MIP start for the next iteration or call to solve(), rounded 
+	// to the binary values of the variables
+	_initialSolution = _solution;
+	for (unsigned int i = 0; i < _initialSolution.size(); i++)
+		_initialSolution[i] = (_initialSolution[i] > 0.5 ? 1.0 : 0.0);
+
 	// get selected candidates
 	for (Crag::CragNode n : _crag.nodes()) {
 
@@ -394,6 +439,7 @@ MultiCutSolver::findCut(CragSolution& solution) {
 	// get merged edges
 	for (Crag::CragEdge e : _crag.edges()) {
 
+		_edgeValues[_crag.id(e)] = _solution[edgeIdToVar(_crag.id(e))];
 		solution.setSelected(e, (_solution[edgeIdToVar(_crag.id(e))] > 0.5));
 
 		LOG_ALL(multicutlog)
@@ -407,146 +453,45 @@ MultiCutSolver::findCut(CragSolution& solution) {
 bool
 MultiCutSolver::findViolatedConstraints(CragSolution& solution) {
 
-    int treePathConstraintAdded =0;
-    int constraintsAdded = 0;
+	int treePathConstraintAdded = 0;
+	int constraintsAdded = 0;
 
 	if (_parameters.noConstraints)
 		return false;
 
+	_cyclePool->updateActivity(_edgeValues);
 
+	if (optionLazyTreePathConstraints.as<bool>()) {
 
+		for (auto& c : _allTreePathConstraints) {
 
-	// Given the large number of adjacency edges, and that only a small subset 
-	// of them gets selected, it might be more efficient to create a new graph, 
-	// here, consisting only of the selected adjacency edges.
+			if (c.isViolated(_solution)) {
 
-	typedef lemon::ListGraph Cut;
-	Cut cutGraph;
-	for (unsigned int i = 0; i < _numNodes; i++)
-		cutGraph.addNode();
-
-	for (Crag::CragEdge e : _crag.edges())
-		if (solution.selected(e))
-			cutGraph.addEdge(_crag.u(e), _crag.v(e));
-
-	// find connected components in cut graph
-	lemon::connectedComponents(cutGraph, _labels);
-
-    if(optionLazyTreePathConstraints.as<bool>()){
-        for(auto & c : _allTreePathConstraints){
-            if(c.isViolated(_solution)){
-                _constraints.add(c);
-                ++treePathConstraintAdded;
-            }
-        }
-    }
-
-	// label rejected nodes with -1
-	for (Crag::CragNode n : _crag.nodes())
-		if (!solution.selected(n))
-			_labels[n] = -1;
+				_constraints.add(c);
+				++treePathConstraintAdded;
+			}
+		}
+	}
 
 	// for each not selected edge with nodes in the same connected component, 
-	// find the shortest path along connected nodes connecting them
-	for (Crag::CragEdge e : _crag.edges()) {
+	// find the shortest path along merged edges connecting them
+	std::vector<CycleSeparator::Cycle> cycles =
+			_separator.findViolatedCycles(solution, _edgeValues);
 
-		// not selected
-		if (solution.selected(e))
-			continue;
-
-		Crag::CragNode s = e.u();
-		Crag::CragNode t = e.v();
+	// cycles are sorted by violation and length, add the most violated and 
+	// shortest ones first
+	for (const CycleSeparator::Cycle& cycle : cycles) {
 
-		// in same component
-		if (_labels[s] != _labels[t] || !solution.selected(s))
+		std::size_t id = _cyclePool->add(cycle.cutEdge, cycle.pathEdges);
+		if (_cycleConstraintIds.count(id))
 			continue;
 
-		LOG_ALL(multicutlog)
-				<< "nodes " << _crag.id(s)
-				<< " and " << _crag.id(t)
-				<< " (edge " << edgeIdToVar(_crag.id(e))
-				<< ") are cut, but in same component"
-				<< std::endl;
-
-		// setup Dijkstra
-		One one;
-		lemon::Dijkstra<Cut, One> dijkstra(cutGraph, one);
-
-		// e = (s, t) was not selected -> there should be no path connecting s 
-		// and t
-		if (!dijkstra.run(s, t))
-			LOG_ERROR(multicutlog)
-					<< "dijkstra could not find a path!"
-					<< std::endl;
-
-		LOG_ALL(multicutlog)
-				<< "nodes " << _crag.id(s)
-				<< " and " << _crag.id(t)
-				<< " are in same component "
-				<< _labels[_crag.v(e)]
-				<< std::endl;
-
-		LinearConstraint cycleConstraint;
-
-		int lenPath = 0;
-
-		// walk along the path between u and v
-		Crag::CragNode cur = t;
-		LOG_ALL(multicutlog)
-				<< "nodes " << _crag.id(s)
-				<< " and " << _crag.id(t)
-				<< " (edge " << edgeIdToVar(_crag.id(e)) << ")"
-				<< " are connected via path ";
-		while (cur != s) {
-
-			LOG_ALL(multicutlog)
-					<< _crag.id(cur)
-					<< " ";
-
-			Crag::Node pre(dijkstra.predNode(cur));
-
-			// here we have to iterate over all adjacent edges in order to 
-			// find (cur, pre) in CRAG, since there is no 1:1 mapping 
-			// between edges in cutGraph and _crag
-			Crag::CragIncEdgeIterator pathEdge = _crag.adjEdges(cur).begin();
-			for (; pathEdge != _crag.adjEdges(cur).end(); ++pathEdge)
-				if ((*pathEdge).opposite(cur) == pre)
-					break;
-
-			if (pathEdge == _crag.adjEdges(cur).end())
-				UTIL_THROW_EXCEPTION(
-						Exception,
-						"could not find path edge in CRAG");
-
-			if (!solution.selected(*pathEdge))
-				LOG_ERROR(multicutlog)
-						<< "edge " << edgeIdToVar(_crag.id(*pathEdge))
-						<< " is not selected, but found by dijkstra"
-						<< std::endl;
-				//UTIL_THROW_EXCEPTION(
-						//Exception,
-						//"edge " << edgeIdToVar(_crag.id(pathEdge)) << " is not selected, but found by dijkstra");
-
-			cycleConstraint.setCoefficient(
-					edgeIdToVar(_crag.id(*pathEdge)),
-					1.0);
-			LOG_ALL(multicutlog)
-					<< "(edge " << edgeIdToVar(_crag.id(*pathEdge)) << ") ";
-
-			lenPath++;
-			cur = pre;
-		}
-		LOG_ALL(multicutlog) << _crag.id(s) << std::endl;
-
-		cycleConstraint.setCoefficient(
-				edgeIdToVar(_crag.id(e)),
-				-1.0);
-		cycleConstraint.setRelation(LessEqual);
-		cycleConstraint.setValue(lenPath - 1);
+		LinearConstraint constraint = cycleConstraint(cycle.cutEdge, cycle.pathEdges);
 
-		LOG_ALL(multicutlog) << cycleConstraint << std::endl;
+		LOG_ALL(multicutlog) << constraint << std::endl;
 
-		_constraints.add(cycleConstraint);
+		_cycleConstraints.add(constraint);
+		_cycleConstraintIds.insert(id);
 
 		constraintsAdded++;
 
@@ -555,17 +500,39 @@ MultiCutSolver::findViolatedConstraints(CragSolution& solution) {
 			break;
 	}
 
+	// the current solution violates the added cycle constraints, merge all 
+	// edges within the found components to satisfy them in the initial 
+	// solution for the next iteration (this might violate pin constraints, in 
+	// which case the initial solution is not used)
+	if (constraintsAdded > 0)
+		for (Crag::CragEdge e : _crag.edges())
+			if (_separator.label(e.u()) != -1 &&
+			    _separator.label(e.u()) == _separator.label(e.v()))
+				_initialSolution[edgeIdToVar(_crag.id(e))] = 1.0;
+
+	const CycleSeparator::Statistics& stats = _separator.getStatistics();
+
+	LOG_USER(multicutlog)
+			<< "found " << stats.numViolatedCycles
+			<< " violated cycles in " << stats.numComponents
+			<< " components with " << stats.numSearches
+			<< " path searches in " << stats.seconds << "s"
+			<< std::endl;
+
 	LOG_USER(multicutlog)
 			<< "added " << constraintsAdded
 			<< " cycle constraints" << std::endl;
 
-    if(optionLazyTreePathConstraints.as<bool>()){
-    LOG_USER(multicutlog)
-            << "added " << treePathConstraintAdded
-            << " tree path  constraints" << std::endl;
-    }
+	if (optionLazyTreePathConstraints.as<bool>()) {
+
+		LOG_USER(multicutlog)
+				<< "added " << treePathConstraintAdded
+				<< " tree path constraints" << std::endl;
+	}
 
 	// propagate node labels to subsets
+	for (Crag::CragNode n : _crag.nodes())
+		_labels[n] = _separator.label(n);
 	for (Crag::CragNode n : _crag.nodes())
 		if (_crag.isRootNode(n))
 			propagateLabel(n, -1);
@@ -573,6 +540,56 @@ MultiCutSolver::findViolatedConstraints(CragSolution& solution) {
 	return (constraintsAdded + treePathConstraintAdded > 0);
 }
 
+void
+MultiCutSolver::addPooledCycleConstraints() {
+
+	// start over if the pool evicted any of our cycle constraints
+	for (std::size_t id : _cycleConstraintIds)
+		if (!_cyclePool->contains(id)) {
+
+			_cycleConstraints.clear();
+			_cycleConstraintIds.clear();
+			break;
+		}
+
+	int constraintsAdded = 0;
+
+	for (const CycleConstraintPool::Cycle& cycle : _cyclePool->getCycles()) {
+
+		if (_cycleConstraintIds.count(cycle.id))
+			continue;
+
+		_cycleConstraints.add(cycleConstraint(cycle.cutEdge, cycle.pathEdges));
+		_cycleConstraintIds.insert(cycle.id);
+
+		constraintsAdded++;
+	}
+
+	LOG_USER(multicutlog)
+			<< "added " << constraintsAdded
+			<< " cycle constraints from pool, using "
+			<< _cycleConstraints.size() << " cycle constraints" << std::endl;
+}
+
+LinearConstraint
+MultiCutSolver::cycleConstraint(int cutEdge, const std::vector<int>& pathEdges) {
+
+	LinearConstraint constraint;
+
+	for (int pathEdge : pathEdges)
+		constraint.setCoefficient(
+				edgeIdToVar(pathEdge),
+				1.0);
+
+	constraint.setCoefficient(
+			edgeIdToVar(cutEdge),
+			-1.0);
+	constraint.setRelation(LessEqual);
+	constraint.setValue(pathEdges.size() - 1);
+
+	return constraint;
+}
+
 void
 MultiCutSolver::propagateLabel(Crag::CragNode n, int label) {
 
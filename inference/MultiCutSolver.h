@@ -7,12 +7,28 @@
 #include <vigra/tinyvector.hxx>
 #include "Costs.h"
 #include "CragSolver.h"
+#include "CycleSeparator.h"
+#include "CycleConstraintPool.h"
 
 class MultiCutSolver : public CragSolver {
 
 public:
 
-	MultiCutSolver(const Crag& crag, const Parameters& parameters = Parameters());
+	/**
+	 * Create a new multi-cut solver.
+	 *
+	 * @param cyclePool
+	 *              An optional pool of cycle constraints to share with other 
+	 *              solvers on the same CRAG. The solver seeds its constraints 
+	 *              from the pool on each call to solve(), and adds newly found 
+	 *              cycle constraints to it. A shared pool is not advanced by 
+	 *              the solver, the owner of the pool has to call 
+	 *              CycleConstraintPool::nextRound() once per round.
+	 */
+	MultiCutSolver(
+			const Crag&          crag,
+			const Parameters&    parameters = Parameters(),
+			CycleConstraintPool* cyclePool = 0);
 
 	~MultiCutSolver();
 
@@ -30,16 +46,6 @@ public:
 
 private:
 
-	// a property map returning 1 for every entry
-	struct One {
-
-		typedef int Value;
-
-		template <typename T>
-		int operator[](const T&) const { return 1; }
-
-	};
-
 	void prepareSolver();
 
 	void setVariables();
@@ -52,6 +58,10 @@ private:
 
 	bool findViolatedConstraints(CragSolution& solution);
 
+	void addPooledCycleConstraints();
+
+	LinearConstraint cycleConstraint(int cutEdge, const std::vector<int>& pathEdges);
+
 	void propagateLabel(Crag::CragNode n, int label);
 
 	inline unsigned int nodeIdToVar(int nodeId) { return nodeId; }
@@ -61,13 +71,16 @@ private:
 
 	unsigned int _numNodes, _numEdges;
 
-	std::map<int, unsigned int> _edgeIdToVarMap;
+	std::vector<unsigned int> _edgeIdToVarMap;
 
 	LinearObjective      _objective;
 	LinearConstraints    _constraints;
 	LinearSolverBackend* _solver;
 	Solution             _solution;
 
+	// the previous solution, used as a MIP start if it is feasible
+	Solution             _initialSolution;
+
 	Parameters _parameters;
 
     std::vector<LinearConstraint> _allTreePathConstraints;
@@ -75,6 +88,19 @@ private:
 	int _numPositiveCostPinConstraints;
 
 	Crag::NodeMap<int> _labels;
+
+	CycleSeparator _separator;
+
+	// values of the edge variables in the current solution, by edge id
+	std::vector<double> _edgeValues;
+
+	// the pool of cycle constraints, either shared or _ownCyclePool
+	CycleConstraintPool  _ownCyclePool;
+	CycleConstraintPool* _cyclePool;
+
+	// the cycle constraints taken from the pool, and their pool ids
+	LinearConstraints     _cycleConstraints;
+	std::set<std::size_t> _cycleConstraintIds;
 };
 
 #endif // CANDIDATE_MC_SOLVER_MULTI_CUT_H__
@@ -1,7 +1,21 @@
+#include <algorithm>
+#include <exception>
+#include <mutex>
+#include <thread>
 #include <vigra/random_forest_hdf5_impex.hxx>
+#include <util/exceptions.h>
 #include "RandomForest.h"
 
+namespace {
+
+// the minimal number of samples to predict per thread
+const int MinSamplesPerThread = 64;
+
+} // anonymous namespace
+
 RandomForest::RandomForest() :
+	_numFeatures(0),
+	_numClasses(0),
 	_outOfBagError(0),
 	_variableImportance(0) {
 
@@ -124,6 +138,130 @@ RandomForest::getProbabilities(const std::vector<FeatureType>& sample) {
 	return p;
 }
 
+void
+RandomForest::getProbabilitiesBatch(const SamplesView& samples, ProbsView probs, int numThreads) const {
+
+	if (samples.shape(1) != static_cast<int>(_numFeatures))
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"samples have " << samples.shape(1) << " features, the classifier expects " << _numFeatures);
+
+	if (probs.shape(0) != samples.shape(0) || probs.shape(1) != static_cast<int>(_numClasses))
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"probabilities have shape " << probs.shape() << ", expected (" <<
+				samples.shape(0) << ", " << _numClasses << ")");
+
+	int numSamples = samples.shape(0);
+
+	if (numSamples == 0)
+		return;
+
+	if (numThreads <= 0)
+		numThreads = std::max(1u, std::thread::hardware_concurrency());
+	numThreads = std::max(1, std::min(numThreads, numSamples/MinSamplesPerThread));
+
+	std::exception_ptr error;
+	std::mutex         errorMutex;
+
+	// each block of rows is predicted with all trees, the trees are only read
+	auto predict = [&](int begin, int end) {
+
+		try {
+
+			SamplesView blockSamples = samples.subarray(SamplesSize(begin, 0), SamplesSize(end, samples.shape(1)));
+			ProbsView   blockProbs   = probs.subarray(ProbsSize(begin, 0), ProbsSize(end, probs.shape(1)));
+
+			_rf.predictProbabilities(blockSamples, blockProbs);
+
+		} catch (...) {
+
+			std::lock_guard<std::mutex> lock(errorMutex);
+			if (!error)
+				error = std::current_exception();
+		}
+	};
+
+	std::vector<std::thread> threads;
+	for (int i = 1; i < numThreads; i++)
+		threads.emplace_back(predict, i*numSamples/numThreads, (i + 1)*numSamples/numThreads);
+
+	predict(0, numSamples/numThreads);
+
+	for (std::thread& thread : threads)
+		thread.join();
+
+	if (error)
+		std::rethrow_exception(error);
+}
+
+void
+RandomForest::getProbabilitiesBatch(
+		const Crag&             crag,
+		const NodeFeatures&     features,
+		Crag::NodeType          type,
+		Crag::NodeMap<double>&  probs,
+		unsigned int            c,
+		int                     numThreads) const {
+
+	const NodeFeatures::FeaturesType& typeFeatures = features.getFeatures(type);
+	std::vector<double> p = getClassProbabilities(typeFeatures, c, numThreads);
+
+	const std::vector<int>& ids = typeFeatures.getIds();
+	for (std::size_t row = 0; row < ids.size(); row++)
+		probs[crag.nodeFromId(ids[row])] = p[row];
+}
+
+void
+RandomForest::getProbabilitiesBatch(
+		const Crag&             crag,
+		const EdgeFeatures&     features,
+		Crag::EdgeType          type,
+		Crag::EdgeMap<double>&  probs,
+		unsigned int            c,
+		int                     numThreads) const {
+
+	const EdgeFeatures::FeaturesType& typeFeatures = features.getFeatures(type);
+	std::vector<double> p = getClassProbabilities(typeFeatures, c, numThreads);
+
+	const std::vector<int>& ids = typeFeatures.getIds();
+	for (std::size_t row = 0; row < ids.size(); row++)
+		probs[crag.edgeFromId(ids[row])] = p[row];
+}
+
+template <typename FeaturesType>
+std::vector<double>
+RandomForest::getClassProbabilities(
+		const FeaturesType& features,
+		unsigned int        c,
+		int                 numThreads) const {
+
+	if (c >= _numClasses)
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"class " << c << " requested, but the classifier has only " << _numClasses << " classes");
+
+	std::size_t numSamples = features.size();
+
+	if (numSamples == 0)
+		return std::vector<double>();
+
+	// the feature matrix is used in-place, without copying
+	SamplesView samples(
+			SamplesSize(numSamples, features.dims()),
+			SamplesSize(features.getStride(), 1),
+			features.data());
+
+	ProbsType probs(ProbsSize(numSamples, _numClasses));
+	getProbabilitiesBatch(samples, probs, numThreads);
+
+	std::vector<double> p(numSamples);
+	for (std::size_t row = 0; row < numSamples; row++)
+		p[row] = probs(row, c);
+
+	return p;
+}
+
 void
 RandomForest::write(std::string filename, std::string group) {
 
@@ -6,6 +6,10 @@
 #include <vigra/multi_array.hxx>
 #include <vigra/random_forest.hxx>
 
+#include <crag/Crag.h>
+#include <features/NodeFeatures.h>
+#include <features/EdgeFeatures.h>
+
 class RandomForest {
 
 public:
@@ -21,6 +25,11 @@ public:
 	typedef LabelsType::difference_type  LabelsSize;
 	typedef ProbsType::difference_type   ProbsSize;
 
+	// views on samples and probabilities in external memory, one row per 
+	// sample
+	typedef vigra::MultiArrayView<2, FeatureType, vigra::StridedArrayTag> SamplesView;
+	typedef vigra::MultiArrayView<2, double, vigra::StridedArrayTag>      ProbsView;
+
 	typedef vigra::RandomForest<LabelType> RandomForestType;
 
 	RandomForest();
@@ -62,6 +71,51 @@ public:
 	 */
 	std::vector<double> getProbabilities(const std::vector<FeatureType>& sample);
 
+	/**
+	 * Get the class probability distributions for a batch of samples, one 
+	 * sample per row. probs has to have one row per sample and one column per 
+	 * class. The rows are split into blocks that are predicted in parallel with 
+	 * numThreads threads (0 for the number of hardware threads). The result is 
+	 * the same as for calling getProbabilities() on each row.
+	 */
+	void getProbabilitiesBatch(const SamplesView& samples, ProbsView probs, int numThreads = 0) const;
+
+	/**
+	 * Get the probability of class c for each node of the given type, using 
+	 * the rows of the node feature matrix of this type as samples. Nodes of 
+	 * other types are not changed in probs.
+	 */
+	void getProbabilitiesBatch(
+			const Crag&             crag,
+			const NodeFeatures&     features,
+			Crag::NodeType          type,
+			Crag::NodeMap<double>&  probs,
+			unsigned int            c = 1,
+			int                     numThreads = 0) const;
+
+	/**
+	 * Get the probability of class c for each edge of the given type, using 
+	 * the rows of the edge feature matrix of this type as samples. Edges of 
+	 * other types are not changed in probs.
+	 */
+	void getProbabilitiesBatch(
+			const Crag&             crag,
+			const EdgeFeatures&     features,
+			Crag::EdgeType          type,
+			Crag::EdgeMap<double>&  probs,
+			unsigned int            c = 1,
+			int                     numThreads = 0) const;
+
+	/**
+	 * The number of features the classifier expects.
+	 */
+	unsigned int getNumFeatures() const { return _numFeatures; }
+
+	/**
+	 * The number of classes the classifier distinguishes.
+	 */
+	unsigned int getNumClasses() const { return _numClasses; }
+
 	/**
 	 * Write the classifier to a file.
 	 */
@@ -74,6 +128,13 @@ public:
 
 private:
 
+	// get the probabilities of class c for all rows of a feature matrix
+	template <typename FeaturesType>
+	std::vector<double> getClassProbabilities(
+			const FeaturesType& features,
+			unsigned int        c,
+			int                 numThreads) const;
+
 	// random forest implementation
 
 	RandomForestType _rf;
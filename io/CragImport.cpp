@@ -1,10 +1,17 @@
-#include <fstream>
+#include <algorithm>
+#include <atomic>
+#include <exception>
 #include <limits>
+#include <mutex>
+#include <set>
+#include <thread>
+#include <unordered_map>
 #include <vigra/impex.hxx>
 #include <util/Logger.h>
 #include <util/ProgramOptions.h>
 #include <crag/MergeTreeParser.h>
 #include "CragImport.h"
+#include "MergeHistory.h"
 #include "volumes.h"
 
 util::ProgramOption optionMaxMerges(
@@ -33,6 +40,233 @@ util::ProgramOption option2dSupervoxels(
 		                          "a CRAG with SliceNodes instead of VolumeNodes. SliceNodes have more features that only apply "
 		                          "to 2D objects.");
 
+namespace {
+
+// the volume of a supervoxel and its offset in the supervoxel stack
+typedef std::unordered_map<int, std::pair<CragVolume*, util::point<int, 3>>> SupervoxelVolumes;
+
+// grow the bounding boxes of the supervoxels in the given volume, which starts 
+// at section zOffset of the stack
+void
+fitBoundingBoxes(
+		const ExplicitVolume<int>&        ids,
+		int                               zOffset,
+		std::map<int, util::box<int, 3>>& bbs) {
+
+	for (unsigned int z = 0; z < ids.depth();  z++)
+	for (unsigned int y = 0; y < ids.height(); y++)
+	for (unsigned int x = 0; x < ids.width();) {
+
+		int id = ids(x, y, z);
+
+		// fit whole runs of the same id at once
+		unsigned int end = x + 1;
+		while (end < ids.width() && ids(end, y, z) == id)
+			end++;
+
+		if (id != 0)
+			bbs[id].fit(
+					util::box<int, 3>(
+							x,   y,   z + zOffset,
+							end, y+1, z + zOffset + 1));
+
+		x = end;
+	}
+}
+
+// set the voxels of the supervoxel volumes from the given volume, which starts 
+// at section zOffset of the stack
+void
+paintSupervoxels(
+		const ExplicitVolume<int>& ids,
+		int                        zOffset,
+		const SupervoxelVolumes&   volumes) {
+
+	for (unsigned int z = 0; z < ids.depth();  z++)
+	for (unsigned int y = 0; y < ids.height(); y++)
+	for (unsigned int x = 0; x < ids.width();) {
+
+		int id = ids(x, y, z);
+
+		unsigned int end = x + 1;
+		while (end < ids.width() && ids(end, y, z) == id)
+			end++;
+
+		if (id != 0) {
+
+			CragVolume&                volume = *volumes.at(id).first;
+			const util::point<int, 3>& min    = volumes.at(id).second;
+
+			for (unsigned int i = x; i < end; i++)
+				volume(i - min.x(), y - min.y(), z + zOffset - min.z()) = 1;
+		}
+
+		x = end;
+	}
+}
+
+// count the overlap of supervoxels with segments
+void
+countOverlaps(
+		const ExplicitVolume<int>&                ids,
+		const ExplicitVolume<int>&                segmentation,
+		std::map<int, std::map<int, int>>&        overlap,
+		std::set<int>&                            segmentIds) {
+
+	if (ids.width() != segmentation.width() || ids.height() != segmentation.height() || ids.depth() != segmentation.depth())
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"supervoxels and candidate segmentation have different sizes");
+
+	for (unsigned int z = 0; z < ids.depth(); z++)
+	for (unsigned int y = 0; y < ids.height(); y++)
+	for (unsigned int x = 0; x < ids.width(); x++) {
+
+		int svId  = ids(x, y, z);
+		int segId = segmentation(x, y, z);
+
+		if (segId != 0) {
+
+			overlap[svId][segId]++;
+			segmentIds.insert(segId);
+		}
+	}
+}
+
+// a map from merge history ids to CRAG nodes, stored densely unless the ids 
+// are sparse
+class IdToNode {
+
+public:
+
+	IdToNode(int minId, int maxId, std::size_t numIds) :
+		_dense(
+				minId >= 0 &&
+				maxId >= minId &&
+				static_cast<std::size_t>(maxId) < 4*numIds + 1024*1024) {
+
+		if (_dense) {
+
+			_nodes.resize(static_cast<std::size_t>(maxId) + 1);
+			_isSet.resize(static_cast<std::size_t>(maxId) + 1, false);
+		}
+	}
+
+	// get the node for an id, return false if there is none
+	bool find(int id, Crag::CragNode& n) const {
+
+		if (_dense) {
+
+			if (id < 0 || static_cast<std::size_t>(id) >= _nodes.size() || !_isSet[id])
+				return false;
+
+			n = _nodes[id];
+			return true;
+		}
+
+		auto i = _sparse.find(id);
+		if (i == _sparse.end())
+			return false;
+
+		n = i->second;
+		return true;
+	}
+
+	void set(int id, Crag::CragNode n) {
+
+		if (_dense) {
+
+			_nodes[id] = n;
+			_isSet[id] = true;
+
+		} else {
+
+			_sparse[id] = n;
+		}
+	}
+
+private:
+
+	bool _dense;
+
+	std::vector<Crag::CragNode>             _nodes;
+	std::vector<bool>                       _isSet;
+	std::unordered_map<int, Crag::CragNode> _sparse;
+};
+
+} // anonymous namespace
+
+template <typename F>
+void
+CragImport::processSlabs(
+		const std::vector<std::vector<std::string>>& stacks,
+		F                                            process) {
+
+	int depth = stacks[0].size();
+
+	vigra::ImageImportInfo info(stacks[0][0].c_str());
+	std::size_t sectionBytes = static_cast<std::size_t>(info.width())*info.height()*sizeof(int)*stacks.size();
+
+	int maxSections = std::min<std::size_t>(std::max<std::size_t>(_blockBudget/sectionBytes, 1), depth);
+
+	int numThreads = _numThreads;
+	if (numThreads <= 0)
+		numThreads = std::max(1u, std::thread::hardware_concurrency());
+	numThreads = std::min(numThreads, maxSections);
+
+	int sectionsPerSlab = maxSections/numThreads;
+	int numSlabs        = (depth + sectionsPerSlab - 1)/sectionsPerSlab;
+
+	LOG_DEBUG(logger::out)
+			<< "processing " << numSlabs << " slabs of " << sectionsPerSlab
+			<< " sections with " << numThreads << " threads" << std::endl;
+
+	std::atomic<int>   nextSlab(0);
+	std::exception_ptr error;
+	std::mutex         errorMutex;
+
+	auto worker = [&]() {
+
+		for (int s = nextSlab++; s < numSlabs; s = nextSlab++) {
+
+			try {
+
+				int zBegin = s*sectionsPerSlab;
+				int zEnd   = std::min(zBegin + sectionsPerSlab, depth);
+
+				std::vector<ExplicitVolume<int>> slabs;
+				for (const std::vector<std::string>& files : stacks)
+					slabs.push_back(
+							readVolume<int>(
+									std::vector<std::string>(
+											files.begin() + zBegin,
+											files.begin() + zEnd)));
+
+				process(zBegin, slabs);
+
+			} catch (...) {
+
+				std::lock_guard<std::mutex> lock(errorMutex);
+				if (!error)
+					error = std::current_exception();
+
+				// skip the remaining slabs
+				nextSlab = numSlabs;
+			}
+		}
+	};
+
+	std::vector<std::thread> threads;
+	for (int i = 1; i < numThreads; i++)
+		threads.emplace_back(worker);
+	worker();
+	for (std::thread& thread : threads)
+		thread.join();
+
+	if (error)
+		std::rethrow_exception(error);
+}
+
 void
 CragImport::readCrag(
 		std::string           filename,
@@ -73,13 +307,13 @@ CragImport::readCragFromMergeHistory(
 		util::point<float, 3> offset,
 		Costs&                mergeCosts) {
 
-	ExplicitVolume<int> ids = readVolume<int>(getImageFiles(supervoxels));
+	std::vector<std::string> files = getImageFiles(supervoxels);
 
 	bool is2D = false;
-	if (ids.depth() == 1 || option2dSupervoxels)
+	if (files.size() == 1 || option2dSupervoxels)
 		is2D = true;
 
-	std::map<int, Crag::Node> idToNode = readSupervoxels(ids, crag, volumes, resolution, offset);
+	std::map<int, Crag::Node> svIdToNode = readSupervoxels(files, crag, volumes, resolution, offset);
 
 	int maxMerges = -1;
 	if (optionMaxMerges)
@@ -87,13 +321,6 @@ CragImport::readCragFromMergeHistory(
 
 	bool useScores = optionMergeHistoryWithScores.as<bool>();
 
-	std::ifstream file(mergeHistory);
-	if (file.fail()) {
-
-		LOG_ERROR(logger::out) << "could not read merge history" << std::endl;
-		return;
-	}
-
 	double maxScore = std::numeric_limits<double>::max();
 	if (optionMaxMergeScore)
 		maxScore = optionMaxMergeScore.as<double>();
@@ -105,59 +332,72 @@ CragImport::readCragFromMergeHistory(
 				"when reading from a merge history, options minRegionSize and maxRegionSize can not be set");
 	}
 
+	// binary merge histories always contain scores
+	bool binary = MergeHistory::isBinary(mergeHistory);
+	std::vector<MergeHistory::Merge> merges = MergeHistory::read(mergeHistory, useScores);
+	if (binary && !useScores)
+		for (MergeHistory::Merge& merge : merges)
+			merge.score = 0;
+
 	LOG_USER(logger::out) << "parsing merge history..." << std::endl;
 
-	int numAdded = 0;
-	while (true) {
-		int a, b, c;
-		file >> a;
-		file >> b;
-		file >> c;
-		double score = 0;
-		if (useScores)
-			file >> score;
+	int minId = std::numeric_limits<int>::max();
+	int maxId = std::numeric_limits<int>::min();
+	for (const auto& p : svIdToNode) {
+
+		minId = std::min(minId, p.first);
+		maxId = std::max(maxId, p.first);
+	}
+	for (const MergeHistory::Merge& merge : merges) {
+
+		minId = std::min(minId, std::min(merge.a, std::min(merge.b, merge.c)));
+		maxId = std::max(maxId, std::max(merge.a, std::max(merge.b, merge.c)));
+	}
+
+	IdToNode idToNode(minId, maxId, svIdToNode.size() + merges.size());
+	for (const auto& p : svIdToNode)
+		idToNode.set(p.first, p.second);
+
+	crag.getAdjacencyGraph().reserveNode(svIdToNode.size() + merges.size());
+	crag.getSubsetGraph().reserveNode(svIdToNode.size() + merges.size());
+	crag.getSubsetGraph().reserveArc(2*merges.size());
 
-		if (!file.good())
-			break;
+	// levels of the added nodes, to avoid recursing the subset graph for each 
+	// merge
+	Crag::NodeMap<int> levels(crag, 0);
+
+	int numAdded = 0;
+	for (const MergeHistory::Merge& merge : merges) {
 
 		// we might encounter ids that we didn't add, since they are too high in 
 		// the merge tree or have a score exceeding maxScore
-		if (!idToNode.count(a))
-			continue;
-		if (!idToNode.count(b))
+		Crag::CragNode a, b;
+		if (!idToNode.find(merge.a, a) || !idToNode.find(merge.b, b))
 			continue;
 
 		// are we limiting the number of merges?
 		if (maxMerges >= 0) {
 
-			if (crag.getLevel(idToNode[a]) >= maxMerges)
+			if (levels[a] >= maxMerges)
 				continue;
-			if (crag.getLevel(idToNode[b]) >= maxMerges)
+			if (levels[b] >= maxMerges)
 				continue;
 		}
 
 		// are we limiting the merge score?
-		if (useScores && score >= maxScore)
+		if (useScores && merge.score >= maxScore)
 			continue;
 
-		Crag::Node n = crag.addNode(is2D ? Crag::SliceNode : Crag::VolumeNode);
-		idToNode[c] = n;
+		Crag::CragNode n = crag.addNode(is2D ? Crag::SliceNode : Crag::VolumeNode);
+		idToNode.set(merge.c, n);
+		levels[n] = std::max(levels[a], levels[b]) + 1;
 		if (useScores)
-			mergeCosts.node[n] = score;
-
-		if (!idToNode.count(a))
-			std::cerr << "node " << a << " is used for merging, but was not encountered before" << std::endl;
-		if (!idToNode.count(b))
-			std::cerr << "node " << b << " is used for merging, but was not encountered before" << std::endl;
+			mergeCosts.node[n] = merge.score;
 
-		LOG_ALL(logger::out) << "merging " << a << " and " << b << " to " << c << std::endl;
+		LOG_ALL(logger::out) << "merging " << merge.a << " and " << merge.b << " to " << merge.c << std::endl;
 
-		crag.addSubsetArc(
-				idToNode[a],
-				n);
-		crag.addSubsetArc(
-				idToNode[b],
-				n);
+		crag.addSubsetArc(a, n);
+		crag.addSubsetArc(b, n);
 		numAdded++;
 	}
 
@@ -167,7 +407,8 @@ CragImport::readCragFromMergeHistory(
 
 		for (Crag::CragNode n : crag.nodes()) {
 
-			const CragVolume& volume = *volumes[n];
+			std::shared_ptr<CragVolume> volumePtr = volumes[n];
+			const CragVolume& volume = *volumePtr;
 
 			if (volume.depth() != 1)
 				UTIL_THROW_EXCEPTION(
@@ -188,40 +429,67 @@ CragImport::readCragFromCandidateSegmentation(
 		util::point<float, 3> resolution,
 		util::point<float, 3> offset) {
 
-	ExplicitVolume<int> ids = readVolume<int>(getImageFiles(supervoxels));
+	std::vector<std::string> files = getImageFiles(supervoxels);
 
 	bool is2D = false;
-	if (ids.depth() == 1 || option2dSupervoxels)
+	if (files.size() == 1 || option2dSupervoxels)
 		is2D = true;
 
-	std::map<int, Crag::Node> svIdToNode = readSupervoxels(ids, crag, volumes, resolution, offset);
+	std::vector<std::string> segmentationFiles = getImageFiles(candidateSegmentation);
 
-	LOG_USER(logger::out) << "reading segmentation" << std::endl;
+	std::map<int, Crag::Node> svIdToNode;
 
-	ExplicitVolume<int> segmentation = readVolume<int>(getImageFiles(candidateSegmentation));
-
-	// get all segments
+	// get overlap of each supervoxel with segments, and all segments
+	std::map<int /*sv id*/, std::map<int /*segment id*/, int /*size*/>> overlap;
 	std::set<int> segmentIds;
-	for (int id : segmentation.data())
-		if (id != 0)
-			segmentIds.insert(id);
 
-	LOG_USER(logger::out) << "found " << segmentIds.size() << " segments" << std::endl;
-	LOG_USER(logger::out) << "assigning supervoxels to segments" << std::endl;
+	if (_blockBudget > 0) {
 
-	// get overlap of each supervoxel with segments
-	std::map<int /*sv id*/, std::map<int /*segment id*/, int /*size*/>> overlap;
-	for (unsigned int z = 0; z < ids.depth(); z++)
-	for (unsigned int y = 0; y < ids.height(); y++)
-	for (unsigned int x = 0; x < ids.width(); x++) {
+		if (segmentationFiles.size() != files.size())
+			UTIL_THROW_EXCEPTION(
+					UsageError,
+					"supervoxels have " << files.size() << " sections, but the candidate segmentation has " <<
+					segmentationFiles.size());
 
-		int svId  = ids(x, y, z);
-		int segId = segmentation(x, y, z);
+		svIdToNode = readSupervoxels(files, crag, volumes, resolution, offset);
 
-		if (segId != 0)
-			overlap[svId][segId]++;
+		LOG_USER(logger::out) << "reading segmentation" << std::endl;
+
+		std::mutex mutex;
+		processSlabs(
+				{ files, segmentationFiles },
+				[&](int, const std::vector<ExplicitVolume<int>>& slabs) {
+
+					std::map<int, std::map<int, int>> slabOverlap;
+					std::set<int>                     slabSegmentIds;
+					countOverlaps(slabs[0], slabs[1], slabOverlap, slabSegmentIds);
+
+					std::lock_guard<std::mutex> lock(mutex);
+					for (const auto& p : slabOverlap)
+						for (const auto& q : p.second)
+							overlap[p.first][q.first] += q.second;
+					segmentIds.insert(slabSegmentIds.begin(), slabSegmentIds.end());
+				});
+
+	} else {
+
+		// read the supervoxels only once for both passes
+		ExplicitVolume<int> ids = readVolume<int>(files);
+
+		svIdToNode = readSupervoxels(ids, crag, volumes, resolution, offset);
+
+		LOG_USER(logger::out) << "reading segmentation" << std::endl;
+
+		countOverlaps(
+				ids,
+				readVolume<int>(segmentationFiles),
+				overlap,
+				segmentIds);
 	}
 
+	LOG_USER(logger::out) << "found " << segmentIds.size() << " segments" << std::endl;
+	LOG_USER(logger::out) << "assigning supervoxels to segments" << std::endl;
+
 	// create a node for each segment (that has overlapping supervoxels) and 
 	// link to max-overlap nodes
 	std::map<int, Crag::Node> segIdToNode;
@@ -271,20 +539,92 @@ CragImport::readSupervoxels(
 	LOG_USER(logger::out) << "supervoxels stack contains ids between " << minId << " and " << maxId << std::endl;
 
 	std::map<int, util::box<int, 3>> bbs;
-	for (unsigned int z = 0; z < ids.depth();  z++)
-	for (unsigned int y = 0; y < ids.height(); y++)
-	for (unsigned int x = 0; x < ids.width();  x++) {
+	fitBoundingBoxes(ids, 0, bbs);
 
-		int id = ids(x, y, z);
+	std::map<int, Crag::Node> idToNode = allocateSupervoxels(bbs, is2D, crag, volumes, resolution, offset);
 
-		if (id == 0)
-			continue;
+	SupervoxelVolumes supervoxelVolumes;
+	for (const auto& p : idToNode)
+		supervoxelVolumes[p.first] = std::make_pair(volumes[p.second].get(), bbs[p.first].min());
 
-		bbs[id].fit(
-				util::box<int, 3>(
-						x,   y,   z,
-						x+1, y+1, z+1));
-	}
+	paintSupervoxels(ids, 0, supervoxelVolumes);
+
+	LOG_USER(logger::out) << "supervoxels parsed" << std::endl;
+
+	return idToNode;
+}
+
+std::map<int, Crag::Node>
+CragImport::readSupervoxels(
+		const std::vector<std::string>& files,
+		Crag&                           crag,
+		CragVolumes&                    volumes,
+		util::point<float, 3>           resolution,
+		util::point<float, 3>           offset) {
+
+	if (_blockBudget == 0)
+		return readSupervoxels(readVolume<int>(files), crag, volumes, resolution, offset);
+
+	if (files.size() == 0)
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"no supervoxel images given");
+
+	bool is2D = false;
+	if (files.size() == 1 || option2dSupervoxels)
+		is2D = true;
+
+	// The stack is read twice: once to find the bounding boxes of the 
+	// supervoxels, once to fill their volumes. Supervoxel ids are global, such 
+	// that supervoxels crossing slab boundaries are stitched exactly by 
+	// merging their bounding boxes.
+
+	LOG_USER(logger::out) << "finding supervoxel bounding boxes..." << std::endl;
+
+	std::map<int, util::box<int, 3>> bbs;
+	std::mutex mutex;
+	processSlabs(
+			{ files },
+			[&](int zBegin, const std::vector<ExplicitVolume<int>>& slabs) {
+
+				std::map<int, util::box<int, 3>> slabBbs;
+				fitBoundingBoxes(slabs[0], zBegin, slabBbs);
+
+				std::lock_guard<std::mutex> lock(mutex);
+				for (const auto& p : slabBbs)
+					bbs[p.first].fit(p.second);
+			});
+
+	LOG_USER(logger::out) << "found " << bbs.size() << " supervoxels" << std::endl;
+
+	std::map<int, Crag::Node> idToNode = allocateSupervoxels(bbs, is2D, crag, volumes, resolution, offset);
+
+	// the volumes by supervoxel id, such that slabs can be painted in parallel 
+	// without accessing the CRAG (slabs write to disjoint sections)
+	SupervoxelVolumes supervoxelVolumes;
+	for (const auto& p : idToNode)
+		supervoxelVolumes[p.first] = std::make_pair(volumes[p.second].get(), bbs[p.first].min());
+
+	processSlabs(
+			{ files },
+			[&](int zBegin, const std::vector<ExplicitVolume<int>>& slabs) {
+
+				paintSupervoxels(slabs[0], zBegin, supervoxelVolumes);
+			});
+
+	LOG_USER(logger::out) << "supervoxels parsed" << std::endl;
+
+	return idToNode;
+}
+
+std::map<int, Crag::Node>
+CragImport::allocateSupervoxels(
+		const std::map<int, util::box<int, 3>>& bbs,
+		bool                                    is2D,
+		Crag&                                   crag,
+		CragVolumes&                            volumes,
+		util::point<float, 3>                   resolution,
+		util::point<float, 3>                   offset) {
 
 	LOG_USER(logger::out) << "allocating candidates..." << std::endl;
 
@@ -302,22 +642,5 @@ CragImport::readSupervoxels(
 		idToNode[id] = n;
 	}
 
-	for (unsigned int z = 0; z < ids.depth();  z++)
-	for (unsigned int y = 0; y < ids.height(); y++)
-	for (unsigned int x = 0; x < ids.width();  x++) {
-
-		int id = ids(x, y, z);
-
-		if (id == 0)
-			continue;
-
-		Crag::Node n = idToNode[id];
-
-		(*volumes[n])(x - bbs[id].min().x(), y - bbs[id].min().y(), z - bbs[id].min().z()) = 1;
-	}
-
-	LOG_USER(logger::out) << "supervoxels parsed" << std::endl;
-
 	return idToNode;
 }
-
@@ -2,6 +2,8 @@
 #define CANDIDATE_MC_IO_CRAG_IMPORT_H__
 
 #include <map>
+#include <string>
+#include <vector>
 #include <crag/Crag.h>
 #include <crag/CragVolumes.h>
 #include <inference/Costs.h>
@@ -10,6 +12,25 @@ class CragImport {
 
 public:
 
+	CragImport() :
+		_blockBudget(0),
+		_numThreads(0) {}
+
+	/**
+	 * Read supervoxel and segmentation image stacks block-wise: The stacks are 
+	 * read in slabs of consecutive sections, which are processed in parallel. 
+	 * At most the given number of bytes are used for the slabs processed at 
+	 * the same time (but at least one section per slab). If 0 (the default), 
+	 * the stacks are read as a whole.
+	 */
+	void setBlockBudget(std::size_t bytes) { _blockBudget = bytes; }
+
+	/**
+	 * The number of slabs to process in parallel, if a block budget is set. If 
+	 * 0 (the default), the number of hardware threads is used.
+	 */
+	void setNumThreads(int numThreads) { _numThreads = numThreads; }
+
 	/**
 	 * Import a CRAG from a merge tree image.
 	 *
@@ -120,6 +141,49 @@ public:
 			CragVolumes&               volumes,
 			util::point<float, 3>      resolution,
 			util::point<float, 3>      offset);
+
+	/**
+	 * Read a flat CRAG from a stack of supervoxel images. If a block budget is 
+	 * set, the images are read block-wise, otherwise as one volume.
+	 *
+	 * @param files
+	 *              The supervoxel images, one per section.
+	 * @param crag
+	 *              The CRAG to fill.
+	 * @param volumes
+	 *              A node map for the leaf node volmes.
+	 * @param resolution
+	 *              The resolution of the volume, to be stored in the volumes.
+	 * @param offset
+	 *              The offset of the volume, to be stored in the volumes.
+	 */
+	std::map<int, Crag::Node> readSupervoxels(
+			const std::vector<std::string>& files,
+			Crag&                           crag,
+			CragVolumes&                    volumes,
+			util::point<float, 3>           resolution,
+			util::point<float, 3>           offset);
+
+private:
+
+	// create a candidate and its volume for each supervoxel bounding box
+	std::map<int, Crag::Node> allocateSupervoxels(
+			const std::map<int, util::box<int, 3>>& bbs,
+			bool                                    is2D,
+			Crag&                                   crag,
+			CragVolumes&                            volumes,
+			util::point<float, 3>                   resolution,
+			util::point<float, 3>                   offset);
+
+	// call process(zBegin, stacks) for each slab of sections of the given 
+	// stacks, in parallel
+	template <typename F>
+	void processSlabs(
+			const std::vector<std::vector<std::string>>& stacks,
+			F                                            process);
+
+	std::size_t _blockBudget;
+	int         _numThreads;
 };
 
 #endif // CANDIDATE_MC_IO_CRAG_IMPORT_H__
@@ -0,0 +1,310 @@
+#include <cstdio>
+#include <cstring>
+#include <fstream>
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#include <util/Logger.h>
+#include <util/assert.h>
+#include <util/exceptions.h>
+#include <util/timing.h>
+#include "CragSnapshot.h"
+
+logger::LogChannel cragsnapshotlog("cragsnapshotlog", "[CragSnapshot] ");
+
+namespace {
+
+const char Magic[8] = { 'C', 'M', 'C', 'C', 'R', 'A', 'G', '\0' };
+
+struct Header {
+
+	char          magic[8];
+	std::uint32_t version;
+	std::uint32_t numNodes;
+	std::uint64_t token;
+	std::uint32_t numEdges;
+	std::uint32_t numArcs;
+	std::uint32_t gridShape[3];
+	std::uint32_t hasGridGraph;
+	std::uint64_t numAffiliatedEdges;
+};
+
+// the size of the file following the header
+std::size_t
+payloadSize(const Header& header) {
+
+	return
+			(static_cast<std::size_t>(header.numEdges) + 1)*sizeof(std::int64_t) +
+			(static_cast<std::size_t>(header.numNodes) +
+			 static_cast<std::size_t>(header.numEdges)*3 +
+			 static_cast<std::size_t>(header.numArcs)*2 +
+			 header.numAffiliatedEdges)*sizeof(std::int32_t);
+}
+
+template <typename T>
+void
+writeArray(std::ofstream& out, const std::vector<T>& data) {
+
+	if (data.size() > 0)
+		out.write(reinterpret_cast<const char*>(data.data()), data.size()*sizeof(T));
+}
+
+/**
+ * A read-only memory mapping of a whole file.
+ */
+class MappedFile {
+
+public:
+
+	MappedFile(const std::string& filename) :
+		_fd(-1),
+		_data(0),
+		_size(0) {
+
+		_fd = open(filename.c_str(), O_RDONLY);
+		if (_fd == -1)
+			return;
+
+		struct stat s;
+		if (fstat(_fd, &s) == -1 || s.st_size == 0)
+			return;
+
+		void* data = mmap(0, s.st_size, PROT_READ, MAP_PRIVATE, _fd, 0);
+		if (data == MAP_FAILED)
+			return;
+
+		// the arrays are read front to back
+		madvise(data, s.st_size, MADV_SEQUENTIAL);
+
+		_data = static_cast<const char*>(data);
+		_size = s.st_size;
+	}
+
+	~MappedFile() {
+
+		if (_data)
+			munmap(const_cast<char*>(_data), _size);
+		if (_fd != -1)
+			close(_fd);
+	}
+
+	bool valid() const { return _data != 0; }
+
+	const char* data() const { return _data; }
+
+	std::size_t size() const { return _size; }
+
+private:
+
+	int         _fd;
+	const char* _data;
+	std::size_t _size;
+};
+
+} // anonymous namespace
+
+bool
+CragSnapshot::canWrite(const Crag& crag) {
+
+	return crag.getAdjacencyGraph().maxNodeId() + 1 == static_cast<int>(crag.numNodes());
+}
+
+void
+CragSnapshot::write(const Crag& crag, const std::string& filename, std::uint64_t token) {
+
+	UTIL_TIME_METHOD;
+
+	if (!canWrite(crag))
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"can not write snapshot of CRAG with non-consecutive node ids");
+
+	const Crag::RagType&    rag = crag.getAdjacencyGraph();
+	const Crag::SubsetType& ssg = crag.getSubsetGraph();
+
+	std::vector<std::int32_t> nodeTypes(rag.maxNodeId() + 1);
+	for (Crag::NodeIt n(rag); n != lemon::INVALID; ++n)
+		nodeTypes[rag.id(n)] = crag.type(n);
+
+	// edges and arcs in the order of the lemon iterators, as written by
+	// Hdf5GraphWriter and Hdf5DigraphWriter
+	std::vector<std::int32_t> edges;
+	std::vector<std::int64_t> affiliatedOffsets(1, 0);
+	std::vector<std::int32_t> affiliatedIds;
+	for (Crag::EdgeIt e(rag); e != lemon::INVALID; ++e) {
+
+		Crag::CragEdge edge(crag, e);
+
+		edges.push_back(rag.id(rag.u(e)));
+		edges.push_back(rag.id(rag.v(e)));
+		edges.push_back(crag.type(edge));
+
+		if (crag.isLeafEdge(edge))
+			for (vigra::GridGraph<3>::Edge ae : crag.getAffiliatedEdges(edge))
+				affiliatedIds.push_back(crag.getGridGraph().id(ae));
+
+		affiliatedOffsets.push_back(affiliatedIds.size());
+	}
+
+	std::vector<std::int32_t> arcs;
+	for (Crag::SubsetArcIt a(ssg); a != lemon::INVALID; ++a) {
+
+		arcs.push_back(ssg.id(ssg.source(a)));
+		arcs.push_back(ssg.id(ssg.target(a)));
+	}
+
+	Header header;
+	std::memset(&header, 0, sizeof(header));
+	std::memcpy(header.magic, Magic, sizeof(Magic));
+	header.version            = Version;
+	header.token              = token;
+	header.numNodes           = nodeTypes.size();
+	header.numEdges           = edges.size()/3;
+	header.numArcs            = arcs.size()/2;
+	header.numAffiliatedEdges = affiliatedIds.size();
+
+	// a default constructed grid graph has shape (0, 0, 0)
+	header.hasGridGraph = (crag.getGridGraph().shape()[0] > 0);
+	for (int d = 0; d < 3; d++)
+		header.gridShape[d] = crag.getGridGraph().shape()[d];
+
+	std::string tmpFilename = filename + ".tmp";
+
+	{
+		std::ofstream out(tmpFilename.c_str(), std::ios::binary | std::ios::trunc);
+
+		out.write(reinterpret_cast<const char*>(&header), sizeof(header));
+		writeArray(out, affiliatedOffsets);
+		writeArray(out, nodeTypes);
+		writeArray(out, edges);
+		writeArray(out, arcs);
+		writeArray(out, affiliatedIds);
+
+		if (!out)
+			UTIL_THROW_EXCEPTION(
+					IOError,
+					"could not write CRAG snapshot " << tmpFilename);
+	}
+
+	if (std::rename(tmpFilename.c_str(), filename.c_str()) != 0)
+		UTIL_THROW_EXCEPTION(
+				IOError,
+				"could not move CRAG snapshot " << tmpFilename << " to " << filename);
+
+	LOG_DEBUG(cragsnapshotlog)
+			<< "wrote snapshot with " << header.numNodes << " nodes, "
+			<< header.numEdges << " edges, and " << header.numArcs
+			<< " arcs to " << filename << std::endl;
+}
+
+bool
+CragSnapshot::read(Crag& crag, const std::string& filename, std::uint64_t token) {
+
+	UTIL_TIME_METHOD;
+
+	MappedFile file(filename);
+
+	if (!file.valid()) {
+
+		LOG_DEBUG(cragsnapshotlog) << "no snapshot found at " << filename << std::endl;
+		return false;
+	}
+
+	if (file.size() < sizeof(Header) || std::memcmp(file.data(), Magic, sizeof(Magic)) != 0)
+		UTIL_THROW_EXCEPTION(
+				IOError,
+				filename << " is not a CRAG snapshot");
+
+	Header header;
+	std::memcpy(&header, file.data(), sizeof(header));
+
+	if (header.version != Version) {
+
+		LOG_USER(cragsnapshotlog)
+				<< "snapshot " << filename << " has version " << header.version
+				<< ", expected " << Version << ", ignoring it" << std::endl;
+		return false;
+	}
+
+	if (header.token != token) {
+
+		LOG_USER(cragsnapshotlog)
+				<< "snapshot " << filename << " does not belong to the project file, ignoring it"
+				<< std::endl;
+		return false;
+	}
+
+	if (file.size() != sizeof(Header) + payloadSize(header))
+		UTIL_THROW_EXCEPTION(
+				IOError,
+				"CRAG snapshot " << filename << " has size " << file.size() <<
+				", expected " << sizeof(Header) + payloadSize(header));
+
+	const std::int64_t* affiliatedOffsets = reinterpret_cast<const std::int64_t*>(file.data() + sizeof(Header));
+	const std::int32_t* nodeTypes         = reinterpret_cast<const std::int32_t*>(affiliatedOffsets + header.numEdges + 1);
+	const std::int32_t* edges             = nodeTypes + header.numNodes;
+	const std::int32_t* arcs              = edges + 3*static_cast<std::size_t>(header.numEdges);
+	const std::int32_t* affiliatedIds     = arcs + 2*static_cast<std::size_t>(header.numArcs);
+
+	crag.getAdjacencyGraph().reserveNode(header.numNodes);
+	crag.getAdjacencyGraph().reserveEdge(header.numEdges);
+	crag.getSubsetGraph().reserveNode(header.numNodes);
+	crag.getSubsetGraph().reserveArc(header.numArcs);
+
+	for (std::uint32_t i = 0; i < header.numNodes; i++) {
+
+		Crag::CragNode n = crag.addNode(static_cast<Crag::NodeType>(nodeTypes[i]));
+		UTIL_ASSERT_REL(crag.id(n), ==, static_cast<int>(i));
+	}
+
+	// arcs first, such that leaf edges can be identified when setting
+	// affiliated edges
+	for (std::uint32_t i = 0; i < header.numArcs; i++)
+		crag.addSubsetArc(
+				crag.nodeFromId(arcs[2*i]),
+				crag.nodeFromId(arcs[2*i + 1]));
+
+	// edges of a new graph get consecutive ids, so edge i of the snapshot is
+	// edge i of the CRAG
+	for (std::uint32_t i = 0; i < header.numEdges; i++) {
+
+		Crag::CragEdge e = crag.addAdjacencyEdge(
+				crag.nodeFromId(edges[3*i]),
+				crag.nodeFromId(edges[3*i + 1]),
+				static_cast<Crag::EdgeType>(edges[3*i + 2]));
+		UTIL_ASSERT_REL(crag.id(e), ==, static_cast<int>(i));
+	}
+
+	if (header.hasGridGraph) {
+
+		vigra::Shape3 shape(header.gridShape[0], header.gridShape[1], header.gridShape[2]);
+		crag.setGridGraph(vigra::GridGraph<3>(shape, vigra::DirectNeighborhood));
+
+		const vigra::GridGraph<3>& gridGraph = crag.getGridGraph();
+
+		std::vector<vigra::GridGraph<3>::Edge> affiliatedEdges;
+		for (std::uint32_t i = 0; i < header.numEdges; i++) {
+
+			std::int64_t begin = affiliatedOffsets[i];
+			std::int64_t end   = affiliatedOffsets[i + 1];
+
+			if (begin == end)
+				continue;
+
+			affiliatedEdges.clear();
+			affiliatedEdges.reserve(end - begin);
+			for (std::int64_t j = begin; j < end; j++)
+				affiliatedEdges.push_back(gridGraph.edgeFromId(affiliatedIds[j]));
+
+			crag.setAffiliatedEdges(crag.edgeFromId(i), affiliatedEdges);
+		}
+	}
+
+	LOG_USER(cragsnapshotlog)
+			<< "read CRAG with " << header.numNodes << " nodes, "
+			<< header.numEdges << " edges, and " << header.numArcs
+			<< " arcs from snapshot" << std::endl;
+
+	return true;
+}
@@ -0,0 +1,60 @@
+#ifndef CANDIDATE_MC_IO_CRAG_SNAPSHOT_H__
+#define CANDIDATE_MC_IO_CRAG_SNAPSHOT_H__
+
+#include <cstdint>
+#include <string>
+#include <crag/Crag.h>
+
+/**
+ * A binary snapshot of the topology of a CRAG: node and edge types, adjacency
+ * edges, subset arcs, the grid graph shape, and the affiliated edges of leaf
+ * edges. The file consists of a fixed-size header followed by flat arrays in
+ * native byte order, such that it can be memory-mapped and the CRAG
+ * reconstructed without searching for edges:
+ *
+ *   header
+ *   int64 affiliated edge offsets, one per adjacency edge plus one (CSR)
+ *   int32 node types, one per node
+ *   int32 adjacency edges as (u, v, type), one triple per edge
+ *   int32 subset arcs as (source, target)
+ *   int32 affiliated grid graph edge ids
+ *
+ * Nodes, edges, and arcs are stored in the order in which Hdf5CragStore
+ * stores them, such that a CRAG read from a snapshot has the same node and
+ * edge ids as one read from the project file.
+ *
+ * Each snapshot carries a token, which is used to decide whether the snapshot
+ * belongs to a project file.
+ */
+class CragSnapshot {
+
+public:
+
+	/**
+	 * The version of the snapshot format.
+	 */
+	static const std::uint32_t Version = 1;
+
+	/**
+	 * Return true if a snapshot can be written for the given CRAG. This is the
+	 * case if the node ids of the CRAG are consecutive, starting at zero.
+	 */
+	static bool canWrite(const Crag& crag);
+
+	/**
+	 * Write a snapshot of the given CRAG. The file is written under a
+	 * temporary name first and renamed afterwards, such that readers never
+	 * see a partially written snapshot.
+	 */
+	static void write(const Crag& crag, const std::string& filename, std::uint64_t token);
+
+	/**
+	 * Read the snapshot into an empty CRAG. Returns false, without modifying
+	 * the CRAG, if the file does not exist, has a different format version,
+	 * or does not carry the expected token. Throws an IOError if the file is
+	 * corrupt.
+	 */
+	static bool read(Crag& crag, const std::string& filename, std::uint64_t token);
+};
+
+#endif // CANDIDATE_MC_IO_CRAG_SNAPSHOT_H__
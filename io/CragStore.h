@@ -4,12 +4,14 @@
 #include <set>
 #include <crag/Crag.h>
 #include <crag/CragVolumes.h>
+#include <crag/GroundTruthOverlaps.h>
 #include <features/NodeFeatures.h>
 #include <features/EdgeFeatures.h>
 #include <features/Skeletons.h>
 #include <features/VolumeRays.h>
 #include <inference/Costs.h>
 #include <inference/CragSolution.h>
+#include <inference/CycleConstraintPool.h>
 
 /**
  * Interface definition for crag stores.
@@ -80,6 +82,19 @@ public:
 	 */
 	virtual void retrieveVolumes(CragVolumes& volumes) = 0;
 
+	/**
+	 * Retrieve only the leaf node volumes needed for the given nodes, i.e., 
+	 * the volumes of the given leaf nodes and of all leaf nodes under the 
+	 * given higher nodes.
+	 */
+	virtual void retrieveVolumes(CragVolumes& volumes, const std::vector<Crag::CragNode>& nodes) = 0;
+
+	/**
+	 * Retrieve only the leaf node volumes whose bounding box intersects the 
+	 * given region of interest (in world units).
+	 */
+	virtual void retrieveVolumes(CragVolumes& volumes, const util::box<float, 3>& roi) = 0;
+
 	/**
 	 * Retrieve features for the candidates (i.e., the nodes) of the CRAG 
 	 * associated to this store.
@@ -138,6 +153,37 @@ public:
 	 * Get a list of the names of all stored solutions.
 	 */
 	virtual std::vector<std::string> getSolutionNames() = 0;
+
+	/**
+	 * Store the cycle constraints of a pool, replacing previously stored ones.
+	 */
+	virtual void saveCycleConstraints(
+			const Crag&                crag,
+			const CycleConstraintPool& pool) = 0;
+
+	/**
+	 * Retrieve stored cycle constraints and add them to the given pool. Does 
+	 * nothing if no cycle constraints have been stored.
+	 */
+	virtual void retrieveCycleConstraints(
+			const Crag&          crag,
+			CycleConstraintPool& pool) = 0;
+
+	/**
+	 * Store the ground-truth overlap tables of the leaf candidates.
+	 */
+	virtual void saveGroundTruthOverlaps(
+			const Crag&                crag,
+			const GroundTruthOverlaps& overlaps) = 0;
+
+	/**
+	 * Retrieve stored ground-truth overlap tables. Returns false and leaves 
+	 * the given tables untouched if no tables have been stored for the given 
+	 * CRAG.
+	 */
+	virtual bool retrieveGroundTruthOverlaps(
+			const Crag&          crag,
+			GroundTruthOverlaps& overlaps) = 0;
 };
 
 #endif // TREE_MC_IO_CRAG_STORE_H__
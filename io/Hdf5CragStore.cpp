@@ -1,10 +1,227 @@
+#include <algorithm>
+#include <cstdint>
+#include <map>
+#include <random>
+#include <set>
 #include <boost/lexical_cast.hpp>
 #include <util/Logger.h>
 #include <util/assert.h>
+#include <util/ProgramOptions.h>
+#include "CragSnapshot.h"
 #include "Hdf5CragStore.h"
 
 logger::LogChannel hdf5storelog("hdf5storelog", "[Hdf5CragStore] ");
 
+util::ProgramOption optionRunLengthVolumes(
+		util::_long_name        = "runLengthVolumes",
+		util::_description_text = "Store candidate volumes run-length encoded, and keep them run-length encoded in memory "
+		                          "when reading them. Volumes that have been stored run-length encoded are always read as "
+		                          "such.");
+
+util::ProgramOption optionProjectLayoutVersion(
+		util::_long_name        = "projectLayoutVersion",
+		util::_description_text = "The layout to use for writing project files. 1: contiguous, uncompressed datasets. 2: chunked, "
+		                          "compressed datasets and an index for the volumes, such that subsets of them can be read.",
+		util::_default_value    = 2);
+
+util::ProgramOption optionProjectCompressionLevel(
+		util::_long_name        = "projectCompressionLevel",
+		util::_description_text = "The compression level for datasets in project files of layout version 2, between 0 (none) and 9 (most).",
+		util::_default_value    = 3);
+
+util::ProgramOption optionNoCragSnapshot(
+		util::_long_name        = "noCragSnapshot",
+		util::_description_text = "Do not write a binary snapshot of the CRAG next to the project file, and do not read "
+		                          "the CRAG from an existing one.");
+
+namespace {
+
+// the number of elements along the last dimension of chunks
+const vigra::MultiArrayIndex VolumeChunkSize         = 1 << 20;
+const vigra::MultiArrayIndex RunsChunkSize           = 1 << 16;
+const vigra::MultiArrayIndex FeaturesChunkSize       = 1 << 12;
+const vigra::MultiArrayIndex AffiliatedEdgeChunkSize = 1 << 16;
+
+// the number of volume elements or runs to collect before writing them
+const vigra::MultiArrayIndex VolumeWriteBufferSize = 1 << 24;
+const vigra::MultiArrayIndex RunsWriteBufferSize   = 1 << 20;
+
+// the maximal gap between the data of two selected volumes, such that they 
+// are still read together
+const vigra::MultiArrayIndex VolumeReadMaxGap = 1 << 16;
+const vigra::MultiArrayIndex RunsReadMaxGap   = 1 << 12;
+
+// columns of the volume index
+enum VolumeIndexColumns {
+
+	IndexId,
+	IndexWidth,
+	IndexHeight,
+	IndexDepth,
+	IndexStart,
+	IndexLength,
+	NumIndexColumns
+};
+
+// a checksum over the ids and types of the nodes and the subset arcs of a 
+// CRAG, to identify the CRAG stored data have been computed for
+std::string
+cragChecksum(const Crag& crag) {
+
+	// FNV-1a
+	std::uint64_t hash = 14695981039346656037ull;
+	auto add = [&hash](int value) {
+
+		for (int i = 0; i < 4; i++) {
+
+			hash ^= (static_cast<unsigned int>(value) >> (8*i)) & 0xff;
+			hash *= 1099511628211ull;
+		}
+	};
+
+	for (Crag::CragNode n : crag.nodes()) {
+
+		add(crag.id(n));
+		add(crag.type(n));
+	}
+
+	for (Crag::CragArc a : crag.arcs()) {
+
+		add(crag.id(a.source()));
+		add(crag.id(a.target()));
+	}
+
+	return boost::lexical_cast<std::string>(hash);
+}
+
+} // anonymous namespace
+
+int
+Hdf5CragStore::getDefaultLayoutVersion() {
+
+	return optionProjectLayoutVersion.as<int>();
+}
+
+int
+Hdf5CragStore::getDefaultCompressionLevel() {
+
+	return optionProjectCompressionLevel.as<int>();
+}
+
+bool
+Hdf5CragStore::getDefaultRunLengthVolumes() {
+
+	return optionRunLengthVolumes;
+}
+
+void
+Hdf5CragStore::setLayoutVersion(int version) {
+
+	if (version < 1 || version > CurrentLayoutVersion)
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"unknown project layout version " << version);
+
+	_layoutVersion = version;
+}
+
+int
+Hdf5CragStore::getStoredVolumesLayoutVersion() {
+
+	if (!_hdfFile.existsAttribute("/crag/volumes", "layout_version"))
+		return 1;
+
+	int version;
+	_hdfFile.readAttribute("/crag/volumes", "layout_version", version);
+
+	return version;
+}
+
+void
+Hdf5CragStore::upgradeLayout() {
+
+	int version = _layoutVersion;
+	_layoutVersion = CurrentLayoutVersion;
+
+	LOG_USER(hdf5storelog) << "reading CRAG" << std::endl;
+
+	Crag crag;
+	retrieveCrag(crag);
+
+	LOG_USER(hdf5storelog) << "rewriting CRAG" << std::endl;
+
+	saveCrag(crag);
+
+	bool hasVolumes = true;
+	try {
+
+		_hdfFile.cd("/crag/volumes");
+
+	} catch (vigra::PreconditionViolation& e) {
+
+		hasVolumes = false;
+	}
+
+	if (hasVolumes) {
+
+		LOG_USER(hdf5storelog) << "rewriting volumes" << std::endl;
+
+		// keep the encoding of the stored volumes
+		bool runLength = storedVolumesAreRunLengthEncoded();
+
+		CragVolumes volumes(crag);
+		readVolumes(
+				volumes,
+				[](int, const util::box<float, 3>&) { return true; },
+				runLength);
+		writeVolumes(volumes, runLength);
+	}
+
+	bool hasFeatures = true;
+	try {
+
+		_hdfFile.cd("/crag/features");
+
+	} catch (vigra::PreconditionViolation& e) {
+
+		hasFeatures = false;
+	}
+
+	if (hasFeatures) {
+
+		LOG_USER(hdf5storelog) << "rewriting features" << std::endl;
+
+		NodeFeatures nodeFeatures(crag);
+		EdgeFeatures edgeFeatures(crag);
+		retrieveNodeFeatures(crag, nodeFeatures);
+		retrieveEdgeFeatures(crag, edgeFeatures);
+		saveNodeFeatures(crag, nodeFeatures);
+		saveEdgeFeatures(crag, edgeFeatures);
+	}
+
+	_layoutVersion = version;
+}
+
+template <unsigned int N, typename T>
+void
+Hdf5CragStore::writeDataset(
+		std::string                                 name,
+		const vigra::MultiArrayView<N, T>&          data,
+		typename vigra::MultiArrayShape<N>::type    chunkShape) {
+
+	if (_layoutVersion < 2 || data.size() == 0) {
+
+		_hdfFile.write(name, data);
+		return;
+	}
+
+	// chunks must not be larger than the dataset
+	for (unsigned int d = 0; d < N; d++)
+		chunkShape[d] = std::min(chunkShape[d], data.shape(d));
+
+	_hdfFile.write(name, data, chunkShape, _compressionLevel);
+}
+
 void
 Hdf5CragStore::saveCrag(const Crag& crag) {
 
@@ -71,22 +288,80 @@ Hdf5CragStore::saveCrag(const Crag& crag) {
 	}
 	LOG_USER(hdf5storelog) << logger::delline << numEdges << " affiliated egde lists prepared" << std::endl;
 
-	if (aeIds.size() == 0)
+	if (aeIds.size() > 0) {
+
+		LOG_USER(hdf5storelog) << "writing affiliated edge lists..." << std::flush;
+		writeDataset(
+				"list",
+				vigra::MultiArrayView<1, int>(vigra::Shape1(aeIds.size()), &aeIds[0]),
+				vigra::Shape1(AffiliatedEdgeChunkSize));
+		LOG_USER(hdf5storelog) << " done." << std::endl;
+	}
+
+	writeCragSnapshot(crag);
+}
+
+void
+Hdf5CragStore::writeCragSnapshot(const Crag& crag) {
+
+	// a new token for every saved CRAG invalidates previous snapshots, even if 
+	// no new snapshot is written
+	std::random_device random;
+	std::uint64_t token = (static_cast<std::uint64_t>(random()) << 32) | random();
+
+	_hdfFile.writeAttribute("/crag", "snapshot_token", boost::lexical_cast<std::string>(token));
+
+	if (optionNoCragSnapshot)
 		return;
 
-	LOG_USER(hdf5storelog) << "writing affiliated edge lists..." << std::flush;
-	_hdfFile.write(
-			"list",
-			vigra::ArrayVectorView<int>(aeIds.size(), const_cast<int*>(&aeIds[0])));
+	if (!CragSnapshot::canWrite(crag)) {
+
+		LOG_USER(hdf5storelog)
+				<< "node ids of CRAG are not consecutive, not writing a snapshot"
+				<< std::endl;
+		return;
+	}
+
+	LOG_USER(hdf5storelog) << "writing CRAG snapshot..." << std::flush;
+	CragSnapshot::write(crag, getCragSnapshotFile(), token);
 	LOG_USER(hdf5storelog) << " done." << std::endl;
 }
 
+bool
+Hdf5CragStore::readCragSnapshot(Crag& crag) {
+
+	if (optionNoCragSnapshot)
+		return false;
+
+	if (!_hdfFile.existsAttribute("/crag", "snapshot_token"))
+		return false;
+
+	std::string token;
+	_hdfFile.readAttribute("/crag", "snapshot_token", token);
+
+	try {
+
+		return CragSnapshot::read(crag, getCragSnapshotFile(), boost::lexical_cast<std::uint64_t>(token));
+
+	} catch (IOError& e) {
+
+		LOG_USER(hdf5storelog)
+				<< "could not read CRAG snapshot, reading CRAG from project file" << std::endl;
+		if (boost::get_error_info<error_message>(e))
+			LOG_USER(hdf5storelog) << *boost::get_error_info<error_message>(e) << std::endl;
+		return false;
+	}
+}
+
 void
 Hdf5CragStore::retrieveCrag(Crag& crag) {
 
 	_hdfFile.root();
 	_hdfFile.cd("crag");
 
+	if (readCragSnapshot(crag))
+		return;
+
 	_hdfFile.cd("adjacencies");
 	readGraph(crag.getAdjacencyGraph());
 
@@ -176,9 +451,34 @@ Hdf5CragStore::retrieveCrag(Crag& crag) {
 void
 Hdf5CragStore::saveVolumes(const CragVolumes& volumes) {
 
+	writeVolumes(volumes, _runLengthVolumes);
+}
+
+void
+Hdf5CragStore::writeVolumes(const CragVolumes& volumes, bool runLength) {
+
+	// remove previously stored volumes, such that datasets of another layout 
+	// or encoding (that are not necessarily written again, e.g., if there are 
+	// no volumes) are not mistaken for the new ones
+	remove("/crag/volumes");
+
 	_hdfFile.cd_mk("/crag");
 	_hdfFile.cd_mk("volumes");
 
+	if (_layoutVersion >= 2)
+		saveIndexedVolumes(volumes, runLength);
+	else if (runLength)
+		saveRunLengthVolumes(volumes);
+	else
+		saveDenseVolumes(volumes);
+
+	_hdfFile.writeAttribute("/crag/volumes", "layout_version", (_layoutVersion >= 2 ? 2 : 1));
+	_hdfFile.writeAttribute("/crag/volumes", "run_length_encoded", (runLength ? 1 : 0));
+}
+
+void
+Hdf5CragStore::saveDenseVolumes(const CragVolumes& volumes) {
+
 	std::vector<unsigned char> serialized;
 	std::vector<int> meta;
 	std::vector<float> offsets;
@@ -194,7 +494,8 @@ Hdf5CragStore::saveVolumes(const CragVolumes& volumes) {
 		if (numNodes%100 == 0)
 			LOG_USER(hdf5storelog) << logger::delline << numNodes << " node volumes prepared for writing" << std::flush;
 
-		const CragVolume& volume = *volumes[n];
+		std::shared_ptr<CragVolume> volumePtr = volumes[n];
+		const CragVolume& volume = *volumePtr;
 		meta.push_back(volumes.getCrag().id(n));
 		meta.push_back(volume.width());
 		meta.push_back(volume.height());
@@ -233,10 +534,75 @@ Hdf5CragStore::saveVolumes(const CragVolumes& volumes) {
 void
 Hdf5CragStore::retrieveVolumes(CragVolumes& volumes) {
 
+	readVolumes(
+			volumes,
+			[](int, const util::box<float, 3>&) { return true; },
+			_runLengthVolumes);
+}
+
+void
+Hdf5CragStore::retrieveVolumes(CragVolumes& volumes, const std::vector<Crag::CragNode>& nodes) {
+
+	const Crag& crag = volumes.getCrag();
+
+	// only leaf node volumes are stored
+	std::set<int> leafIds;
+	for (Crag::CragNode n : nodes) {
+
+		if (crag.isLeafNode(n))
+			leafIds.insert(crag.id(n));
+		else
+			for (Crag::CragNode l : crag.leafNodes(n))
+				leafIds.insert(crag.id(l));
+	}
+
+	readVolumes(
+			volumes,
+			[&leafIds](int id, const util::box<float, 3>&) { return leafIds.count(id) > 0; },
+			_runLengthVolumes);
+}
+
+void
+Hdf5CragStore::retrieveVolumes(CragVolumes& volumes, const util::box<float, 3>& roi) {
+
+	readVolumes(
+			volumes,
+			[&roi](int, const util::box<float, 3>& boundingBox) { return boundingBox.intersects(roi); },
+			_runLengthVolumes);
+}
+
+void
+Hdf5CragStore::readVolumes(CragVolumes& volumes, const VolumeFilter& filter, bool toRunLength) {
+
 	_hdfFile.root();
 	_hdfFile.cd("/crag");
 	_hdfFile.cd("volumes");
 
+	if (getStoredVolumesLayoutVersion() >= 2)
+		retrieveIndexedVolumes(volumes, filter, toRunLength);
+	else if (storedVolumesAreRunLengthEncoded())
+		retrieveRunLengthVolumes(volumes, filter);
+	else
+		retrieveDenseVolumes(volumes, filter, toRunLength);
+}
+
+bool
+Hdf5CragStore::storedVolumesAreRunLengthEncoded() {
+
+	// files written before the attribute was introduced have only a "runs" 
+	// dataset
+	if (!_hdfFile.existsAttribute("/crag/volumes", "run_length_encoded"))
+		return _hdfFile.existsDataset("runs");
+
+	int runLength;
+	_hdfFile.readAttribute("/crag/volumes", "run_length_encoded", runLength);
+
+	return runLength;
+}
+
+void
+Hdf5CragStore::retrieveDenseVolumes(CragVolumes& volumes, const VolumeFilter& filter, bool toRunLength) {
+
 	vigra::MultiArray<1, unsigned char> serialized;
 	vigra::MultiArray<1, int> meta;
 	vigra::MultiArray<1, float> offsets;
@@ -276,13 +642,439 @@ Hdf5CragStore::retrieveVolumes(CragVolumes& volumes) {
 		z = offsets[oi++];
 		volume->setOffset(x, y, z);
 
+		// this layout has no index, all volumes are read and filtered 
+		// afterwards
+		if (!filter(id, volume->getBoundingBox()))
+			continue;
+
 		Crag::Node n = volumes.getCrag().nodeFromId(id);
-		volumes.setVolume(n, volume);
+		if (toRunLength)
+			volumes.setVolume(n, std::make_shared<RunLengthVolume>(*volume));
+		else
+			volumes.setVolume(n, volume);
 
 		UTIL_ASSERT(!volume->getBoundingBox().isZero());
 	}
 }
 
+void
+Hdf5CragStore::saveRunLengthVolumes(const CragVolumes& volumes) {
+
+	std::vector<int> runs;
+	std::vector<int> meta;
+	std::vector<float> offsets;
+	std::vector<float> resolutions;
+
+	int numNodes = 0;
+	for (Crag::NodeIt n(volumes.getCrag()); n != lemon::INVALID; ++n) {
+
+		// only store leaf node volumes
+		if (!volumes.getCrag().isLeafNode(n))
+			continue;
+
+		if (numNodes%100 == 0)
+			LOG_USER(hdf5storelog) << logger::delline << numNodes << " node volumes prepared for writing" << std::flush;
+
+		const RunLengthVolume& volume = *volumes.getRunLengthVolume(n);
+		meta.push_back(volumes.getCrag().id(n));
+		meta.push_back(volume.getDiscreteBoundingBox().width());
+		meta.push_back(volume.getDiscreteBoundingBox().height());
+		meta.push_back(volume.getDiscreteBoundingBox().depth());
+		meta.push_back(volume.runs().size());
+		offsets.push_back(volume.getOffset().x());
+		offsets.push_back(volume.getOffset().y());
+		offsets.push_back(volume.getOffset().z());
+		resolutions.push_back(volume.getResolution().x());
+		resolutions.push_back(volume.getResolution().y());
+		resolutions.push_back(volume.getResolution().z());
+
+		for (const RunLengthVolume::Run& run : volume.runs()) {
+
+			runs.push_back(run.x);
+			runs.push_back(run.y);
+			runs.push_back(run.z);
+			runs.push_back(run.length);
+		}
+
+		numNodes++;
+	}
+
+	LOG_USER(hdf5storelog) << logger::delline << numNodes << " node volumes prepared for writing" << std::endl;
+
+	LOG_USER(hdf5storelog) << "writing run-length encoded node volumes... " << std::flush;
+
+	// write at least one element, in case all volumes are empty; pad with a
+	// whole (unreferenced) run, such that the dataset stays a multiple of four
+	if (runs.size() == 0)
+		runs.assign(4, 0);
+
+	_hdfFile.write(
+			"runs",
+			vigra::ArrayVectorView<int>(runs.size(), const_cast<int*>(&runs[0])));
+	_hdfFile.write(
+			"meta",
+			vigra::ArrayVectorView<int>(meta.size(), const_cast<int*>(&meta[0])));
+	_hdfFile.write(
+			"offsets",
+			vigra::ArrayVectorView<float>(offsets.size(), const_cast<float*>(&offsets[0])));
+	_hdfFile.write(
+			"resolutions",
+			vigra::ArrayVectorView<float>(resolutions.size(), const_cast<float*>(&resolutions[0])));
+
+	LOG_USER(hdf5storelog) << "done." << std::endl;
+}
+
+void
+Hdf5CragStore::retrieveRunLengthVolumes(CragVolumes& volumes, const VolumeFilter& filter) {
+
+	vigra::MultiArray<1, int> runs;
+	vigra::MultiArray<1, int> meta;
+	vigra::MultiArray<1, float> offsets;
+	vigra::MultiArray<1, float> resolutions;
+
+	_hdfFile.readAndResize("runs", runs);
+	_hdfFile.readAndResize("meta", meta);
+	_hdfFile.readAndResize("offsets", offsets);
+	_hdfFile.readAndResize("resolutions", resolutions);
+
+	UTIL_ASSERT_REL(runs.size() % 4, ==, 0);
+	UTIL_ASSERT_REL(meta.size() % 5, ==, 0);
+	UTIL_ASSERT_REL(offsets.size() % 3, ==, 0);
+	UTIL_ASSERT_REL(resolutions.size() % 3, ==, 0);
+	UTIL_ASSERT_REL(meta.size()/5, ==, offsets.size()/3);
+	UTIL_ASSERT_REL(meta.size()/5, ==, resolutions.size()/3);
+
+	std::size_t ri = 0;
+	std::size_t oi = 0;
+	std::size_t si = 0;
+	for (int i = 0; i < meta.size();) {
+
+		int id = meta[i++];
+		int width = meta[i++];
+		int height = meta[i++];
+		int depth = meta[i++];
+		int numRuns = meta[i++];
+
+		std::vector<RunLengthVolume::Run> volumeRuns(numRuns);
+		for (RunLengthVolume::Run& run : volumeRuns) {
+
+			run.x      = runs[ri++];
+			run.y      = runs[ri++];
+			run.z      = runs[ri++];
+			run.length = runs[ri++];
+		}
+
+		std::shared_ptr<RunLengthVolume> volume = std::make_shared<RunLengthVolume>(
+				width, height, depth,
+				std::move(volumeRuns));
+
+		float x = resolutions[si++];
+		float y = resolutions[si++];
+		float z = resolutions[si++];
+		volume->setResolution(util::point<float, 3>(x, y, z));
+		x = offsets[oi++];
+		y = offsets[oi++];
+		z = offsets[oi++];
+		volume->setOffset(util::point<float, 3>(x, y, z));
+
+		if (!filter(id, volume->getBoundingBox()))
+			continue;
+
+		Crag::Node n = volumes.getCrag().nodeFromId(id);
+		volumes.setVolume(n, volume);
+	}
+}
+
+void
+Hdf5CragStore::saveIndexedVolumes(const CragVolumes& volumes, bool runLength) {
+
+	const Crag& crag = volumes.getCrag();
+
+	std::vector<Crag::CragNode> leafNodes;
+	for (Crag::CragNode n : crag.nodes())
+		if (crag.isLeafNode(n))
+			leafNodes.push_back(n);
+
+	vigra::MultiArrayIndex numVolumes = leafNodes.size();
+
+	// one column per volume
+	vigra::MultiArray<2, long long> index(vigra::Shape2(NumIndexColumns, numVolumes));
+	vigra::MultiArray<2, float>     offsets(vigra::Shape2(3, numVolumes));
+	vigra::MultiArray<2, float>     resolutions(vigra::Shape2(3, numVolumes));
+
+	// first pass: find the position of each volume in the volume data
+
+	long long start = 0;
+	for (vigra::MultiArrayIndex i = 0; i < numVolumes; i++) {
+
+		Crag::CragNode n = leafNodes[i];
+
+		long long length;
+		util::point<unsigned int, 3> size;
+		util::point<float, 3> offset;
+		util::point<float, 3> resolution;
+
+		if (runLength) {
+
+			std::shared_ptr<RunLengthVolume> volume = volumes.getRunLengthVolume(n);
+			const util::box<unsigned int, 3>& dbb = volume->getDiscreteBoundingBox();
+
+			length     = volume->runs().size();
+			size       = util::point<unsigned int, 3>(dbb.width(), dbb.height(), dbb.depth());
+			offset     = volume->getOffset();
+			resolution = volume->getResolution();
+
+		} else {
+
+			std::shared_ptr<CragVolume> volume = volumes[n];
+
+			length     = volume->data().size();
+			size       = util::point<unsigned int, 3>(volume->width(), volume->height(), volume->depth());
+			offset     = volume->getOffset();
+			resolution = volume->getResolution();
+		}
+
+		index(IndexId,     i) = crag.id(n);
+		index(IndexWidth,  i) = size.x();
+		index(IndexHeight, i) = size.y();
+		index(IndexDepth,  i) = size.z();
+		index(IndexStart,  i) = start;
+		index(IndexLength, i) = length;
+
+		for (int d = 0; d < 3; d++) {
+
+			offsets(d, i)     = offset[d];
+			resolutions(d, i) = resolution[d];
+		}
+
+		start += length;
+	}
+
+	// second pass: write the volume data in blocks
+
+	LOG_USER(hdf5storelog) << "writing " << numVolumes << " indexed node volumes... " << std::flush;
+
+	// datasets have at least one element, in case all volumes are empty
+	vigra::MultiArrayIndex total = std::max(start, 1LL);
+
+	if (runLength) {
+
+		_hdfFile.createDataset<2, int>(
+				"runs",
+				vigra::Shape2(4, total),
+				0,
+				vigra::Shape2(4, std::min(total, RunsChunkSize)),
+				_compressionLevel);
+
+		std::vector<int> buffer;
+		vigra::MultiArrayIndex bufferStart = 0;
+
+		auto flush = [&]() {
+
+			if (buffer.empty())
+				return;
+
+			vigra::MultiArrayView<2, int> block(vigra::Shape2(4, buffer.size()/4), &buffer[0]);
+			_hdfFile.writeBlock("runs", vigra::Shape2(0, bufferStart), block);
+			bufferStart += buffer.size()/4;
+			buffer.clear();
+		};
+
+		for (Crag::CragNode n : leafNodes) {
+
+			for (const RunLengthVolume::Run& run : volumes.getRunLengthVolume(n)->runs()) {
+
+				buffer.push_back(run.x);
+				buffer.push_back(run.y);
+				buffer.push_back(run.z);
+				buffer.push_back(run.length);
+			}
+
+			if (static_cast<vigra::MultiArrayIndex>(buffer.size()/4) >= RunsWriteBufferSize)
+				flush();
+		}
+		flush();
+
+	} else {
+
+		_hdfFile.createDataset<1, unsigned char>(
+				"serialized",
+				vigra::Shape1(total),
+				0,
+				vigra::Shape1(std::min(total, VolumeChunkSize)),
+				_compressionLevel);
+
+		std::vector<unsigned char> buffer;
+		vigra::MultiArrayIndex bufferStart = 0;
+
+		auto flush = [&]() {
+
+			if (buffer.empty())
+				return;
+
+			vigra::MultiArrayView<1, unsigned char> block(vigra::Shape1(buffer.size()), &buffer[0]);
+			_hdfFile.writeBlock("serialized", vigra::Shape1(bufferStart), block);
+			bufferStart += buffer.size();
+			buffer.clear();
+		};
+
+		for (Crag::CragNode n : leafNodes) {
+
+			std::shared_ptr<CragVolume> volume = volumes[n];
+			std::copy(volume->data().begin(), volume->data().end(), std::back_inserter(buffer));
+
+			if (static_cast<vigra::MultiArrayIndex>(buffer.size()) >= VolumeWriteBufferSize)
+				flush();
+		}
+		flush();
+	}
+
+	if (numVolumes > 0) {
+
+		writeDataset("meta", index, vigra::Shape2(NumIndexColumns, FeaturesChunkSize));
+		writeDataset("offsets", offsets, vigra::Shape2(3, FeaturesChunkSize));
+		writeDataset("resolutions", resolutions, vigra::Shape2(3, FeaturesChunkSize));
+	}
+
+	LOG_USER(hdf5storelog) << "done." << std::endl;
+}
+
+void
+Hdf5CragStore::retrieveIndexedVolumes(CragVolumes& volumes, const VolumeFilter& filter, bool toRunLength) {
+
+	bool runLengthEncoded = storedVolumesAreRunLengthEncoded();
+
+	if (!_hdfFile.existsDataset("meta"))
+		return;
+
+	vigra::MultiArray<2, long long> index;
+	vigra::MultiArray<2, float>     offsets;
+	vigra::MultiArray<2, float>     resolutions;
+
+	_hdfFile.readAndResize("meta", index);
+	_hdfFile.readAndResize("offsets", offsets);
+	_hdfFile.readAndResize("resolutions", resolutions);
+
+	UTIL_ASSERT_REL(index.shape(0), ==, NumIndexColumns);
+	UTIL_ASSERT_REL(index.shape(1), ==, offsets.shape(1));
+	UTIL_ASSERT_REL(index.shape(1), ==, resolutions.shape(1));
+
+	// select the volumes to read, in the order of their data
+
+	std::vector<vigra::MultiArrayIndex> selected;
+	for (vigra::MultiArrayIndex i = 0; i < index.shape(1); i++) {
+
+		util::point<float, 3> offset(offsets(0, i), offsets(1, i), offsets(2, i));
+		util::point<float, 3> size(
+				index(IndexWidth,  i)*resolutions(0, i),
+				index(IndexHeight, i)*resolutions(1, i),
+				index(IndexDepth,  i)*resolutions(2, i));
+
+		if (filter(index(IndexId, i), util::box<float, 3>(offset, offset + size)))
+			selected.push_back(i);
+	}
+
+	vigra::MultiArrayIndex maxGap = (runLengthEncoded ? RunsReadMaxGap : VolumeReadMaxGap);
+
+	int numRanges = 0;
+
+	// read ranges of the volume data that contain selected volumes close to 
+	// each other, such that only the chunks of these volumes are decompressed
+	for (std::size_t begin = 0; begin < selected.size();) {
+
+		long long rangeStart = index(IndexStart, selected[begin]);
+		long long rangeEnd   = rangeStart + index(IndexLength, selected[begin]);
+
+		std::size_t end = begin + 1;
+		while (end < selected.size() && index(IndexStart, selected[end]) <= rangeEnd + maxGap) {
+
+			rangeEnd = index(IndexStart, selected[end]) + index(IndexLength, selected[end]);
+			end++;
+		}
+
+		vigra::MultiArrayIndex rangeLength = rangeEnd - rangeStart;
+
+		vigra::MultiArray<1, unsigned char> data;
+		vigra::MultiArray<2, int>           runs;
+
+		if (rangeLength > 0) {
+
+			if (runLengthEncoded) {
+
+				runs.reshape(vigra::Shape2(4, rangeLength));
+				_hdfFile.readBlock("runs", vigra::Shape2(0, rangeStart), vigra::Shape2(4, rangeLength), runs);
+
+			} else {
+
+				data.reshape(vigra::Shape1(rangeLength));
+				_hdfFile.readBlock("serialized", vigra::Shape1(rangeStart), vigra::Shape1(rangeLength), data);
+			}
+		}
+
+		for (std::size_t s = begin; s < end; s++) {
+
+			vigra::MultiArrayIndex i = selected[s];
+
+			int id     = index(IndexId,     i);
+			int width  = index(IndexWidth,  i);
+			int height = index(IndexHeight, i);
+			int depth  = index(IndexDepth,  i);
+
+			vigra::MultiArrayIndex first  = index(IndexStart,  i) - rangeStart;
+			vigra::MultiArrayIndex length = index(IndexLength, i);
+
+			util::point<float, 3> offset(offsets(0, i), offsets(1, i), offsets(2, i));
+			util::point<float, 3> resolution(resolutions(0, i), resolutions(1, i), resolutions(2, i));
+
+			Crag::Node n = volumes.getCrag().nodeFromId(id);
+
+			if (runLengthEncoded) {
+
+				std::vector<RunLengthVolume::Run> volumeRuns(length);
+				for (vigra::MultiArrayIndex r = 0; r < length; r++) {
+
+					volumeRuns[r].x      = runs(0, first + r);
+					volumeRuns[r].y      = runs(1, first + r);
+					volumeRuns[r].z      = runs(2, first + r);
+					volumeRuns[r].length = runs(3, first + r);
+				}
+
+				std::shared_ptr<RunLengthVolume> volume = std::make_shared<RunLengthVolume>(
+						width, height, depth,
+						std::move(volumeRuns));
+				volume->setResolution(resolution);
+				volume->setOffset(offset);
+
+				volumes.setVolume(n, volume);
+
+			} else {
+
+				std::shared_ptr<CragVolume> volume = std::make_shared<CragVolume>(width, height, depth);
+				std::copy(
+						data.begin() + first,
+						data.begin() + first + length,
+						volume->data().begin());
+				volume->setResolution(resolution.x(), resolution.y(), resolution.z());
+				volume->setOffset(offset.x(), offset.y(), offset.z());
+
+				if (toRunLength)
+					volumes.setVolume(n, std::make_shared<RunLengthVolume>(*volume));
+				else
+					volumes.setVolume(n, volume);
+
+				UTIL_ASSERT(!volume->getBoundingBox().isZero());
+			}
+		}
+
+		numRanges++;
+		begin = end;
+	}
+
+	LOG_DEBUG(hdf5storelog)
+			<< "read " << selected.size() << " of " << index.shape(1)
+			<< " volumes in " << numRanges << " ranges" << std::endl;
+}
+
 void
 Hdf5CragStore::saveNodeFeatures(const Crag& crag, const NodeFeatures& features) {
 
@@ -294,31 +1086,33 @@ Hdf5CragStore::saveNodeFeatures(const Crag& crag, const NodeFeatures& features)
 
 	for (Crag::NodeType type : Crag::NodeTypes) {
 
-		int numNodes = 0;
-		for (Crag::CragNode n : crag.nodes())
-			if (crag.type(n) == type)
-				numNodes++;
+		const NodeFeatures::FeaturesType& typeFeatures = features.getFeatures(type);
+
+		int numNodes = typeFeatures.size();
 
 		if (numNodes == 0)
 			continue;
 
-		vigra::MultiArray<2, double> allFeatures(vigra::Shape2(features.dims(type) + 1, numNodes));
+		unsigned int dims = typeFeatures.dims();
 
-		int nodeNum = 0;
-		for (Crag::CragNode n : crag.nodes()) {
+		// one column per node, starting with the node id
+		vigra::MultiArray<2, double> allFeatures(vigra::Shape2(dims + 1, numNodes));
 
-			if (crag.type(n) != type)
-				continue;
+		for (int i = 0; i < numNodes; i++) {
+
+			const double* f = typeFeatures.data() + i*typeFeatures.getStride();
 
-			allFeatures(0, nodeNum) = crag.id(n);
+			allFeatures(0, i) = typeFeatures.getIds()[i];
 			std::copy(
-					features[n].begin(),
-					features[n].end(),
-					allFeatures.bind<1>(nodeNum).begin() + 1);
-			nodeNum++;
+					f,
+					f + dims,
+					allFeatures.bind<1>(i).begin() + 1);
 		}
 
-		_hdfFile.write(std::string("nodes_") + boost::lexical_cast<std::string>(type), allFeatures);
+		writeDataset(
+				std::string("nodes_") + boost::lexical_cast<std::string>(type),
+				allFeatures,
+				vigra::Shape2(dims + 1, FeaturesChunkSize));
 	}
 
 	LOG_USER(hdf5storelog) << "done." << std::endl;
@@ -343,18 +1137,19 @@ Hdf5CragStore::retrieveNodeFeatures(const Crag& crag, NodeFeatures& features) {
 		int dims     = allFeatures.shape(0) - 1;
 		int numNodes = allFeatures.shape(1);
 
-		for (int i = 0; i < numNodes; i++) {
+		std::vector<int>    ids(numNodes);
+		std::vector<double> matrix(static_cast<std::size_t>(numNodes)*dims);
 
-			Crag::CragNode n = crag.nodeFromId(allFeatures(0, i));
+		for (int i = 0; i < numNodes; i++) {
 
-			std::vector<double> f;
-			f.resize(dims);
+			ids[i] = allFeatures(0, i);
 			std::copy(
 					allFeatures.bind<1>(i).begin() + 1,
 					allFeatures.bind<1>(i).end(),
-					f.begin());
-			features.set(n, f);
+					matrix.begin() + static_cast<std::size_t>(i)*dims);
 		}
+
+		features.set(type, ids, std::move(matrix), dims);
 	}
 }
 
@@ -369,32 +1164,35 @@ Hdf5CragStore::saveEdgeFeatures(const Crag& crag, const EdgeFeatures& features)
 
 	for (Crag::EdgeType type : Crag::EdgeTypes) {
 
-		int numEdges = 0;
-		for (Crag::CragEdge e : crag.edges())
-			if (crag.type(e) == type)
-				numEdges++;
+		const EdgeFeatures::FeaturesType& typeFeatures = features.getFeatures(type);
+
+		int numEdges = typeFeatures.size();
 
 		if (numEdges == 0)
 			continue;
 
-		vigra::MultiArray<2, double> allFeatures(vigra::Shape2(features.dims(type) + 2, numEdges));
+		unsigned int dims = typeFeatures.dims();
 
-		int edgeNum = 0;
-		for (Crag::CragEdge e : crag.edges()) {
+		// one column per edge, starting with the ids of the incident nodes
+		vigra::MultiArray<2, double> allFeatures(vigra::Shape2(dims + 2, numEdges));
 
-			if (crag.type(e) != type)
-				continue;
+		for (int i = 0; i < numEdges; i++) {
 
-			allFeatures(0, edgeNum) = crag.id(e.u());
-			allFeatures(1, edgeNum) = crag.id(e.v());
+			Crag::CragEdge e = crag.edgeFromId(typeFeatures.getIds()[i]);
+			const double*  f = typeFeatures.data() + i*typeFeatures.getStride();
+
+			allFeatures(0, i) = crag.id(e.u());
+			allFeatures(1, i) = crag.id(e.v());
 			std::copy(
-					features[e].begin(),
-					features[e].end(),
-					allFeatures.bind<1>(edgeNum).begin() + 2);
-			edgeNum++;
+					f,
+					f + dims,
+					allFeatures.bind<1>(i).begin() + 2);
 		}
 
-		_hdfFile.write(std::string("edges_") + boost::lexical_cast<std::string>(type), allFeatures);
+		writeDataset(
+				std::string("edges_") + boost::lexical_cast<std::string>(type),
+				allFeatures,
+				vigra::Shape2(dims + 2, FeaturesChunkSize));
 	}
 
 	LOG_USER(hdf5storelog) << "done." << std::endl;
@@ -419,6 +1217,9 @@ Hdf5CragStore::retrieveEdgeFeatures(const Crag& crag, EdgeFeatures& features) {
 		int dims     = allFeatures.shape(0) - 2;
 		int numEdges = allFeatures.shape(1);
 
+		std::vector<int>    ids(numEdges);
+		std::vector<double> matrix(static_cast<std::size_t>(numEdges)*dims);
+
 		for (int i = 0; i < numEdges; i++) {
 
 			Crag::CragNode u = crag.nodeFromId(allFeatures(0, i));
@@ -434,14 +1235,14 @@ Hdf5CragStore::retrieveEdgeFeatures(const Crag& crag, EdgeFeatures& features) {
 						IOError,
 						"can not find edge for nodes " << crag.id(u) << " and " << crag.id(v));
 
-			std::vector<double> f;
-			f.resize(dims);
+			ids[i] = crag.id(*e);
 			std::copy(
 					allFeatures.bind<1>(i).begin() + 2,
 					allFeatures.bind<1>(i).end(),
-					f.begin());
-			features.set(*e, f);
+					matrix.begin() + static_cast<std::size_t>(i)*dims);
 		}
+
+		features.set(type, ids, std::move(matrix), dims);
 	}
 }
 
@@ -770,6 +1571,287 @@ Hdf5CragStore::getSolutionNames() {
 	}
 }
 
+void
+Hdf5CragStore::saveCycleConstraints(
+		const Crag&                crag,
+		const CycleConstraintPool& pool) {
+
+	// the pool replaces previously stored constraints, even if it is empty 
+	// (e.g., after all constraints have been evicted)
+	remove("/crag/cycle_constraints");
+
+	if (pool.size() == 0)
+		return;
+
+	_hdfFile.root();
+	_hdfFile.cd_mk("crag");
+	_hdfFile.cd_mk("cycle_constraints");
+
+	// incident nodes by edge id
+	std::vector<int> u(crag.getAdjacencyGraph().maxEdgeId() + 1);
+	std::vector<int> v(crag.getAdjacencyGraph().maxEdgeId() + 1);
+	for (Crag::CragEdge e : crag.edges()) {
+
+		u[crag.id(e)] = crag.id(e.u());
+		v[crag.id(e)] = crag.id(e.v());
+	}
+
+	// for each cycle, the incident nodes of the cut edge followed by the ones 
+	// of the path edges
+	std::vector<int> edges;
+	std::vector<int> lengths;
+	std::vector<int> ages;
+
+	for (const CycleConstraintPool::Cycle& cycle : pool.getCycles()) {
+
+		edges.push_back(u[cycle.cutEdge]);
+		edges.push_back(v[cycle.cutEdge]);
+
+		for (int id : cycle.pathEdges) {
+
+			edges.push_back(u[id]);
+			edges.push_back(v[id]);
+		}
+
+		lengths.push_back(cycle.pathEdges.size());
+		ages.push_back(pool.getAge(cycle));
+	}
+
+	_hdfFile.write(
+			"edges",
+			vigra::ArrayVectorView<int>(edges.size(), const_cast<int*>(&edges[0])));
+	_hdfFile.write(
+			"lengths",
+			vigra::ArrayVectorView<int>(lengths.size(), const_cast<int*>(&lengths[0])));
+	_hdfFile.write(
+			"ages",
+			vigra::ArrayVectorView<int>(ages.size(), const_cast<int*>(&ages[0])));
+}
+
+void
+Hdf5CragStore::retrieveCycleConstraints(
+		const Crag&          crag,
+		CycleConstraintPool& pool) {
+
+	try {
+
+		_hdfFile.cd("/crag/cycle_constraints");
+
+	} catch (vigra::PreconditionViolation& e) {
+
+		return;
+	}
+
+	vigra::ArrayVector<int> edges;
+	vigra::ArrayVector<int> lengths;
+	vigra::ArrayVector<int> ages;
+	_hdfFile.readAndResize("edges", edges);
+	_hdfFile.readAndResize("lengths", lengths);
+	_hdfFile.readAndResize("ages", ages);
+
+	// find edges by their incident nodes
+	std::map<std::pair<int, int>, int> edgeIds;
+	for (Crag::CragEdge e : crag.edges()) {
+
+		edgeIds[std::make_pair(crag.id(e.u()), crag.id(e.v()))] = crag.id(e);
+		edgeIds[std::make_pair(crag.id(e.v()), crag.id(e.u()))] = crag.id(e);
+	}
+
+	auto edgeId = [&](int i) -> int {
+
+		auto it = edgeIds.find(std::make_pair(edges[2*i], edges[2*i + 1]));
+		if (it == edgeIds.end())
+			UTIL_THROW_EXCEPTION(
+					IOError,
+					"stored cycle constraint refers to unknown edge (" << edges[2*i] << ", " << edges[2*i + 1] << ")");
+		return it->second;
+	};
+
+	int next = 0;
+	for (unsigned int i = 0; i < lengths.size(); i++) {
+
+		int cutEdge = edgeId(next++);
+
+		std::vector<int> pathEdges;
+		for (int j = 0; j < lengths[i]; j++)
+			pathEdges.push_back(edgeId(next++));
+
+		pool.add(cutEdge, pathEdges, ages[i]);
+	}
+
+	LOG_USER(hdf5storelog) << "read " << lengths.size() << " cycle constraints" << std::endl;
+}
+
+void
+Hdf5CragStore::saveGroundTruthOverlaps(
+		const Crag&                crag,
+		const GroundTruthOverlaps& overlaps) {
+
+	// for each leaf node, the number of labels followed by the labels and 
+	// counts
+	std::vector<int> nodes;
+	std::vector<int> lengths;
+	std::vector<int> labels;
+	std::vector<int> counts;
+
+	for (Crag::CragNode n : crag.nodes()) {
+
+		if (!crag.isLeafNode(n) || overlaps[n].empty())
+			continue;
+
+		nodes.push_back(crag.id(n));
+		lengths.push_back(overlaps[n].size());
+
+		for (const auto& p : overlaps[n]) {
+
+			labels.push_back(p.first);
+			counts.push_back(p.second);
+		}
+	}
+
+	std::vector<int> gtLabels;
+	std::vector<int> gtSizes;
+	for (const auto& p : overlaps.getGroundTruthSizes()) {
+
+		gtLabels.push_back(p.first);
+		gtSizes.push_back(p.second);
+	}
+
+	// remove previously stored tables, which would otherwise be mistaken for 
+	// the tables of the current CRAG
+	remove("/crag/gt_overlaps");
+
+	if (nodes.size() == 0 || gtLabels.size() == 0)
+		return;
+
+	_hdfFile.root();
+	_hdfFile.cd_mk("crag");
+	_hdfFile.cd_mk("gt_overlaps");
+
+	// identify the CRAG the tables have been computed for
+	if (_hdfFile.existsAttribute("/crag", "snapshot_token")) {
+
+		std::string token;
+		_hdfFile.readAttribute("/crag", "snapshot_token", token);
+		_hdfFile.writeAttribute("/crag/gt_overlaps", "crag_token", token);
+	}
+	_hdfFile.writeAttribute("/crag/gt_overlaps", "crag_checksum", cragChecksum(crag));
+	_hdfFile.writeAttribute("/crag/gt_overlaps", "num_nodes", static_cast<int>(crag.numNodes()));
+
+	_hdfFile.write(
+			"nodes",
+			vigra::ArrayVectorView<int>(nodes.size(), const_cast<int*>(&nodes[0])));
+	_hdfFile.write(
+			"lengths",
+			vigra::ArrayVectorView<int>(lengths.size(), const_cast<int*>(&lengths[0])));
+	_hdfFile.write(
+			"labels",
+			vigra::ArrayVectorView<int>(labels.size(), const_cast<int*>(&labels[0])));
+	_hdfFile.write(
+			"counts",
+			vigra::ArrayVectorView<int>(counts.size(), const_cast<int*>(&counts[0])));
+	_hdfFile.write(
+			"gt_labels",
+			vigra::ArrayVectorView<int>(gtLabels.size(), const_cast<int*>(&gtLabels[0])));
+	_hdfFile.write(
+			"gt_sizes",
+			vigra::ArrayVectorView<int>(gtSizes.size(), const_cast<int*>(&gtSizes[0])));
+}
+
+bool
+Hdf5CragStore::retrieveGroundTruthOverlaps(
+		const Crag&          crag,
+		GroundTruthOverlaps& overlaps) {
+
+	try {
+
+		_hdfFile.cd("/crag/gt_overlaps");
+
+	} catch (vigra::PreconditionViolation& e) {
+
+		return false;
+	}
+
+	// tables written before they were associated with a CRAG
+	if (!_hdfFile.existsAttribute("/crag/gt_overlaps", "crag_checksum")) {
+
+		LOG_USER(hdf5storelog) << "stored ground-truth overlaps are not associated with a CRAG, ignoring them" << std::endl;
+		return false;
+	}
+
+	std::string storedToken;
+	std::string token;
+	std::string checksum;
+	int numNodes;
+	if (_hdfFile.existsAttribute("/crag/gt_overlaps", "crag_token"))
+		_hdfFile.readAttribute("/crag/gt_overlaps", "crag_token", storedToken);
+	_hdfFile.readAttribute("/crag/gt_overlaps", "crag_checksum", checksum);
+	_hdfFile.readAttribute("/crag/gt_overlaps", "num_nodes", numNodes);
+	if (_hdfFile.existsAttribute("/crag", "snapshot_token"))
+		_hdfFile.readAttribute("/crag", "snapshot_token", token);
+
+	if (storedToken != token ||
+	    numNodes != static_cast<int>(crag.numNodes()) ||
+	    checksum != cragChecksum(crag)) {
+
+		LOG_USER(hdf5storelog) << "stored ground-truth overlaps belong to a different CRAG, ignoring them" << std::endl;
+		return false;
+	}
+
+	vigra::ArrayVector<int> nodes;
+	vigra::ArrayVector<int> lengths;
+	vigra::ArrayVector<int> labels;
+	vigra::ArrayVector<int> counts;
+	vigra::ArrayVector<int> gtLabels;
+	vigra::ArrayVector<int> gtSizes;
+	_hdfFile.readAndResize("nodes", nodes);
+	_hdfFile.readAndResize("lengths", lengths);
+	_hdfFile.readAndResize("labels", labels);
+	_hdfFile.readAndResize("counts", counts);
+	_hdfFile.readAndResize("gt_labels", gtLabels);
+	_hdfFile.readAndResize("gt_sizes", gtSizes);
+
+	int next = 0;
+	for (unsigned int i = 0; i < nodes.size(); i++) {
+
+		if (nodes[i] > crag.getAdjacencyGraph().maxNodeId() || !crag.isLeafNode(crag.nodeFromId(nodes[i])))
+			UTIL_THROW_EXCEPTION(
+					IOError,
+					"stored ground-truth overlaps refer to unknown leaf node " << nodes[i]);
+
+		GroundTruthOverlaps::Overlaps leafOverlaps;
+		for (int j = 0; j < lengths[i]; j++, next++)
+			leafOverlaps[labels[next]] = counts[next];
+
+		overlaps.setLeafOverlaps(crag.nodeFromId(nodes[i]), leafOverlaps);
+	}
+
+	GroundTruthOverlaps::Overlaps sizes;
+	for (unsigned int i = 0; i < gtLabels.size(); i++)
+		sizes[gtLabels[i]] = gtSizes[i];
+	overlaps.setGroundTruthSizes(sizes);
+
+	overlaps.propagate();
+
+	LOG_USER(hdf5storelog) << "read ground-truth overlaps of " << nodes.size() << " leaf nodes" << std::endl;
+
+	return true;
+}
+
+void
+Hdf5CragStore::remove(std::string path) {
+
+	_hdfFile.root();
+
+	if (!_hdfFile.existsDataset(path))
+		return;
+
+	if (H5Ldelete(_hdfFile.getFileHandle(), path.c_str(), H5P_DEFAULT) < 0)
+		UTIL_THROW_EXCEPTION(
+				IOError,
+				"could not remove " << path << " from " << _projectFile);
+}
+
 void
 Hdf5CragStore::writeGraphVolume(const GraphVolume& graphVolume) {
 
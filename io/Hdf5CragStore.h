@@ -1,6 +1,7 @@
 #ifndef CANDIDATE_MC_IO_HDF_CRAG_STORE_H__
 #define CANDIDATE_MC_IO_HDF_CRAG_STORE_H__
 
+#include <functional>
 #include <vigra/hdf5impex.hxx>
 #include "Hdf5GraphReader.h"
 #include "Hdf5GraphWriter.h"
@@ -10,6 +11,23 @@
 #include "Hdf5VolumeWriter.h"
 #include "CragStore.h"
 
+/**
+ * Stores CRAGs and everything related to them in an HDF5 project file.
+ *
+ * Two layouts are supported for writing (see option --projectLayoutVersion), 
+ * both can be read:
+ *
+ *   1: datasets are contiguous and uncompressed
+ *
+ *   2: large datasets (volumes, features, affiliated edges) are chunked and 
+ *      compressed, and volumes are stored with an index of their position in 
+ *      the volume data, such that subsets of the volumes can be read without 
+ *      reading all of them
+ *
+ * Next to the project file, a binary snapshot of the CRAG topology is written 
+ * (see CragSnapshot and option --noCragSnapshot), from which retrieveCrag() 
+ * reconstructs the CRAG much faster than from the HDF5 datasets.
+ */
 class Hdf5CragStore :
 		public CragStore,
 		public Hdf5GraphReader,
@@ -30,17 +48,62 @@ public:
 		Hdf5VolumeWriter(projectFile),
 		_hdfFile(
 				projectFile,
-				vigra::HDF5File::OpenMode::ReadWrite) {}
+				vigra::HDF5File::OpenMode::ReadWrite),
+		_projectFile(projectFile),
+		_layoutVersion(getDefaultLayoutVersion()),
+		_compressionLevel(getDefaultCompressionLevel()),
+		_runLengthVolumes(getDefaultRunLengthVolumes()) {}
 
+	/**
+	 * The most recent layout version.
+	 */
+	static const int CurrentLayoutVersion = 2;
+
+	/**
+	 * Set the layout version to use for writing.
+	 */
+	void setLayoutVersion(int version);
+
+	int getLayoutVersion() const { return _layoutVersion; }
+
+	/**
+	 * Set whether volumes should be written run-length encoded, and kept
+	 * run-length encoded in memory when reading them. Defaults to option
+	 * --runLengthVolumes.
+	 */
+	void setRunLengthVolumes(bool runLength) { _runLengthVolumes = runLength; }
+
+	bool getRunLengthVolumes() const { return _runLengthVolumes; }
+
+	/**
+	 * Get the layout version of the volumes stored in the project file.
+	 */
+	int getStoredVolumesLayoutVersion();
+
+	/**
+	 * Rewrite the volumes, features, and affiliated edges of the project file 
+	 * in the current layout version. Since HDF5 does not reclaim the space of 
+	 * replaced datasets, run h5repack afterwards to shrink the file.
+	 */
+	void upgradeLayout();
+
+	/**
+	 * Get the name of the CRAG snapshot file that accompanies the project 
+	 * file.
+	 */
+	std::string getCragSnapshotFile() const { return _projectFile + ".crag"; }
 
 	/**
-	 * Store a candidate region adjacency graph (CRAG).
+	 * Store a candidate region adjacency graph (CRAG). Unless option 
+	 * --noCragSnapshot is given, a snapshot of the CRAG is written to 
+	 * getCragSnapshotFile() as well.
 	 */
 	void saveCrag(const Crag& crag) override;
 
 	/**
 	 * Save CRAG volumes. This will only store the volumes of leaf nodes, others 
-	 * can be assembled from them.
+	 * can be assembled from them. With option --runLengthVolumes, the volumes 
+	 * are stored run-length encoded.
 	 */
 	void saveVolumes(const CragVolumes& volumes) override;
 
@@ -82,7 +145,8 @@ public:
 
 	/**
 	 * Retrieve the candidate region adjacency graph (CRAG) associated to this 
-	 * store.
+	 * store. If a snapshot written together with the CRAG exists, the CRAG is 
+	 * read from the snapshot.
 	 */
 	void retrieveCrag(Crag& crag) override;
 
@@ -93,6 +157,20 @@ public:
 	 */
 	void retrieveVolumes(CragVolumes& volumes) override;
 
+	/**
+	 * Retrieve only the leaf node volumes needed for the given nodes. For 
+	 * layout version 2, only the parts of the volume data that contain these 
+	 * volumes are read.
+	 */
+	void retrieveVolumes(CragVolumes& volumes, const std::vector<Crag::CragNode>& nodes) override;
+
+	/**
+	 * Retrieve only the leaf node volumes whose bounding box intersects the 
+	 * given region of interest. For layout version 2, only the parts of the 
+	 * volume data that contain these volumes are read.
+	 */
+	void retrieveVolumes(CragVolumes& volumes, const util::box<float, 3>& roi) override;
+
 	/**
 	 * Retrieve features for the candidates (i.e., the nodes) of the CRAG 
 	 * associated to this store.
@@ -153,6 +231,38 @@ public:
 	 */
 	std::vector<std::string> getSolutionNames() override;
 
+	/**
+	 * Store the cycle constraints of a pool, replacing previously stored ones.
+	 */
+	void saveCycleConstraints(
+			const Crag&                crag,
+			const CycleConstraintPool& pool) override;
+
+	/**
+	 * Retrieve stored cycle constraints and add them to the given pool.
+	 */
+	void retrieveCycleConstraints(
+			const Crag&          crag,
+			CycleConstraintPool& pool) override;
+
+	/**
+	 * Store the ground-truth overlap tables of the leaf candidates. The tables 
+	 * of the other candidates are restored from them on retrieval.
+	 */
+	void saveGroundTruthOverlaps(
+			const Crag&                crag,
+			const GroundTruthOverlaps& overlaps) override;
+
+	/**
+	 * Retrieve stored ground-truth overlap tables. Tables that have been 
+	 * stored for a different CRAG (as identified by the CRAG snapshot token, 
+	 * the number of nodes, and a checksum over nodes and subset arcs) are 
+	 * ignored.
+	 */
+	bool retrieveGroundTruthOverlaps(
+			const Crag&          crag,
+			GroundTruthOverlaps& overlaps) override;
+
 private:
 
 	/**
@@ -182,13 +292,57 @@ private:
 
 	};
 
+	// decides for a leaf node id and the bounding box of its volume, whether 
+	// the volume should be read
+	typedef std::function<bool(int, const util::box<float, 3>&)> VolumeFilter;
+
+	static int getDefaultLayoutVersion();
+	static int getDefaultCompressionLevel();
+	static bool getDefaultRunLengthVolumes();
+
+	// write or read the CRAG snapshot, identified by a token stored in the 
+	// project file
+	void writeCragSnapshot(const Crag& crag);
+	bool readCragSnapshot(Crag& crag);
+
+	// remove a dataset or group (with all its content), if it exists
+	void remove(std::string path);
+
 	void writeGraphVolume(const GraphVolume& graphVolume);
 	void readGraphVolume(GraphVolume& graphVolume);
 
+	// layout version 1
+	void saveDenseVolumes(const CragVolumes& volumes);
+	void saveRunLengthVolumes(const CragVolumes& volumes);
+	void retrieveDenseVolumes(CragVolumes& volumes, const VolumeFilter& filter, bool toRunLength);
+	void retrieveRunLengthVolumes(CragVolumes& volumes, const VolumeFilter& filter);
+
+	// layout version 2
+	void saveIndexedVolumes(const CragVolumes& volumes, bool runLength);
+	void retrieveIndexedVolumes(CragVolumes& volumes, const VolumeFilter& filter, bool toRunLength);
+
+	void writeVolumes(const CragVolumes& volumes, bool runLength);
+	void readVolumes(CragVolumes& volumes, const VolumeFilter& filter, bool toRunLength);
+
+	bool storedVolumesAreRunLengthEncoded();
+
+	// write a dataset, chunked and compressed for layout version 2
+	template <unsigned int N, typename T>
+	void writeDataset(
+			std::string                                 name,
+			const vigra::MultiArrayView<N, T>&          data,
+			typename vigra::MultiArrayShape<N>::type    chunkShape);
+
 	void writeWeights(const FeatureWeights& weights, std::string name);
 	void readWeights(FeatureWeights& weights, std::string name);
 
 	vigra::HDF5File _hdfFile;
+
+	std::string _projectFile;
+
+	int _layoutVersion;
+	int _compressionLevel;
+	bool _runLengthVolumes;
 };
 
 #endif // CANDIDATE_MC_IO_HDF_CRAG_STORE_H__
@@ -1,9 +1,12 @@
 #ifndef CANDIDATE_MC_IO_HDF5_VOLUME_READER_H__
 #define CANDIDATE_MC_IO_HDF5_VOLUME_READER_H__
 
+#include <algorithm>
 #include <string>
+#include <util/exceptions.h>
 #include <imageprocessing/ExplicitVolume.h>
 #include "Hdf5FileAccessor.h"
+#include "VolumeInfo.h"
 
 class Hdf5VolumeReader : public Hdf5FileAccessor {
 
@@ -18,6 +21,84 @@ public:
 		readVolume(volume, dataset, false /* onlyGeometry */);
 	}
 
+	/**
+	 * Read only the part of a volume inside the given box of voxels. The box 
+	 * is clipped to the volume. The offset of the returned volume is set, such 
+	 * that it is at the same position in world units as in the stored volume.
+	 */
+	template <typename ValueType>
+	void readVolume(ExplicitVolume<ValueType>& volume, std::string dataset, const util::box<unsigned int, 3>& roi) {
+
+		VolumeInfo info = readVolumeInfo(dataset);
+
+		util::point<unsigned int, 3> begin(
+				std::min(roi.min().x(), info.width()),
+				std::min(roi.min().y(), info.height()),
+				std::min(roi.min().z(), info.depth()));
+		util::point<unsigned int, 3> end(
+				std::max(begin.x(), std::min(roi.max().x(), info.width())),
+				std::max(begin.y(), std::min(roi.max().y(), info.height())),
+				std::max(begin.z(), std::min(roi.max().z(), info.depth())));
+
+		vigra::Shape3 blockOffset(begin.x(), begin.y(), begin.z());
+		vigra::Shape3 blockShape(end.x() - begin.x(), end.y() - begin.y(), end.z() - begin.z());
+
+		volume.data().reshape(blockShape);
+		if (volume.data().size() > 0)
+			_hdfFile.readBlock(dataset, blockOffset, blockShape, volume.data());
+
+		volume.setResolution(
+				info.resolution.x(),
+				info.resolution.y(),
+				info.resolution.z());
+		volume.setOffset(
+				info.offset.x() + begin.x()*info.resolution.x(),
+				info.offset.y() + begin.y()*info.resolution.y(),
+				info.offset.z() + begin.z()*info.resolution.z());
+	}
+
+	/**
+	 * Read only the part of a volume that covers the given box in world units.
+	 */
+	template <typename ValueType>
+	void readVolume(ExplicitVolume<ValueType>& volume, std::string dataset, const util::box<float, 3>& roi) {
+
+		readVolume(volume, dataset, readVolumeInfo(dataset).toDiscrete(roi));
+	}
+
+	/**
+	 * Read the shape, resolution, and offset of a volume, without reading the 
+	 * volume itself.
+	 */
+	VolumeInfo readVolumeInfo(std::string dataset) {
+
+		VolumeInfo info;
+
+		vigra::ArrayVector<hsize_t> shape = _hdfFile.getDatasetShape(dataset);
+		if (shape.size() != 3)
+			UTIL_THROW_EXCEPTION(
+					IOError,
+					"dataset " << dataset << " has " << shape.size() << " dimensions, expected 3");
+
+		info.shape = util::point<unsigned int, 3>(shape[0], shape[1], shape[2]);
+
+		vigra::MultiArray<1, float> p(3);
+
+		if (_hdfFile.existsAttribute(dataset, "resolution")) {
+
+			_hdfFile.readAttribute(dataset, "resolution", p);
+			info.resolution = util::point<float, 3>(p[0], p[1], p[2]);
+		}
+
+		if (_hdfFile.existsAttribute(dataset, "offset")) {
+
+			_hdfFile.readAttribute(dataset, "offset", p);
+			info.offset = util::point<float, 3>(p[0], p[1], p[2]);
+		}
+
+		return info;
+	}
+
 	template <typename ValueType>
 	void readVolume(ExplicitVolume<ValueType>& volume, std::string dataset, bool onlyGeometry) {
 
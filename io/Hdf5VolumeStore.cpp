@@ -48,6 +48,24 @@ Hdf5VolumeStore::retrieveGroundTruth(ExplicitVolume<int>& labels) {
 	readVolume(labels, "groundtruth");
 }
 
+void
+Hdf5VolumeStore::retrieveIntensities(ExplicitVolume<float>& intensities, const util::box<float, 3>& roi) {
+
+	readVolume(intensities, "intensities", roi);
+}
+
+void
+Hdf5VolumeStore::retrieveBoundaries(ExplicitVolume<float>& boundaries, const util::box<float, 3>& roi) {
+
+	readVolume(boundaries, "boundaries", roi);
+}
+
+void
+Hdf5VolumeStore::retrieveGroundTruth(ExplicitVolume<int>& labels, const util::box<float, 3>& roi) {
+
+	readVolume(labels, "groundtruth", roi);
+}
+
 void
 Hdf5VolumeStore::retrieveAffinities(
 		ExplicitVolume<float>& xAffinities,
@@ -1,6 +1,7 @@
 #ifndef CANDIDATE_MC_IO_HDF5_VOLUME_STORE_H__
 #define CANDIDATE_MC_IO_HDF5_VOLUME_STORE_H__
 
+#include "VolumeBlocks.h"
 #include "VolumeStore.h"
 #include "Hdf5VolumeReader.h"
 #include "Hdf5VolumeWriter.h"
@@ -33,6 +34,12 @@ public:
 
 	void retrieveGroundTruth(ExplicitVolume<int>& groundTruth) override;
 
+	void retrieveIntensities(ExplicitVolume<float>& intensities, const util::box<float, 3>& roi) override;
+
+	void retrieveBoundaries(ExplicitVolume<float>& boundaries, const util::box<float, 3>& roi) override;
+
+	void retrieveGroundTruth(ExplicitVolume<int>& groundTruth, const util::box<float, 3>& roi) override;
+
 	void retrieveAffinities(ExplicitVolume<float>& xAffinities,
 							ExplicitVolume<float>& yAffinities,
 							ExplicitVolume<float>& zAffinities) override;
@@ -41,6 +48,43 @@ public:
 
 		readVolume(volume, std::string("/volumes/") + name);
 	}
+
+	VolumeInfo retrieveVolumeInfo(std::string name) override {
+
+		return readVolumeInfo(std::string("/volumes/") + name);
+	}
+
+	/**
+	 * Get the part of a volume inside the given box of voxels, e.g., the 
+	 * extended box of a VolumeBlock.
+	 */
+	template <typename ValueType>
+	void retrieveVolume(ExplicitVolume<ValueType>& volume, std::string name, const util::box<unsigned int, 3>& roi) {
+
+		readVolume(volume, std::string("/volumes/") + name, roi);
+	}
+
+	/**
+	 * Get the part of a volume that covers the given box in world units.
+	 */
+	template <typename ValueType>
+	void retrieveVolume(ExplicitVolume<ValueType>& volume, std::string name, const util::box<float, 3>& roi) {
+
+		readVolume(volume, std::string("/volumes/") + name, roi);
+	}
+
+	/**
+	 * Split a volume into blocks of the given size, extended by halo voxels on 
+	 * each side. Read the blocks one by one with retrieveVolume(volume, name, 
+	 * block.extended).
+	 */
+	VolumeBlocks getBlocks(
+			std::string name,
+			const util::point<unsigned int, 3>& blockSize,
+			unsigned int halo) {
+
+		return VolumeBlocks(retrieveVolumeInfo(name).shape, blockSize, halo);
+	}
 };
 
 #endif // CANDIDATE_MC_IO_HDF5_VOLUME_STORE_H__
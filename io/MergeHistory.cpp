@@ -0,0 +1,223 @@
+#include <algorithm>
+#include <cctype>
+#include <cstdlib>
+#include <cstring>
+#include <fstream>
+#include <util/Logger.h>
+#include <util/exceptions.h>
+#include <util/timing.h>
+#include "MergeHistory.h"
+
+logger::LogChannel mergehistorylog("mergehistorylog", "[MergeHistory] ");
+
+namespace {
+
+const char Magic[8] = { 'C', 'M', 'C', 'M', 'H', 'I', 'S', 'T' };
+
+struct Header {
+
+	char          magic[8];
+	std::uint32_t version;
+	std::uint32_t reserved;
+	std::uint64_t numMerges;
+};
+
+static_assert(sizeof(MergeHistory::Merge) == 16, "merge records have to be packed");
+
+// a tokenizer for whitespace separated numbers in a zero-terminated buffer
+class Tokenizer {
+
+public:
+
+	Tokenizer(const std::vector<char>& buffer, const std::string& filename) :
+		_begin(buffer.data()),
+		_p(buffer.data()),
+		_filename(filename) {}
+
+	// skip whitespace and return true if there are more tokens
+	bool more() {
+
+		while (std::isspace(static_cast<unsigned char>(*_p)))
+			_p++;
+
+		return *_p != '\0';
+	}
+
+	std::int32_t nextInt() {
+
+		expectToken();
+
+		char* end;
+		long value = std::strtol(_p, &end, 10);
+		check(end);
+
+		return value;
+	}
+
+	float nextFloat() {
+
+		expectToken();
+
+		char* end;
+		float value = std::strtof(_p, &end);
+		check(end);
+
+		return value;
+	}
+
+private:
+
+	void expectToken() {
+
+		if (!more())
+			UTIL_THROW_EXCEPTION(
+					IOError,
+					"merge history " << _filename << " ends in the middle of a merge");
+	}
+
+	void check(char* end) {
+
+		if (end == _p || (*end != '\0' && !std::isspace(static_cast<unsigned char>(*end))))
+			UTIL_THROW_EXCEPTION(
+					IOError,
+					"invalid number in line " << (std::count(_begin, _p, '\n') + 1) <<
+					" of merge history " << _filename);
+
+		_p = end;
+	}
+
+	const char* _begin;
+	const char* _p;
+	std::string _filename;
+};
+
+} // anonymous namespace
+
+bool
+MergeHistory::isBinary(const std::string& filename) {
+
+	std::ifstream in(filename.c_str(), std::ios::binary);
+
+	char magic[sizeof(Magic)];
+	in.read(magic, sizeof(magic));
+
+	return in && std::memcmp(magic, Magic, sizeof(Magic)) == 0;
+}
+
+void
+MergeHistory::writeBinary(const std::vector<Merge>& merges, const std::string& filename) {
+
+	Header header;
+	std::memset(&header, 0, sizeof(header));
+	std::memcpy(header.magic, Magic, sizeof(Magic));
+	header.version   = Version;
+	header.numMerges = merges.size();
+
+	std::ofstream out(filename.c_str(), std::ios::binary | std::ios::trunc);
+
+	out.write(reinterpret_cast<const char*>(&header), sizeof(header));
+	if (merges.size() > 0)
+		out.write(reinterpret_cast<const char*>(merges.data()), merges.size()*sizeof(Merge));
+
+	if (!out)
+		UTIL_THROW_EXCEPTION(
+				IOError,
+				"could not write merge history " << filename);
+}
+
+void
+MergeHistory::writeText(const std::vector<Merge>& merges, const std::string& filename) {
+
+	std::ofstream out(filename.c_str());
+
+	for (const Merge& merge : merges)
+		out << merge.a << "\t" << merge.b << "\t" << merge.c << "\t" << merge.score << "\n";
+
+	if (!out)
+		UTIL_THROW_EXCEPTION(
+				IOError,
+				"could not write merge history " << filename);
+}
+
+std::vector<MergeHistory::Merge>
+MergeHistory::read(const std::string& filename, bool withScores) {
+
+	UTIL_TIME_METHOD;
+
+	if (isBinary(filename))
+		return readBinary(filename);
+
+	return readText(filename, withScores);
+}
+
+std::vector<MergeHistory::Merge>
+MergeHistory::readBinary(const std::string& filename) {
+
+	std::ifstream in(filename.c_str(), std::ios::binary);
+
+	Header header;
+	in.read(reinterpret_cast<char*>(&header), sizeof(header));
+
+	if (!in)
+		UTIL_THROW_EXCEPTION(
+				IOError,
+				"could not read header of merge history " << filename);
+
+	if (header.version != Version)
+		UTIL_THROW_EXCEPTION(
+				IOError,
+				"merge history " << filename << " has version " << header.version <<
+				", expected " << Version);
+
+	std::vector<Merge> merges(header.numMerges);
+	if (merges.size() > 0)
+		in.read(reinterpret_cast<char*>(merges.data()), merges.size()*sizeof(Merge));
+
+	if (!in)
+		UTIL_THROW_EXCEPTION(
+				IOError,
+				"merge history " << filename << " is truncated, expected " << header.numMerges << " merges");
+
+	LOG_DEBUG(mergehistorylog) << "read " << merges.size() << " merges from binary " << filename << std::endl;
+
+	return merges;
+}
+
+std::vector<MergeHistory::Merge>
+MergeHistory::readText(const std::string& filename, bool withScores) {
+
+	std::ifstream in(filename.c_str(), std::ios::binary | std::ios::ate);
+
+	if (!in)
+		UTIL_THROW_EXCEPTION(
+				IOError,
+				"could not read merge history " << filename);
+
+	// read the whole file at once, zero-terminated for the tokenizer
+	std::vector<char> buffer(static_cast<std::size_t>(in.tellg()) + 1, '\0');
+	in.seekg(0);
+	in.read(buffer.data(), buffer.size() - 1);
+
+	if (!in)
+		UTIL_THROW_EXCEPTION(
+				IOError,
+				"could not read merge history " << filename);
+
+	std::vector<Merge> merges;
+	Tokenizer tokens(buffer, filename);
+
+	while (tokens.more()) {
+
+		Merge merge;
+		merge.a     = tokens.nextInt();
+		merge.b     = tokens.nextInt();
+		merge.c     = tokens.nextInt();
+		merge.score = (withScores ? tokens.nextFloat() : 0);
+
+		merges.push_back(merge);
+	}
+
+	LOG_DEBUG(mergehistorylog) << "read " << merges.size() << " merges from " << filename << std::endl;
+
+	return merges;
+}
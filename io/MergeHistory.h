@@ -0,0 +1,71 @@
+#ifndef CANDIDATE_MC_IO_MERGE_HISTORY_H__
+#define CANDIDATE_MC_IO_MERGE_HISTORY_H__
+
+#include <cstdint>
+#include <string>
+#include <vector>
+
+/**
+ * Reading and writing of merge histories. A merge history is a sequence of 
+ * merges (a, b, c, score), stating that candidates a and b got merged into 
+ * candidate c with the given score. Merge histories are stored either as 
+ * text, with one merge per line as "a b c" or "a b c score", or in a binary 
+ * format:
+ *
+ *   char[8] magic "CMCMHIST"
+ *   uint32  version
+ *   uint32  reserved
+ *   uint64  number of merges
+ *   int32 a, int32 b, int32 c, float32 score, one record per merge
+ *
+ * in native byte order.
+ */
+class MergeHistory {
+
+public:
+
+	struct Merge {
+
+		std::int32_t a;
+		std::int32_t b;
+		std::int32_t c;
+		float        score;
+	};
+
+	/**
+	 * The version of the binary format.
+	 */
+	static const std::uint32_t Version = 1;
+
+	/**
+	 * Return true if the given file is a binary merge history.
+	 */
+	static bool isBinary(const std::string& filename);
+
+	/**
+	 * Write a merge history in the binary format.
+	 */
+	static void writeBinary(const std::vector<Merge>& merges, const std::string& filename);
+
+	/**
+	 * Write a merge history as text, with one "a b c score" line per merge,
+	 * separated by tabs.
+	 */
+	static void writeText(const std::vector<Merge>& merges, const std::string& filename);
+
+	/**
+	 * Read a merge history in either format. Binary merge histories always 
+	 * contain scores. Text merge histories contain scores only if withScores 
+	 * is set, otherwise the scores are set to zero. Throws an IOError if the 
+	 * file can not be read or is malformed.
+	 */
+	static std::vector<Merge> read(const std::string& filename, bool withScores);
+
+private:
+
+	static std::vector<Merge> readBinary(const std::string& filename);
+
+	static std::vector<Merge> readText(const std::string& filename, bool withScores);
+};
+
+#endif // CANDIDATE_MC_IO_MERGE_HISTORY_H__
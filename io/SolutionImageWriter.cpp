@@ -1,11 +1,105 @@
+#include <algorithm>
+#include <atomic>
+#include <cstdint>
+#include <exception>
+#include <map>
+#include <memory>
+#include <mutex>
+#include <thread>
 #include <boost/filesystem.hpp>
 #include <vigra/multi_impex.hxx>
-#include <vigra/functorexpression.hxx>
+#include <vigra/hdf5impex.hxx>
 #include "SolutionImageWriter.h"
 #include <util/Logger.h>
+#include <util/exceptions.h>
+#include <util/timing.h>
 
 logger::LogChannel solutionimagewriterlog("solutionimagewriterlog", "[SolutionImageWriter] ");
 
+class SolutionImageWriter::SlabVolumes {
+
+public:
+
+	SlabVolumes(
+			const CragVolumes& volumes,
+			const Layout&      layout,
+			unsigned int       slabSize) :
+		_volumes(volumes) {
+
+		unsigned int depth = layout.shape[2];
+
+		for (const std::vector<Target>* targets : { &layout.selected, &layout.leafs })
+			for (const Target& target : *targets) {
+
+				int id = volumes.getCrag().id(target.node);
+				if (_entries.count(id))
+					continue;
+
+				unsigned int begin = target.begin.z();
+				unsigned int end   = std::min(target.end.z(), depth);
+
+				std::unique_ptr<Entry>& entry = _entries[id];
+				entry = std::unique_ptr<Entry>(new Entry());
+				entry->begin = begin;
+				entry->end   = end;
+				entry->numSlabs = (begin < end ? (end - 1)/slabSize - begin/slabSize + 1 : 0);
+			}
+	}
+
+	/**
+	 * Get the volume of a candidate, fetching it if it is not kept already.
+	 */
+	std::shared_ptr<CragVolume> get(Crag::CragNode n) {
+
+		Entry& entry = *_entries.at(_volumes.getCrag().id(n));
+
+		std::lock_guard<std::mutex> lock(entry.mutex);
+		if (!entry.volume)
+			entry.volume = _volumes[n];
+
+		return entry.volume;
+	}
+
+	/**
+	 * Mark the slab [zBegin, zEnd) as painted, and release the volumes of
+	 * candidates for which this was the last slab.
+	 */
+	void slabDone(unsigned int zBegin, unsigned int zEnd) {
+
+		for (auto& p : _entries) {
+
+			Entry& entry = *p.second;
+
+			if (std::max(zBegin, entry.begin) >= std::min(zEnd, entry.end))
+				continue;
+
+			std::lock_guard<std::mutex> lock(entry.mutex);
+			if (--entry.numSlabs == 0)
+				entry.volume.reset();
+		}
+	}
+
+private:
+
+	struct Entry {
+
+		std::mutex                  mutex;
+		std::shared_ptr<CragVolume> volume;
+		unsigned int                begin;
+		unsigned int                end;
+		unsigned int                numSlabs;
+	};
+
+	const CragVolumes& _volumes;
+
+	// by candidate id, not modified after construction
+	std::map<int, std::unique_ptr<Entry>> _entries;
+};
+
+SolutionImageWriter::SolutionImageWriter() :
+	_slabSize(16),
+	_numThreads(0) {}
+
 void
 SolutionImageWriter::setExportArea(const util::box<float, 3>& bb) {
 
@@ -21,121 +115,372 @@ SolutionImageWriter::write(
 		const std::string& basename,
 		bool boundary) {
 
+	UTIL_TIME_METHOD;
+
 	LOG_DEBUG(solutionimagewriterlog) << "storing solution in " << basename << std::endl;
 
+	Layout layout = getLayout(crag, volumes, solution, boundary);
+
+	// background for areas without candidates
+	writeImages<float>(volumes, layout, basename, (boundary ? 0.25 : 0), boundary);
+}
+
+void
+SolutionImageWriter::writeLabels(
+		const Crag& crag,
+		const CragVolumes& volumes,
+		const CragSolution& solution,
+		const std::string& basename,
+		LabelType labelType) {
+
+	UTIL_TIME_METHOD;
+
+	if (labelType != UInt32Labels)
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"only 32-bit labels can be written as images");
+
+	LOG_DEBUG(solutionimagewriterlog) << "storing solution labels in " << basename << std::endl;
+
+	Layout layout = getLayout(crag, volumes, solution, false);
+
+	writeImages<std::uint32_t>(volumes, layout, basename, 0, false);
+}
+
+void
+SolutionImageWriter::writeHdf5Labels(
+		const Crag& crag,
+		const CragVolumes& volumes,
+		const CragSolution& solution,
+		const std::string& filename,
+		const std::string& dataset,
+		LabelType labelType) {
+
+	UTIL_TIME_METHOD;
+
+	LOG_DEBUG(solutionimagewriterlog) << "storing solution labels in " << filename << ":" << dataset << std::endl;
+
+	Layout layout = getLayout(crag, volumes, solution, false);
+
+	if (labelType == UInt32Labels)
+		writeHdf5<std::uint32_t>(volumes, layout, filename, dataset);
+	else
+		writeHdf5<std::uint64_t>(volumes, layout, filename, dataset);
+}
+
+SolutionImageWriter::Layout
+SolutionImageWriter::getLayout(
+		const Crag& crag,
+		const CragVolumes& volumes,
+		const CragSolution& solution,
+		bool withLeafs) {
+
 	if (_volumesBB.isZero())
 		_volumesBB = volumes.getBoundingBox();
 
 	LOG_DEBUG(solutionimagewriterlog) << "using bounding box of " << _volumesBB << std::endl;
 
-	util::point<float, 3> resolution;
+	Layout layout;
+
 	for (Crag::CragNode n : crag.nodes()) {
 
 		if (!crag.isLeafNode(n))
 			continue;
-		resolution = volumes[n]->getResolution();
+		layout.resolution = volumes[n]->getResolution();
 		break;
 	}
 
-	LOG_DEBUG(solutionimagewriterlog) << "using resolution of " << resolution << std::endl;
+	LOG_DEBUG(solutionimagewriterlog) << "using resolution of " << layout.resolution << std::endl;
 
-	// create a vigra multi-array large enough to hold all volumes
-	vigra::MultiArray<3, float> components(
-			vigra::Shape3(
-				_volumesBB.width() /resolution.x(),
-				_volumesBB.height()/resolution.y(),
-				_volumesBB.depth() /resolution.z()),
-			std::numeric_limits<int>::max());
-
-	// background for areas without candidates
-	if (boundary)
-		components = 0.25;
-	else
-		components = 0;
+	layout.shape = vigra::Shape3(
+			_volumesBB.width() /layout.resolution.x(),
+			_volumesBB.height()/layout.resolution.y(),
+			_volumesBB.depth() /layout.resolution.z());
 
+	// find the target areas of all candidates to draw, in the order of
+	// Crag::nodes(), such that later candidates are drawn over earlier ones
 	for (Crag::CragNode n : crag.nodes()) {
 
-		LOG_ALL(solutionimagewriterlog) << "drawing node " << crag.id(n) << std::endl;
+		bool selected = solution.selected(n);
+		bool leaf     = withLeafs && crag.isLeafNode(n);
 
-		// draw only selected nodes
-		if (!solution.selected(n))
+		if (!selected && !leaf)
 			continue;
 
-		const util::point<float, 3>&      volumeOffset     = volumes[n]->getOffset();
-		const util::box<unsigned int, 3>& volumeDiscreteBB = volumes[n]->getDiscreteBoundingBox();
+		std::shared_ptr<CragVolume> volume = volumes[n];
+
+		util::point<float, 3>      volumeOffset     = volume->getOffset();
+		util::box<unsigned int, 3> volumeDiscreteBB = volume->getDiscreteBoundingBox();
 
-		util::point<unsigned int, 3> begin = (volumeOffset - _volumesBB.min())/resolution;
-		util::point<unsigned int, 3> end   = begin +
+		Target target;
+		target.node  = n;
+		target.label = solution.label(n);
+		target.begin = (volumeOffset - _volumesBB.min())/layout.resolution;
+		target.end   = target.begin +
 				util::point<unsigned int, 3>(
 						volumeDiscreteBB.width(),
 						volumeDiscreteBB.height(),
 						volumeDiscreteBB.depth());
 
+		LOG_ALL(solutionimagewriterlog) << "node " << crag.id(n) << std::endl;
 		LOG_ALL(solutionimagewriterlog) << "\toffset      : " << volumeOffset << std::endl;
 		LOG_ALL(solutionimagewriterlog) << "\tdiscrete bb : " << volumeDiscreteBB << std::endl;
-		LOG_ALL(solutionimagewriterlog) << "\ttarget area : " << begin << " -- " << end << std::endl;
-
-		// fill id of connected component
-		vigra::combineTwoMultiArrays(
-			volumes[n]->data(),
-			components.subarray(TinyVector3UInt(&begin[0]),TinyVector3UInt(&end[0])),
-			components.subarray(TinyVector3UInt(&begin[0]),TinyVector3UInt(&end[0])),
-			vigra::functor::ifThenElse(
-					vigra::functor::Arg1() == vigra::functor::Param(1),
-					vigra::functor::Param(solution.label(n)),
-					vigra::functor::Arg2()
-		));
+		LOG_ALL(solutionimagewriterlog) << "\ttarget area : " << target.begin << " -- " << target.end << std::endl;
+
+		if (selected)
+			layout.selected.push_back(target);
+		if (leaf)
+			layout.leafs.push_back(target);
+	}
+
+	return layout;
+}
+
+template <typename ValueType>
+void
+SolutionImageWriter::processSlabs(
+		const CragVolumes& volumes,
+		const Layout& layout,
+		ValueType background,
+		bool boundary,
+		std::function<void(unsigned int, const vigra::MultiArray<3, ValueType>&)> write) {
+
+	unsigned int depth = layout.shape[2];
+	if (depth == 0)
+		return;
+
+	unsigned int slabSize = (_slabSize == 0 ? depth : std::min(_slabSize, depth));
+	unsigned int numSlabs = (depth + slabSize - 1)/slabSize;
+
+	int numThreads = _numThreads;
+	if (numThreads <= 0)
+		numThreads = std::max(1u, std::thread::hardware_concurrency());
+	numThreads = std::min(numThreads, static_cast<int>(numSlabs));
+
+	LOG_DEBUG(solutionimagewriterlog)
+			<< "processing " << numSlabs << " slabs of " << slabSize
+			<< " sections with " << numThreads << " threads" << std::endl;
+
+	SlabVolumes slabVolumes(volumes, layout, slabSize);
+
+	std::atomic<unsigned int> next(0);
+	std::exception_ptr        error;
+	std::mutex                errorMutex;
+
+	auto worker = [&]() {
+
+		while (true) {
+
+			unsigned int i = next++;
+			if (i >= numSlabs)
+				return;
+
+			try {
+
+				unsigned int zBegin = i*slabSize;
+				unsigned int zEnd   = std::min(zBegin + slabSize, depth);
+
+				vigra::MultiArray<3, ValueType> slab(
+						vigra::Shape3(layout.shape[0], layout.shape[1], zEnd - zBegin),
+						background);
+
+				paintSlab(slabVolumes, layout, zBegin, boundary, slab);
+				slabVolumes.slabDone(zBegin, zEnd);
+				write(zBegin, slab);
+
+			} catch (...) {
+
+				std::lock_guard<std::mutex> lock(errorMutex);
+				if (!error)
+					error = std::current_exception();
+				next = numSlabs;
+			}
+		}
+	};
+
+	std::vector<std::thread> threads;
+	for (int t = 0; t < numThreads; t++)
+		threads.push_back(std::thread(worker));
+	for (std::thread& thread : threads)
+		thread.join();
+
+	if (error)
+		std::rethrow_exception(error);
+}
+
+template <typename ValueType>
+void
+SolutionImageWriter::paintSlab(
+		SlabVolumes&                     volumes,
+		const Layout&                    layout,
+		unsigned int                     zBegin,
+		bool                             boundary,
+		vigra::MultiArray<3, ValueType>& slab) {
+
+	unsigned int zEnd = zBegin + slab.shape(2);
+
+	// fill id of connected component
+	for (const Target& target : layout.selected) {
+
+		unsigned int begin = std::max(zBegin, target.begin.z());
+		unsigned int end   = std::min(zEnd,   target.end.z());
+
+		if (begin >= end)
+			continue;
+
+		std::shared_ptr<CragVolume> volume = volumes.get(target.node);
+		const util::box<unsigned int, 3>& volumeDiscreteBB = volume->getDiscreteBoundingBox();
+
+		ValueType label = static_cast<ValueType>(target.label);
+
+		for (unsigned int z = begin; z < end; z++)
+		for (unsigned int y = 0; y < volumeDiscreteBB.height(); y++)
+		for (unsigned int x = 0; x < volumeDiscreteBB.width();  x++)
+			if (volume->data()(x, y, z - target.begin.z()) == 1)
+				slab(
+						target.begin.x() + x,
+						target.begin.y() + y,
+						z - zBegin) = label;
 	}
 
 	if (boundary) {
 
 		// gray boundary for all leaf nodes
-		for (Crag::CragNode n : crag.nodes())
-			if (crag.isLeafNode(n))
-				drawBoundary(volumes, n, components, 0.5);
+		for (const Target& target : layout.leafs)
+			drawBoundary(volumes, target, zBegin, slab, static_cast<ValueType>(0.5));
 
 		// black boundary for all selected nodes
-		for (Crag::CragNode n : crag.nodes())
-			if (solution.selected(n))
-				drawBoundary(volumes, n, components, 0);
+		for (const Target& target : layout.selected)
+			drawBoundary(volumes, target, zBegin, slab, static_cast<ValueType>(0));
 	}
+}
+
+template <typename ValueType>
+void
+SolutionImageWriter::writeImages(
+		const CragVolumes& volumes,
+		const Layout& layout,
+		const std::string& basename,
+		ValueType background,
+		bool boundary) {
 
-	if (components.shape(2) > 1) {
+	bool stack = (layout.shape[2] > 1);
 
+	if (stack)
 		boost::filesystem::create_directory(basename);
-		for (unsigned int z = 0; z < components.shape(2); z++) {
 
-			std::stringstream ss;
-			ss << std::setw(4) << std::setfill('0') << z;
-			vigra::exportImage(
-					components.bind<2>(z),
-					vigra::ImageExportInfo((basename + "/" + ss.str() + ".tif").c_str()));
-		}
+	processSlabs<ValueType>(
+			volumes,
+			layout,
+			background,
+			boundary,
+			[&](unsigned int zBegin, const vigra::MultiArray<3, ValueType>& slab) {
 
-	} else {
+				for (unsigned int z = 0; z < slab.shape(2); z++) {
 
-		vigra::exportImage(
-				components.bind<2>(0),
-				vigra::ImageExportInfo((basename + ".tif").c_str()));
-	}
+					std::string filename;
+
+					if (stack) {
+
+						std::stringstream ss;
+						ss << std::setw(4) << std::setfill('0') << zBegin + z;
+						filename = basename + "/" + ss.str() + ".tif";
+
+					} else {
+
+						filename = basename + ".tif";
+					}
+
+					vigra::exportImage(
+							slab.bind<2>(z),
+							vigra::ImageExportInfo(filename.c_str()));
+				}
+			});
 }
 
+template <typename ValueType>
+void
+SolutionImageWriter::writeHdf5(
+		const CragVolumes& volumes,
+		const Layout& layout,
+		const std::string& filename,
+		const std::string& dataset) {
+
+	vigra::HDF5File file(filename, vigra::HDF5File::OpenMode::ReadWrite);
+
+	// chunks do not cross slabs, such that each chunk is written once
+	unsigned int slabSize = (_slabSize == 0 ? layout.shape[2] : _slabSize);
+	vigra::TinyVector<vigra::MultiArrayIndex, 3> chunkSize(
+			std::max(std::min(layout.shape[0], (vigra::MultiArrayIndex)256), (vigra::MultiArrayIndex)1),
+			std::max(std::min(layout.shape[1], (vigra::MultiArrayIndex)256), (vigra::MultiArrayIndex)1),
+			std::max(std::min(layout.shape[2], (vigra::MultiArrayIndex)std::min(slabSize, 256u)), (vigra::MultiArrayIndex)1));
+
+	// 0 (none) ... 9 (most)
+	int compressionLevel = 3;
+
+	file.createDataset<3, ValueType>(
+			dataset,
+			layout.shape,
+			0,
+			chunkSize,
+			compressionLevel);
+
+	// the HDF5 library is not thread-safe, slabs are painted in parallel but
+	// written one at a time
+	std::mutex fileMutex;
+
+	processSlabs<ValueType>(
+			volumes,
+			layout,
+			0,
+			false,
+			[&](unsigned int zBegin, const vigra::MultiArray<3, ValueType>& slab) {
+
+				std::lock_guard<std::mutex> lock(fileMutex);
+				file.writeBlock(dataset, vigra::Shape3(0, 0, zBegin), slab);
+			});
+
+	vigra::MultiArray<1, float> p(3);
+
+	// resolution
+	p[0] = layout.resolution.x();
+	p[1] = layout.resolution.y();
+	p[2] = layout.resolution.z();
+	file.writeAttribute(dataset, "resolution", p);
+
+	// offset
+	p[0] = _volumesBB.min().x();
+	p[1] = _volumesBB.min().y();
+	p[2] = _volumesBB.min().z();
+	file.writeAttribute(dataset, "offset", p);
+}
+
+template <typename ValueType>
 void
 SolutionImageWriter::drawBoundary(
-		const CragVolumes&           volumes,
-		Crag::Node                   n,
-		vigra::MultiArray<3, float>& components,
-		float                        value) {
+		SlabVolumes&                     volumes,
+		const Target&                    target,
+		unsigned int                     zBegin,
+		vigra::MultiArray<3, ValueType>& slab,
+		ValueType                        value) {
+
+	unsigned int zEnd = zBegin + slab.shape(2);
+
+	// the sections of the candidate inside the slab
+	unsigned int begin = std::max(zBegin, target.begin.z());
+	unsigned int end   = std::min(zEnd,   target.end.z());
+
+	if (begin >= end)
+		return;
 
-	const CragVolume& volume = *volumes[n];
+	std::shared_ptr<CragVolume> volumePtr = volumes.get(target.node);
+	const CragVolume& volume = *volumePtr;
 	const util::box<unsigned int, 3>& volumeDiscreteBB = volume.getDiscreteBoundingBox();
-	const util::point<float, 3>&      volumeOffset     = volume.getOffset();
-	util::point<unsigned int, 3>      begin            = (volumeOffset - _volumesBB.min())/volume.getResolution();
 
 	bool hasZ = (volumeDiscreteBB.depth() > 1);
 
 	// draw boundary
-	for (unsigned int z = 0; z < volumeDiscreteBB.depth();  z++)
+	for (unsigned int z = begin - target.begin.z(); z < end - target.begin.z(); z++)
 	for (unsigned int y = 0; y < volumeDiscreteBB.height(); y++)
 	for (unsigned int x = 0; x < volumeDiscreteBB.width();  x++) {
 
@@ -147,10 +492,10 @@ SolutionImageWriter::drawBoundary(
 			y == 0 || y == volumeDiscreteBB.height() - 1 ||
 			x == 0 || x == volumeDiscreteBB.width()  - 1) {
 
-			components(
-					begin.x() + x,
-					begin.y() + y,
-					begin.z() + z) = value;
+			slab(
+					target.begin.x() + x,
+					target.begin.y() + y,
+					target.begin.z() + z - zBegin) = value;
 			continue;
 		}
 
@@ -164,10 +509,10 @@ SolutionImageWriter::drawBoundary(
 
 			if (!volume.data()(x + dx, y + dy, z + dz)) {
 
-				components(
-						begin.x() + x,
-						begin.y() + y,
-						begin.z() + z) = value;
+				slab(
+						target.begin.x() + x,
+						target.begin.y() + y,
+						target.begin.z() + z - zBegin) = value;
 				done = true;
 			}
 		}
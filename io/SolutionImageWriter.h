@@ -1,27 +1,57 @@
 #ifndef CANDIDATE_MC_IO_SOLUTION_IMAGE_WRITER_H__
 #define CANDIDATE_MC_IO_SOLUTION_IMAGE_WRITER_H__
 
+#include <functional>
 #include <crag/Crag.h>
 #include <crag/CragVolumes.h>
 #include <inference/CragSolution.h>
 
+/**
+ * Exports a solution as an image stack or HDF5 dataset. The export area is
+ * processed in slabs of sections, such that only one slab per thread has to
+ * be kept in memory. Slabs are painted and written in parallel.
+ */
 class SolutionImageWriter {
 
 public:
 
 	/**
-	 * Set a region of interest to be exported. This region can be larger than 
-	 * the bounding box of all volumes, and in particular can be the bounding 
-	 * box of the intensity volume to create an image of the same size with the 
+	 * The type of labels written by writeLabels() and writeHdf5Labels().
+	 */
+	enum LabelType {
+
+		UInt32Labels,
+		UInt64Labels
+	};
+
+	SolutionImageWriter();
+
+	/**
+	 * Set a region of interest to be exported. This region can be larger than
+	 * the bounding box of all volumes, and in particular can be the bounding
+	 * box of the intensity volume to create an image of the same size with the
 	 * candidate volumes properly located in it.
 	 *
-	 * If not set, the bounding box of the volumes is used (which might be 
+	 * If not set, the bounding box of the volumes is used (which might be
 	 * smaller than the bounding box of the intensity volume).
 	 */
 	void setExportArea(const util::box<float, 3>& bb);
 
 	/**
-	 * Store the solution as label image in the given image file.
+	 * Set the number of sections to paint and write at once. Set to 0 to
+	 * process the whole export area at once. Default is 16.
+	 */
+	void setSlabSize(unsigned int numSections) { _slabSize = numSections; }
+
+	/**
+	 * Set the number of threads to process slabs with. Set to 0 (the default)
+	 * to use one thread per core.
+	 */
+	void setNumThreads(int numThreads) { _numThreads = numThreads; }
+
+	/**
+	 * Store the solution as label image in the given image file. Labels are
+	 * written as float, boundaries are drawn in gray values.
 	 */
 	void write(
 			const Crag& crag,
@@ -30,18 +60,110 @@ public:
 			const std::string& filename,
 			bool drawBoundary = false);
 
+	/**
+	 * Store the solution as integer label image in the given image file, or
+	 * in a directory of images named after the file, if the export area spans
+	 * more than one section. Only UInt32Labels are supported for images.
+	 */
+	void writeLabels(
+			const Crag& crag,
+			const CragVolumes& volumes,
+			const CragSolution& solution,
+			const std::string& filename,
+			LabelType labelType = UInt32Labels);
+
+	/**
+	 * Store the solution as chunked and compressed integer label dataset in an
+	 * HDF5 file. The file is created if it does not exist. Resolution and
+	 * offset are stored as attributes of the dataset.
+	 */
+	void writeHdf5Labels(
+			const Crag& crag,
+			const CragVolumes& volumes,
+			const CragSolution& solution,
+			const std::string& filename,
+			const std::string& dataset,
+			LabelType labelType = UInt32Labels);
+
 private:
 
 	typedef vigra::TinyVector<unsigned int, 3> TinyVector3UInt;
 
+	// a candidate to paint, with its location in the export area
+	struct Target {
+
+		Crag::CragNode               node;
+		int                          label;
+		util::point<unsigned int, 3> begin;
+		util::point<unsigned int, 3> end;
+	};
+
+	// the geometry of the export and the candidates to paint
+	struct Layout {
+
+		util::point<float, 3> resolution;
+		vigra::Shape3         shape;
+		std::vector<Target>   selected;
+		std::vector<Target>   leafs;
+	};
+
+	// the volumes of the targets of a layout, fetched once per candidate and
+	// kept while the slabs the candidate intersects are painted
+	class SlabVolumes;
+
+	Layout getLayout(
+			const Crag& crag,
+			const CragVolumes& volumes,
+			const CragSolution& solution,
+			bool withLeafs);
+
+	/**
+	 * Paint the export area slab by slab and call write(zBegin, slab) for
+	 * each slab, possibly from several threads at the same time.
+	 */
+	template <typename ValueType>
+	void processSlabs(
+			const CragVolumes& volumes,
+			const Layout& layout,
+			ValueType background,
+			bool boundary,
+			std::function<void(unsigned int, const vigra::MultiArray<3, ValueType>&)> write);
+
+	template <typename ValueType>
+	void paintSlab(
+			SlabVolumes&                     volumes,
+			const Layout&                    layout,
+			unsigned int                     zBegin,
+			bool                             boundary,
+			vigra::MultiArray<3, ValueType>& slab);
+
+	template <typename ValueType>
+	void writeImages(
+			const CragVolumes& volumes,
+			const Layout& layout,
+			const std::string& basename,
+			ValueType background,
+			bool boundary);
+
+	template <typename ValueType>
+	void writeHdf5(
+			const CragVolumes& volumes,
+			const Layout& layout,
+			const std::string& filename,
+			const std::string& dataset);
+
+	template <typename ValueType>
 	void drawBoundary(
-			const CragVolumes&           volumes,
-			Crag::Node                   n,
-			vigra::MultiArray<3, float>& components,
-			float                        value);
+			SlabVolumes&                     volumes,
+			const Target&                    target,
+			unsigned int                     zBegin,
+			vigra::MultiArray<3, ValueType>& slab,
+			ValueType                        value);
 
 	util::box<float, 3> _volumesBB;
+
+	unsigned int _slabSize;
+	int          _numThreads;
 };
 
 #endif // CANDIDATE_MC_IO_SOLUTION_IMAGE_WRITER_H__
-
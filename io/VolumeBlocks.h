@@ -0,0 +1,136 @@
+#ifndef CANDIDATE_MC_IO_VOLUME_BLOCKS_H__
+#define CANDIDATE_MC_IO_VOLUME_BLOCKS_H__
+
+#include <algorithm>
+#include <iterator>
+#include <util/box.hpp>
+#include <util/exceptions.h>
+#include <util/point.hpp>
+
+/**
+ * A block of a volume, in voxels. The core blocks of a VolumeBlocks partition
+ * the volume, the extended blocks grow the core blocks by a halo, clipped to
+ * the volume.
+ */
+struct VolumeBlock {
+
+	util::box<unsigned int, 3> core;
+	util::box<unsigned int, 3> extended;
+};
+
+/**
+ * Splits a volume of the given shape into blocks of (at most) the given size,
+ * each extended by a halo on all sides. Blocks are enumerated with x
+ * changing fastest.
+ */
+class VolumeBlocks {
+
+public:
+
+	/**
+	 * A forward iterator over the blocks. Blocks are computed on dereference 
+	 * and returned by value. Use operator[] for random access.
+	 */
+	class const_iterator : public std::iterator<std::forward_iterator_tag, VolumeBlock, std::ptrdiff_t, void, VolumeBlock> {
+
+	public:
+
+		const_iterator(const VolumeBlocks& blocks, std::size_t i) : _blocks(&blocks), _i(i) {}
+
+		VolumeBlock operator*() const { return (*_blocks)[_i]; }
+
+		const_iterator& operator++() { _i++; return *this; }
+		const_iterator  operator++(int) { const_iterator tmp(*this); _i++; return tmp; }
+
+		const_iterator operator+(std::ptrdiff_t n) const { return const_iterator(*_blocks, _i + n); }
+
+		std::ptrdiff_t operator-(const const_iterator& other) const { return _i - other._i; }
+
+		bool operator==(const const_iterator& other) const { return _i == other._i; }
+		bool operator!=(const const_iterator& other) const { return _i != other._i; }
+
+	private:
+
+		const VolumeBlocks* _blocks;
+		std::size_t         _i;
+	};
+
+	VolumeBlocks(
+			const util::point<unsigned int, 3>& shape,
+			const util::point<unsigned int, 3>& blockSize,
+			unsigned int halo) :
+		_shape(shape),
+		_blockSize(blockSize),
+		_halo(halo) {
+
+		if (blockSize.x() == 0 || blockSize.y() == 0 || blockSize.z() == 0)
+			UTIL_THROW_EXCEPTION(
+					UsageError,
+					"block size (" << blockSize.x() << ", " << blockSize.y() << ", " <<
+					blockSize.z() << ") has a zero dimension");
+
+		_numBlocks = util::point<unsigned int, 3>(
+				(shape.x() + blockSize.x() - 1)/blockSize.x(),
+				(shape.y() + blockSize.y() - 1)/blockSize.y(),
+				(shape.z() + blockSize.z() - 1)/blockSize.z());
+	}
+
+	/**
+	 * The number of blocks.
+	 */
+	std::size_t size() const {
+
+		return static_cast<std::size_t>(_numBlocks.x())*_numBlocks.y()*_numBlocks.z();
+	}
+
+	/**
+	 * The number of blocks along each dimension.
+	 */
+	const util::point<unsigned int, 3>& getNumBlocks() const { return _numBlocks; }
+
+	/**
+	 * Get the ith block.
+	 */
+	VolumeBlock operator[](std::size_t i) const {
+
+		util::point<unsigned int, 3> index(
+				i%_numBlocks.x(),
+				(i/_numBlocks.x())%_numBlocks.y(),
+				i/(static_cast<std::size_t>(_numBlocks.x())*_numBlocks.y()));
+
+		util::point<unsigned int, 3> begin(
+				index.x()*_blockSize.x(),
+				index.y()*_blockSize.y(),
+				index.z()*_blockSize.z());
+		util::point<unsigned int, 3> end(
+				std::min(begin.x() + _blockSize.x(), _shape.x()),
+				std::min(begin.y() + _blockSize.y(), _shape.y()),
+				std::min(begin.z() + _blockSize.z(), _shape.z()));
+
+		VolumeBlock block;
+		block.core = util::box<unsigned int, 3>(begin, end);
+		block.extended = util::box<unsigned int, 3>(
+				util::point<unsigned int, 3>(
+						begin.x() - std::min(begin.x(), _halo),
+						begin.y() - std::min(begin.y(), _halo),
+						begin.z() - std::min(begin.z(), _halo)),
+				util::point<unsigned int, 3>(
+						std::min(end.x() + _halo, _shape.x()),
+						std::min(end.y() + _halo, _shape.y()),
+						std::min(end.z() + _halo, _shape.z())));
+
+		return block;
+	}
+
+	const_iterator begin() const { return const_iterator(*this, 0); }
+	const_iterator end()   const { return const_iterator(*this, size()); }
+
+private:
+
+	util::point<unsigned int, 3> _shape;
+	util::point<unsigned int, 3> _blockSize;
+	util::point<unsigned int, 3> _numBlocks;
+	unsigned int                 _halo;
+};
+
+#endif // CANDIDATE_MC_IO_VOLUME_BLOCKS_H__
@@ -0,0 +1,79 @@
+#ifndef CANDIDATE_MC_IO_VOLUME_INFO_H__
+#define CANDIDATE_MC_IO_VOLUME_INFO_H__
+
+#include <algorithm>
+#include <cmath>
+#include <util/box.hpp>
+#include <util/point.hpp>
+
+/**
+ * The geometry of a stored volume: its shape in voxels, its resolution, and
+ * its offset in world units.
+ */
+struct VolumeInfo {
+
+	VolumeInfo() :
+		shape(0, 0, 0),
+		resolution(1, 1, 1),
+		offset(0, 0, 0) {}
+
+	util::point<unsigned int, 3> shape;
+	util::point<float, 3>        resolution;
+	util::point<float, 3>        offset;
+
+	unsigned int width()  const { return shape.x(); }
+	unsigned int height() const { return shape.y(); }
+	unsigned int depth()  const { return shape.z(); }
+
+	/**
+	 * Get the bounding box of the volume in world units.
+	 */
+	util::box<float, 3> getBoundingBox() const {
+
+		return util::box<float, 3>(
+				offset,
+				offset + util::point<float, 3>(
+						shape.x()*resolution.x(),
+						shape.y()*resolution.y(),
+						shape.z()*resolution.z()));
+	}
+
+	/**
+	 * Get the bounding box of the volume in voxels.
+	 */
+	util::box<unsigned int, 3> getDiscreteBoundingBox() const {
+
+		return util::box<unsigned int, 3>(util::point<unsigned int, 3>(0, 0, 0), shape);
+	}
+
+	/**
+	 * Convert a box in world units into the smallest box of voxels of this
+	 * volume that covers it. The result is clipped to the volume.
+	 */
+	util::box<unsigned int, 3> toDiscrete(const util::box<float, 3>& box) const {
+
+		util::point<unsigned int, 3> begin(
+				toDiscrete(box.min().x(), 0, std::floor),
+				toDiscrete(box.min().y(), 1, std::floor),
+				toDiscrete(box.min().z(), 2, std::floor));
+		util::point<unsigned int, 3> end(
+				toDiscrete(box.max().x(), 0, std::ceil),
+				toDiscrete(box.max().y(), 1, std::ceil),
+				toDiscrete(box.max().z(), 2, std::ceil));
+
+		return util::box<unsigned int, 3>(begin, end);
+	}
+
+private:
+
+	unsigned int toDiscrete(float x, int d, double (*round)(double)) const {
+
+		float  o = (d == 0 ? offset.x()     : (d == 1 ? offset.y()     : offset.z()));
+		float  r = (d == 0 ? resolution.x() : (d == 1 ? resolution.y() : resolution.z()));
+		double s = (d == 0 ? shape.x()      : (d == 1 ? shape.y()      : shape.z()));
+
+		return static_cast<unsigned int>(std::min(std::max(round((x - o)/r), 0.0), s));
+	}
+};
+
+#endif // CANDIDATE_MC_IO_VOLUME_INFO_H__
@@ -2,6 +2,7 @@
 #define CANDIDATE_MC_IO_VOLUME_STORE_H__
 
 #include <imageprocessing/ExplicitVolume.h>
+#include "VolumeInfo.h"
 
 /**
  * Interface definition for volume stores.
@@ -47,6 +48,20 @@ public:
 	 */
 	virtual void retrieveGroundTruth(ExplicitVolume<int>& groundTruth) = 0;
 
+	/**
+	 * Get only the part of the intensity, boundary prediction, or ground-truth 
+	 * volume that covers the given region of interest (in world units).
+	 */
+	virtual void retrieveIntensities(ExplicitVolume<float>& intensities, const util::box<float, 3>& roi) = 0;
+	virtual void retrieveBoundaries(ExplicitVolume<float>& boundaries, const util::box<float, 3>& roi) = 0;
+	virtual void retrieveGroundTruth(ExplicitVolume<int>& groundTruth, const util::box<float, 3>& roi) = 0;
+
+	/**
+	 * Get the shape, resolution, and offset of a volume by its name, without 
+	 * reading the volume.
+	 */
+	virtual VolumeInfo retrieveVolumeInfo(std::string name) = 0;
+
 	/**
 	 * Get the affinities volumes.
 	 */
@@ -92,7 +92,8 @@ AssignmentLoss::computeSizesAndOverlaps(
 		if (crag.type(n) == Crag::NoAssignmentNode)
 			continue;
 
-		const CragVolume& region = *volumes[n];
+		std::shared_ptr<CragVolume> regionPtr = volumes[n];
+		const CragVolume& region = *regionPtr;
 
 		util::point<unsigned int, 3> offset =
 				(region.getOffset() - groundTruth.getOffset())/
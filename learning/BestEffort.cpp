@@ -46,6 +46,12 @@ BestEffort::BestEffort(
 		const Crag&                   crag,
 		const CragVolumes&            volumes,
 		const ExplicitVolume<int>&    groundTruth) :
+	BestEffort(crag, volumes, GroundTruthOverlaps(crag, volumes, groundTruth)) {}
+
+BestEffort::BestEffort(
+		const Crag&                   crag,
+		const CragVolumes&            volumes,
+		const GroundTruthOverlaps&    overlaps) :
 	CragSolution(crag),
 	_fullBestEffort(optionFullBestEffort),
 	_bgOverlapWeight(optionBackgroundOverlapWeight){
@@ -58,9 +64,6 @@ BestEffort::BestEffort(
 
 	// assign each candidate to the ground-truth region with maximal overlap (this does not select the candidates, yet)
 
-	Crag::NodeMap<std::map<int, int>> overlaps(crag);
-	getGroundTruthOverlaps(crag, volumes, groundTruth, overlaps);
-
 	Crag::NodeMap<int> gtAssignments(crag);
 	getGroundTruthAssignments(crag, overlaps, gtAssignments);
 
@@ -89,47 +92,15 @@ BestEffort::BestEffort(
 	}
 
 	// For the Assignment Model, select the assignment nodes and edges
-	selectAssignments(crag, volumes, groundTruth, gtAssignments, overlaps);
+	selectAssignments(crag, volumes, gtAssignments, overlaps);
 
 }
 
-void
-BestEffort::getGroundTruthOverlaps(
-		const Crag&                        crag,
-		const CragVolumes&                 volumes,
-		const ExplicitVolume<int>&         groundTruth,
-		Crag::NodeMap<std::map<int, int>>& overlaps) {
-
-	for (Crag::CragNode n : crag.nodes()) {
-
-		if (crag.type(n) == Crag::NoAssignmentNode)
-			continue;
-
-		const CragVolume& region = *volumes[n];
-
-		util::point<unsigned int, 3> offset =
-				(region.getOffset() - groundTruth.getOffset())/
-				groundTruth.getResolution();
-
-		for (unsigned int z = 0; z < region.getDiscreteBoundingBox().depth();  z++)
-		for (unsigned int y = 0; y < region.getDiscreteBoundingBox().height(); y++)
-		for (unsigned int x = 0; x < region.getDiscreteBoundingBox().width();  x++) {
-
-			if (!region.data()(x, y, z))
-				continue;
-
-			int gtLabel = groundTruth[offset + util::point<unsigned int, 3>(x, y, z)];
-
-			overlaps[n][gtLabel]++;
-		}
-	}
-}
-
 void
 BestEffort::getGroundTruthAssignments(
-		const Crag&                              crag,
-		const Crag::NodeMap<std::map<int, int>>& overlaps,
-		Crag::NodeMap<int>&                      gtAssignments) {
+		const Crag&                   crag,
+		const GroundTruthOverlaps&    overlaps,
+		Crag::NodeMap<int>&           gtAssignments) {
 
 	for (Crag::CragNode i : crag.nodes()) {
 
@@ -180,9 +151,9 @@ BestEffort::getLeafAssignments(
 
 void
 BestEffort::findMajorityOverlapCandidates(
-		const Crag&                              crag,
-		const Crag::NodeMap<std::map<int, int>>& overlaps,
-		const Crag::NodeMap<int>&                gtAssignments) {
+		const Crag&                crag,
+		const GroundTruthOverlaps& overlaps,
+		const Crag::NodeMap<int>&  gtAssignments) {
 
 	for (Crag::CragNode n : crag.nodes())
 	{
@@ -214,10 +185,10 @@ BestEffort::findConcordantLeafNodeCandidates(
 
 void
 BestEffort::labelMajorityOverlapCandidate(
-		const Crag&                              crag,
-		const Crag::CragNode&                    n,
-		const Crag::NodeMap<std::map<int, int>>& overlaps,
-		const Crag::NodeMap<int>&                gtAssignments) {
+		const Crag&                crag,
+		const Crag::CragNode&      n,
+		const GroundTruthOverlaps& overlaps,
+		const Crag::NodeMap<int>&  gtAssignments) {
 
 	double maxOverlap = overlaps[n].at(gtAssignments[n]);
 
@@ -265,11 +236,10 @@ BestEffort::labelSingleAssignmentCandidate(
 }
 
 void BestEffort::selectAssignments(
-		const Crag&                 crag,
-		const CragVolumes&          volumes,
-		const ExplicitVolume<int>&  groundTruth,
-		Crag::NodeMap<int>&         gtAssignments,
-		Crag::NodeMap<std::map<int, int>>& overlaps)
+		const Crag&                crag,
+		const CragVolumes&         volumes,
+		Crag::NodeMap<int>&        gtAssignments,
+		const GroundTruthOverlaps& overlaps)
 {
 
 	// for each slice node, if a parent is selected, unselected all children
@@ -348,9 +318,9 @@ void BestEffort::selectAssignments(
 		}
 	}
 
-	explanationConstraint( crag, volumes, groundTruth, gtAssignments, overlaps );
+	explanationConstraint( crag, volumes, gtAssignments, overlaps );
 
-	selectNoAssignmentEdges( crag, volumes, groundTruth );
+	selectNoAssignmentEdges( crag, volumes );
 
 #ifdef DEBUG
 	LOG_DEBUG(bestEffortlog) << "\tChecking results: selected edges for each selected slice node::" <<  std::endl;
@@ -398,11 +368,10 @@ void BestEffort::unselectChildren(
 }
 
 void BestEffort::explanationConstraint(
-		const Crag&                        crag,
-		const CragVolumes&                 volumes,
-		const ExplicitVolume<int>&         groundTruth,
-		Crag::NodeMap<int>&                gtAssignments,
-		Crag::NodeMap<std::map<int, int>>& overlaps) {
+		const Crag&                crag,
+		const CragVolumes&         volumes,
+		Crag::NodeMap<int>&        gtAssignments,
+		const GroundTruthOverlaps& overlaps) {
 
 	// For all selected sliceNodes, check if they have more than one assignment node selected per section
 	for (Crag::CragNode n : crag.nodes()) {
@@ -450,7 +419,7 @@ void BestEffort::explanationConstraint(
 
 					// keep selected only the one with the most overlaping gt area
 					Crag::CragNode removed =
-							(overlaps[previous][label] > overlaps[opposite][label]) ?
+							(overlaps.getOverlap(previous, label) > overlaps.getOverlap(opposite, label)) ?
 									opposite : previous;
 
 					setSelected(removed, false);
@@ -478,8 +447,7 @@ void BestEffort::explanationConstraint(
 
 void BestEffort::selectNoAssignmentEdges(
 		const Crag&                crag,
-		const CragVolumes&         volumes,
-		const ExplicitVolume<int>& groundTruth) {
+		const CragVolumes&         volumes) {
 
 	// Check if there is a selected candidate missing assignment
 	for (Crag::CragNode n : crag.nodes()) {
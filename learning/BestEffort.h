@@ -3,6 +3,7 @@
 
 #include <crag/Crag.h>
 #include <crag/CragVolumes.h>
+#include <crag/GroundTruthOverlaps.h>
 #include <inference/CragSolver.h>
 #include "CragSolution.h"
 
@@ -39,18 +40,21 @@ public:
 			const CragVolumes&            volumes,
 			const ExplicitVolume<int>&    groundTruth);
 
-private:
+	/**
+	 * Same as above, but with precomputed overlaps of the candidates with the 
+	 * ground-truth regions.
+	 */
+	BestEffort(
+			const Crag&                   crag,
+			const CragVolumes&            volumes,
+			const GroundTruthOverlaps&    overlaps);
 
-	void getGroundTruthOverlaps(
-			const Crag&                        crag,
-			const CragVolumes&                 volumes,
-			const ExplicitVolume<int>&         groundTruth,
-			Crag::NodeMap<std::map<int, int>>& overlaps);
+private:
 
 	void getGroundTruthAssignments(
-			const Crag&                              crag,
-			const Crag::NodeMap<std::map<int, int>>& overlaps,
-			Crag::NodeMap<int>&                      gtAssignments);
+			const Crag&                   crag,
+			const GroundTruthOverlaps&    overlaps,
+			Crag::NodeMap<int>&           gtAssignments);
 
 	void getLeafAssignments(
 			const Crag&                   crag,
@@ -63,9 +67,9 @@ private:
 			const Crag::NodeMap<int>& gtAssignments);
 
 	void findMajorityOverlapCandidates(
-			const Crag&                              crag,
-			const Crag::NodeMap<std::map<int, int>>& overlaps,
-			const Crag::NodeMap<int>&                gtAssignments);
+			const Crag&                crag,
+			const GroundTruthOverlaps& overlaps,
+			const Crag::NodeMap<int>&  gtAssignments);
 
 	void labelSingleAssignmentCandidate(
 			const Crag&                         crag,
@@ -73,33 +77,30 @@ private:
 			const Crag::NodeMap<std::set<int>>& leafAssignments);
 	
 	void labelMajorityOverlapCandidate(
-			const Crag&                              crag,
-			const Crag::CragNode&                    n,
-			const Crag::NodeMap<std::map<int, int>>& overlaps,
-			const Crag::NodeMap<int>&                gtAssignments);
+			const Crag&                crag,
+			const Crag::CragNode&      n,
+			const GroundTruthOverlaps& overlaps,
+			const Crag::NodeMap<int>&  gtAssignments);
 
 	void selectAssignments(
-			const Crag&                        crag,
-			const CragVolumes&                 volumes,
-			const ExplicitVolume<int>&         groundTruth,
-			Crag::NodeMap<int>&                gtAssignments,
-			Crag::NodeMap<std::map<int, int>>& overlaps);
+			const Crag&                crag,
+			const CragVolumes&         volumes,
+			Crag::NodeMap<int>&        gtAssignments,
+			const GroundTruthOverlaps& overlaps);
 
 	void unselectChildren(
 			const Crag&    crag,
 			Crag::CragNode n);
 
 	void explanationConstraint(
-			const Crag&                 crag,
-			const CragVolumes&          volumes,
-			const ExplicitVolume<int>&  groundTruth,
-			Crag::NodeMap<int>&         gtAssignments,
-			Crag::NodeMap<std::map<int, int>>& overlaps);
+			const Crag&                crag,
+			const CragVolumes&         volumes,
+			Crag::NodeMap<int>&        gtAssignments,
+			const GroundTruthOverlaps& overlaps);
 
 	void selectNoAssignmentEdges(
 			const Crag&                crag,
-			const CragVolumes&         volumes,
-			const ExplicitVolume<int>& groundTruth);
+			const CragVolumes&         volumes);
 
 	// include children and child edges of best-effort candidates and edges
 	bool _fullBestEffort;
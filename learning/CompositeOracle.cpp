@@ -0,0 +1,136 @@
+#include <algorithm>
+#include <atomic>
+#include <chrono>
+#include <exception>
+#include <mutex>
+#include <thread>
+#include <util/Logger.h>
+#include <util/exceptions.h>
+#include "CompositeOracle.h"
+
+logger::LogChannel compositeoraclelog("compositeoraclelog", "[CompositeOracle] ");
+
+void
+CompositeOracle::valueGradientP(
+		const FeatureWeights& weights,
+		double&               value,
+		FeatureWeights&       gradient) {
+
+	evaluate(weights, value, gradient, false);
+}
+
+void
+CompositeOracle::valueGradientR(
+		const FeatureWeights& weights,
+		double&               value,
+		FeatureWeights&       gradient) {
+
+	evaluate(weights, value, gradient, true);
+}
+
+bool
+CompositeOracle::haveConcavePart() const {
+
+	for (Oracle<FeatureWeights>* oracle : _oracles)
+		if (oracle->haveConcavePart())
+			return true;
+
+	return false;
+}
+
+void
+CompositeOracle::evaluate(
+		const FeatureWeights& weights,
+		double&               value,
+		FeatureWeights&       gradient,
+		bool                  concave) {
+
+	if (_oracles.size() == 0)
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"no oracles have been added");
+
+	std::vector<double>         values(_oracles.size(), 0);
+	std::vector<FeatureWeights> gradients(_oracles.size(), weights);
+	std::vector<double>         seconds(_oracles.size(), 0);
+
+	int numThreads = _numThreads;
+	if (numThreads <= 0)
+		numThreads = std::max(1u, std::thread::hardware_concurrency());
+	numThreads = std::min(numThreads, static_cast<int>(_oracles.size()));
+
+	std::atomic<std::size_t> next(0);
+	std::exception_ptr       error;
+	std::mutex               errorMutex;
+
+	auto worker = [&]() {
+
+		while (true) {
+
+			std::size_t i = next++;
+			if (i >= _oracles.size())
+				return;
+
+			try {
+
+				auto start = std::chrono::steady_clock::now();
+
+				if (concave)
+					_oracles[i]->valueGradientR(weights, values[i], gradients[i]);
+				else
+					_oracles[i]->valueGradientP(weights, values[i], gradients[i]);
+
+				seconds[i] = std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+
+			} catch (...) {
+
+				std::lock_guard<std::mutex> lock(errorMutex);
+				if (!error)
+					error = std::current_exception();
+				next = _oracles.size();
+			}
+		}
+	};
+
+	std::vector<std::thread> threads;
+	for (int t = 0; t < numThreads; t++)
+		threads.push_back(std::thread(worker));
+	for (std::thread& thread : threads)
+		thread.join();
+
+	if (error)
+		std::rethrow_exception(error);
+
+	// sum in a fixed order, such that the result does not depend on the
+	// scheduling of the threads
+	value = 0;
+	std::vector<double> sum = gradients[0].exportToVector();
+	std::fill(sum.begin(), sum.end(), 0);
+
+	for (std::size_t i = 0; i < _oracles.size(); i++) {
+
+		LOG_USER(compositeoraclelog)
+				<< "sample " << _names[i]
+				<< ": value " << values[i]
+				<< " in " << seconds[i] << "s" << std::endl;
+
+		value += values[i];
+
+		std::vector<double> g = gradients[i].exportToVector();
+		if (g.size() != sum.size())
+			UTIL_THROW_EXCEPTION(
+					UsageError,
+					"gradient of sample " << _names[i] << " has " << g.size()
+					<< " entries, expected " << sum.size());
+
+		for (std::size_t j = 0; j < g.size(); j++)
+			sum[j] += g[j];
+	}
+
+	gradient = weights;
+	gradient.importFromVector(sum);
+
+	LOG_USER(compositeoraclelog)
+			<< "sum of " << _oracles.size()
+			<< " samples: " << value << std::endl;
+}
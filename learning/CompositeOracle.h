@@ -0,0 +1,75 @@
+#ifndef CANDIDATE_MC_LEARNING_COMPOSITE_ORACLE_H__
+#define CANDIDATE_MC_LEARNING_COMPOSITE_ORACLE_H__
+
+#include <string>
+#include <vector>
+#include <features/FeatureWeights.h>
+#include "Oracle.h"
+
+/**
+ * Combines the oracles of several training samples into one, whose objective
+ * is the sum of the objectives of the samples. The oracles of the samples are
+ * evaluated concurrently, values and gradients are summed in the order in
+ * which the oracles were added.
+ *
+ * The oracles of different samples must not share any state, and their
+ * weights have to be congruent.
+ */
+class CompositeOracle : public Oracle<FeatureWeights> {
+
+public:
+
+	/**
+	 * Create an empty composite oracle.
+	 *
+	 * @param numThreads
+	 *              The maximal number of samples to evaluate at the same time.
+	 *              If 0 (the default), one thread per core is used.
+	 */
+	CompositeOracle(int numThreads = 0) :
+		_numThreads(numThreads) {}
+
+	/**
+	 * Add the oracle of a sample. The oracle is not owned by this class. The
+	 * name is used for logging.
+	 */
+	void addOracle(Oracle<FeatureWeights>& oracle, std::string name) {
+
+		_oracles.push_back(&oracle);
+		_names.push_back(name);
+	}
+
+	/**
+	 * Get the number of samples.
+	 */
+	std::size_t size() const { return _oracles.size(); }
+
+	void valueGradientP(
+			const FeatureWeights& weights,
+			double&               value,
+			FeatureWeights&       gradient) override;
+
+	void valueGradientR(
+			const FeatureWeights& weights,
+			double&               value,
+			FeatureWeights&       gradient) override;
+
+	bool haveConcavePart() const override;
+
+private:
+
+	// evaluate P (or R, if concave is set) of all oracles and sum the results
+	void evaluate(
+			const FeatureWeights& weights,
+			double&               value,
+			FeatureWeights&       gradient,
+			bool                  concave);
+
+	std::vector<Oracle<FeatureWeights>*> _oracles;
+	std::vector<std::string>             _names;
+
+	int _numThreads;
+};
+
+#endif // CANDIDATE_MC_LEARNING_COMPOSITE_ORACLE_H__
+
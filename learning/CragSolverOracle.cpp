@@ -21,6 +21,9 @@ CragSolverOracle::valueGradientP(
 
 	updateCosts(weights);
 
+	if (_cyclePool)
+		_cyclePool->nextRound();
+
 	CragSolver::Status status = _mostViolatedSolver->solve(_mostViolatedSolution);
 
 	if (status != CragSolver::SolutionFound)
@@ -39,10 +42,10 @@ CragSolverOracle::valueGradientP(
 	double mostViolatedEnergy = 0;
 	for (Crag::CragNode n : _crag.nodes())
 		if (_mostViolatedSolution.selected(n))
-			mostViolatedEnergy += nodeCost(n, weights);
+			mostViolatedEnergy += _featureCosts.node[n];
 	for (Crag::CragEdge e : _crag.edges())
 		if (_mostViolatedSolution.selected(e))
-			mostViolatedEnergy += edgeCost(e, weights);
+			mostViolatedEnergy += _featureCosts.edge[e];
 
 	double loss   = value - _B_c + mostViolatedEnergy;
 	double margin = value - loss;
@@ -114,18 +117,15 @@ CragSolverOracle::updateCosts(const FeatureWeights& weights) {
 	// value.
 
 	// wΦ
-	for (Crag::CragNode n : _crag.nodes())
-		_costs.node[n] = nodeCost(n, weights);
-	for (Crag::CragEdge e : _crag.edges())
-		_costs.edge[e] = edgeCost(e, weights);
+	_linearCosts.computeCosts(weights, _featureCosts.node, _featureCosts.edge);
 
-	_currentBestSolver->setCosts(_costs);
+	_currentBestSolver->setCosts(_featureCosts);
 
-	// -Δ_l
+	// wΦ - Δ_l
 	for (Crag::CragNode n : _crag.nodes())
-		_costs.node[n] -= _loss.node[n];
+		_costs.node[n] = _featureCosts.node[n] - _loss.node[n];
 	for (Crag::CragEdge e : _crag.edges())
-		_costs.edge[e] -= _loss.edge[e];
+		_costs.edge[e] = _featureCosts.edge[e] - _loss.edge[e];
 
 	// Δ_c
 	_constant = _loss.constant;
@@ -134,10 +134,10 @@ CragSolverOracle::updateCosts(const FeatureWeights& weights) {
 	_B_c = 0;
 	for (Crag::CragNode n : _crag.nodes())
 		if (_bestEffort.selected(n))
-			_B_c += nodeCost(n, weights);
+			_B_c += _featureCosts.node[n];
 	for (Crag::CragEdge e : _crag.edges())
 		if (_bestEffort.selected(e))
-			_B_c += edgeCost(e, weights);
+			_B_c += _featureCosts.edge[e];
 	_constant += _B_c;
 
 	// L(w) = max_y <w,Φy'-Φy> + Δ(y',y)
@@ -168,23 +168,13 @@ CragSolverOracle::accumulateGradient(FeatureWeights& gradient) {
 
 	gradient.fill(0);
 
-	for (Crag::CragNode n : _crag.nodes()) {
-
-		int sign = _bestEffort.selected(n) - _mostViolatedSolution.selected(n);
+	Crag::NodeMap<double> nodeCoefficients(_crag);
+	Crag::EdgeMap<double> edgeCoefficients(_crag);
 
-		const std::vector<double>& f = _nodeFeatures[n];
-		std::vector<double>&       g = gradient[_crag.type(n)];
-		for (unsigned int i = 0; i < f.size(); i++)
-			g[i] += f[i]*sign;
-	}
-
-	for (Crag::CragEdge e : _crag.edges()) {
-
-		int sign = _bestEffort.selected(e) - _mostViolatedSolution.selected(e);
+	for (Crag::CragNode n : _crag.nodes())
+		nodeCoefficients[n] = _bestEffort.selected(n) - _mostViolatedSolution.selected(n);
+	for (Crag::CragEdge e : _crag.edges())
+		edgeCoefficients[e] = _bestEffort.selected(e) - _mostViolatedSolution.selected(e);
 
-		const std::vector<double>& f = _edgeFeatures[e];
-		std::vector<double>&       g = gradient[_crag.type(e)];
-		for (unsigned int i = 0; i < f.size(); i++)
-			g[i] += f[i]*sign;
-	}
+	_linearCosts.accumulate(nodeCoefficients, edgeCoefficients, gradient);
 }
@@ -5,6 +5,7 @@
 #include <inference/CragSolverFactory.h>
 #include <features/NodeFeatures.h>
 #include <features/EdgeFeatures.h>
+#include <features/LinearCosts.h>
 #include <util/assert.h>
 #include "Loss.h"
 #include "BestEffort.h"
@@ -12,7 +13,9 @@
 
 /**
  * Provides solution for loss-augmented inference problem, given a set of 
- * weights. To be used in a learning optimizer.
+ * weights. To be used in a learning optimizer. If a cycle constraint pool is 
+ * given, the cycle constraints found in one call are reused in the following 
+ * ones. Each call is one round of the pool.
  */
 class CragSolverOracle : public Oracle<FeatureWeights> {
 
@@ -25,17 +28,21 @@ public:
 			const EdgeFeatures&     edgeFeatures,
 			const Loss&             loss,
 			const BestEffort&       bestEffort,
-			CragSolver::Parameters  parameters = CragSolver::Parameters()) :
+			CragSolver::Parameters  parameters = CragSolver::Parameters(),
+			CycleConstraintPool*    cyclePool = 0) :
 		_crag(crag),
 		_volumes(volumes),
 		_nodeFeatures(nodeFeatures),
 		_edgeFeatures(edgeFeatures),
 		_loss(loss),
 		_bestEffort(bestEffort),
+		_linearCosts(crag, nodeFeatures, edgeFeatures),
+		_featureCosts(_crag),
 		_costs(_crag),
 		_mostViolatedSolution(_crag),
-		_mostViolatedSolver(CragSolverFactory::createSolver(crag, volumes, parameters)),
-		_currentBestSolver(CragSolverFactory::createSolver(crag, volumes, parameters)),
+		_mostViolatedSolver(CragSolverFactory::createSolver(crag, volumes, parameters, cyclePool)),
+		_currentBestSolver(CragSolverFactory::createSolver(crag, volumes, parameters, cyclePool)),
+		_cyclePool(cyclePool),
 		_iteration(0) {}
 
 	void valueGradientP(
@@ -49,35 +56,6 @@ private:
 
 	void accumulateGradient(FeatureWeights& gradient);
 
-	inline double nodeCost(Crag::CragNode n, const FeatureWeights& weights) const {
-
-		return dot(weights[_crag.type(n)], _nodeFeatures[n]);
-	}
-
-	inline double edgeCost(Crag::CragEdge e, const FeatureWeights& weights) const {
-
-		return dot(weights[_crag.type(e)], _edgeFeatures[e]);
-	}
-
-	inline double dot(const std::vector<double>& a, const std::vector<double>& b) const {
-
-		UTIL_ASSERT_REL(a.size(), ==, b.size());
-
-		double sum = 0;
-		auto ba = a.begin();
-		auto ea = a.end();
-		auto bb = b.begin();
-
-		while (ba != ea) {
-
-			sum += (*ba)*(*bb);
-			ba++;
-			bb++;
-		}
-
-		return sum;
-	}
-
 	const Crag&         _crag;
 	const CragVolumes&  _volumes;
 	const NodeFeatures& _nodeFeatures;
@@ -85,6 +63,12 @@ private:
 	const Loss&         _loss;
 	const BestEffort&   _bestEffort;
 
+	LinearCosts _linearCosts;
+
+	// the costs wΦ for the current weights
+	Costs _featureCosts;
+
+	// the loss augmented costs wΦ - Δ_l
 	Costs _costs;
 
 	// constant to be added to the optimal value of the multi-cut solution
@@ -98,6 +82,9 @@ private:
 	std::unique_ptr<CragSolver> _mostViolatedSolver;
 	std::unique_ptr<CragSolver> _currentBestSolver;
 
+	// shared by both solvers, advanced once per call to valueGradientP()
+	CycleConstraintPool* _cyclePool;
+
 	int _iteration;
 };
 
@@ -17,11 +17,12 @@ OverlapLoss::OverlapLoss(
 		const Crag&                crag,
 		const CragVolumes&         volumes,
 		const ExplicitVolume<int>& groundTruth) :
-	Loss(crag),
-	_candidateSizes(crag),
-	_overlaps(crag) {
+	OverlapLoss(crag, GroundTruthOverlaps(crag, volumes, groundTruth)) {}
 
-	computeSizesAndOverlaps(crag, volumes, groundTruth);
+OverlapLoss::OverlapLoss(
+		const Crag&                crag,
+		const GroundTruthOverlaps& overlaps) :
+	Loss(crag) {
 
 	// For each candidate i, get the gt region j with maximal overlap and set
 	//
@@ -49,17 +50,22 @@ OverlapLoss::OverlapLoss(
 
 		LOG_ALL(overlaplosslog) << "computing loss for node " << crag.id(i) << std::endl;
 
-		int size_i = _candidateSizes[i];
+		int size_i = overlaps.getSize(i);
 
 		// find most overlapping ground truth region
 		int bestGtSize = 0;
 		int maxOverlap = 0;
 
-		for (auto& p : _overlaps[i]) {
+		for (auto& p : overlaps[i]) {
 
 			int gtLabel = p.first;
 			int overlap = p.second;
-			int size_j  = _gtSizes[gtLabel];
+
+			// the background is not a ground-truth region
+			if (gtLabel == 0)
+				continue;
+
+			int size_j  = overlaps.getGroundTruthSize(gtLabel);
 
 			LOG_ALL(overlaplosslog) << "\toverlap with  gt region " << gtLabel << ": " << overlap << std::endl;
 			LOG_ALL(overlaplosslog) << "\tdifference to gt region " << gtLabel << ": " << (size_i - overlap) << std::endl;
@@ -78,51 +84,3 @@ OverlapLoss::OverlapLoss(
 	for (Crag::CragEdge e : crag.edges())
 		edge[e] = 0;
 }
-
-void
-OverlapLoss::computeSizesAndOverlaps(
-		const Crag& crag,
-		const CragVolumes& volumes,
-		const ExplicitVolume<int>& groundTruth) {
-
-	// ground truth sizes
-	_gtSizes.clear();
-	for (int l : groundTruth.data())
-		if (l > 0)
-			_gtSizes[l]++;
-
-	// candidate sizes and overlap with ground truth regions
-	for (Crag::CragNode n : crag.nodes()) {
-
-		_candidateSizes[n] = 0;
-
-		if (crag.type(n) == Crag::NoAssignmentNode)
-			continue;
-
-		const CragVolume& region = *volumes[n];
-
-		util::point<unsigned int, 3> offset =
-				(region.getOffset() - groundTruth.getOffset())/
-				groundTruth.getResolution();
-
-		LOG_ALL(overlaplosslog) << "offset into ground-truth image: " << offset << std::endl;
-
-		for (unsigned int z = 0; z < region.getDiscreteBoundingBox().depth();  z++)
-		for (unsigned int y = 0; y < region.getDiscreteBoundingBox().height(); y++)
-		for (unsigned int x = 0; x < region.getDiscreteBoundingBox().width();  x++) {
-
-			if (!region.data()(x, y, z))
-				continue;
-
-			_candidateSizes[n]++;
-
-			int gtLabel = groundTruth[offset + util::point<unsigned int, 3>(x, y, z)];
-
-			if (gtLabel == 0)
-				continue;
-
-			_overlaps[n][gtLabel]++;
-		}
-	}
-}
-
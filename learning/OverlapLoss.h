@@ -2,6 +2,7 @@
 #define CANDIDATE_MC_LEARNING_OVERLAP_LOSS_H__
 
 #include <imageprocessing/ExplicitVolume.h>
+#include <crag/GroundTruthOverlaps.h>
 #include <learning/Loss.h>
 
 /**
@@ -22,17 +23,13 @@ public:
 			const CragVolumes&         volumes,
 			const ExplicitVolume<int>& groundTruth);
 
-private:
-
-	void computeSizesAndOverlaps(
-			const Crag& crag,
-			const CragVolumes& volumes,
-			const ExplicitVolume<int>& groundTruth);
-
-	std::map<int, int> _gtSizes;
-	Crag::NodeMap<int> _candidateSizes;
-
-	Crag::NodeMap<std::map<int, int>> _overlaps;
+	/**
+	 * Same as above, but with precomputed overlaps of the candidates with the 
+	 * ground-truth regions.
+	 */
+	OverlapLoss(
+			const Crag&                crag,
+			const GroundTruthOverlaps& overlaps);
 };
 
 #endif // CANDIDATE_MC_LEARNING_OVERLAP_LOSS_H__
@@ -25,19 +25,16 @@ RandLoss::RandLoss(
 		const Crag&                crag,
 		const CragVolumes&         volumes,
 		const ExplicitVolume<int>& groundTruth) :
-	Loss(crag),
-	_overlaps(crag) {
+	RandLoss(crag, GroundTruthOverlaps(crag, volumes, groundTruth)) {}
+
+RandLoss::RandLoss(
+		const Crag&                crag,
+		const GroundTruthOverlaps& overlaps) :
+	Loss(crag) {
 
 	bool balance = optionBalanceRandLoss;
 	bool restrictToLeaves = optionRestrictRandLossToLeaves;
 
-	LOG_DEBUG(randlosslog) << "getting candidate overlaps..." << std::endl;
-
-	// annotate all nodes with the max overlap area to any gt label
-	for (Crag::NodeIt n(crag); n != lemon::INVALID; ++n)
-		if (Crag::SubsetOutArcIt(crag.getSubsetGraph(), crag.toSubset(n)) == lemon::INVALID)
-			recurseRandLoss(crag, volumes, n, groundTruth);
-
 	LOG_DEBUG(randlosslog) << "setting foreground RAND loss" << std::endl;
 
 	// annotate nodes: loss is number of incorrectly merged pairs, minus number 
@@ -55,7 +52,7 @@ RandLoss::RandLoss(
 		LOG_ALL(randlosslog)
 				<< "getting RAND score for node " << crag.id(n) << std::endl;
 
-		node[n] = foregroundNodeOverlapScore(_overlaps[n]) + backgroundNodeOverlapScore(_overlaps[n]);
+		node[n] = foregroundNodeOverlapScore(overlaps[n]) + backgroundNodeOverlapScore(overlaps[n]);
 
 		LOG_ALL(randlosslog)
 				<< "node " << crag.id(n)
@@ -86,7 +83,7 @@ RandLoss::RandLoss(
 				<< ", "     << crag.id(crag.v(e)) << ")"
 				<< std::endl;
 
-		edge[e] = foregroundEdgeOverlapScore(_overlaps[u], _overlaps[v]) + backgroundEdgeOverlapScore(_overlaps[u], _overlaps[v]);
+		edge[e] = foregroundEdgeOverlapScore(overlaps[u], overlaps[v]) + backgroundEdgeOverlapScore(overlaps[u], overlaps[v]);
 
 		LOG_ALL(randlosslog)
 				<< "edge (" << crag.id(crag.u(e))
@@ -98,68 +95,6 @@ RandLoss::RandLoss(
 		propagateLeafValues(crag);
 }
 
-void
-RandLoss::recurseRandLoss(
-		const Crag&                crag,
-		const CragVolumes&         volumes,
-		const Crag::Node&          n,
-		const ExplicitVolume<int>& groundTruth) {
-
-	bool leafNode = (Crag::SubsetInArcIt(crag.getSubsetGraph(), crag.toSubset(n)) == lemon::INVALID);
-	if (leafNode) {
-
-		LOG_ALL(randlosslog) << "getting leaf overlap for node " << crag.id(n) << std::endl;
-		_overlaps[n] = leafOverlaps(*volumes[n], groundTruth);
-
-	} else {
-
-		// get overlaps with all gt regions
-		for (Crag::SubsetInArcIt a(crag.getSubsetGraph(), crag.toSubset(n)); a != lemon::INVALID; ++a) {
-
-			Crag::Node child = crag.toRag(crag.getSubsetGraph().source(a));
-
-			recurseRandLoss(crag, volumes, child, groundTruth);
-
-			for (auto p : _overlaps[child])
-				if (!_overlaps[n].count(p.first))
-					_overlaps[n][p.first] = p.second;
-				else
-					_overlaps[n][p.first] += p.second;
-		}
-	}
-}
-
-std::map<int, int>
-RandLoss::leafOverlaps(
-		const ExplicitVolume<bool>& region,
-		const ExplicitVolume<int>&  groundTruth) {
-
-	std::map<int, int> overlaps;
-
-	util::point<unsigned int, 3> offset =
-			(region.getOffset() - groundTruth.getOffset())/
-			groundTruth.getResolution();
-
-	LOG_ALL(randlosslog) << "offset into ground-truth image: " << offset << std::endl;
-
-	for (unsigned int z = 0; z < region.getDiscreteBoundingBox().depth();  z++)
-	for (unsigned int y = 0; y < region.getDiscreteBoundingBox().height(); y++)
-	for (unsigned int x = 0; x < region.getDiscreteBoundingBox().width();  x++) {
-
-		if (!region.data()(x, y, z))
-			continue;
-
-		int gtLabel = groundTruth[offset + util::point<unsigned int, 3>(x, y, z)];
-
-		if (!overlaps.count(gtLabel))
-			overlaps[gtLabel] = 1;
-		else
-			overlaps[gtLabel]++;
-	}
-
-	return overlaps;
-}
-
 double
 RandLoss::foregroundNodeOverlapScore(
 		const std::map<int, int>& overlaps) {
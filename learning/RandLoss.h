@@ -2,6 +2,7 @@
 #define CANDIDATE_MC_LEARNING_RAND_LOSS_H__
 
 #include <imageprocessing/ExplicitVolume.h>
+#include <crag/GroundTruthOverlaps.h>
 #include <learning/Loss.h>
 
 /**
@@ -33,17 +34,15 @@ public:
 			const CragVolumes&         volumes,
 			const ExplicitVolume<int>& groundTruth);
 
-private:
-
-	void recurseRandLoss(
+	/**
+	 * Same as above, but with precomputed overlaps of the candidates with the 
+	 * ground-truth regions.
+	 */
+	RandLoss(
 			const Crag&                crag,
-			const CragVolumes&         volumes,
-			const Crag::Node&          n,
-			const ExplicitVolume<int>& groundTruth);
+			const GroundTruthOverlaps& overlaps);
 
-	std::map<int, int> leafOverlaps(
-			const ExplicitVolume<bool>& region,
-			const ExplicitVolume<int>&  groundTruth);
+private:
 
 	double foregroundNodeOverlapScore(
 			const std::map<int, int>& overlaps);
@@ -58,8 +57,6 @@ private:
 	double backgroundEdgeOverlapScore(
 			const std::map<int, int>& overlapsU,
 			const std::map<int, int>& overlapsV);
-
-	Crag::NodeMap<std::map<int, int>> _overlaps;
 };
 
 #endif // CANDIDATE_MC_LEARNING_RAND_LOSS_H__
@@ -57,6 +57,23 @@ public:
 
 	void storeMergeHistory(std::string filename);
 
+	/**
+	 * Get the number of merges performed by createMergeTree.
+	 */
+	std::size_t getNumMerges() const { return _mergeHistory.size(); }
+
+	/**
+	 * Get the ith merge, in the order of merging: regions u and v got merged 
+	 * into region parent with the given score.
+	 */
+	void getMerge(std::size_t i, int& u, int& v, int& parent, float& score) const {
+
+		u      = _rag.id(_mergeHistory[i].u);
+		v      = _rag.id(_mergeHistory[i].v);
+		parent = _rag.id(_mergeHistory[i].parent);
+		score  = _mergeHistory[i].score;
+	}
+
 	/**
 	 * Get the region adjacency graph.
 	 */
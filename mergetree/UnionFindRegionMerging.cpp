@@ -0,0 +1,326 @@
+#include <algorithm>
+#include <cmath>
+#include <initializer_list>
+#include <numeric>
+#include <unordered_map>
+#include <util/Logger.h>
+#include <util/assert.h>
+#include <util/exceptions.h>
+#include <util/timing.h>
+#include "UnionFindRegionMerging.h"
+
+extern logger::LogChannel mergetreelog;
+
+UnionFindRegionMerging::UnionFindRegionMerging(
+		vigra::MultiArrayView<3, int>   initialRegions,
+		vigra::MultiArrayView<3, float> intensities,
+		unsigned int                    numBins) {
+
+	UTIL_TIME_METHOD;
+
+	if (initialRegions.shape() != intensities.shape())
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"initial regions of shape " << initialRegions.shape() <<
+				" do not match intensities of shape " << intensities.shape());
+
+	if (numBins == 0)
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"number of histogram bins has to be positive");
+
+	if (initialRegions.size() == 0)
+		return;
+
+	int minLabel = *std::min_element(initialRegions.begin(), initialRegions.end());
+	int maxLabel = *std::max_element(initialRegions.begin(), initialRegions.end());
+
+	if (minLabel < 0)
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"initial regions contain negative label " << minLabel);
+
+	_parents.resize(maxLabel + 1);
+	std::iota(_parents.begin(), _parents.end(), 0);
+	_regionSizes.resize(maxLabel + 1, 0);
+	_regionEdges.resize(maxLabel + 1);
+
+	for (int label : initialRegions)
+		_regionSizes[label]++;
+
+	// boundary intensities are means of voxel intensities, and thus within the
+	// range of the voxel intensities
+	float minIntensity = *std::min_element(intensities.begin(), intensities.end());
+	float maxIntensity = *std::max_element(intensities.begin(), intensities.end());
+	double binWidth = (static_cast<double>(maxIntensity) - minIntensity)/numBins;
+
+	auto binOf = [&](float value) -> std::uint32_t {
+
+		if (binWidth <= 0)
+			return 0;
+		return std::min(numBins - 1, static_cast<unsigned int>((value - minIntensity)/binWidth));
+	};
+
+	// collect (bin, value) pairs for each boundary, edges are enumerated in
+	// the order in which they are found in the volume
+
+	std::unordered_map<std::uint64_t, int> edgeIds;
+	std::vector<std::vector<std::pair<std::uint32_t, float>>> boundaries;
+
+	int width  = initialRegions.shape(0);
+	int height = initialRegions.shape(1);
+	int depth  = initialRegions.shape(2);
+
+	auto addBoundary = [&](int a, int b, float value) {
+
+		int u = std::min(a, b);
+		int v = std::max(a, b);
+		std::uint64_t key = (static_cast<std::uint64_t>(u) << 32) | static_cast<std::uint32_t>(v);
+
+		auto i = edgeIds.find(key);
+		int id;
+		if (i == edgeIds.end()) {
+
+			id = _edges.size();
+			edgeIds[key] = id;
+			_edges.push_back({u, v, std::vector<Bin>(), 0, 0, true});
+			boundaries.emplace_back();
+			_regionEdges[u].push_back(id);
+			_regionEdges[v].push_back(id);
+
+		} else {
+
+			id = i->second;
+		}
+
+		boundaries[id].push_back(std::make_pair(binOf(value), value));
+	};
+
+	for (int z = 0; z < depth; z++)
+	for (int y = 0; y < height; y++)
+	for (int x = 0; x < width; x++) {
+
+		int   label     = initialRegions(x, y, z);
+		float intensity = intensities(x, y, z);
+
+		if (x + 1 < width && initialRegions(x + 1, y, z) != label)
+			addBoundary(label, initialRegions(x + 1, y, z), (intensity + intensities(x + 1, y, z))/2);
+		if (y + 1 < height && initialRegions(x, y + 1, z) != label)
+			addBoundary(label, initialRegions(x, y + 1, z), (intensity + intensities(x, y + 1, z))/2);
+		if (z + 1 < depth && initialRegions(x, y, z + 1) != label)
+			addBoundary(label, initialRegions(x, y, z + 1), (intensity + intensities(x, y, z + 1))/2);
+	}
+
+	// compress the boundaries into histograms
+
+	for (std::size_t i = 0; i < _edges.size(); i++) {
+
+		std::vector<std::pair<std::uint32_t, float>>& boundary = boundaries[i];
+		std::sort(boundary.begin(), boundary.end());
+
+		Edge& edge = _edges[i];
+		edge.size = boundary.size();
+
+		for (const auto& sample : boundary) {
+
+			if (edge.histogram.empty() || edge.histogram.back().index != sample.first)
+				edge.histogram.push_back({sample.first, 0, 0});
+
+			edge.histogram.back().count++;
+			edge.histogram.back().sum += sample.second;
+		}
+
+		edge.histogram.shrink_to_fit();
+		std::vector<std::pair<std::uint32_t, float>>().swap(boundary);
+	}
+
+	LOG_USER(mergetreelog)
+			<< "got region adjacency graph with "
+			<< std::count_if(_regionSizes.begin(), _regionSizes.end(), [](std::size_t s){ return s > 0; })
+			<< " regions and " << _edges.size() << " edges" << std::endl;
+}
+
+void
+UnionFindRegionMerging::createMergeTree(float minRegionSizeExponent) {
+
+	UTIL_TIME_METHOD;
+
+	LOG_USER(mergetreelog) << "computing initial edge scores..." << std::endl;
+
+	HeapType heap;
+	for (std::size_t i = 0; i < _edges.size(); i++)
+		heap.push({scoreEdge(_edges[i], minRegionSizeExponent), static_cast<int>(i), 0});
+
+	LOG_USER(mergetreelog) << "merging regions..." << std::endl;
+
+	while (!heap.empty()) {
+
+		HeapEntry next = heap.top();
+		heap.pop();
+
+		// skip edges that got merged or re-scored since
+		const Edge& edge = _edges[next.edge];
+		if (!edge.alive || edge.version != next.version)
+			continue;
+
+		mergeRegions(next.edge, next.score, heap, minRegionSizeExponent);
+	}
+
+	LOG_USER(mergetreelog) << "finished merging" << std::endl;
+}
+
+int
+UnionFindRegionMerging::find(int region) {
+
+	// path halving
+	while (_parents[region] != region) {
+
+		_parents[region] = _parents[_parents[region]];
+		region = _parents[region];
+	}
+
+	return region;
+}
+
+void
+UnionFindRegionMerging::mergeRegions(int e, float score, HeapType& heap, float exponent) {
+
+	int a = find(_edges[e].u);
+	int b = find(_edges[e].v);
+
+	UTIL_ASSERT(a != b);
+
+	// add new c = a + b
+	int c = _parents.size();
+	_parents.push_back(c);
+	_parents[a] = c;
+	_parents[b] = c;
+	_regionSizes.push_back(_regionSizes[a] + _regionSizes[b]);
+
+	_mergeHistory.push_back({a, b, c, score});
+
+	LOG_ALL(mergetreelog)
+			<< "merged regions " << a << " and " << b
+			<< " with score " << score
+			<< " into " << c << std::endl;
+
+	kill(_edges[e]);
+
+	// connect c to the neighbors of a and b, merging the boundaries of
+	// neighbors of both
+
+	std::unordered_map<int, int> neighborEdges;
+	std::vector<int> edges;
+
+	for (int child : { a, b }) {
+
+		for (int i : _regionEdges[child]) {
+
+			Edge& edge = _edges[i];
+
+			// edges of a region are not removed when the edge gets merged
+			// into another one
+			if (!edge.alive)
+				continue;
+
+			int u = find(edge.u);
+			int v = find(edge.v);
+			int neighbor = (u == c ? v : u);
+
+			UTIL_ASSERT(neighbor != c);
+
+			auto existing = neighborEdges.find(neighbor);
+
+			if (existing == neighborEdges.end()) {
+
+				edge.u = c;
+				edge.v = neighbor;
+				neighborEdges[neighbor] = i;
+				edges.push_back(i);
+
+			} else {
+
+				mergeHistograms(_edges[existing->second], edge);
+				kill(edge);
+			}
+		}
+
+		std::vector<int>().swap(_regionEdges[child]);
+	}
+
+	// get edge scores for the edges of c
+	for (int i : edges) {
+
+		Edge& edge = _edges[i];
+		edge.version++;
+		heap.push({scoreEdge(edge, exponent), i, edge.version});
+	}
+
+	_regionEdges.push_back(std::move(edges));
+}
+
+float
+UnionFindRegionMerging::scoreEdge(const Edge& edge, float exponent) const {
+
+	UTIL_ASSERT_REL(edge.size, >, 0u);
+
+	// the value at position size/2 in the sorted boundary
+	std::size_t median = edge.size/2;
+	std::size_t seen   = 0;
+
+	float score = 0;
+	for (const Bin& bin : edge.histogram) {
+
+		seen += bin.count;
+		if (seen > median) {
+
+			score = bin.sum/bin.count;
+			break;
+		}
+	}
+
+	score *= pow(std::min(_regionSizes[edge.u], _regionSizes[edge.v]), exponent);
+
+	return score;
+}
+
+void
+UnionFindRegionMerging::mergeHistograms(Edge& a, const Edge& b) {
+
+	std::vector<Bin> merged;
+	merged.reserve(a.histogram.size() + b.histogram.size());
+
+	auto i = a.histogram.begin();
+	auto j = b.histogram.begin();
+
+	while (i != a.histogram.end() || j != b.histogram.end()) {
+
+		if (j == b.histogram.end() || (i != a.histogram.end() && i->index < j->index)) {
+
+			merged.push_back(*i);
+			i++;
+
+		} else if (i == a.histogram.end() || j->index < i->index) {
+
+			merged.push_back(*j);
+			j++;
+
+		} else {
+
+			merged.push_back({i->index, i->count + j->count, i->sum + j->sum});
+			i++;
+			j++;
+		}
+	}
+
+	merged.shrink_to_fit();
+	a.histogram.swap(merged);
+	a.size += b.size;
+}
+
+void
+UnionFindRegionMerging::kill(Edge& edge) {
+
+	edge.alive = false;
+	std::vector<Bin>().swap(edge.histogram);
+}
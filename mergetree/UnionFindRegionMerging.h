@@ -0,0 +1,145 @@
+#ifndef MULTI2CUT_MERGETREE_UNION_FIND_REGION_MERGING_H__
+#define MULTI2CUT_MERGETREE_UNION_FIND_REGION_MERGING_H__
+
+#include <cstdint>
+#include <queue>
+#include <vector>
+#include <vigra/multi_array.hxx>
+
+/**
+ * A faster alternative to IterativeRegionMerging with
+ * MultiplyMinRegionSize<MedianEdgeIntensity<3>> as scoring function.
+ *
+ * Regions are tracked in a union-find structure, in which each merge creates a
+ * new root. Instead of the grid edges along a boundary, each region adjacency
+ * edge keeps a sparse histogram of the boundary intensities, which can be
+ * merged in time linear in the number of its non-empty bins. The median of a
+ * boundary is the mean of the values in the bin that contains the median. For
+ * quantized intensities (like 8-bit images), each bin holds at most one
+ * distinct value and the median is exact. Edges are kept in a heap that is
+ * invalidated lazily: re-scoring an edge pushes a new entry with a new version
+ * of the edge, outdated entries are skipped when popped. After a merge, only
+ * the edges of the new region are re-scored.
+ *
+ * The merge history uses the same ids as IterativeRegionMerging: initial
+ * regions are identified by their label, merged regions get consecutive ids
+ * starting at the largest label plus one.
+ */
+class UnionFindRegionMerging {
+
+public:
+
+	/**
+	 * Create the region adjacency graph of the given initial regions, with
+	 * boundary intensities taken as the mean of the intensities of
+	 * neighboring voxels (in the direct neighborhood).
+	 *
+	 * @param numBins
+	 *              The number of bins of the boundary histograms, spread
+	 *              evenly between the minimal and maximal intensity.
+	 */
+	UnionFindRegionMerging(
+			vigra::MultiArrayView<3, int>   initialRegions,
+			vigra::MultiArrayView<3, float> intensities,
+			unsigned int                    numBins = 1024);
+
+	/**
+	 * Merge regions until no adjacent regions are left. The score of an edge
+	 * is the median boundary intensity, times the size of the smaller region
+	 * to the power of minRegionSizeExponent. Regions with the smallest score
+	 * get merged first.
+	 */
+	void createMergeTree(float minRegionSizeExponent);
+
+	/**
+	 * Get the number of merges performed by createMergeTree.
+	 */
+	std::size_t getNumMerges() const { return _mergeHistory.size(); }
+
+	/**
+	 * Get the ith merge, in the order of merging: regions u and v got merged
+	 * into region parent with the given score.
+	 */
+	void getMerge(std::size_t i, int& u, int& v, int& parent, float& score) const {
+
+		u      = _mergeHistory[i].u;
+		v      = _mergeHistory[i].v;
+		parent = _mergeHistory[i].parent;
+		score  = _mergeHistory[i].score;
+	}
+
+private:
+
+	struct Bin {
+
+		std::uint32_t index;
+		std::uint32_t count;
+		double        sum;
+	};
+
+	struct Edge {
+
+		// the regions connected by this edge, might be outdated by merges
+		int u;
+		int v;
+
+		// sparse boundary histogram, sorted by bin index
+		std::vector<Bin> histogram;
+		std::size_t      size;
+
+		unsigned int version;
+		bool         alive;
+	};
+
+	struct HeapEntry {
+
+		float        score;
+		int          edge;
+		unsigned int version;
+	};
+
+	// sort entries in increasing score, ties broken by edge id
+	struct HeapCompare {
+
+		bool operator()(const HeapEntry& a, const HeapEntry& b) const {
+
+			if (a.score != b.score)
+				return a.score > b.score;
+			return a.edge > b.edge;
+		}
+	};
+
+	struct Merge {
+
+		int   u;
+		int   v;
+		int   parent;
+		float score;
+	};
+
+	typedef std::priority_queue<HeapEntry, std::vector<HeapEntry>, HeapCompare> HeapType;
+
+	// find the current region of a region
+	int find(int region);
+
+	// merge the regions of the given edge and re-score the edges of the new
+	// region
+	void mergeRegions(int edge, float score, HeapType& heap, float exponent);
+
+	float scoreEdge(const Edge& edge, float exponent) const;
+
+	// add the bins of the histogram of b to the histogram of a
+	static void mergeHistograms(Edge& a, const Edge& b);
+
+	static void kill(Edge& edge);
+
+	std::vector<int>              _parents;
+	std::vector<std::size_t>      _regionSizes;
+	std::vector<std::vector<int>> _regionEdges;
+
+	std::vector<Edge> _edges;
+
+	std::vector<Merge> _mergeHistory;
+};
+
+#endif // MULTI2CUT_MERGETREE_UNION_FIND_REGION_MERGING_H__
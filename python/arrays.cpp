@@ -0,0 +1,229 @@
+#include <algorithm>
+#include "arrays.h"
+#define NPY_NO_DEPRECATED_API NPY_1_7_API_VERSION
+#include <numpy/arrayobject.h>
+
+namespace pycmc {
+
+namespace {
+
+const char* ViewBaseName = "pycmc.ViewBase";
+
+struct ViewBase {
+
+	boost::python::object owner;
+	std::function<void()> release;
+};
+
+void
+destroyViewBase(PyObject* capsule) {
+
+	ViewBase* base = static_cast<ViewBase*>(PyCapsule_GetPointer(capsule, ViewBaseName));
+
+	base->release();
+	delete base;
+}
+
+boost::python::object
+wrap(
+		int                   nd,
+		npy_intp*             shape,
+		npy_intp*             strides,
+		int                   typenum,
+		const void*           data,
+		boost::python::object base) {
+
+	// without NPY_ARRAY_WRITEABLE, the array is read-only
+	PyObject* array = PyArray_New(
+			&PyArray_Type,
+			nd,
+			shape,
+			typenum,
+			strides,
+			const_cast<void*>(data),
+			0,
+			NPY_ARRAY_ALIGNED,
+			NULL);
+
+	if (array == NULL)
+		boost::python::throw_error_already_set();
+
+	// the array steals a reference to its base
+	Py_INCREF(base.ptr());
+	if (PyArray_SetBaseObject(reinterpret_cast<PyArrayObject*>(array), base.ptr()) < 0) {
+
+		Py_DECREF(array);
+		boost::python::throw_error_already_set();
+	}
+
+	return boost::python::object(boost::python::handle<>(array));
+}
+
+template <typename T>
+boost::python::object
+copyToArray(const std::vector<T>& v, int nd, npy_intp* shape, int typenum) {
+
+	PyObject* array = PyArray_SimpleNew(nd, shape, typenum);
+
+	if (array == NULL)
+		boost::python::throw_error_already_set();
+
+	std::copy(
+			v.begin(),
+			v.end(),
+			static_cast<T*>(PyArray_DATA(reinterpret_cast<PyArrayObject*>(array))));
+
+	return boost::python::object(boost::python::handle<>(array));
+}
+
+template <typename T>
+void
+copyFromArray(boost::python::object o, std::vector<T>& v, int typenum) {
+
+	PyObject* array = PyArray_FROMANY(o.ptr(), typenum, 1, 1, NPY_ARRAY_IN_ARRAY | NPY_ARRAY_FORCECAST);
+
+	if (array == NULL)
+		boost::python::throw_error_already_set();
+
+	boost::python::handle<> handle(array);
+
+	const T* data = static_cast<const T*>(PyArray_DATA(reinterpret_cast<PyArrayObject*>(array)));
+	v.assign(data, data + PyArray_DIM(reinterpret_cast<PyArrayObject*>(array), 0));
+}
+
+} // anonymous namespace
+
+void
+initArrays() {
+
+	if (_import_array() < 0)
+		boost::python::throw_error_already_set();
+}
+
+boost::python::object
+viewBase(
+		boost::python::object owner,
+		std::function<void()> release) {
+
+	ViewBase* base = new ViewBase{owner, release};
+
+	PyObject* capsule = PyCapsule_New(base, ViewBaseName, &destroyViewBase);
+
+	if (capsule == NULL) {
+
+		base->release();
+		delete base;
+		boost::python::throw_error_already_set();
+	}
+
+	return boost::python::object(boost::python::handle<>(capsule));
+}
+
+boost::python::object
+matrixView(
+		const double*         data,
+		std::size_t           rows,
+		std::size_t           cols,
+		std::size_t           rowStride,
+		boost::python::object base) {
+
+	npy_intp shape[2]   = { static_cast<npy_intp>(rows), static_cast<npy_intp>(cols) };
+	npy_intp strides[2] = { static_cast<npy_intp>(rowStride*sizeof(double)), sizeof(double) };
+
+	return wrap(2, shape, strides, NPY_DOUBLE, data, base);
+}
+
+boost::python::object
+vectorView(
+		const int*            data,
+		std::size_t           size,
+		boost::python::object base) {
+
+	npy_intp shape[1]   = { static_cast<npy_intp>(size) };
+	npy_intp strides[1] = { sizeof(int) };
+
+	return wrap(1, shape, strides, NPY_INT, data, base);
+}
+
+boost::python::object
+toMatrix(boost::python::object o) {
+
+	PyObject* array = PyArray_FROMANY(o.ptr(), NPY_DOUBLE, 2, 2, NPY_ARRAY_IN_ARRAY);
+
+	if (array == NULL)
+		boost::python::throw_error_already_set();
+
+	return boost::python::object(boost::python::handle<>(array));
+}
+
+boost::python::object
+newMatrix(std::size_t rows, std::size_t cols) {
+
+	npy_intp shape[2] = { static_cast<npy_intp>(rows), static_cast<npy_intp>(cols) };
+
+	PyObject* array = PyArray_SimpleNew(2, shape, NPY_DOUBLE);
+
+	if (array == NULL)
+		boost::python::throw_error_already_set();
+
+	return boost::python::object(boost::python::handle<>(array));
+}
+
+double*
+matrixData(boost::python::object matrix, std::size_t& rows, std::size_t& cols) {
+
+	PyArrayObject* array = reinterpret_cast<PyArrayObject*>(matrix.ptr());
+
+	rows = PyArray_DIM(array, 0);
+	cols = PyArray_DIM(array, 1);
+
+	return static_cast<double*>(PyArray_DATA(array));
+}
+
+boost::python::object
+toArray(const std::vector<int>& v) {
+
+	npy_intp shape[1] = { static_cast<npy_intp>(v.size()) };
+	return copyToArray(v, 1, shape, NPY_INT);
+}
+
+boost::python::object
+toArray(const std::vector<double>& v) {
+
+	npy_intp shape[1] = { static_cast<npy_intp>(v.size()) };
+	return copyToArray(v, 1, shape, NPY_DOUBLE);
+}
+
+boost::python::object
+toArray(const std::vector<unsigned char>& v) {
+
+	npy_intp shape[1] = { static_cast<npy_intp>(v.size()) };
+	return copyToArray(v, 1, shape, NPY_BOOL);
+}
+
+boost::python::object
+toArray(const std::vector<int>& v, std::size_t cols) {
+
+	npy_intp shape[2] = { static_cast<npy_intp>(cols == 0 ? 0 : v.size()/cols), static_cast<npy_intp>(cols) };
+	return copyToArray(v, 2, shape, NPY_INT);
+}
+
+void
+fromArray(boost::python::object o, std::vector<int>& v) {
+
+	copyFromArray(o, v, NPY_INT);
+}
+
+void
+fromArray(boost::python::object o, std::vector<double>& v) {
+
+	copyFromArray(o, v, NPY_DOUBLE);
+}
+
+void
+fromArray(boost::python::object o, std::vector<unsigned char>& v) {
+
+	copyFromArray(o, v, NPY_BOOL);
+}
+
+} // namespace pycmc
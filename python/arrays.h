@@ -0,0 +1,91 @@
+#ifndef CANDIDATE_MC_PYTHON_ARRAYS_H__
+#define CANDIDATE_MC_PYTHON_ARRAYS_H__
+
+#include <functional>
+#include <vector>
+#include <boost/python.hpp>
+
+namespace pycmc {
+
+/**
+ * Initialize the NumPy C API. Has to be called once before any of the other 
+ * functions in this file is used.
+ */
+void initArrays();
+
+/**
+ * Create an object to be used as the base of array views: It keeps owner 
+ * alive and calls release() when it is destroyed, i.e., when the last view 
+ * using it as base is gone.
+ */
+boost::python::object viewBase(
+		boost::python::object owner,
+		std::function<void()> release);
+
+/**
+ * Create a read-only NumPy array of shape (rows, cols) that shares the memory 
+ * of a row-major matrix, with rowStride elements between the starts of 
+ * consecutive rows. The array keeps base alive. It is only valid as long as 
+ * the memory of the matrix is not reallocated, which base has to ensure (see 
+ * viewBase()).
+ */
+boost::python::object matrixView(
+		const double*         data,
+		std::size_t           rows,
+		std::size_t           cols,
+		std::size_t           rowStride,
+		boost::python::object base);
+
+/**
+ * Create a read-only one-dimensional NumPy array that shares the given 
+ * memory, like matrixView().
+ */
+boost::python::object vectorView(
+		const int*            data,
+		std::size_t           size,
+		boost::python::object base);
+
+/**
+ * Convert any object that NumPy can interpret as a two-dimensional matrix of 
+ * doubles into a C-contiguous NumPy array. Arrays that are C-contiguous 
+ * already are not copied.
+ */
+boost::python::object toMatrix(boost::python::object o);
+
+/**
+ * Create a new, writeable NumPy array of doubles of shape (rows, cols).
+ */
+boost::python::object newMatrix(std::size_t rows, std::size_t cols);
+
+/**
+ * Get the data and shape of a matrix created with toMatrix() or newMatrix().
+ */
+double* matrixData(boost::python::object matrix, std::size_t& rows, std::size_t& cols);
+
+/**
+ * Copy a vector into a new one-dimensional NumPy array. Vectors of unsigned 
+ * char are converted into arrays of bools.
+ */
+boost::python::object toArray(const std::vector<int>& v);
+boost::python::object toArray(const std::vector<double>& v);
+boost::python::object toArray(const std::vector<unsigned char>& v);
+
+/**
+ * Copy a row-major matrix with cols columns into a new two-dimensional NumPy 
+ * array.
+ */
+boost::python::object toArray(const std::vector<int>& v, std::size_t cols);
+
+/**
+ * Copy any object that NumPy can interpret as a one-dimensional array into a 
+ * vector, converting the values if needed. Vectors of unsigned char receive 
+ * bools.
+ */
+void fromArray(boost::python::object o, std::vector<int>& v);
+void fromArray(boost::python::object o, std::vector<double>& v);
+void fromArray(boost::python::object o, std::vector<unsigned char>& v);
+
+} // namespace pycmc
+
+#endif // CANDIDATE_MC_PYTHON_ARRAYS_H__
+
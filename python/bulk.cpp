@@ -0,0 +1,244 @@
+#include <util/exceptions.h>
+#include "arrays.h"
+#include "bulk.h"
+
+namespace pycmc {
+
+namespace {
+
+inline std::size_t numNodeIds(const Crag& crag) { return crag.getAdjacencyGraph().maxNodeId() + 1; }
+inline std::size_t numEdgeIds(const Crag& crag) { return crag.getAdjacencyGraph().maxEdgeId() + 1; }
+
+/**
+ * Read one value per node or edge id from a python object.
+ */
+template <typename T>
+void readValues(boost::python::object o, std::size_t numIds, std::vector<T>& values) {
+
+	fromArray(o, values);
+
+	if (values.size() != numIds)
+		UTIL_THROW_EXCEPTION(
+				UsageError,
+				"expected an array with " << numIds << " entries (one per id), got " << values.size());
+}
+
+} // anonymous namespace
+
+boost::python::object
+nodeIdArray(const Crag& crag) {
+
+	std::vector<int> ids;
+	for (Crag::CragNode n : crag.nodes())
+		ids.push_back(crag.id(n));
+
+	return toArray(ids);
+}
+
+boost::python::object
+nodeTypeArray(const Crag& crag) {
+
+	std::vector<int> types(numNodeIds(crag), -1);
+	for (Crag::CragNode n : crag.nodes())
+		types[crag.id(n)] = crag.type(n);
+
+	return toArray(types);
+}
+
+boost::python::object
+leafNodeArray(const Crag& crag) {
+
+	std::vector<unsigned char> leaf(numNodeIds(crag), false);
+	for (Crag::CragNode n : crag.nodes())
+		leaf[crag.id(n)] = crag.isLeafNode(n);
+
+	return toArray(leaf);
+}
+
+boost::python::object
+edgeIdArray(const Crag& crag) {
+
+	std::vector<int> ids;
+	for (Crag::CragEdge e : crag.edges())
+		ids.push_back(crag.id(e));
+
+	return toArray(ids);
+}
+
+boost::python::object
+edgeArray(const Crag& crag) {
+
+	std::vector<int> edges(3*numEdgeIds(crag), -1);
+	for (Crag::CragEdge e : crag.edges()) {
+
+		int id = crag.id(e);
+		edges[3*id]     = crag.id(e.u());
+		edges[3*id + 1] = crag.id(e.v());
+		edges[3*id + 2] = crag.type(e);
+	}
+
+	return toArray(edges, 3);
+}
+
+boost::python::object
+leafEdgeArray(const Crag& crag) {
+
+	std::vector<unsigned char> leaf(numEdgeIds(crag), false);
+	for (Crag::CragEdge e : crag.edges())
+		leaf[crag.id(e)] = crag.isLeafEdge(e);
+
+	return toArray(leaf);
+}
+
+boost::python::object
+nodeLeafNodeCountArray(const Crag& crag) {
+
+	const CragHierarchyIndex* index = crag.getHierarchyIndex();
+
+	std::vector<int> counts(numNodeIds(crag), 0);
+	for (Crag::CragNode n : crag.nodes())
+		counts[crag.id(n)] = (index ? index->getNumLeafNodes(crag.id(n)) : crag.leafNodes(n).size());
+
+	return toArray(counts);
+}
+
+boost::python::object
+nodeLeafEdgeCountArray(const Crag& crag) {
+
+	const CragHierarchyIndex* index = crag.getHierarchyIndex();
+
+	std::vector<int> counts(numNodeIds(crag), 0);
+	for (Crag::CragNode n : crag.nodes())
+		counts[crag.id(n)] = (index ? index->getNumLeafEdges(crag.id(n)) : crag.leafEdges(n).size());
+
+	return toArray(counts);
+}
+
+boost::python::object
+edgeLeafEdgeCountArray(const Crag& crag) {
+
+	const CragHierarchyIndex* index = crag.getHierarchyIndex();
+
+	std::vector<int> counts(numEdgeIds(crag), 0);
+	std::vector<int> leafEdges;
+	for (Crag::CragEdge e : crag.edges()) {
+
+		if (index) {
+
+			leafEdges.clear();
+			index->leafEdges(crag.id(e.u()), crag.id(e.v()), leafEdges);
+			counts[crag.id(e)] = leafEdges.size();
+
+		} else {
+
+			counts[crag.id(e)] = crag.leafEdges(e).size();
+		}
+	}
+
+	return toArray(counts);
+}
+
+boost::python::object
+subsetArcArray(const Crag& crag) {
+
+	std::vector<int> arcs;
+	for (Crag::CragArc a : crag.arcs()) {
+
+		arcs.push_back(crag.id(a.source()));
+		arcs.push_back(crag.id(a.target()));
+	}
+
+	return toArray(arcs, 2);
+}
+
+boost::python::object
+nodeCostArray(const Costs& costs, const Crag& crag) {
+
+	std::vector<double> values(numNodeIds(crag), 0);
+	for (Crag::CragNode n : crag.nodes())
+		values[crag.id(n)] = costs.node[n];
+
+	return toArray(values);
+}
+
+boost::python::object
+edgeCostArray(const Costs& costs, const Crag& crag) {
+
+	std::vector<double> values(numEdgeIds(crag), 0);
+	for (Crag::CragEdge e : crag.edges())
+		values[crag.id(e)] = costs.edge[e];
+
+	return toArray(values);
+}
+
+void
+setNodeCostArray(Costs& costs, const Crag& crag, boost::python::object values) {
+
+	std::vector<double> v;
+	readValues(values, numNodeIds(crag), v);
+
+	for (Crag::CragNode n : crag.nodes())
+		costs.node[n] = v[crag.id(n)];
+}
+
+void
+setEdgeCostArray(Costs& costs, const Crag& crag, boost::python::object values) {
+
+	std::vector<double> v;
+	readValues(values, numEdgeIds(crag), v);
+
+	for (Crag::CragEdge e : crag.edges())
+		costs.edge[e] = v[crag.id(e)];
+}
+
+boost::python::object
+selectedNodeArray(const CragSolution& solution, const Crag& crag) {
+
+	std::vector<unsigned char> selected(numNodeIds(crag), false);
+	for (Crag::CragNode n : crag.nodes())
+		selected[crag.id(n)] = solution.selected(n);
+
+	return toArray(selected);
+}
+
+boost::python::object
+selectedEdgeArray(const CragSolution& solution, const Crag& crag) {
+
+	std::vector<unsigned char> selected(numEdgeIds(crag), false);
+	for (Crag::CragEdge e : crag.edges())
+		selected[crag.id(e)] = solution.selected(e);
+
+	return toArray(selected);
+}
+
+void
+setSelectedNodeArray(CragSolution& solution, const Crag& crag, boost::python::object selected) {
+
+	std::vector<unsigned char> s;
+	readValues(selected, numNodeIds(crag), s);
+
+	for (Crag::CragNode n : crag.nodes())
+		solution.setSelected(n, s[crag.id(n)]);
+}
+
+void
+setSelectedEdgeArray(CragSolution& solution, const Crag& crag, boost::python::object selected) {
+
+	std::vector<unsigned char> s;
+	readValues(selected, numEdgeIds(crag), s);
+
+	for (Crag::CragEdge e : crag.edges())
+		solution.setSelected(e, s[crag.id(e)]);
+}
+
+boost::python::object
+labelArray(const CragSolution& solution, const Crag& crag) {
+
+	std::vector<int> labels(numNodeIds(crag), 0);
+	for (Crag::CragNode n : crag.nodes())
+		labels[crag.id(n)] = solution.label(n);
+
+	return toArray(labels);
+}
+
+} // namespace pycmc
@@ -0,0 +1,91 @@
+#ifndef CANDIDATE_MC_PYTHON_BULK_H__
+#define CANDIDATE_MC_PYTHON_BULK_H__
+
+#include <boost/python.hpp>
+#include <crag/Crag.h>
+#include <inference/Costs.h>
+#include <inference/CragSolution.h>
+
+/**
+ * Bulk access to CRAGs, costs, and solutions through NumPy arrays, to avoid 
+ * crossing the python bindings for each node or edge.
+ *
+ * Unless stated otherwise, arrays have one entry per node or edge id, i.e., 
+ * entry i belongs to the node or edge with id i. Ids that are not used by the 
+ * CRAG (e.g., after erasing nodes or edges) get -1, 0, or false, and are 
+ * ignored by the setters.
+ */
+
+namespace pycmc {
+
+/**
+ * Get the ids of all nodes in the CRAG.
+ */
+boost::python::object nodeIdArray(const Crag& crag);
+
+/**
+ * Get the type of each node.
+ */
+boost::python::object nodeTypeArray(const Crag& crag);
+
+/**
+ * Get a flag for each node indicating whether it is a leaf node.
+ */
+boost::python::object leafNodeArray(const Crag& crag);
+
+/**
+ * Get the ids of all edges in the CRAG.
+ */
+boost::python::object edgeIdArray(const Crag& crag);
+
+/**
+ * Get a matrix with one row per edge id, containing the ids of the incident 
+ * nodes u and v and the type of the edge.
+ */
+boost::python::object edgeArray(const Crag& crag);
+
+/**
+ * Get a flag for each edge indicating whether it is a leaf edge.
+ */
+boost::python::object leafEdgeArray(const Crag& crag);
+
+/**
+ * Get the number of leaf nodes and leaf edges under each node, and the number 
+ * of leaf edges under each edge. Uses the hierarchy index of the CRAG, if it 
+ * was built.
+ */
+boost::python::object nodeLeafNodeCountArray(const Crag& crag);
+boost::python::object nodeLeafEdgeCountArray(const Crag& crag);
+boost::python::object edgeLeafEdgeCountArray(const Crag& crag);
+
+/**
+ * Get a matrix with one row per subset arc, containing the id of the child 
+ * (source) and the parent (target) node.
+ */
+boost::python::object subsetArcArray(const Crag& crag);
+
+/**
+ * Get and set the node and edge values of costs.
+ */
+boost::python::object nodeCostArray(const Costs& costs, const Crag& crag);
+boost::python::object edgeCostArray(const Costs& costs, const Crag& crag);
+void setNodeCostArray(Costs& costs, const Crag& crag, boost::python::object values);
+void setEdgeCostArray(Costs& costs, const Crag& crag, boost::python::object values);
+
+/**
+ * Get and set the selected nodes and edges of a solution.
+ */
+boost::python::object selectedNodeArray(const CragSolution& solution, const Crag& crag);
+boost::python::object selectedEdgeArray(const CragSolution& solution, const Crag& crag);
+void setSelectedNodeArray(CragSolution& solution, const Crag& crag, boost::python::object selected);
+void setSelectedEdgeArray(CragSolution& solution, const Crag& crag, boost::python::object selected);
+
+/**
+ * Get the connected component label of each node of a solution (0 for nodes 
+ * that are not selected).
+ */
+boost::python::object labelArray(const CragSolution& solution, const Crag& crag);
+
+} // namespace pycmc
+
+#endif // CANDIDATE_MC_PYTHON_BULK_H__
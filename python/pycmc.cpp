@@ -15,6 +15,8 @@
 #include <learning/BundleOptimizer.h>
 #include <learning/Loss.h>
 #include "PyOracle.h"
+#include "arrays.h"
+#include "bulk.h"
 #include "logging.h"
 
 template <typename Map, typename K, typename V>
@@ -31,6 +33,9 @@ std::vector<V> list_to_vec(boost::python::list l) {
 	return vec;
 }
 
+template <typename Map, typename K>
+std::vector<double> featuresGetter(const Map& map, const K& k) { return map[k].toVector(); }
+
 template <typename Map, typename K, typename V, typename D>
 void featuresSetter(Map& map, const K& k, const V& value) { 
 	map.set(k, list_to_vec<D>(value));
@@ -137,6 +142,99 @@ void parseConfigFile(std::string configFile) {
 	util::ProgramOptions::init(configFile);
 }
 
+/**
+ * Create a base for views on the features of a node or edge type, which keeps 
+ * the NodeFeatures or EdgeFeatures self alive and registers the view with 
+ * the features, such that they can not be reallocated while it exists.
+ */
+template <typename FeaturesT>
+boost::python::object featuresViewBase(boost::python::object self, FeaturesT& features) {
+
+	features.addView();
+
+	return viewBase(self, [&features]() { features.removeView(); });
+}
+
+/**
+ * Get the feature matrix of a node or edge type as a read-only NumPy array, 
+ * without copying. Rows correspond to the ids returned by featureIds(). The 
+ * matrix is compacted first, if no other view exists. While the array (or 
+ * any array derived from it) exists, appending to or setting the features of 
+ * this type throws.
+ */
+template <typename FeaturesT, typename TypeT>
+boost::python::object featureMatrix(boost::python::object self, TypeT type) {
+
+	FeaturesT& features = boost::python::extract<FeaturesT&>(self);
+	typename FeaturesT::FeaturesType& typeFeatures = features.getFeatures(type);
+
+	// existing views prevent changes, the matrix is still compact
+	if (!typeFeatures.hasViews())
+		typeFeatures.compact();
+
+	return matrixView(
+			typeFeatures.data(),
+			typeFeatures.size(),
+			typeFeatures.dims(),
+			typeFeatures.getStride(),
+			featuresViewBase(self, typeFeatures));
+}
+
+/**
+ * Get the node or edge ids of the rows of a feature matrix as a read-only 
+ * NumPy array, without copying. Like featureMatrix(), the features of this 
+ * type can not be changed while the array exists.
+ */
+template <typename FeaturesT, typename TypeT>
+boost::python::object featureIds(boost::python::object self, TypeT type) {
+
+	FeaturesT& features = boost::python::extract<FeaturesT&>(self);
+	typename FeaturesT::FeaturesType& typeFeatures = features.getFeatures(type);
+
+	return vectorView(
+			typeFeatures.getIds().data(),
+			typeFeatures.size(),
+			featuresViewBase(self, typeFeatures));
+}
+
+/**
+ * Get the class probabilities for each row of a matrix of samples as a NumPy 
+ * array with one row per sample and one column per class.
+ */
+boost::python::object randomForestProbabilitiesBatch(
+		const RandomForest&   rf,
+		boost::python::object samples,
+		int                   numThreads) {
+
+	boost::python::object s = toMatrix(samples);
+	std::size_t numSamples, numFeatures;
+	const double* samplesData = matrixData(s, numSamples, numFeatures);
+
+	boost::python::object probs = newMatrix(numSamples, rf.getNumClasses());
+	std::size_t numClasses;
+	double* probsData = matrixData(probs, numSamples, numClasses);
+
+	rf.getProbabilitiesBatch(
+			RandomForest::SamplesView(
+					RandomForest::SamplesSize(numSamples, numFeatures),
+					RandomForest::SamplesSize(numFeatures, 1),
+					samplesData),
+			RandomForest::ProbsView(
+					RandomForest::ProbsSize(numSamples, numClasses),
+					RandomForest::ProbsSize(numClasses, 1),
+					probsData),
+			numThreads);
+
+	return probs;
+}
+
+boost::python::object randomForestProbabilitiesBatchAllThreads(
+		const RandomForest&   rf,
+		boost::python::object samples) {
+
+	return randomForestProbabilitiesBatch(rf, samples, 0);
+}
+
 /**
  * Defines all the python classes in the module libpycmc. Here we decide 
  * which functions and data members we wish to expose.
@@ -145,6 +243,8 @@ BOOST_PYTHON_MODULE(pycmc) {
 
 	boost::python::register_exception_translator<Exception>(&translateException);
 
+	initArrays();
+
 	// Logging
 	boost::python::enum_<logger::LogLevel>("LogLevel")
 			.value("Quiet", logger::Quiet)
@@ -245,6 +345,18 @@ BOOST_PYTHON_MODULE(pycmc) {
 			.def("leafNodes", &Crag::leafNodes)
 			.def("leafEdges", static_cast<std::set<Crag::CragEdge>(Crag::*)(Crag::CragNode) const>(&Crag::leafEdges))
 			.def("leafEdges", static_cast<std::set<Crag::CragEdge>(Crag::*)(Crag::CragEdge) const>(&Crag::leafEdges))
+			.def("buildHierarchyIndex", &Crag::buildHierarchyIndex)
+			.def("clearHierarchyIndex", &Crag::clearHierarchyIndex)
+			.def("nodeIdArray", &nodeIdArray)
+			.def("nodeTypeArray", &nodeTypeArray)
+			.def("leafNodeArray", &leafNodeArray)
+			.def("edgeIdArray", &edgeIdArray)
+			.def("edgeArray", &edgeArray)
+			.def("leafEdgeArray", &leafEdgeArray)
+			.def("nodeLeafNodeCountArray", &nodeLeafNodeCountArray)
+			.def("nodeLeafEdgeCountArray", &nodeLeafEdgeCountArray)
+			.def("edgeLeafEdgeCountArray", &edgeLeafEdgeCountArray)
+			.def("subsetArcArray", &subsetArcArray)
 			;
 
 	// util::point<float, 3>
@@ -344,8 +456,21 @@ BOOST_PYTHON_MODULE(pycmc) {
 
 	// CragVolumes
 	boost::python::class_<CragVolumes, boost::noncopyable>("CragVolumes", boost::python::init<const Crag&>())
-			.def("setVolume", &CragVolumes::setVolume)
+			.def("setVolume", static_cast<void(CragVolumes::*)(Crag::CragNode, std::shared_ptr<CragVolume>)>(&CragVolumes::setVolume))
 			.def("getVolume", &CragVolumes::operator[])
+			.def("clearCache", &CragVolumes::clearCache)
+			.def("setCacheSize", &CragVolumes::setCacheSize)
+			.def("getCacheSize", &CragVolumes::getCacheSize)
+			.def("getCacheStatistics", &CragVolumes::getCacheStatistics)
+			;
+
+	// VolumeCache::Statistics
+	boost::python::class_<VolumeCache::Statistics>("VolumeCacheStatistics")
+			.def_readonly("hits", &VolumeCache::Statistics::hits)
+			.def_readonly("misses", &VolumeCache::Statistics::misses)
+			.def_readonly("evictions", &VolumeCache::Statistics::evictions)
+			.def_readonly("bytes", &VolumeCache::Statistics::bytes)
+			.def_readonly("entries", &VolumeCache::Statistics::entries)
 			;
 
 	// node and edge maps
@@ -362,6 +487,10 @@ BOOST_PYTHON_MODULE(pycmc) {
 	boost::python::class_<Costs, boost::noncopyable>("Costs", boost::python::init<const Crag&>())
 			.def_readonly("node", &Costs::node)
 			.def_readonly("edge", &Costs::edge)
+			.def("nodeArray", &nodeCostArray)
+			.def("edgeArray", &edgeCostArray)
+			.def("setNodeArray", &setNodeCostArray)
+			.def("setEdgeArray", &setEdgeCostArray)
 			;
 
 	// Loss (need to expose 'node' and 'edge' again?)
@@ -390,20 +519,24 @@ BOOST_PYTHON_MODULE(pycmc) {
 
 	// NodeFeatures
 	boost::python::class_<NodeFeatures>("NodeFeatures", boost::python::init<const Crag&>())
-			.def("__getitem__", &genericGetter<NodeFeatures, Crag::CragNode, std::vector<double>>,
-					boost::python::return_internal_reference<>())
+			.def("__getitem__", &featuresGetter<NodeFeatures, Crag::CragNode>)
 			.def("__setitem__", &featuresSetter<NodeFeatures, Crag::CragNode, boost::python::list, double>)
 			.def("dims", &NodeFeatures::dims)
 			.def("append", &NodeFeatures::append)
+			.def("matrix", &featureMatrix<NodeFeatures, Crag::NodeType>)
+			.def("ids", &featureIds<NodeFeatures, Crag::NodeType>)
+			.def("compact", &NodeFeatures::compact)
 			;
 
 	// EdgeFeatures
 	boost::python::class_<EdgeFeatures>("EdgeFeatures", boost::python::init<const Crag&>())
-			.def("__getitem__", &genericGetter<EdgeFeatures, Crag::CragEdge, std::vector<double>>,
-					boost::python::return_internal_reference<>())
+			.def("__getitem__", &featuresGetter<EdgeFeatures, Crag::CragEdge>)
 			.def("__setitem__", &featuresSetter<EdgeFeatures, Crag::CragEdge, boost::python::list, double>)
 			.def("dims", &EdgeFeatures::dims)
 			.def("append", &EdgeFeatures::append)
+			.def("matrix", &featureMatrix<EdgeFeatures, Crag::EdgeType>)
+			.def("ids", &featureIds<EdgeFeatures, Crag::EdgeType>)
+			.def("compact", &EdgeFeatures::compact)
 			;
 
 	// FeatureWeights
@@ -429,6 +562,11 @@ BOOST_PYTHON_MODULE(pycmc) {
 			.def("selected", s1)
 			.def("selected", s2)
 			.def("label", &CragSolution::label)
+			.def("selectedNodeArray", &selectedNodeArray)
+			.def("selectedEdgeArray", &selectedEdgeArray)
+			.def("setSelectedNodeArray", &setSelectedNodeArray)
+			.def("setSelectedEdgeArray", &setSelectedEdgeArray)
+			.def("labelArray", &labelArray)
 			;
 
 	// CRAG store
@@ -444,7 +582,8 @@ BOOST_PYTHON_MODULE(pycmc) {
 			.def("saveCosts", &Hdf5CragStore::saveCosts)
 			.def("saveSolution", &Hdf5CragStore::saveSolution)
 			.def("retrieveCrag", &Hdf5CragStore::retrieveCrag)
-			.def("retrieveVolumes", &Hdf5CragStore::retrieveVolumes)
+			.def("retrieveVolumes", static_cast<void(Hdf5CragStore::*)(CragVolumes&)>(&Hdf5CragStore::retrieveVolumes))
+			.def("retrieveVolumes", static_cast<void(Hdf5CragStore::*)(CragVolumes&, const util::box<float, 3>&)>(&Hdf5CragStore::retrieveVolumes))
 			.def("retrieveNodeFeatures", &Hdf5CragStore::retrieveNodeFeatures)
 			.def("retrieveEdgeFeatures", &Hdf5CragStore::retrieveEdgeFeatures)
 			.def("retrieveFeaturesMin", &Hdf5CragStore::retrieveFeaturesMin)
@@ -454,6 +593,10 @@ BOOST_PYTHON_MODULE(pycmc) {
 			.def("retrieveCosts", &Hdf5CragStore::retrieveCosts)
 			.def("retrieveSolution", &Hdf5CragStore::retrieveSolution)
 			.def("getSolutionNames", &Hdf5CragStore::getSolutionNames)
+			.def("setLayoutVersion", &Hdf5CragStore::setLayoutVersion)
+			.def("getLayoutVersion", &Hdf5CragStore::getLayoutVersion)
+			.def("getStoredVolumesLayoutVersion", &Hdf5CragStore::getStoredVolumesLayoutVersion)
+			.def("upgradeLayout", &Hdf5CragStore::upgradeLayout)
 			;
 
 	// volume store
@@ -461,9 +604,23 @@ BOOST_PYTHON_MODULE(pycmc) {
 			.def("saveIntensities", &Hdf5VolumeStore::saveIntensities)
 			.def("saveBoundaries", &Hdf5VolumeStore::saveBoundaries)
 			.def("saveGroundTruth", &Hdf5VolumeStore::saveGroundTruth)
-			.def("retrieveIntensities", &Hdf5VolumeStore::retrieveIntensities)
-			.def("retrieveBoundaries", &Hdf5VolumeStore::retrieveBoundaries)
-			.def("retrieveGroundTruth", &Hdf5VolumeStore::retrieveGroundTruth)
+			.def("retrieveIntensities", static_cast<void(Hdf5VolumeStore::*)(ExplicitVolume<float>&)>(&Hdf5VolumeStore::retrieveIntensities))
+			.def("retrieveIntensities", static_cast<void(Hdf5VolumeStore::*)(ExplicitVolume<float>&, const util::box<float, 3>&)>(&Hdf5VolumeStore::retrieveIntensities))
+			.def("retrieveBoundaries", static_cast<void(Hdf5VolumeStore::*)(ExplicitVolume<float>&)>(&Hdf5VolumeStore::retrieveBoundaries))
+			.def("retrieveBoundaries", static_cast<void(Hdf5VolumeStore::*)(ExplicitVolume<float>&, const util::box<float, 3>&)>(&Hdf5VolumeStore::retrieveBoundaries))
+			.def("retrieveGroundTruth", static_cast<void(Hdf5VolumeStore::*)(ExplicitVolume<int>&)>(&Hdf5VolumeStore::retrieveGroundTruth))
+			.def("retrieveGroundTruth", static_cast<void(Hdf5VolumeStore::*)(ExplicitVolume<int>&, const util::box<float, 3>&)>(&Hdf5VolumeStore::retrieveGroundTruth))
+			.def("retrieveVolumeInfo", &Hdf5VolumeStore::retrieveVolumeInfo)
+			;
+
+	// VolumeInfo
+	boost::python::class_<VolumeInfo>("VolumeInfo")
+			.def_readonly("resolution", &VolumeInfo::resolution)
+			.def_readonly("offset", &VolumeInfo::offset)
+			.def("width", &VolumeInfo::width)
+			.def("height", &VolumeInfo::height)
+			.def("depth", &VolumeInfo::depth)
+			.def("getBoundingBox", &VolumeInfo::getBoundingBox)
 			;
 
 	// volume store
@@ -478,6 +635,10 @@ BOOST_PYTHON_MODULE(pycmc) {
 			.def("addSample", &RandomForest::addSample)
 			.def("train", &RandomForest::train)
 			.def("getProbabilities", &RandomForest::getProbabilities)
+			.def("getProbabilitiesBatch", &randomForestProbabilitiesBatch)
+			.def("getProbabilitiesBatch", &randomForestProbabilitiesBatchAllThreads)
+			.def("getNumFeatures", &RandomForest::getNumFeatures)
+			.def("getNumClasses", &RandomForest::getNumClasses)
 			.def("write", &RandomForest::write)
 			.def("read", &RandomForest::read)
 			.def("getOutOfBagError", &RandomForest::getOutOfBagError)
@@ -1,44 +1,31 @@
 #!/usr/bin/python
 
-from glob import glob
-import numpy
 import os
-import joblib
 from subprocess import call
 
-def merge_tree(sp_file, membrane_file, region_size_exponent):
-
-#    basename = os.path.basename(membrane_file).strip(".tiff")
+def merge_trees(sp_dir, membrane_dir, mergetree_dir, region_size_exponent, num_threads):
 
+    # merge_tree processes all sections of the stack on its own thread pool
     call([
         "merge_tree",
-#        "--minRegionSizeExponent=" + str(region_size_exponent),
+        "--stack",
+        "--numThreads=" + str(num_threads),
+        "--fastMerging",
+        "--minRegionSizeExponent=" + str(region_size_exponent),
 #        "--dontConsiderRegionSize",
-#         "--mergeSmallRegionsFirst",
-        "--initialSuperpixels=" + sp_file,
-        "-s", membrane_file,
-        "--mergeHistory=/home/vleite/PhD/research/scripts/candidate_mc_scripts/data/training/mergetrees_original1/0000.txt",
+        "--initialSuperpixels=" + sp_dir,
+        "-s", membrane_dir,
+        "--mergeHistory=" + mergetree_dir,
     ])
 
 if __name__ == "__main__":
 
-#    if not os.path.isdir("mergetrees"):
-#        os.mkdir("mergetrees")
-
-    #region_size_exponents = numpy.arange(0, 1.1, 0.1)
-    region_size_exponents = [ 1 ]
+    data_dir = "/home/vleite/PhD/research/scripts/candidate_mc_scripts/data/training"
 
     #using membrane_inv so, the border is bright (higher values)
-#    membrane_files = glob("/home/vleite/PhD/research/scripts/candidate_mc_scripts/data/training/membrane/*")
-#    membrane_files.sort()
-#
-    jobs = []
-#    for membrane_file in membrane_files:
-#
-#        basename = os.path.basename(membrane_file).strip(".tiff")
-    sp_file = "/home/vleite/PhD/research/scripts/candidate_mc_scripts/data/training/fragments_original1/00000.tif"
-
-#    for region_size_exponent in region_size_exponents:
-    jobs.append(joblib.delayed(merge_tree)(sp_file, "/home/vleite/PhD/research/scripts/candidate_mc_scripts/data/training/membrane/00000.tif", 1))
-
-    joblib.Parallel(n_jobs=20)(jobs)
+    merge_trees(
+        os.path.join(data_dir, "fragments_original1"),
+        os.path.join(data_dir, "membrane"),
+        os.path.join(data_dir, "mergetrees_original1"),
+        1,
+        20)
@@ -2,9 +2,12 @@
 
 # adds a RF "feature" to the given dataset (which is assumed to not have the 
 # feature yet)
+#
+# the same can be done without a Python pass with 'cmc_extract_features 
+# --rfFeature'
 
 from pycmc import *
-import math
+import numpy
 import sys
 
 def probToEnergy(prob):
@@ -29,11 +32,13 @@ def probToEnergy(prob):
     #   E_n(1) = log(p(y_n==0)) - log(p(y_n==1))
     #
     # this energy is negative, if p(y_n==1) > 0.5
+    #
+    # works on single probabilities as well as on arrays of them
 
     # ensure numerical stability
-    prob = max(0.001, min(0.999, prob))
+    prob = numpy.clip(prob, 0.001, 0.999)
 
-    return math.log(1.0-prob) - math.log(prob);
+    return numpy.log(1.0-prob) - numpy.log(prob);
 
 def add_rf_feature(rf_filename, project_filename, higher_node_bias, higher_edge_bias):
 
@@ -43,6 +48,7 @@ def add_rf_feature(rf_filename, project_filename, higher_node_bias, higher_edge_
 
     cragStore = Hdf5CragStore(project_filename)
     cragStore.retrieveCrag(crag)
+    crag.buildHierarchyIndex()
     cragStore.retrieveNodeFeatures(crag, nodeFeatures)
     cragStore.retrieveEdgeFeatures(crag, edgeFeatures)
 
@@ -60,82 +66,67 @@ def add_rf_feature(rf_filename, project_filename, higher_node_bias, higher_edge_
 
     print "Adding RF \"feature\"..."
 
-    node_energies = {}
-    edge_energies = {}
-
-    # get the energies for each edge and node
-    for n in crag.nodes():
-        prob = 0
-        if crag.type(n) == CragNodeType.SliceNode:
-            prob = sliceNodeRandomForest.getProbabilities(nodeFeatures[n])[1]
-        elif crag.type(n) == CragNodeType.AssignmentNode:
-            prob = assNodeRandomForest.getProbabilities(nodeFeatures[n])[1]
-        else:
+    # per node and edge id
+    node_types = crag.nodeTypeArray()
+    leaf_nodes = crag.leafNodeArray().astype(bool)
+    edge_types = crag.edgeArray()[:,2]
+    leaf_edges = crag.leafEdgeArray().astype(bool)
+
+    node_energies = numpy.zeros(len(node_types))
+    edge_energies = numpy.zeros(len(edge_types))
+
+    # get the energies for each node, predicting all nodes of a type at once
+    for (rf, node_type) in [
+            (sliceNodeRandomForest, CragNodeType.SliceNode),
+            (assNodeRandomForest, CragNodeType.AssignmentNode)]:
+        ids = nodeFeatures.ids(node_type)
+        if len(ids) == 0:
             continue
-        node_energies[crag.id(n)] = probToEnergy(prob)
-    for e in crag.edges():
-        if crag.type(e) == CragEdgeType.NoAssignmentEdge:
-            # all samples in the training dataset belonged to one class
-            #prob = edgeRandomForest.getProbabilities(edgeFeatures[e])[1]
-            #edge_energies[crag.id(e)] = probToEnergy(prob)
-            edge_energies[crag.id(e)] = 0
+        probs = rf.getProbabilitiesBatch(nodeFeatures.matrix(node_type))
+        node_energies[ids] = probToEnergy(probs[:,1])
+    # the features can not be appended to while views on them exist
+    ids = None
+
+    # all samples in the training dataset belonged to one class, keep the 
+    # NoAssignmentEdge energies at 0
+    #probs = edgeRandomForest.getProbabilitiesBatch(edgeFeatures.matrix(CragEdgeType.NoAssignmentEdge))
+    #edge_energies[edgeFeatures.ids(CragEdgeType.NoAssignmentEdge)] = probToEnergy(probs[:,1])
+
+    rf_nodes = numpy.logical_or(
+            node_types == CragNodeType.SliceNode,
+            node_types == CragNodeType.AssignmentNode)
+    rf_edges = (edge_types == CragEdgeType.NoAssignmentEdge)
 
     # multiply the scores of the higher candidates with their "weight", i.e., the 
     # number of leaf decisions they imply
 
-    # map from leaf nodes to their parents
-    parents = {}
-    for n in crag.nodes():
-        if crag.isRootNode(n):
-            for arc in crag.inArcs(n):
-                child = arc.source()
-                parents[crag.id(child)] = crag.id(n)
-
-    # number of leaf nodes and edges under a higher node or edge
-    node_num_leaf_nodes = {}
-    node_num_leaf_edges = {}
-    edge_num_leaf_edges = {}
-
-    # count number of leaf nodes and edges under higher node
-    for n in crag.nodes():
-        node_num_leaf_nodes[crag.id(n)] = len(crag.leafNodes(n))
-        node_num_leaf_edges[crag.id(n)] = len(crag.leafEdges(n))
-    # count number of leaf edges under higher edge
-    for e in crag.edges():
-        edge_num_leaf_edges[crag.id(e)] = len(crag.leafEdges(e))
-
-    for n in crag.nodes():
-        if not crag.isLeafNode(n) and (crag.type(n) == CragNodeType.SliceNode or crag.type(n) == CragNodeType.AssignmentNode):
-            nln = node_num_leaf_nodes[crag.id(n)]
-            nle = node_num_leaf_edges[crag.id(n)]
-            node_energies[crag.id(n)] *= nln + nle
-            node_energies[crag.id(n)] += higher_node_bias
-    for e in crag.edges():
-        if not crag.isLeafEdge(e) and crag.type(e) == CragEdgeType.NoAssignmentEdge:
-            edge_energies[crag.id(e)] *= edge_num_leaf_edges[crag.id(e)]
-            edge_energies[crag.id(e)] += higher_edge_bias
+    # number of leaf nodes and edges under a higher node or edge, read from 
+    # the hierarchy index
+    node_num_leaf_nodes = crag.nodeLeafNodeCountArray()
+    node_num_leaf_edges = crag.nodeLeafEdgeCountArray()
+    edge_num_leaf_edges = crag.edgeLeafEdgeCountArray()
+
+    higher_nodes = numpy.logical_and(rf_nodes, numpy.logical_not(leaf_nodes))
+    node_energies[higher_nodes] *= node_num_leaf_nodes[higher_nodes] + node_num_leaf_edges[higher_nodes]
+    node_energies[higher_nodes] += higher_node_bias
+
+    higher_edges = numpy.logical_and(rf_edges, numpy.logical_not(leaf_edges))
+    edge_energies[higher_edges] *= edge_num_leaf_edges[higher_edges]
+    edge_energies[higher_edges] += higher_edge_bias
 
     # DEBUG "FEATURES" ########################
-    #for n in crag.nodes():
-        #if not crag.isLeafNode(n):
-            #nodeFeatures.append(n, node_num_leaf_nodes[crag.id(n)]);
-            #nodeFeatures.append(n, node_num_leaf_edges[crag.id(n)]);
-        #else:
-            #nodeFeatures.append(n, 0);
-            #nodeFeatures.append(n, 0);
+    #for id in crag.nodeIdArray():
+        #nodeFeatures.append(crag.nodeFromId(int(id)), node_num_leaf_nodes[id]*(not leaf_nodes[id]));
+        #nodeFeatures.append(crag.nodeFromId(int(id)), node_num_leaf_edges[id]*(not leaf_nodes[id]));
     #for e in crag.edges():
-        #if not crag.isLeafEdge(e):
-            #edgeFeatures.append(e, edge_num_leaf_edges[crag.id(e)]);
-        #else:
-            #edgeFeatures.append(e, 0);
+        #edgeFeatures.append(e, edge_num_leaf_edges[crag.id(e)]*(not leaf_edges[crag.id(e)]));
     ###########################################
 
-    for n in crag.nodes():
-        if crag.type(n) == CragNodeType.SliceNode or crag.type(n) == CragNodeType.AssignmentNode:
-            nodeFeatures.append(n, node_energies[crag.id(n)]);
+    for id in numpy.flatnonzero(rf_nodes):
+        nodeFeatures.append(crag.nodeFromId(int(id)), float(node_energies[id]));
     for e in crag.edges():
-        if crag.type(e) == CragEdgeType.NoAssignmentEdge:
-            edgeFeatures.append(e, edge_energies[crag.id(e)]);
+        if rf_edges[crag.id(e)]:
+            edgeFeatures.append(e, float(edge_energies[crag.id(e)]));
 
     cragStore.saveNodeFeatures(crag, nodeFeatures);
     cragStore.saveEdgeFeatures(crag, edgeFeatures);
@@ -2,6 +2,7 @@
 
 from pycmc import *
 import json
+import numpy
 import zmq
 import sys
 
@@ -25,8 +26,8 @@ def read_crag(project_file):
 
     # initially, segment ids are node ids
     max_id = 0
-    for n in crag.nodes():
-        id = crag.id(n)
+    for id in crag.nodeIdArray():
+        id = int(id)
         seg_to_node[id] = id
         node_to_seg[id] = id
         max_id = max(id, max_id)
@@ -139,24 +140,26 @@ def segment():
     solution = CragSolution(crag)
 
     # all leaf nodes are part of the solution
-    for n in crag.nodes():
-        if crag.isLeafNode(n):
-            solution.setSelected(n, True)
+    leaf_nodes = crag.leafNodeArray()
+    solution.setSelectedNodeArray(crag, leaf_nodes)
+
+    # predict the probabilities of all edges with features at once
+    leaf_edges = crag.leafEdgeArray()
+    edge_probs = numpy.zeros(len(leaf_edges))
+    for edge_type in [CragEdgeType.AdjacencyEdge, CragEdgeType.SeparationEdge, CragEdgeType.AssignmentEdge, CragEdgeType.NoAssignmentEdge]:
+        ids = edge_features.ids(edge_type)
+        if len(ids) == 0:
+            continue
+        probs = edge_rf.getProbabilitiesBatch(edge_features.matrix(edge_type))
+        edge_probs[ids] = probs[:,1]
 
     # threshold leaf node edges
-    for e in crag.edges():
-        if crag.isLeafEdge(e):
-            prob = edge_rf.getProbabilities(edge_features[e])[1]
-            if prob > 0.5:
-                solution.setSelected(e, True)
-            else:
-                solution.setSelected(e, False)
+    solution.setSelectedEdgeArray(crag, numpy.logical_and(leaf_edges, edge_probs > 0.5))
 
     # get connected component ids
-    connected_components = set([])
-    for n in crag.nodes():
-        if crag.isLeafNode(n):
-            connected_components.add(solution.label(n))
+    leaf_node_ids = numpy.nonzero(leaf_nodes)[0]
+    leaf_node_labels = solution.labelArray(crag)[leaf_node_ids]
+    connected_components = set(leaf_node_labels)
 
     # map connected component ids to unique ids
     id_service_socket.send(json.dumps({
@@ -173,10 +176,9 @@ def segment():
     # create final LUT from fragment ids to segment ids
     fragments = []
     segments  = []
-    for n in crag.nodes():
-        if crag.isLeafNode(n):
-            fragments.append(node_to_seg[crag.id(n)])
-            segments.append(cc_to_seg[solution.label(n)])
+    for (id, label) in zip(leaf_node_ids, leaf_node_labels):
+        fragments.append(node_to_seg[int(id)])
+        segments.append(cc_to_seg[label])
 
     client_socket.send(json.dumps({
         "type": "fragment-segment-lut",
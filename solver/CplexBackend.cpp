@@ -2,6 +2,7 @@
 
 #ifdef HAVE_CPLEX
 
+#include <cmath>
 #include <string>
 #include <vector>
 
@@ -17,6 +18,13 @@
 
 logger::LogChannel cplexlog("cplexlog", "[Cplex] ");
 
+// records the time at which the first incumbent solution was found
+ILOMIPINFOCALLBACK1(FirstIncumbentCallback, IloNum&, timeToFirstIncumbent) {
+
+    if (timeToFirstIncumbent < 0 && hasIncumbent())
+        timeToFirstIncumbent = getCplexTime() - getStartTime();
+}
+
 CplexBackend::CplexBackend(const Parameter& parameter) :
     _parameter(parameter),
     model_(env_),
@@ -24,6 +32,7 @@ CplexBackend::CplexBackend(const Parameter& parameter) :
     c_(env_),
     obj_(env_),
     sol_(env_),
+    _timeToFirstIncumbent(-1),
     firstRun_(true)
 {
     LOG_DEBUG(cplexlog) << "constructing cplex solver" << std::endl;
@@ -213,6 +222,14 @@ CplexBackend::createConstraint(const LinearConstraint& constraint) {
     }
 }
 
+void
+CplexBackend::setInitialSolution(const Solution& solution) {
+
+    _initialSolution = std::vector<double>(solution.size());
+    for (unsigned int i = 0; i < solution.size(); i++)
+        _initialSolution[i] = solution[i];
+}
+
 bool
 CplexBackend::solve(Solution& x,/* double& value, */ std::string& msg) {
 
@@ -220,6 +237,28 @@ CplexBackend::solve(Solution& x,/* double& value, */ std::string& msg) {
         cplex_ = IloCplex(model_);
         setVerbose(_parameter.verbose);
 
+        _timeToFirstIncumbent = -1;
+        cplex_.use(FirstIncumbentCallback(env_, _timeToFirstIncumbent));
+
+        if (!_initialSolution.empty()) {
+
+            IloNumVarArray startVars(env_);
+            IloNumArray    startValues(env_);
+            for (unsigned int i = 0; i < _initialSolution.size() && i < _numVariables; i++)
+                if (!std::isnan(_initialSolution[i])) {
+                    startVars.add(x_[i]);
+                    startValues.add(_initialSolution[i]);
+                }
+
+            LOG_DEBUG(cplexlog) << "setting MIP start for " << startVars.getSize() << " variables" << std::endl;
+
+            cplex_.addMIPStart(startVars, startValues);
+            startVars.end();
+            startValues.end();
+
+            _initialSolution.clear();
+        }
+
         setMIPGap(_parameter.mipGap);
 
         if (_parameter.mipFocus <= 3)
@@ -237,6 +276,11 @@ CplexBackend::solve(Solution& x,/* double& value, */ std::string& msg) {
         else
             msg = "Optimal solution found";
 
+        // the problem might have been solved without reporting an incumbent 
+        // to the callback
+        if (_timeToFirstIncumbent < 0)
+            _timeToFirstIncumbent = cplex_.getTime();
+
         // extract solution
         cplex_.getValues(sol_, x_);
         x.resize(_numVariables);
@@ -83,6 +83,10 @@ public:
 
     void addConstraint(const LinearConstraint& constraint);
 
+    void setInitialSolution(const Solution& solution);
+
+    double getTimeToFirstIncumbent() { return _timeToFirstIncumbent; }
+
     bool solve(Solution& solution,/* double& value, */ std::string& message);
 
 private:
@@ -138,6 +142,12 @@ private:
     typedef std::vector<IloExtractable> ConstraintVector;
     ConstraintVector _constraints;
 
+    // the MIP start to be used by the next call to solve()
+    std::vector<double> _initialSolution;
+
+    // the time until the first incumbent was found in the last solve
+    IloNum _timeToFirstIncumbent;
+
     // are we in the first run
     bool firstRun_;
 };
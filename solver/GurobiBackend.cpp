@@ -2,6 +2,8 @@
 
 #ifdef HAVE_GUROBI
 
+#include <algorithm>
+#include <cmath>
 #include <sstream>
 
 #include <util/Logger.h>
@@ -44,11 +46,26 @@ util::ProgramOption optionGurobiDumpIlp(
 		util::_long_name        = "dumpILP",
 		util::_description_text = "Write the ILP into a file.");
 
+// records the runtime at which the first incumbent solution was found
+static int __stdcall
+firstIncumbentCallback(GRBmodel* model, void* cbdata, int where, void* usrdata) {
+
+	if (where != GRB_CB_MIPSOL)
+		return 0;
+
+	double* timeToFirstIncumbent = static_cast<double*>(usrdata);
+	if (*timeToFirstIncumbent < 0)
+		GRBcbget(cbdata, where, GRB_CB_RUNTIME, timeToFirstIncumbent);
+
+	return 0;
+}
+
 GurobiBackend::GurobiBackend() :
 	_numVariables(0),
 	_numConstraints(0),
 	_env(0),
-	_model(0) {
+	_model(0),
+	_timeToFirstIncumbent(-1) {
 
 	GRB_CHECK(GRBloadenv(&_env, NULL));
 }
@@ -103,6 +120,8 @@ GurobiBackend::initialize(
 
 	setNumThreads(optionGurobiNumThreads);
 
+	GRB_CHECK(GRBsetcallbackfunc(_model, firstIncumbentCallback, &_timeToFirstIncumbent));
+
 	// add new variables to the model
 
 	_numVariables = numVariables;
@@ -259,6 +278,30 @@ GurobiBackend::addConstraint(const LinearConstraint& constraint) {
 	delete[] vals;
 }
 
+void
+GurobiBackend::setInitialSolution(const Solution& solution) {
+
+	std::vector<double> start(_numVariables, GRB_UNDEFINED);
+
+	unsigned int numSpecified = 0;
+	for (unsigned int i = 0; i < std::min(solution.size(), _numVariables); i++)
+		if (!std::isnan(solution[i])) {
+
+			start[i] = solution[i];
+			numSpecified++;
+		}
+
+	LOG_DEBUG(gurobilog)
+			<< "setting MIP start for " << numSpecified
+			<< " of " << _numVariables << " variables" << std::endl;
+
+	GRB_CHECK(GRBsetdblattrarray(
+			_model,
+			GRB_DBL_ATTR_START,
+			0 /* start */, _numVariables,
+			&start[0]));
+}
+
 bool
 GurobiBackend::solve(Solution& x, std::string& msg) {
 
@@ -267,11 +310,20 @@ GurobiBackend::solve(Solution& x, std::string& msg) {
 
 	GRB_CHECK(GRBupdatemodel(_model));
 
+	_timeToFirstIncumbent = -1;
+
 	GRB_CHECK(GRBoptimize(_model));
 
 	int status;
 	GRB_CHECK(GRBgetintattr(_model, GRB_INT_ATTR_STATUS, &status));
 
+	// the problem might have been solved without reporting an incumbent to 
+	// the callback (e.g., in presolve)
+	int numSolutions;
+	GRB_CHECK(GRBgetintattr(_model, GRB_INT_ATTR_SOLCOUNT, &numSolutions));
+	if (_timeToFirstIncumbent < 0 && numSolutions > 0)
+		GRB_CHECK(GRBgetdblattr(_model, GRB_DBL_ATTR_RUNTIME, &_timeToFirstIncumbent));
+
 	if (status != GRB_OPTIMAL) {
 
 		msg = "Optimal solution *NOT* found";
@@ -282,9 +334,6 @@ GurobiBackend::solve(Solution& x, std::string& msg) {
 
 			msg += " (timeout";
 
-			int numSolutions;
-			GRB_CHECK(GRBgetintattr(_model, GRB_INT_ATTR_SOLCOUNT, &numSolutions));
-
 			if (numSolutions == 0) {
 
 				msg += ", no feasible solution found)";
@@ -60,6 +60,10 @@ public:
 
 	void addConstraint(const LinearConstraint& constraint);
 
+	void setInitialSolution(const Solution& solution);
+
+	double getTimeToFirstIncumbent() { return _timeToFirstIncumbent; }
+
 	bool solve(Solution& solution, std::string& message);
 
 private:
@@ -100,6 +104,9 @@ private:
 
 	// the GRB model containing the objective and constraints
 	GRBmodel* _model;
+
+	// the runtime until the first incumbent was found in the last solve
+	double _timeToFirstIncumbent;
 };
 
 #endif // HAVE_GUROBI
@@ -25,7 +25,7 @@ LinearConstraint::setRelation(Relation relation) {
 	_relation = relation;
 }
 
-bool LinearConstraint::isViolated(const Solution & solution){
+bool LinearConstraint::isViolated(const Solution & solution) const {
 
     double s = 0;
 
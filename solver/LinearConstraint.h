@@ -27,7 +27,7 @@ public:
 
 	double getValue() const;
 
-    bool isViolated(const Solution & solution);
+    bool isViolated(const Solution & solution) const;
 
 private:
 
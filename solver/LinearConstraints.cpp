@@ -17,6 +17,16 @@ LinearConstraints::addAll(const LinearConstraints& linearConstraints) {
 	_linearConstraints.insert(_linearConstraints.end(), linearConstraints.begin(), linearConstraints.end());
 }
 
+bool
+LinearConstraints::isSatisfied(const Solution& solution) const {
+
+	for (const LinearConstraint& constraint : _linearConstraints)
+		if (constraint.isViolated(solution))
+			return false;
+
+	return true;
+}
+
 std::vector<unsigned int>
 LinearConstraints::getConstraints(const std::vector<unsigned int>& variableIds) {
 
@@ -59,6 +59,11 @@ public:
 
 	LinearConstraint& operator[](size_t i) { return _linearConstraints[i]; }
 
+	/**
+	 * Check whether the given solution satisfies all constraints of this set.
+	 */
+	bool isSatisfied(const Solution& solution) const;
+
 	/**
 	 * Get a linst of indices of linear constraints that use the given 
 	 * variables.
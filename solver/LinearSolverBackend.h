@@ -64,6 +64,22 @@ public:
 	 */
 	virtual void addConstraint(const LinearConstraint& constraint) = 0;
 
+	/**
+	 * Set an initial solution (MIP start) to be used by the next call to 
+	 * solve(). Entries that are NaN (and missing entries, if the solution is 
+	 * smaller than the number of variables) are left unspecified, such that 
+	 * the solver can complete a partial solution.
+	 *
+	 * @param solution An initial, possibly partial, solution.
+	 */
+	virtual void setInitialSolution(const Solution& solution) = 0;
+
+	/**
+	 * Get the time in seconds it took to find the first incumbent solution in 
+	 * the last call to solve(). Negative, if no solution was found.
+	 */
+	virtual double getTimeToFirstIncumbent() = 0;
+
 	/**
 	 * Solve the problem.
 	 *
@@ -2,6 +2,7 @@
 
 #ifdef HAVE_SCIP
 
+#include <cmath>
 #include <sstream>
 
 #include <scip/scipdefplugins.h>
@@ -16,7 +17,8 @@ using namespace logger;
 LogChannel sciplog("sciplog", "[ScipBackend] ");
 
 ScipBackend::ScipBackend() :
-		_scip(0) {
+		_scip(0),
+		_timeToFirstIncumbent(-1) {
 
 	SCIP_CALL_ABORT(SCIPcreate(&_scip));
 	SCIP_CALL_ABORT(SCIPincludeDefaultPlugins(_scip));
@@ -176,14 +178,37 @@ ScipBackend::addConstraint(const LinearConstraint& constraint) {
 	SCIP_CALL_ABORT(SCIPreleaseCons(_scip, &c));
 }
 
+void
+ScipBackend::setInitialSolution(const Solution& solution) {
+
+	_initialSolution = std::vector<double>(solution.size());
+	for (unsigned int i = 0; i < solution.size(); i++)
+		_initialSolution[i] = solution[i];
+}
+
 bool
 ScipBackend::solve(Solution& x, std::string& msg) {
 
+	if (!_initialSolution.empty()) {
+
+		addInitialSolution();
+		_initialSolution.clear();
+	}
+
 	LOG_ALL(sciplog) << "solving model" << std::endl;
 
 	SCIP_CALL_ABORT(SCIPpresolve(_scip));
 	SCIP_CALL_ABORT(SCIPsolve(_scip));
 
+	_timeToFirstIncumbent = -1;
+	SCIP_SOL** sols = SCIPgetSols(_scip);
+	for (int i = 0; i < SCIPgetNSols(_scip); i++) {
+
+		double time = SCIPgetSolTime(_scip, sols[i]);
+		if (_timeToFirstIncumbent < 0 || time < _timeToFirstIncumbent)
+			_timeToFirstIncumbent = time;
+	}
+
 	if (SCIPgetNSols(_scip) == 0) {
 
 		msg = "Optimal solution *NOT* found";
@@ -205,6 +230,33 @@ ScipBackend::solve(Solution& x, std::string& msg) {
 	return true;
 }
 
+void
+ScipBackend::addInitialSolution() {
+
+	bool partial = (_initialSolution.size() < _numVariables);
+	for (double value : _initialSolution)
+		if (std::isnan(value))
+			partial = true;
+
+	// partial solutions will be completed by SCIP
+	SCIP_SOL* sol;
+	if (partial)
+		SCIP_CALL_ABORT(SCIPcreatePartialSol(_scip, &sol, NULL));
+	else
+		SCIP_CALL_ABORT(SCIPcreateOrigSol(_scip, &sol, NULL));
+
+	for (unsigned int i = 0; i < _initialSolution.size() && i < _numVariables; i++)
+		if (!std::isnan(_initialSolution[i]))
+			SCIP_CALL_ABORT(SCIPsetSolVal(_scip, sol, _variables[i], _initialSolution[i]));
+
+	SCIP_Bool stored;
+	SCIP_CALL_ABORT(SCIPaddSolFree(_scip, &sol, &stored));
+
+	LOG_DEBUG(sciplog)
+			<< "initial " << (partial ? "partial " : "") << "solution "
+			<< (stored ? "stored" : "rejected") << std::endl;
+}
+
 void
 ScipBackend::setVerbose(bool verbose) {
 
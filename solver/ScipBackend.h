@@ -55,6 +55,10 @@ public:
 
 	void addConstraint(const LinearConstraint& constraint);
 
+	void setInitialSolution(const Solution& solution);
+
+	double getTimeToFirstIncumbent() { return _timeToFirstIncumbent; }
+
 	bool solve(Solution& solution, std::string& message);
 
 private:
@@ -72,6 +76,8 @@ private:
 
 	void freeConstraints();
 
+	void addInitialSolution();
+
 	SCIP_VARTYPE scipVarType(VariableType type, double& lb, double& ub);
 
 	// size of a and x
@@ -82,6 +88,12 @@ private:
 	std::vector<SCIP_VAR*> _variables;
 
 	std::vector<SCIP_CONS*> _constraints;
+
+	// the MIP start to be used by the next call to solve()
+	std::vector<double> _initialSolution;
+
+	// the time until the first incumbent was found in the last solve
+	double _timeToFirstIncumbent;
 };
 
 #endif // HAVE_SCIP